@@ -1,3 +1,5 @@
+import re
+
 from admin_auto_filters.filters import AutocompleteFilter
 from django.contrib import admin
 from .models import CountyModel, RegionModel, OfferModel, Referrals, SmsCode, UserDevice
@@ -29,10 +31,17 @@ class CustomUserAdmin(BaseUserAdmin):
     model = UserModel
     list_display = ('id', 'phone','role','language','theme_mode','is_staff','is_active')
     list_filter = ('role','language','theme_mode','is_staff','is_active')
-    search_fields = ('phone','email','id')
+    search_fields = ('phone','first_name','last_name','email','id')
     ordering = ('phone',)
     filter_horizontal = ['favorite_medicine',]
 
+    def get_search_results(self, request, queryset, search_term):
+        # Raqamli qidiruv (autocomplete ham) phone bo'yicha prefix - varchar_pattern_ops index;
+        # ism/email icontains - pg_trgm GIN index lar (account 0010 migration)
+        if re.fullmatch(r'\+?[0-9 ]+', search_term.strip()):
+            return queryset.filter(phone__startswith=search_term.replace(' ', '').lstrip('+')), False
+        return super().get_search_results(request, queryset, search_term)
+
     fieldsets = (
         (None, {'fields': ('phone','email','avatar','language','theme_mode','favorite_medicine', 'is_approved')}),
         ('Permissions', {'fields': ('is_staff','is_active','is_superuser')}),
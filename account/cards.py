@@ -0,0 +1,129 @@
+"""
+User card - chat/call/stream payloadlaridagi va REST dagi mini user ma'lumoti
+
+Bitta values_list query (user + client_profile + doctor), natija cache da
+(user_card:<id>). Profil/user o'zgarganda signal orqali invalidate bo'ladi.
+
+REST serializerlar (UserCardSerializer) user ni IdentityLoader dan oladi va
+shu build_card() bilan render qiladi - ism/avatar qoidasi bitta joyda.
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from rest_framework import serializers
+
+from .identity import IdentityListSerializer, IdentityMixin, get_profile
+from .models import UserModel
+
+logger = logging.getLogger(__name__)
+
+CARD_COLUMNS = (
+    'id', 'phone', 'role', 'avatar',
+    'client_profile__full_name', 'client_profile__gender',
+    'doctor__full_name', 'doctor__gender',
+)
+
+
+def card_key(user_id):
+    return f'user_card:{user_id}'
+
+
+def media_url(name):
+    """Storage nomi -> absolute URL (REST va WS da bir xil)"""
+    if not name:
+        return None
+    return f"{settings.SITE_URL}{default_storage.url(name)}"
+
+
+def build_card(row):
+    user_id, phone, role, avatar, client_name, client_gender, doctor_name, doctor_gender = row
+
+    # Priority: client_profile.full_name -> doctor.full_name -> phone
+    full_name = (client_name or '').strip() or (doctor_name or '').strip() or phone or 'User'
+
+    return {
+        'id': user_id,
+        'phone': phone,
+        'full_name': full_name,
+        # Eski clientlar uchun: key first_name, value full_name
+        'first_name': full_name,
+        'last_name': '',
+        'role': role,
+        'gender': client_gender if client_name is not None else doctor_gender,
+        'avatar': media_url(avatar),
+    }
+
+
+def card_row(user):
+    """Profillari yuklangan UserModel (IdentityLoader) -> CARD_COLUMNS qatori, query siz"""
+    client = get_profile(user, 'client_profile')
+    doctor = get_profile(user, 'doctor')
+    return (
+        user.id, user.phone, user.role, user.avatar.name if user.avatar else None,
+        client.full_name if client else None, client.gender if client else None,
+        doctor.full_name if doctor else None, doctor.gender if doctor else None,
+    )
+
+
+def user_cards(user_ids):
+    """{user_id: card} - cache dan, yo'qlari bitta query bilan"""
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if not user_ids:
+        return {}
+
+    timeout = getattr(settings, 'USER_CARD_CACHE_TIMEOUT', 300)
+    try:
+        cached = cache.get_many([card_key(user_id) for user_id in user_ids])
+    except Exception as e:
+        logger.warning(f"User card cache unavailable: {e}")
+        cached = {}
+
+    cards = {card['id']: card for card in cached.values()}
+    missing = user_ids - cards.keys()
+
+    if missing:
+        fresh = {
+            row[0]: build_card(row)
+            for row in UserModel.objects.filter(id__in=missing).values_list(*CARD_COLUMNS)
+        }
+        cards.update(fresh)
+        try:
+            cache.set_many({card_key(user_id): card for user_id, card in fresh.items()}, timeout)
+        except Exception as e:
+            logger.warning(f"User card cache unavailable: {e}")
+
+    return cards
+
+
+def user_card(user_id):
+    return user_cards([user_id]).get(user_id)
+
+
+def invalidate_user_card(user_id):
+    try:
+        cache.delete(card_key(user_id))
+    except Exception as e:
+        logger.warning(f"User card cache unavailable: {e}")
+
+
+class UserCardSerializer(IdentityMixin, serializers.ModelSerializer):
+    """
+    Mini user - chat/call payload idagi user card bilan bir xil
+
+    Meta.fields - card key laridan tanlov. Profillar select_related
+    qilinmagan bo'lsa IdentityLoader bitta query da oladi.
+    """
+    first_name = serializers.CharField(read_only=True)
+    last_name = serializers.CharField(read_only=True)
+    avatar = serializers.CharField(read_only=True, allow_null=True)
+
+    class Meta:
+        model = UserModel
+        list_serializer_class = IdentityListSerializer
+        fields = ['id', 'phone', 'first_name', 'last_name', 'avatar', 'role']
+
+    def to_representation(self, instance):
+        card = build_card(card_row(self.identity(instance)))
+        return {field: card[field] for field in self.Meta.fields}
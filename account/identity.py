@@ -0,0 +1,117 @@
+"""
+Request-scoped identity loader (DataLoader uslubida)
+
+Serializerlar sahifadagi doctor/client user id larini yig'adi (prime),
+birinchi load() da hammasi bitta query bilan resolve bo'ladi:
+user + doctor (+ type_doctor) + client_profile JOIN.
+
+Loader request ga (request yo'q bo'lsa serializer context ga) bog'lanadi -
+consultation, chat va call serializerlar bitta loader ni bo'lishadi.
+"""
+from django.db import models
+from rest_framework import serializers
+
+from .models import UserModel
+
+PROFILE_RELATIONS = ('doctor', 'client_profile')
+
+
+class IdentityLoader:
+
+    def __init__(self):
+        self.users = {}
+        self.pending = set()
+        self.queries = 0
+
+    def add(self, user):
+        """Profillari allaqachon select_related/prefetch qilingan user ni qabul qilish"""
+        if user.id in self.users:
+            return True
+        if all(relation in user._state.fields_cache for relation in PROFILE_RELATIONS):
+            self.users[user.id] = user
+            self.pending.discard(user.id)
+            return True
+        return False
+
+    def prime(self, users):
+        """id yoki UserModel lar - keyingi load() da bitta query bilan olinadi"""
+        for user in users:
+            if isinstance(user, UserModel):
+                if self.add(user):
+                    continue
+                user = user.id
+            if user is not None and user not in self.users:
+                self.pending.add(user)
+
+    def load(self, user):
+        """id yoki UserModel -> profillari bilan UserModel (topilmasa None)"""
+        if isinstance(user, UserModel):
+            if self.add(user):
+                return self.users[user.id]
+            user = user.id
+        if user is None:
+            return None
+
+        if user not in self.users:
+            self.pending.add(user)
+            self._resolve()
+        return self.users[user]
+
+    def _resolve(self):
+        ids, self.pending = self.pending, set()
+        self.queries += 1
+
+        users = UserModel.objects.filter(id__in=ids).select_related('doctor__type_doctor', 'client_profile')
+        for user in users:
+            self.users[user.id] = user
+        for user_id in ids:
+            self.users.setdefault(user_id, None)
+
+
+def identity_loader(context):
+    request = context.get('request')
+    holder = request if request is not None else context
+
+    if isinstance(holder, dict):
+        return holder.setdefault('identity_loader', IdentityLoader())
+
+    loader = getattr(holder, 'identity_loader', None)
+    if loader is None:
+        loader = IdentityLoader()
+        holder.identity_loader = loader
+    return loader
+
+
+def get_profile(user, relation):
+    """user.doctor / user.client_profile - yo'q bo'lsa None (query yo'q, cache dan)"""
+    if user is None:
+        return None
+    try:
+        return getattr(user, relation)
+    except models.ObjectDoesNotExist:
+        return None
+
+
+class IdentityListSerializer(serializers.ListSerializer):
+    """many=True da butun sahifaning identity_fields larini oldindan prime qilish"""
+
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, models.Manager) else data)
+
+        loader = identity_loader(self.context)
+        loader.prime(item for item in items if isinstance(item, UserModel))
+        for field in self.child.identity_fields:
+            loader.prime(getattr(item, field) for item in items)
+
+        return super().to_representation(items)
+
+
+class IdentityMixin:
+    """
+    identity_fields: prime qilinadigan user FK attributlari ('doctor_id', 'client_id').
+    UserModel listlari o'zi prime bo'ladi. Meta.list_serializer_class = IdentityListSerializer
+    """
+    identity_fields = ()
+
+    def identity(self, user):
+        return identity_loader(self.context).load(user)
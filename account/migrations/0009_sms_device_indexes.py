@@ -0,0 +1,41 @@
+# Generated by Django 4.0.2 on 2026-10-19 16:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0008_userdevice_userdevice_user_device_user_id_14e9e9_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='smscode',
+            name='account_sms_phone_90ddc7_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='smscode',
+            name='account_sms_expire__caed62_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='userdevice',
+            name='user_device_user_id_14e9e9_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='userdevice',
+            name='user_device_fcm_tok_657184_idx',
+        ),
+        migrations.AddIndex(
+            model_name='smscode',
+            index=models.Index(condition=models.Q(('confirmed', False)), fields=['phone', 'purpose', 'expire_at'], name='sms_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='smscode',
+            index=models.Index(condition=models.Q(('confirmed', True)), fields=['phone', 'expire_at'], name='sms_confirmed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userdevice',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['user'], name='device_active_user_idx'),
+        ),
+    ]
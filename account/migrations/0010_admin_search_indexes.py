@@ -0,0 +1,55 @@
+from django.db import migrations
+
+# Admin UserModel qidiruvi (CustomUserAdmin.get_search_results) - faqat PostgreSQL:
+# - phone__startswith -> "phone"::text LIKE '998..%' - varchar_pattern_ops
+# - ism/email icontains -> UPPER("col"::text) LIKE UPPER('%..%') - pg_trgm GIN
+#   (index ifodasi Django SQL i bilan bir xil bo'lishi kerak)
+TABLE = 'account_usermodel'
+PHONE_INDEX = 'user_phone_pattern_idx'
+TRIGRAM_INDEXES = {
+    'user_first_name_trgm_idx': 'first_name',
+    'user_last_name_trgm_idx': 'last_name',
+    'user_email_trgm_idx': 'email',
+}
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        # unique CharField uchun Django o'zi "_like" pattern_ops index yaratadi - ikkinchisi kerak emas
+        cursor.execute(
+            "SELECT 1 FROM pg_indexes WHERE tablename = %s AND indexdef LIKE %s",
+            [TABLE, '%(phone varchar_pattern_ops)%'],
+        )
+        if cursor.fetchone() is None:
+            schema_editor.execute(
+                f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {PHONE_INDEX} ON {TABLE} (phone varchar_pattern_ops)'
+            )
+
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, column in TRIGRAM_INDEXES.items():
+        schema_editor.execute(
+            f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {TABLE} '
+            f'USING gin ((UPPER({column}::text)) gin_trgm_ops)'
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in [PHONE_INDEX, *TRIGRAM_INDEXES]:
+        schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY tranzaksiya ichida ishlamaydi (jadval lock lanmaydi)
+    atomic = False
+
+    dependencies = [
+        ('account', '0009_sms_device_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -103,8 +103,8 @@ class UserDevice(models.Model):
         db_table = 'user_devices'
         unique_together = ['user', 'device_id']
         indexes = [
-            models.Index(fields=['user', 'is_active']),
-            models.Index(fields=['fcm_token']),
+            # Push: faqat aktiv device lar (fcm_token unique - alohida index kerak emas)
+            models.Index(fields=['user'], condition=models.Q(is_active=True), name='device_active_user_idx'),
         ]
 
     def __str__(self):
@@ -137,10 +137,13 @@ class SmsCode(models.Model):
 
 
     class Meta:
-        index_together = []
         indexes = [
-            models.Index(fields=['phone']),
-            models.Index(fields=['expire_at']),
+            # Kodni tekshirish / eski kodlarni o'chirish (phone, purpose, confirmed=False, expire_at >= now)
+            models.Index(fields=['phone', 'purpose', 'expire_at'], condition=models.Q(confirmed=False),
+                         name='sms_pending_idx'),
+            # Ro'yxatdan o'tish: tasdiqlangan va muddati o'tmagan kod
+            models.Index(fields=['phone', 'expire_at'], condition=models.Q(confirmed=True),
+                         name='sms_confirmed_idx'),
         ]
 
     def __str__(self):
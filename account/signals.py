@@ -0,0 +1,19 @@
+from django.db.models.signals import post_delete, post_save
+
+from .cards import invalidate_user_card
+from .models import UserModel
+
+
+def _user_changed(sender, instance, **kwargs):
+    invalidate_user_card(instance.pk)
+
+
+def _profile_changed(sender, instance, **kwargs):
+    invalidate_user_card(instance.user_id)
+
+
+# User card (account.cards) - ism/avatar/rol o'zgarganda cache dan chiqarish
+for signal in (post_save, post_delete):
+    signal.connect(_user_changed, sender=UserModel, dispatch_uid=f'user_card_user_{signal is post_save}')
+    for label in ('client.ClientProfile', 'specialist.Doctor'):
+        signal.connect(_profile_changed, sender=label, dispatch_uid=f'user_card_{label}_{signal is post_save}')
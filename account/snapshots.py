@@ -0,0 +1,21 @@
+"""Ilova ochilganda so'raladigan ma'lumot (config/snapshots.py)"""
+from config.snapshots import Snapshot
+
+from .models import CountyModel, RegionModel
+from .serializers import CountrySerializer, RegionSerializer
+
+
+def build_countries():
+    return CountrySerializer(CountyModel.objects.order_by('order_number', 'id'), many=True).data
+
+
+def build_regions():
+    """{country_id: [region, ...]} - RegionView ?pk= bo'yicha"""
+    regions = {}
+    for region in RegionSerializer(RegionModel.objects.order_by('id'), many=True).data:
+        regions.setdefault(region['country'], []).append(region)
+    return regions
+
+
+countries = Snapshot('countries', build_countries, depends_on=[CountyModel])
+regions = Snapshot('regions', build_regions, depends_on=[RegionModel])
@@ -12,10 +12,12 @@ from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
 from config.helpers import send_sms_code
 from config.responses import ResponseFail, ResponseSuccess
+from config.snapshots import not_modified, with_etag
 from config.validators import normalize_phone
-from .models import UserModel, CountyModel, RegionModel, SmsCode, UserDevice
+from . import snapshots
+from .models import UserModel, SmsCode, UserDevice
 from .serializers import (SmsSerializer, ConfirmSmsSerializer,
-                          RegionSerializer, CountrySerializer, UserSerializer,
+                          CountrySerializer, UserSerializer,
                           OfferSerializer, ChangePasswordSerializer, ReferalUserSerializer, UserAvatarSerializer,
                           PhoneCheckSerializer, ResetPasswordSerializer, LogoutSerializer, DeleteAccountSerializer,
                           UserDeviceSerializer,
@@ -281,9 +283,12 @@ class RegionView(APIView):
     def get(self, request):
         key = request.GET.get('pk', False)
         if key:
-            reg = RegionModel.objects.filter(country_id=key)
-            serializer = RegionSerializer(reg, many=True)
-            return ResponseSuccess(data=serializer.data, request=request.method)
+            snapshot = snapshots.regions.get()
+            response = not_modified(request, snapshot)
+            if response is not None:
+                return response
+            regions = snapshot['data'].get(int(key), []) if key.isdigit() else []
+            return with_etag(ResponseSuccess(data=regions, request=request.method), snapshot)
         else:
             return ResponseFail(data='country_id is not send ')
 
@@ -299,9 +304,11 @@ class CountryView(APIView):
         },
     )
     def get(self, request):
-        coun = CountyModel.objects.all().order_by('order_number')
-        serializer = CountrySerializer(coun, many=True)
-        return ResponseSuccess(data=serializer.data, request=request.method)
+        snapshot = snapshots.countries.get()
+        response = not_modified(request, snapshot)
+        if response is not None:
+            return response
+        return with_etag(ResponseSuccess(data=snapshot['data'], request=request.method), snapshot)
 
 
 class OfferView(APIView):
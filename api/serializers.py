@@ -254,3 +254,4 @@ class NotificationAdminSerializer(serializers.ModelSerializer):
     class Meta:
         model = Notification
         fields = '__all__'
+        read_only_fields = ('status', 'last_device_id', 'success_count', 'failure_count', 'progress_at', 'sent_at')
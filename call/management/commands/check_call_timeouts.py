@@ -8,6 +8,7 @@ from asgiref.sync import async_to_sync
 import logging
 
 from call.service import livekit_service
+from config.fastjson import frame_event
 
 logger = logging.getLogger('call')
 
@@ -59,11 +60,11 @@ class Command(BaseCommand):
 
                     async_to_sync(channel_layer.group_send)(
                         room_group_name,
-                        {
+                        frame_event({
                             'type': 'call_missed',
                             'call_id': call.id,
                             'reason': 'timeout'
-                        }
+                        })
                     )
                 except Exception as ws_error:
                     logger.warning(f"WebSocket notification failed: {ws_error}")
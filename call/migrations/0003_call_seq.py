@@ -0,0 +1,22 @@
+# Generated by Django 4.0.2 on 2026-10-19 16:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('call', '0002_alter_callevent_event_type'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='call',
+            name='seq',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='call',
+            index=models.Index(fields=['room', 'seq'], name='call_call_room_id_81467f_idx'),
+        ),
+    ]
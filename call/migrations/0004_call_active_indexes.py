@@ -0,0 +1,21 @@
+# Generated by Django 4.0.2 on 2026-10-19 16:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('call', '0003_call_seq'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='call',
+            index=models.Index(condition=models.Q(('status__in', ['initiated', 'ringing', 'answered'])), fields=['caller'], name='call_active_caller_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='call',
+            index=models.Index(condition=models.Q(('status__in', ['initiated', 'ringing', 'answered'])), fields=['receiver'], name='call_active_receiver_idx'),
+        ),
+    ]
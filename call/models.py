@@ -1,7 +1,10 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.utils import timezone
-from chat.models import ChatRoom
+from chat.models import ChatRoom, RoomSequence
+
+
+ACTIVE_STATUSES = ['initiated', 'ringing', 'answered']
 
 
 class Call(models.Model):
@@ -68,6 +71,9 @@ class Call(models.Model):
     # Business metrics
     cost = models.DecimalField(max_digits=10, decimal_places=2, default=0)  # future billing
 
+    # Chat delta sync (chat.models.RoomSequence)
+    seq = models.BigIntegerField(default=0)
+
     class Meta:
         ordering = ['-created_at']
         indexes = [
@@ -76,8 +82,22 @@ class Call(models.Model):
             models.Index(fields=['status', '-created_at']),
             models.Index(fields=['livekit_room_name']),
             models.Index(fields=['call_type', '-created_at']),
+            models.Index(fields=['room', 'seq']),
+            # Busy check: Q(caller=X) | Q(receiver=X), status aktiv - faqat aktiv call lar indekslanadi
+            models.Index(fields=['caller'], condition=models.Q(status__in=ACTIVE_STATUSES),
+                         name='call_active_caller_idx'),
+            models.Index(fields=['receiver'], condition=models.Q(status__in=ACTIVE_STATUSES),
+                         name='call_active_receiver_idx'),
         ]
 
+    def save(self, *args, **kwargs):
+        # Har bir status o'zgarishi chat history da ko'rinadi - room seq ni oshiramiz
+        with transaction.atomic():
+            self.seq = RoomSequence.next(self.room_id)
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'seq'}
+            super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.call_type.title()} Call: {self.caller} → {self.receiver} [{self.status}]"
 
@@ -107,7 +127,7 @@ class Call(models.Model):
     @property
     def is_active(self):
         """Call active ekanligini tekshirish"""
-        return self.status in ['initiated', 'ringing', 'answered']
+        return self.status in ACTIVE_STATUSES
 
     @property
     def formatted_duration(self):
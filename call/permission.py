@@ -49,10 +49,10 @@ class CanInitiateCall(permissions.BasePermission):
             return True
 
         # Check concurrent calls
-        from .models import Call
+        from .models import ACTIVE_STATUSES, Call
         active_calls = Call.objects.filter(
             caller=request.user,
-            status__in=['initiated', 'ringing', 'answered']
+            status__in=ACTIVE_STATUSES
         ).count()
 
         from django.conf import settings
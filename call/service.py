@@ -7,6 +7,8 @@ from datetime import timedelta
 import logging
 import requests
 
+from config.metrics import outbound
+
 logger = logging.getLogger(__name__)
 
 
@@ -86,7 +88,8 @@ class LiveKitService:
                 "max_participants": max_participants
             }
 
-            response = requests.post(url, json=data, headers=headers, timeout=10)
+            with outbound('livekit'):
+                response = requests.post(url, json=data, headers=headers, timeout=10)
 
             if response.status_code == 200:
                 logger.info(f"Created LiveKit room: {room_name}")
@@ -120,7 +123,8 @@ class LiveKitService:
 
             data = {"room": room_name}
 
-            response = requests.post(url, json=data, headers=headers, timeout=10)
+            with outbound('livekit'):
+                response = requests.post(url, json=data, headers=headers, timeout=10)
 
             if response.status_code == 200:
                 logger.info(f"Deleted LiveKit room: {room_name}")
@@ -149,7 +153,8 @@ class LiveKitService:
                 "Content-Type": "application/json"
             }
 
-            response = requests.post(url, json={}, headers=headers, timeout=10)
+            with outbound('livekit'):
+                response = requests.post(url, json={}, headers=headers, timeout=10)
 
             if response.status_code == 200:
                 data = response.json()
@@ -175,7 +180,8 @@ class LiveKitService:
 
             data = {"room": room_name}
 
-            response = requests.post(url, json=data, headers=headers, timeout=10)
+            with outbound('livekit'):
+                response = requests.post(url, json=data, headers=headers, timeout=10)
 
             if response.status_code == 200:
                 return response.json().get('participants', [])
@@ -201,7 +207,8 @@ class LiveKitService:
                 "identity": participant_identity
             }
 
-            response = requests.post(url, json=data, headers=headers, timeout=10)
+            with outbound('livekit'):
+                response = requests.post(url, json=data, headers=headers, timeout=10)
 
             if response.status_code == 200:
                 logger.info(f"Removed {participant_identity} from {room_name}")
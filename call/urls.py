@@ -1,11 +1,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import CallViewSet
+from .views import AsyncActiveCallsView, CallViewSet
 
 router = DefaultRouter()
 router.register(r'calls', CallViewSet, basename='call')
 
 urlpatterns = [
+    path('calls/active/', AsyncActiveCallsView.as_view()),
     path('', include(router.urls)),
 ]
 
@@ -7,8 +7,10 @@ from django.db.models import Q
 import uuid
 import logging
 
+from account.cards import user_card
+from config.aio import AsyncReadView, run_sync
 from utils.fcm import send_fcm
-from .models import Call, CallEvent
+from .models import ACTIVE_STATUSES, Call, CallEvent
 from .serializers import (
     CallSerializer, CallListSerializer,
     CallInitiateSerializer
@@ -23,31 +25,10 @@ def get_user_full_name(user):
     """
     User ning to'liq ismini olish (helper function)
 
-    Priority:
-    - Client: client_profile.full_name
-    - Doctor: doctor.full_name
-    - Fallback: phone
+    Priority: client_profile.full_name -> doctor.full_name -> phone
+    (account.cards - cache dagi user card, profil query siz)
     """
-    # Client
-    if hasattr(user, 'client_profile'):
-        try:
-            full_name = (user.client_profile.full_name or '').strip()
-            if full_name:
-                return full_name
-        except:
-            pass
-
-    # Doctor
-    if hasattr(user, 'doctor'):
-        try:
-            full_name = (user.doctor.full_name or '').strip()
-            if full_name:
-                return full_name
-        except:
-            pass
-
-    # Fallback
-    return user.phone or ''
+    return user_card(user.id)['full_name']
 
 
 class CallPagination(PageNumberPagination):
@@ -147,7 +128,7 @@ class CallViewSet(viewsets.ModelViewSet):
             # Check if caller is busy
             caller_busy = Call.objects.filter(
                 Q(caller=caller) | Q(receiver=caller),
-                status__in=['initiated', 'ringing', 'answered']
+                status__in=ACTIVE_STATUSES
             ).exists()
 
             if caller_busy:
@@ -163,7 +144,7 @@ class CallViewSet(viewsets.ModelViewSet):
             # Check if receiver is busy
             receiver_busy = Call.objects.filter(
                 Q(caller=receiver) | Q(receiver=receiver),
-                status__in=['initiated', 'ringing', 'answered']
+                status__in=ACTIVE_STATUSES
             ).exists()
 
             if receiver_busy:
@@ -597,8 +578,22 @@ class CallViewSet(viewsets.ModelViewSet):
             ]
         """
         active_calls = self.get_queryset().filter(
-            status__in=['initiated', 'ringing', 'answered']
+            status__in=ACTIVE_STATUSES
         )
 
         serializer = CallListSerializer(active_calls, many=True, context={'request': request})
-        return Response(serializer.data)
\ No newline at end of file
+        return Response(serializer.data)
+
+
+class AsyncActiveCallsView(AsyncReadView):
+    """
+    CallViewSet.active ning async varianti (GET /api/call/calls/active/)
+
+    Client lar tez-tez poll qiladi - cache yo'q, javob doim yangi.
+    """
+    permission_classes = [IsAuthenticated]
+
+    async def data(self, request):
+        calls = CallViewSet(request=request).get_queryset().filter(status__in=ACTIVE_STATUSES)
+        # CallUserMiniSerializer profillarni IdentityLoader dan oladi - query bilan bitta hop
+        return await run_sync(lambda: CallListSerializer(calls, many=True, context={'request': request}).data)
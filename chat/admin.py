@@ -1,6 +1,7 @@
 from django.contrib import admin
 from admin_auto_filters.filters import AutocompleteFilter
 from .models import ChatRoom, Message, MessageAttachment
+from .services import delete_messages
 
 
 # Filters for admin
@@ -31,6 +32,10 @@ class MessageAdmin(admin.ModelAdmin):
     autocomplete_fields = ['room', 'sender']
     inlines = []  # Agar inline qilmoqchi bo'lsang MessageAttachment uchun
 
+    def delete_queryset(self, request, queryset):
+        # Bulk delete ham delta sync da ko'rinsin (MessageTombstone)
+        delete_messages(queryset)
+
 
 # ChatRoom Admin
 class ChatRoomAdmin(admin.ModelAdmin):
@@ -1,5 +1,5 @@
 from urllib.parse import parse_qs
-from channels.db import database_sync_to_async
+from config.serving import database_sync_to_async
 from django.contrib.auth.models import AnonymousUser
 
 
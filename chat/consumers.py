@@ -1,14 +1,25 @@
-import json
+import asyncio
+from urllib.parse import parse_qs
+
 from channels.generic.websocket import AsyncWebsocketConsumer
-from channels.db import database_sync_to_async
-from django.utils import timezone
+from config.serving import database_sync_to_async
 from django.conf import settings
 
+from config import archive
+
+from account.cards import user_card
+from config.fastjson import FrameConsumerMixin, loads
+from config.metrics import InstrumentedConsumerMixin
 from utils.fcm import send_fcm
-from .models import ChatRoom, Message
+from .models import ChatRoom, Message, MessageTombstone, RoomSequence
+from .payloads import archived_items, chat_message_event, delta_items, history_items, message_payload
+from .services import mark_messages_read, read_receipt_event
+
 
+class ChatConsumer(InstrumentedConsumerMixin, FrameConsumerMixin, AsyncWebsocketConsumer):
+    # Read receiptlar shu oyna ichida bitta UPDATE + broadcast ga yig'iladi (sekund)
+    READ_RECEIPT_FLUSH_DELAY = 0.5
 
-class ChatConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         self.room_id = self.scope['url_route']['kwargs']['room_id']
         self.room_group_name = f'chat_{self.room_id}'
@@ -17,6 +28,10 @@ class ChatConsumer(AsyncWebsocketConsumer):
         # User ID saqlab qo'yish (disconnect uchun)
         self.user_id = None
 
+        # Coalesced read receipt holati
+        self.pending_read_up_to = None
+        self.read_flush_task = None
+
         # Anonymous user reject
         if self.user.is_anonymous:
             await self.close(code=4001)
@@ -39,8 +54,13 @@ class ChatConsumer(AsyncWebsocketConsumer):
 
         await self.accept()
 
+        # Reconnect: ?sync_since=<seq> bo'lsa faqat delta, aks holda
         # COMBINED CHAT + CALL HISTORY YUBORISH
-        await self.send_combined_history()
+        since = self.get_sync_since()
+        if since:
+            await self.send_sync(since)
+        else:
+            await self.send_combined_history()
 
         # User online status
         await self.channel_layer.group_send(
@@ -54,6 +74,11 @@ class ChatConsumer(AsyncWebsocketConsumer):
 
     async def disconnect(self, close_code):
         if hasattr(self, 'room_group_name') and hasattr(self, 'user_id') and self.user_id:
+            # Kutilayotgan read receiptlarni yo'qotmaslik
+            if self.read_flush_task:
+                self.read_flush_task.cancel()
+            await self.flush_read_receipts()
+
             # User offline status
             await self.channel_layer.group_send(
                 self.room_group_name,
@@ -71,7 +96,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
             )
 
     async def receive(self, text_data):
-        data = json.loads(text_data)
+        data = loads(text_data)
         message_type = data.get('type')
 
         if message_type == 'chat_message':
@@ -82,6 +107,8 @@ class ChatConsumer(AsyncWebsocketConsumer):
             await self.handle_read_receipt(data)
         elif message_type == 'load_more':
             await self.handle_load_more(data)
+        elif message_type == 'sync':
+            await self.handle_sync(data)
 
     async def handle_chat_message(self, data):
         """Handle incoming chat message"""
@@ -91,16 +118,13 @@ class ChatConsumer(AsyncWebsocketConsumer):
         message = await self.save_message(text)
 
         if message:
-            # Serialize message
+            # Bitta payload, frame lar oldindan encode qilingan (chat.payloads)
             message_data = await self.serialize_message(message)
 
             # Broadcast to room
             await self.channel_layer.group_send(
                 self.room_group_name,
-                {
-                    'type': 'chat_message_handler',
-                    'message': message_data
-                }
+                chat_message_event(message_data)
             )
 
             # Send FCM to other user
@@ -128,8 +152,9 @@ class ChatConsumer(AsyncWebsocketConsumer):
     @database_sync_to_async
     def _send_fcm(self, user, message):
         """Send FCM notification"""
-        # Get sender display name
-        sender_name = self._get_user_full_name(self.user)
+        # Get sender display name (cache dagi user card)
+        sender = user_card(self.user.id)
+        sender_name = sender['full_name']
 
         send_fcm(
             user=user,
@@ -140,7 +165,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
             message_id=message.id,
             sender_id=self.user.id,
             sender_name=sender_name,
-            sender_avatar=self.user.avatar.url if self.user.avatar else '',
+            sender_avatar=sender['avatar'] or '',
         )
 
     async def handle_typing(self, data):
@@ -157,35 +182,105 @@ class ChatConsumer(AsyncWebsocketConsumer):
         )
 
     async def handle_read_receipt(self, data):
-        """Xabar o'qilganini belgilash"""
-        message_id = data.get('message_id')
+        """
+        Xabar o'qilganini belgilash
+
+        Client: {"type": "read_receipt", "up_to_message_id": X}
+        (eski clientlar: "message_id"). Backlog scroll qilinganda
+        kelgan receiptlar READ_RECEIPT_FLUSH_DELAY ichida eng katta id
+        ga yig'iladi va bitta ranged UPDATE + bitta broadcast bo'ladi.
+        """
+        up_to_id = data.get('up_to_message_id') or data.get('message_id')
+
+        try:
+            up_to_id = int(up_to_id)
+        except (TypeError, ValueError):
+            return
+
+        self.pending_read_up_to = max(self.pending_read_up_to or 0, up_to_id)
+
+        if self.read_flush_task is None:
+            self.read_flush_task = asyncio.ensure_future(self._flush_read_receipts_later())
+
+    async def _flush_read_receipts_later(self):
+        await asyncio.sleep(self.READ_RECEIPT_FLUSH_DELAY)
+        await self.flush_read_receipts()
+
+    async def flush_read_receipts(self):
+        """Yig'ilgan read receiptni DB ga yozish va broadcast qilish"""
+        self.read_flush_task = None
+        up_to_id, self.pending_read_up_to = self.pending_read_up_to, None
+
+        if not up_to_id:
+            return
 
-        if message_id:
-            await self.mark_message_read(message_id)
+        marked = await self.mark_read_up_to(up_to_id)
 
+        if marked:
             await self.channel_layer.group_send(
                 self.room_group_name,
-                {
-                    'type': 'read_receipt_handler',
-                    'message_id': message_id,
-                    'user_id': self.user.id
-                }
+                read_receipt_event(self.user_id, up_to_id, marked)
             )
 
     #  Combined history (messages + calls)
-    async def send_combined_history(self):
+    async def send_combined_history(self, reset=False):
         """
         Chat history + Call history ni aralash yuborish
         Telegram kabi - hammasi bitta listda
+
+        seq - client shu qiymatni saqlab, reconnect da sync_since qilib yuboradi.
+        reset=True - delta juda katta edi, client local cache ni almashtiradi.
         """
-        items = await self.get_combined_history(limit=50)
+        seq, items = await self.get_combined_history(limit=50)
         has_more = await self.has_more_history()
 
-        await self.send(text_data=json.dumps({
+        await self.send_frame({
             'type': 'chat_history',
+            'seq': seq,
             'items': items,  # ← messages va calls aralash
-            'has_more': has_more
-        }))
+            'has_more': has_more,
+            'reset': reset,
+        })
+
+    def get_sync_since(self):
+        query = parse_qs(self.scope.get('query_string', b'').decode())
+        try:
+            return int(query.get('sync_since', [0])[0])
+        except ValueError:
+            return 0
+
+    async def handle_sync(self, data):
+        """Client: {"type": "sync", "since": <seq>} - connect dan keyin qayta sync"""
+        try:
+            since = int(data.get('since') or 0)
+        except (TypeError, ValueError):
+            since = 0
+
+        if since:
+            await self.send_sync(since)
+        else:
+            await self.send_combined_history(reset=True)
+
+    async def send_sync(self, since):
+        """
+        Delta sync: since dan keyingi yangi/o'zgargan/o'qilgan xabarlar va call lar
+
+        Client yangi bo'lsa items bo'sh - history qayta yuborilmaydi.
+        Xabar har bir o'zgarishda yangi seq oladi, shuning uchun item lar
+        id bo'yicha local cache ga upsert qilinadi.
+        """
+        seq, items = await self.get_delta(since)
+
+        if items is None:
+            await self.send_combined_history(reset=True)
+            return
+
+        await self.send_frame({
+            'type': 'chat_sync',
+            'since': since,
+            'seq': seq,
+            'items': items,
+        })
 
     async def handle_load_more(self, data):
         """Ko'proq history yuklash (messages + calls)"""
@@ -195,57 +290,59 @@ class ChatConsumer(AsyncWebsocketConsumer):
         items = await self.get_history_before(before_timestamp, limit)
         has_more = await self.has_history_before(before_timestamp, limit)
 
-        await self.send(text_data=json.dumps({
+        await self.send_frame({
             'type': 'load_more_response',
             'items': items,
             'has_more': has_more
-        }))
+        })
 
     # Event handlers
     async def chat_message_handler(self, event):
         """
         Handle chat message broadcast
-        Calculate is_mine for current user
+        is_mine qabul qiluvchiga qarab - ikkala frame oldindan encode qilingan
         """
-        message_data = event['message']
-
-        # Calculate is_mine for THIS user
-        sender_id = message_data.get('sender', {}).get('id')
-        current_user_id = self.user.id
+        frame = event['frame_mine'] if event['sender_id'] == self.user.id else event['frame_other']
+        await self.send_frame(frame)
 
-        # Override is_mine with correct value for this user
-        message_data['is_mine'] = (sender_id == current_user_id)
+    async def message_deleted_handler(self, event):
+        """Xabar o'chirildi (MessageViewSet.destroy) - tombstone delta sync da ham bor"""
+        await self.send_frame(event['frame'])
 
-        # Send to WebSocket
-        await self.send(text_data=json.dumps({
-            'type': 'chat_message',
-            'message': message_data
-        }))
+    async def attachment_ready_handler(self, event):
+        """Thumbnail/duration tayyor (chat.tasks.process_chat_attachment)"""
+        await self.send_frame({
+            'type': 'attachment_ready',
+            'message_id': event['message_id'],
+            'attachment': event['attachment'],
+        })
 
     async def typing_handler(self, event):
         # O'ziga typing yubormaslik
         if event['user_id'] != self.user.id:
-            await self.send(text_data=json.dumps({
+            await self.send_frame({
                 'type': 'typing',
                 'user_id': event['user_id'],
                 'is_typing': event['is_typing']
-            }))
+            })
 
     async def read_receipt_handler(self, event):
-        await self.send(text_data=json.dumps({
+        await self.send_frame({
             'type': 'read_receipt',
             'message_id': event['message_id'],
+            'up_to_message_id': event.get('up_to_message_id'),
+            'marked_count': event.get('marked_count'),
             'user_id': event['user_id']
-        }))
+        })
 
     async def user_status(self, event):
         # O'ziga status yubormaslik
         if event['user_id'] != self.user.id:
-            await self.send(text_data=json.dumps({
+            await self.send_frame({
                 'type': 'user_status',
                 'user_id': event['user_id'],
                 'status': event['status']
-            }))
+            })
 
     # Database operations
     @database_sync_to_async
@@ -282,184 +379,8 @@ class ChatConsumer(AsyncWebsocketConsumer):
 
     @database_sync_to_async
     def serialize_message(self, message):
-        """Message obyektini dict ga aylantirish (ABSOLUTE URLs)"""
-        return self._message_to_dict(message)
-
-    def _get_base_url(self):
-        """Base URL olish (settings dan yoki default)"""
-        # settings.py da SITE_URL mavjud bo'lsa
-        if hasattr(settings, 'SITE_URL'):
-            return settings.SITE_URL
-
-        # Yoki scope dan olish
-        headers = dict(self.scope.get('headers', []))
-        host = headers.get(b'host', b'localhost:8000').decode()
-
-        # Protocol aniqlash
-        is_secure = self.scope.get('scheme') == 'https'
-        protocol = 'https' if is_secure else 'http'
-
-        return f'{protocol}://{host}'
-
-    def _get_user_full_name(self, user):
-        """
-        User ning to'liq ismini olish
-
-        Priority:
-        - Client: client_profile.full_name
-        - Doctor: doctor.full_name
-        - Fallback: phone
-        """
-        # Client
-        if hasattr(user, 'client_profile'):
-            try:
-                full_name = (user.client_profile.full_name or '').strip()
-                if full_name:
-                    return full_name
-            except:
-                pass
-
-        # Doctor
-        if hasattr(user, 'doctor'):
-            try:
-                full_name = (user.doctor.full_name or '').strip()
-                if full_name:
-                    return full_name
-            except:
-                pass
-
-        # Fallback
-        return user.phone or 'User'
-
-    def _message_to_dict(self, message):
-        """
-        Message obyektini dict ga aylantirish
-        ABSOLUTE URLs bilan
-        """
-        base_url = self._get_base_url()
-
-        # Sender full_name olish
-        sender_full_name = self._get_user_full_name(message.sender)
-
-        data = {
-            'id': message.id,
-            'item_type': 'message',
-            'room': message.room.id,
-            'sender': {
-                'id': message.sender.id,
-                'phone': message.sender.phone,
-                'full_name': sender_full_name,  # full_name
-                'role': message.sender.role,
-            },
-            'message_type': message.message_type,
-            'text': message.text,
-            'is_read': message.is_read,
-            'read_at': message.read_at.isoformat() if message.read_at else None,
-            'created_at': message.created_at.isoformat(),
-            'updated_at': message.updated_at.isoformat(),
-            'timestamp': message.created_at.timestamp(),
-            'is_mine': message.sender.id == self.user.id,
-            'attachments': [],
-            'reply_to': None
-        }
-
-        # Attachments with ABSOLUTE URLs
-        for att in message.attachments.all():
-            file_url = None
-            thumbnail_url = None
-
-            if att.file:
-                file_url = f"{base_url}{att.file.url}"
-
-            if att.thumbnail:
-                thumbnail_url = f"{base_url}{att.thumbnail.url}"
-
-            data['attachments'].append({
-                'id': att.id,
-                'file_type': att.file_type,
-                'file_name': att.file_name,
-                'size': att.size,
-                'duration': att.duration,
-                'file_url': file_url,
-                'thumbnail_url': thumbnail_url,
-            })
-
-        # Reply to
-        if message.reply_to:
-            # Reply sender full_name
-            reply_sender_full_name = self._get_user_full_name(message.reply_to.sender)
-
-            data['reply_to'] = {
-                'id': message.reply_to.id,
-                'sender': {
-                    'id': message.reply_to.sender.id,
-                    'phone': message.reply_to.sender.phone,
-                    'full_name': reply_sender_full_name,  # full_name
-                },
-                'text': message.reply_to.text[:100] if message.reply_to.text else '',
-                'message_type': message.reply_to.message_type,
-            }
-
-        return data
-
-    def get_user_display_info(self, user):
-        """
-        User uchun display ma'lumotlar:
-        ClientProfile yoki Doctor modelidan full_name oladi
-        """
-        full_name = ''
-        gender = None
-
-        # Client
-        if hasattr(user, 'client_profile'):
-            try:
-                full_name = (user.client_profile.full_name or '').strip()
-                gender = user.client_profile.gender
-            except:
-                pass
-
-        # Doctor
-        elif hasattr(user, 'doctor'):
-            try:
-                full_name = (user.doctor.full_name or '').strip()
-                gender = user.doctor.gender
-            except:
-                pass
-
-        # Fallback
-        if not full_name:
-            full_name = user.phone or 'User'
-
-        return {
-            'id': user.id,
-            'phone': user.phone,
-            'full_name': full_name,  # To'liq ism
-            'gender': gender,
-        }
-
-    def _call_to_dict(self, call):
-        data = {
-            'id': call.id,
-            'item_type': 'call',
-            'room': call.room.id,
-
-            'caller': self.get_user_display_info(call.caller),
-            'receiver': self.get_user_display_info(call.receiver) if call.receiver else None,
-
-            'call_type': call.call_type,
-            'status': call.status,
-            'duration': call.duration,
-
-            'started_at': call.answered_at.isoformat() if call.answered_at else None,
-            'ended_at': call.ended_at.isoformat() if call.ended_at else None,
-
-            'created_at': call.created_at.isoformat(),
-            'timestamp': call.created_at.timestamp(),
-
-            'is_mine': call.caller_id == self.user.id,
-        }
-
-        return data
+        """Message payload (chat.payloads, ABSOLUTE URLs)"""
+        return message_payload(message.id, viewer_id=self.user.id)
 
     @database_sync_to_async
     def get_combined_history(self, limit=50):
@@ -468,50 +389,30 @@ class ChatConsumer(AsyncWebsocketConsumer):
         """
         from call.models import Call
 
-        # Messages olish
-        messages = list(Message.objects.filter(
-            room_id=self.room_id
-        ).select_related(
-            'sender',
-            'sender__client_profile',  # ClientProfile
-            'sender__doctor',  # Doctor
-            'reply_to__sender',
-            'reply_to__sender__client_profile',
-            'reply_to__sender__doctor'
-        ).prefetch_related(
-            'attachments'
-        ).order_by('-created_at')[:limit])
-
-        # Calls olish
-        calls = list(Call.objects.filter(
-            room_id=self.room_id,
-            status__in=['ended', 'missed', 'rejected']
-        ).select_related(
-            'caller',
-            'caller__client_profile',
-            'caller__doctor',
-            'receiver',
-            'receiver__client_profile',
-            'receiver__doctor'
-        ).order_by('-created_at')[:limit])
-
-        # Convert to dict
-        message_dicts = [self._message_to_dict(msg) for msg in messages]
-        call_dicts = [self._call_to_dict(call) for call in calls]
-
-        # Combine
-        all_items = message_dicts + call_dicts
-
-        # Sort by timestamp
-        all_items.sort(key=lambda x: x['timestamp'], reverse=True)
+        # seq items dan oldin o'qiladi - oraliqdagi o'zgarishlar keyingi sync da qaytadi
+        seq = RoomSequence.current(self.room_id)
+        return seq, history_items(
+            Message.objects.filter(room_id=self.room_id),
+            Call.objects.filter(room_id=self.room_id, status__in=['ended', 'missed', 'rejected']),
+            limit, viewer_id=self.user.id
+        )
 
-        # Limit
-        all_items = all_items[:limit]
+    @database_sync_to_async
+    def get_delta(self, since):
+        """(seq, items) - items None bo'lsa to'liq history kerak"""
+        from call.models import Call
 
-        # Reverse
-        all_items = list(reversed(all_items))
+        seq = RoomSequence.current(self.room_id)
+        if since > seq:
+            # Client boshqa holatdan (masalan, DB restore) - to'liq history
+            return seq, None
 
-        return all_items
+        return seq, delta_items(
+            Message.objects.filter(room_id=self.room_id),
+            Call.objects.filter(room_id=self.room_id, status__in=['ended', 'missed', 'rejected']),
+            since, settings.CHAT_SYNC_LIMIT, viewer_id=self.user.id,
+            tombstone_qs=MessageTombstone.objects.filter(room_id=self.room_id),
+        )
 
     @database_sync_to_async
     def has_more_history(self):
@@ -525,64 +426,39 @@ class ChatConsumer(AsyncWebsocketConsumer):
         ).count()
 
         total = message_count + call_count
-        return total > 50
+        return total > 50 or archive.has_archived('chat.Message', int(self.room_id))
 
     @database_sync_to_async
     def get_history_before(self, before_timestamp, limit=50):
         """before_timestamp dan oldingi history"""
         from call.models import Call
-        from datetime import datetime
+        from datetime import datetime, timezone
+
+        before_dt = datetime.fromtimestamp(float(before_timestamp), tz=timezone.utc)
+
+        items = history_items(
+            Message.objects.filter(room_id=self.room_id, created_at__lt=before_dt),
+            Call.objects.filter(
+                room_id=self.room_id,
+                status__in=['ended', 'missed', 'rejected'],
+                created_at__lt=before_dt
+            ),
+            limit, viewer_id=self.user.id
+        )
 
-        before_dt = datetime.fromtimestamp(float(before_timestamp))
-
-        # Messages
-        messages = list(Message.objects.filter(
-            room_id=self.room_id,
-            created_at__lt=before_dt
-        ).select_related(
-            'sender',
-            'sender__client_profile',
-            'sender__doctor',
-            'reply_to__sender',
-            'reply_to__sender__client_profile',
-            'reply_to__sender__doctor'
-        ).prefetch_related(
-            'attachments'
-        ).order_by('-created_at')[:limit])
-
-        # Calls
-        calls = list(Call.objects.filter(
-            room_id=self.room_id,
-            status__in=['ended', 'missed', 'rejected'],
-            created_at__lt=before_dt
-        ).select_related(
-            'caller',
-            'caller__client_profile',
-            'caller__doctor',
-            'receiver',
-            'receiver__client_profile',
-            'receiver__doctor'
-        ).order_by('-created_at')[:limit])
-
-        # Convert
-        message_dicts = [self._message_to_dict(msg) for msg in messages]
-        call_dicts = [self._call_to_dict(call) for call in calls]
-
-        # Combine and sort
-        all_items = message_dicts + call_dicts
-        all_items.sort(key=lambda x: x['timestamp'], reverse=True)
-        all_items = all_items[:limit]
-        all_items = list(reversed(all_items))
-
-        return all_items
+        # DB dagi history tugadi - qolganini cold storage dan (read-through)
+        if len(items) < limit:
+            oldest = datetime.fromtimestamp(items[0]['timestamp'], tz=timezone.utc) if items else before_dt
+            items = archived_items(int(self.room_id), oldest, limit - len(items), self.user.id) + items
+        return items
 
     @database_sync_to_async
     def has_history_before(self, before_timestamp, limit=50):
         """Yana history bormi"""
         from call.models import Call
-        from datetime import datetime
+        from datetime import datetime, timezone
 
-        before_dt = datetime.fromtimestamp(float(before_timestamp))
+        before_dt = datetime.fromtimestamp(float(before_timestamp), tz=timezone.utc)
 
         message_count = Message.objects.filter(
             room_id=self.room_id,
@@ -596,25 +472,16 @@ class ChatConsumer(AsyncWebsocketConsumer):
         ).count()
 
         total = message_count + call_count
-        return total > limit
+        return total > limit or archive.has_archived('chat.Message', int(self.room_id), before=before_dt)
 
     @database_sync_to_async
-    def mark_message_read(self, message_id):
-        try:
-            message = Message.objects.get(id=message_id, room_id=self.room_id)
-            if message.sender != self.user and not message.is_read:
-                message.is_read = True
-                message.read_at = timezone.now()
-                message.save(update_fields=['is_read', 'read_at'])
-                return True
-        except Message.DoesNotExist:
-            pass
-        return False
+    def mark_read_up_to(self, up_to_id):
+        return mark_messages_read(self.room_id, self.user, up_to_id=up_to_id)
 
     # CALL EVENT HANDLERS
     async def call_incoming(self, event):
         """Incoming call notification"""
-        await self.send(text_data=json.dumps({
+        await self.send_frame({
             'type': 'call_incoming',
             'call_id': event['call_id'],
             'call_type': event['call_type'],
@@ -622,42 +489,42 @@ class ChatConsumer(AsyncWebsocketConsumer):
             'livekit_room_name': event['livekit_room_name'],
             'livekit_token': event['livekit_token'],
             'livekit_ws_url': event['livekit_ws_url'],
-        }))
+        })
 
     async def call_answered(self, event):
         """Call answered notification"""
-        await self.send(text_data=json.dumps({
+        await self.send_frame({
             'type': 'call_answered',
             'call_id': event['call_id'],
             'answerer': event.get('answerer', {}),
-        }))
+        })
 
     async def call_rejected(self, event):
         """Call rejected notification"""
-        await self.send(text_data=json.dumps({
+        await self.send_frame({
             'type': 'call_rejected',
             'call_id': event['call_id'],
-        }))
+        })
 
     async def call_ended(self, event):
         """Call ended notification"""
-        await self.send(text_data=json.dumps({
+        await self.send_frame({
             'type': 'call_ended',
             'call_id': event['call_id'],
             'duration': event.get('duration', 0),
-        }))
+        })
 
     async def call_cancelled(self, event):
         """Call cancelled notification"""
-        await self.send(text_data=json.dumps({
+        await self.send_frame({
             'type': 'call_cancelled',
             'call_id': event['call_id'],
-        }))
+        })
 
     async def call_missed(self, event):
         """Call missed notification"""
-        await self.send(text_data=json.dumps({
+        await self.send_frame({
             'type': 'call_missed',
             'call_id': event['call_id'],
             'reason': event.get('reason', 'timeout'),
-        }))
\ No newline at end of file
+        })
\ No newline at end of file
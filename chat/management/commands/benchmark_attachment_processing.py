@@ -0,0 +1,50 @@
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from PIL import Image
+
+from chat.media import analyze
+
+
+class Command(BaseCommand):
+    help = 'Benchmark chat attachment processing (thumbnail + probe) throughput (no DB, no storage)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--files', type=int, default=200, help='Generated image count (default: 200)')
+        parser.add_argument('--workers', type=int, default=4, help='Worker pool size (default: 4)')
+        parser.add_argument('--width', type=int, default=4000, help='Source image width (default: 4000)')
+        parser.add_argument('--height', type=int, default=3000, help='Source image height (default: 3000)')
+
+    def handle(self, *args, **options):
+        rng = random.Random(42)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            paths = []
+            # Bir nechta noyob rasm - qolganlari nusxa (generatsiya benchmark ga kirmaydi)
+            for i in range(min(options['files'], 8)):
+                size = (options['width'], options['height'])
+                color = tuple(rng.randrange(256) for _ in range(3))
+                noise = Image.effect_noise(size, 64).convert('RGB')
+                image = Image.blend(Image.new('RGB', size, color), noise, 0.5)
+                path = os.path.join(tmpdir, f'source_{i}.jpg')
+                image.save(path, 'JPEG', quality=90)
+                paths.append(path)
+            paths = [paths[i % len(paths)] for i in range(options['files'])]
+            source_bytes = sum(os.path.getsize(path) for path in paths)
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+                results = list(pool.map(lambda path: analyze(path, 'image'), paths))
+            elapsed = time.perf_counter() - started
+
+        thumb_bytes = sum(len(result['thumbnail']) for result in results)
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(paths)} images in {elapsed:.2f}s "
+            f"({len(paths) / elapsed:,.1f} files/s, {source_bytes / elapsed / 1024 / 1024:,.1f} MB/s, "
+            f"workers={options['workers']})"
+        ))
+        self.stdout.write(f"source={source_bytes / 1024 / 1024:.1f}MB thumbnails={thumb_bytes / 1024:.1f}KB")
@@ -0,0 +1,67 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+from rest_framework.renderers import JSONRenderer
+
+from chat.models import ChatRoom, Message
+from chat.payloads import MESSAGE_COLUMNS, build_messages
+from chat.serializers import MessageSerializer
+from config.fastjson import dumps
+
+User = get_user_model()
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Benchmark chat message serialization: DRF MessageSerializer vs payloads + orjson (rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=50, help='Messages per page (default: 50)')
+        parser.add_argument('--rounds', type=int, default=200, help='Serialization rounds (default: 200)')
+        parser.add_argument('--locmem', action='store_true', help='Use process-local cache instead of Redis')
+
+    def handle(self, *args, **options):
+        caches = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        try:
+            with override_settings(**({'CACHES': caches} if options['locmem'] else {})), transaction.atomic():
+                self._run(options['messages'], options['rounds'])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _run(self, count, rounds):
+        client = User.objects.create_user(phone='998000000001')
+        doctor = User.objects.create_user(phone='998000000002', role='doctor')
+        room, _ = ChatRoom.get_or_create_private_room(client, doctor)
+
+        previous = None
+        for i in range(count):
+            previous = Message.objects.create(
+                room=room, sender=client if i % 2 else doctor, text=f'Xabar {i} ' * 8,
+                reply_to=previous if i % 5 == 0 else None,
+            )
+
+        def drf():
+            queryset = room.messages.select_related('sender', 'reply_to__sender').prefetch_related('attachments')
+            data = MessageSerializer(queryset, many=True).data
+            return JSONRenderer().render(data)
+
+        def fast():
+            return dumps(build_messages(list(room.messages.values_list(*MESSAGE_COLUMNS)), client.id))
+
+        fast()  # user card lar cache ga tushadi
+        for name, func in (('drf', drf), ('payloads', fast)):
+            started = time.perf_counter()
+            for _ in range(rounds):
+                body = func()
+            elapsed = time.perf_counter() - started
+            self.stdout.write(self.style.SUCCESS(
+                f"{name:>9}: {elapsed / rounds * 1000:.2f} ms/page, "
+                f"{rounds * count / elapsed:,.0f} messages/s, {len(body)} bytes"
+            ))
@@ -0,0 +1,169 @@
+"""
+Chat attachment media pipeline
+
+Upload request ichida faqat fayl diskka chunk lab yoziladi (TemporaryFileUploadHandler).
+Thumbnail va duration Celery worker da (chat.tasks.process_chat_attachment)
+hisoblanadi, tayyor bo'lgach chat group ga `attachment_ready` yuboriladi.
+
+analyze() DB ga bog'liq emas - benchmark ham shuni o'lchaydi.
+"""
+import io
+import json
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import wave
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+PROCESSED_TYPES = ('image', 'video', 'audio')
+
+
+def thumbnail_size():
+    return tuple(getattr(settings, 'CHAT_THUMBNAIL_SIZE', (320, 320)))
+
+
+def image_thumbnail(path, size=None):
+    """JPEG thumbnail (bytes)"""
+    size = size or thumbnail_size()
+
+    with Image.open(path) as image:
+        # JPEG ni to'liq o'lchamda decode qilmaslik (draft - DCT scaling)
+        image.draft('RGB', (size[0] * 2, size[1] * 2))
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail(size)
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+
+        buffer = io.BytesIO()
+        image.save(buffer, 'JPEG', quality=80, optimize=True)
+        return buffer.getvalue()
+
+
+def video_thumbnail(path, size=None):
+    """Videoning 1-sekundidagi kadr (ffmpeg bo'lmasa None)"""
+    if not shutil.which('ffmpeg'):
+        return None
+
+    size = size or thumbnail_size()
+    result = subprocess.run(
+        ['ffmpeg', '-v', 'error', '-ss', '1', '-i', path, '-frames:v', '1',
+         '-vf', f'scale={size[0]}:{size[1]}:force_original_aspect_ratio=decrease',
+         '-f', 'image2pipe', '-vcodec', 'mjpeg', '-'],
+        capture_output=True, timeout=30,
+    )
+    if result.returncode != 0 or not result.stdout:
+        logger.warning(f"ffmpeg thumbnail failed for {path}: {result.stderr[:200]}")
+        return None
+    return result.stdout
+
+
+def probe_duration(path):
+    """Audio/video davomiyligi (sekund)"""
+    if path.lower().endswith('.wav'):
+        try:
+            with wave.open(path) as wav:
+                return round(wav.getnframes() / wav.getframerate())
+        except (wave.Error, EOFError, ZeroDivisionError):
+            pass
+
+    if not shutil.which('ffprobe'):
+        return None
+
+    result = subprocess.run(
+        ['ffprobe', '-v', 'error', '-show_entries', 'format=duration', '-of', 'json', path],
+        capture_output=True, timeout=30,
+    )
+    try:
+        return round(float(json.loads(result.stdout)['format']['duration']))
+    except (ValueError, KeyError, TypeError):
+        logger.warning(f"ffprobe failed for {path}: {result.stderr[:200]}")
+        return None
+
+
+def analyze(path, file_type):
+    """Returns {'thumbnail': bytes|None, 'duration': int|None}"""
+    thumbnail = duration = None
+
+    if file_type == 'image':
+        thumbnail = image_thumbnail(path)
+    elif file_type == 'video':
+        thumbnail = video_thumbnail(path)
+        duration = probe_duration(path)
+    elif file_type == 'audio':
+        duration = probe_duration(path)
+
+    return {'thumbnail': thumbnail, 'duration': duration}
+
+
+@contextmanager
+def local_path(field_file):
+    """Storage local bo'lmasa (S3) faylni vaqtincha diskka chunk lab ko'chirish"""
+    try:
+        path = field_file.path
+    except NotImplementedError:
+        path = None
+
+    if path:
+        yield path
+        return
+
+    suffix = os.path.splitext(field_file.name)[1]
+    with tempfile.NamedTemporaryFile(suffix=suffix) as tmp:
+        field_file.open('rb')
+        try:
+            for chunk in field_file.chunks():
+                tmp.write(chunk)
+        finally:
+            field_file.close()
+        tmp.flush()
+        yield tmp.name
+
+
+def process_attachment(attachment):
+    """Thumbnail/duration ni hisoblab saqlash. Returns updated field nomlari"""
+    with local_path(attachment.file) as path:
+        result = analyze(path, attachment.file_type)
+
+    update_fields = []
+    if result['thumbnail']:
+        stem = os.path.splitext(os.path.basename(attachment.file.name))[0]
+        attachment.thumbnail.save(f'{stem}_thumb.jpg', ContentFile(result['thumbnail']), save=False)
+        update_fields.append('thumbnail')
+    if result['duration'] is not None:
+        attachment.duration = result['duration']
+        update_fields.append('duration')
+
+    if update_fields:
+        attachment.save(update_fields=update_fields)
+    return update_fields
+
+
+def absolute_media_url(field_file):
+    if not field_file:
+        return None
+    return f"{settings.SITE_URL}{field_file.url}"
+
+
+def attachment_ready_event(attachment):
+    """Chat group uchun event (ChatConsumer.attachment_ready_handler)"""
+    return {
+        'type': 'attachment_ready_handler',
+        'message_id': attachment.message_id,
+        'attachment': {
+            'id': attachment.id,
+            'file_type': attachment.file_type,
+            'file_name': attachment.file_name,
+            'size': attachment.size,
+            'duration': attachment.duration,
+            'file_url': absolute_media_url(attachment.file),
+            'thumbnail_url': absolute_media_url(attachment.thumbnail),
+        },
+    }
@@ -0,0 +1,72 @@
+# Generated by Django 4.0.2 on 2026-10-19 15:37
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_memberships(apps, schema_editor):
+    """Mavjud participants uchun membership + unread counter"""
+    ChatRoom = apps.get_model('chat', 'ChatRoom')
+    Message = apps.get_model('chat', 'Message')
+    RoomMembership = apps.get_model('chat', 'RoomMembership')
+
+    # {room_id: {sender_id: unread}}
+    unread = {}
+    rows = Message.objects.filter(is_read=False).values_list('room_id', 'sender_id').annotate(
+        count=models.Count('id')
+    ).order_by()
+    for room_id, sender_id, count in rows:
+        unread.setdefault(room_id, {})[sender_id] = count
+
+    batch = []
+    participants = ChatRoom.participants.through.objects.values_list('chatroom_id', 'usermodel_id')
+    for room_id, user_id in participants.iterator(chunk_size=2000):
+        by_sender = unread.get(room_id, {})
+        batch.append(RoomMembership(
+            room_id=room_id,
+            user_id=user_id,
+            unread_count=sum(by_sender.values()) - by_sender.get(user_id, 0),
+        ))
+        if len(batch) >= 2000:
+            RoomMembership.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+
+    RoomMembership.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('chat', '0004_chatroom_is_active'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomMembership',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('unread_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='chatroom',
+            index=models.Index(fields=['-last_message_time'], name='chat_chatro_last_me_cc0bcc_idx'),
+        ),
+        migrations.AddField(
+            model_name='roommembership',
+            name='room',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to='chat.chatroom'),
+        ),
+        migrations.AddField(
+            model_name='roommembership',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='room_memberships', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterUniqueTogether(
+            name='roommembership',
+            unique_together={('room', 'user')},
+        ),
+        migrations.RunPython(backfill_memberships, migrations.RunPython.noop),
+    ]
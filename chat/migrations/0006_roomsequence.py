@@ -0,0 +1,30 @@
+# Generated by Django 4.0.2 on 2026-10-19 16:01
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0005_roommembership'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomSequence',
+            fields=[
+                ('room', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='sequence', serialize=False, to='chat.chatroom')),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='message',
+            name='seq',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['room', 'seq'], name='chat_messag_room_id_5eb582_idx'),
+        ),
+    ]
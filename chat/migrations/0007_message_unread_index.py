@@ -0,0 +1,21 @@
+# Generated by Django 4.0.2 on 2026-10-19 16:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0006_roomsequence'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='message',
+            name='chat_messag_is_read_872c73_idx',
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['room', 'sender'], name='chat_msg_unread_idx'),
+        ),
+    ]
@@ -1,4 +1,6 @@
-from django.db import models
+from django.db import connection, models, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
 from django.conf import settings
 import os
 
@@ -25,6 +27,7 @@ class ChatRoom(models.Model):
         ordering = ['-updated_at']
         indexes = [
             models.Index(fields=['-updated_at']),
+            models.Index(fields=['-last_message_time']),
             models.Index(fields=['room_type']),
         ]
 
@@ -50,14 +53,130 @@ class ChatRoom(models.Model):
         return room, True
 
     def get_unread_count(self, user):
-        """User uchun o'qilmagan xabarlar soni"""
-        return self.messages.filter(is_read=False).exclude(sender=user).count()
+        """User uchun o'qilmagan xabarlar soni (RoomMembership counter)"""
+        # ChatRoomViewSet annotate qilgan bo'lsa - qo'shimcha query yo'q
+        if hasattr(self, 'unread_count'):
+            return self.unread_count
+
+        count = RoomMembership.objects.filter(
+            room_id=self.id, user_id=user.id
+        ).values_list('unread_count', flat=True).first()
+
+        if count is None:
+            return self.messages.filter(is_read=False).exclude(sender=user).count()
+        return count
 
     def get_other_participant(self, user):
         """1:1 chatda ikkinchi user"""
         return self.participants.exclude(id=user.id).first()
 
 
+class RoomMembership(models.Model):
+    """
+    Per-(room, user) unread counter
+
+    Participants M2M bilan sinxron (chat.signals), counter esa
+    message insert va read receipt da yangilanadi - room list
+    har bir room uchun COUNT qilmaydi.
+    """
+    room = models.ForeignKey(ChatRoom, on_delete=models.CASCADE, related_name='memberships')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='room_memberships')
+    unread_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ['room', 'user']
+
+    def __str__(self):
+        return f"Room {self.room_id} - User {self.user_id} ({self.unread_count})"
+
+    @classmethod
+    def message_created(cls, room_id, sender_id, count=1):
+        """Yangi xabar: sender dan boshqa barcha a'zolarga +count"""
+        cls.objects.filter(room_id=room_id).exclude(user_id=sender_id).update(
+            unread_count=F('unread_count') + count
+        )
+
+    @classmethod
+    def messages_read(cls, room_id, read_by_sender):
+        """
+        Xabarlar o'qildi
+
+        read_by_sender: {sender_id: o'qilgan xabarlar soni}
+        Har bir xabar sender dan boshqa a'zolarning counteridan ayriladi.
+        """
+        for sender_id, count in read_by_sender.items():
+            if count:
+                cls.objects.filter(room_id=room_id).exclude(user_id=sender_id).update(
+                    unread_count=Greatest(F('unread_count') - count, 0)
+                )
+
+    @classmethod
+    def messages_removed(cls, room_id, unread_by_sender):
+        """O'qilmagan xabarlar o'chirildi/arxivlandi - o'qilgandek counter dan ayriladi"""
+        cls.messages_read(room_id, unread_by_sender)
+
+
+class RoomSequence(models.Model):
+    """
+    Per-room monotonic sequence (delta sync uchun)
+
+    Xabar yaratish/o'zgartirish, read receipt va call status o'zgarishi
+    next() dan yangi qiymat oladi va uni o'z qatoriga (seq) yozadi.
+    Client oxirgi ko'rgan seq ni yuboradi (sync_since) - server faqat
+    undan keyingi o'zgarishlarni qaytaradi.
+
+    ChatRoom dan alohida jadval: RoomTouchBuffer ChatRoom qatorini
+    lock qilmaslik uchun qilingan, sequence UPDATE lari unga tegmaydi.
+    """
+    room = models.OneToOneField(ChatRoom, on_delete=models.CASCADE, primary_key=True, related_name='sequence')
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"Room {self.room_id} seq={self.value}"
+
+    @classmethod
+    def next(cls, room_id):
+        """
+        Keyingi seq - transaction.atomic() ichida chaqirilishi kerak
+
+        Qator lock i commit gacha turadi, shuning uchun bitta room dagi
+        o'zgarishlar seq tartibida commit bo'ladi (sync da "teshik" bo'lmaydi).
+        """
+        value = cls._increment(room_id)
+        if value is None:
+            cls.objects.get_or_create(room_id=room_id)
+            value = cls._increment(room_id)
+        return value
+
+    @classmethod
+    def _increment(cls, room_id):
+        """
+        +1 -> yangi qiymat (qator yo'q bo'lsa None)
+
+        UPDATE .. RETURNING - bitta round trip: lock olingandan keyin SELECT
+        kutmaydi, qator commit gacha imkon qadar qisqa band turadi.
+        """
+        returning = connection.vendor in ('postgresql', 'sqlite') and connection.features.can_return_columns_from_insert
+        if not returning:
+            if not cls.objects.filter(room_id=room_id).update(value=F('value') + 1):
+                return None
+            return cls.objects.filter(room_id=room_id).values_list('value', flat=True).get()
+
+        quote = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {quote(cls._meta.db_table)} SET {quote("value")} = {quote("value")} + 1 '
+                f'WHERE {quote("room_id")} = %s RETURNING {quote("value")}',
+                [room_id],
+            )
+            row = cursor.fetchone()
+        return row[0] if row else None
+
+    @classmethod
+    def current(cls, room_id):
+        return cls.objects.filter(room_id=room_id).values_list('value', flat=True).first() or 0
+
+
 class Message(models.Model):
     MESSAGE_TYPE_CHOICES = (
         ('text', 'Text'),
@@ -93,12 +212,17 @@ class Message(models.Model):
         related_name='replies'
     )
 
+    # Oxirgi o'zgarishning room sequence qiymati (RoomSequence)
+    seq = models.BigIntegerField(default=0)
+
     class Meta:
         ordering = ['created_at']
         indexes = [
             models.Index(fields=['room', '-created_at']),
             models.Index(fields=['sender', '-created_at']),
-            models.Index(fields=['is_read']),
+            models.Index(fields=['room', 'seq']),
+            # O'qilmagan xabarlar (mark_messages_read, unread fallback) - o'qilganlar indeksga kirmaydi
+            models.Index(fields=['room', 'sender'], condition=models.Q(is_read=False), name='chat_msg_unread_idx'),
         ]
 
     def __str__(self):
@@ -106,13 +230,60 @@ class Message(models.Model):
 
     def save(self, *args, **kwargs):
         is_new = self.pk is None
-        super().save(*args, **kwargs)
 
-        # Room last message update
+        with transaction.atomic():
+            self.seq = RoomSequence.next(self.room_id)
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'seq'}
+            super().save(*args, **kwargs)
+            if is_new:
+                # Xabar bilan bitta commit da, room lock ostida - oraliqda kelgan
+                # read receipt counter ni xabarsiz ko'rmasin
+                RoomMembership.message_created(self.room_id, self.sender_id)
+
         if is_new:
-            self.room.last_message_text = self.text[:100] if self.text else f"[{self.message_type}]"
-            self.room.last_message_time = self.created_at
-            self.room.save(update_fields=['last_message_text', 'last_message_time', 'updated_at'])
+            from .services import message_preview, room_touch_buffer
+
+            # Room last message update - commit dan keyin, coalesced
+            # (busy roomlarda ChatRoom qatori uchun lock contention bo'lmasin)
+            room_id, text, created_at = self.room_id, message_preview(self), self.created_at
+            transaction.on_commit(lambda: room_touch_buffer.touch(room_id, text, created_at))
+
+    def delete(self, *args, **kwargs):
+        """O'chirish delta sync da ko'rinadi (MessageTombstone), unread counter lar moslanadi"""
+        from .services import record_removed
+
+        with transaction.atomic():
+            # is_read DB dan - instance eskirgan bo'lishi mumkin (mark_messages_read UPDATE qiladi)
+            rows = Message.objects.select_for_update().filter(pk=self.pk).values('id', 'room_id', 'sender_id', 'is_read')
+            record_removed(list(rows), MessageTombstone.Reason.DELETED)
+            return super().delete(*args, **kwargs)
+
+
+class MessageTombstone(models.Model):
+    """
+    O'chirilgan / arxivga ko'chirilgan xabar - delta sync uchun
+
+    Xabar qatori yo'q bo'lgani uchun seq shu yerda: client sync_since dan
+    keyingi tombstone larni oladi va xabarni o'chiradi (archived - scroll-back
+    da arxivdan qaytadi). Eski tombstone lar config.archive bilan ko'chiriladi.
+    """
+
+    class Reason(models.TextChoices):
+        DELETED = 'deleted'
+        ARCHIVED = 'archived'
+
+    room = models.ForeignKey(ChatRoom, on_delete=models.CASCADE, related_name='tombstones')
+    message_id = models.BigIntegerField()
+    reason = models.CharField(max_length=10, choices=Reason.choices, default=Reason.DELETED)
+    seq = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['room', 'seq'])]
+
+    def __str__(self):
+        return f"Room {self.room_id} message {self.message_id} {self.reason} seq={self.seq}"
 
 
 class MessageAttachment(models.Model):
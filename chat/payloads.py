@@ -0,0 +1,246 @@
+"""
+Chat message/call payloadlari - REST, WebSocket va FCM uchun yagona format
+
+Model instance va DRF field lar o'rniga .values_list() tuple lari ustida
+ishlaydi: message lar bitta query, attachment lar bitta query, user card lar
+cache dan (account.cards). Natija fastjson.dumps() bilan bir marta encode
+qilinadi va HTTP body / group_send frame sifatida ishlatiladi.
+
+Message formati (eski REST/WS formatlarining birlashmasi):
+    {id, item_type, room, sender{card}, message_type, text, is_read, read_at,
+     created_at, updated_at, timestamp, seq, is_mine, attachments[], reply_to}
+
+Delta sync dagi o'chirilgan xabar (MessageTombstone):
+    {id, item_type: 'deleted', room, reason, timestamp, seq}
+"""
+from collections import defaultdict
+
+from account.cards import media_url, user_cards
+from config.fastjson import dumps
+
+from .models import Message, MessageAttachment
+
+MESSAGE_COLUMNS = (
+    'id', 'room_id', 'sender_id', 'message_type', 'text', 'is_read', 'read_at',
+    'created_at', 'updated_at', 'seq',
+    'reply_to_id', 'reply_to__sender_id', 'reply_to__text', 'reply_to__message_type',
+)
+
+ATTACHMENT_COLUMNS = (
+    'message_id', 'id', 'file_type', 'file_name', 'size', 'duration', 'file', 'thumbnail', 'created_at',
+)
+
+CALL_COLUMNS = (
+    'id', 'room_id', 'caller_id', 'receiver_id', 'call_type', 'status', 'duration',
+    'answered_at', 'ended_at', 'created_at', 'seq',
+)
+
+TOMBSTONE_COLUMNS = ('message_id', 'room_id', 'reason', 'seq', 'created_at')
+
+
+def _iso(value):
+    # Arxivdan kelgan nested qatorlarda datetime allaqachon string
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+def message_rows(queryset):
+    return list(queryset.values_list(*MESSAGE_COLUMNS))
+
+
+def attachments_by_message(message_ids):
+    result = defaultdict(list)
+    if not message_ids:
+        return result
+
+    rows = MessageAttachment.objects.filter(message_id__in=message_ids).order_by('created_at')
+    for row in rows.values_list(*ATTACHMENT_COLUMNS):
+        result[row[0]].append(attachment_payload(*row[1:]))
+    return result
+
+
+def attachment_payload(att_id, file_type, file_name, size, duration, file, thumbnail, created_at):
+    return {
+        'id': att_id,
+        'file_type': file_type,
+        'file_name': file_name,
+        'size': size,
+        'duration': duration,
+        'file_url': media_url(file),
+        'thumbnail_url': media_url(thumbnail),
+        'created_at': _iso(created_at),
+    }
+
+
+def build_messages(rows, viewer_id=None, attachments=None):
+    """MESSAGE_COLUMNS tuple lari -> payload dict lar (tartib saqlanadi)"""
+    if not rows:
+        return []
+
+    cards = user_cards([row[2] for row in rows] + [row[11] for row in rows])
+    if attachments is None:
+        attachments = attachments_by_message([row[0] for row in rows])
+
+    payloads = []
+    for (message_id, room_id, sender_id, message_type, text, is_read, read_at, created_at, updated_at, seq,
+         reply_to_id, reply_sender_id, reply_text, reply_type) in rows:
+        reply_to = None
+        if reply_to_id:
+            reply_to = {
+                'id': reply_to_id,
+                'sender': cards.get(reply_sender_id),
+                'text': (reply_text or '')[:100],
+                'message_type': reply_type,
+            }
+
+        payloads.append({
+            'id': message_id,
+            'item_type': 'message',
+            'room': room_id,
+            'sender': cards.get(sender_id),
+            'message_type': message_type,
+            'text': text,
+            'is_read': is_read,
+            'read_at': _iso(read_at),
+            'created_at': _iso(created_at),
+            'updated_at': _iso(updated_at),
+            'timestamp': created_at.timestamp(),
+            'seq': seq,
+            'is_mine': sender_id == viewer_id,
+            'attachments': attachments.get(message_id, []),
+            'reply_to': reply_to,
+        })
+    return payloads
+
+
+def message_payload(message_id, viewer_id=None):
+    payloads = build_messages(message_rows(Message.objects.filter(id=message_id)), viewer_id)
+    return payloads[0] if payloads else None
+
+
+def build_calls(rows, viewer_id=None):
+    """CALL_COLUMNS tuple lari -> chat history dagi call item lar"""
+    if not rows:
+        return []
+
+    cards = user_cards([row[2] for row in rows] + [row[3] for row in rows])
+
+    return [
+        {
+            'id': call_id,
+            'item_type': 'call',
+            'room': room_id,
+            'caller': cards.get(caller_id),
+            'receiver': cards.get(receiver_id) if receiver_id else None,
+            'call_type': call_type,
+            'status': status,
+            'duration': duration,
+            'started_at': _iso(answered_at),
+            'ended_at': _iso(ended_at),
+            'created_at': _iso(created_at),
+            'timestamp': created_at.timestamp(),
+            'seq': seq,
+            'is_mine': caller_id == viewer_id,
+        }
+        for (call_id, room_id, caller_id, receiver_id, call_type, status, duration,
+             answered_at, ended_at, created_at, seq) in rows
+    ]
+
+
+def history_items(message_qs, call_qs, limit, viewer_id):
+    """Messages + calls aralash, vaqt bo'yicha (eski -> yangi)"""
+    messages = build_messages(message_rows(message_qs.order_by('-created_at')[:limit]), viewer_id)
+    calls = build_calls(list(call_qs.order_by('-created_at').values_list(*CALL_COLUMNS)[:limit]), viewer_id)
+
+    items = sorted(messages + calls, key=lambda item: item['timestamp'], reverse=True)[:limit]
+    items.reverse()
+    return items
+
+
+def build_tombstones(rows):
+    """TOMBSTONE_COLUMNS tuple lari -> {item_type: 'deleted'} item lar"""
+    return [
+        {
+            'id': message_id,
+            'item_type': 'deleted',
+            'room': room_id,
+            'reason': reason,
+            'timestamp': created_at.timestamp(),
+            'seq': seq,
+        }
+        for message_id, room_id, reason, seq, created_at in rows
+    ]
+
+
+def delta_items(message_qs, call_qs, since, limit, viewer_id, tombstone_qs=None):
+    """
+    seq > since bo'lgan message/call lar, seq tartibida (yangi, o'zgargan, o'qilgan)
+    + o'chirilgan/arxivlangan xabar tombstone lari
+
+    limit dan ko'p bo'lsa None - client to'liq history ni qayta oladi.
+    """
+    messages = message_rows(message_qs.filter(seq__gt=since).order_by('seq')[:limit + 1])
+    calls = list(call_qs.filter(seq__gt=since).order_by('seq').values_list(*CALL_COLUMNS)[:limit + 1])
+    tombstones = [] if tombstone_qs is None else list(
+        tombstone_qs.filter(seq__gt=since).order_by('seq').values_list(*TOMBSTONE_COLUMNS)[:limit + 1]
+    )
+    if len(messages) + len(calls) + len(tombstones) > limit:
+        return None
+
+    items = build_messages(messages, viewer_id) + build_calls(calls, viewer_id) + build_tombstones(tombstones)
+    items.sort(key=lambda item: item['seq'])
+    return items
+
+
+def archived_items(room_id, before, limit, viewer_id):
+    """
+    Scroll-back read-through: cold storage dagi xabarlar (config.archive), eski -> yangi
+
+    Payload DB dagi bilan bir xil, faqat 'archived': True.
+    """
+    from config import archive
+
+    rows = archive.read('chat.Message', room_id, before=before, limit=limit)
+    rows.reverse()
+
+    tuples, attachments = [], {}
+    for row in rows:
+        reply = row['reply'] or {}
+        tuples.append((
+            row['id'], row['room_id'], row['sender_id'], row['message_type'], row['text'], row['is_read'],
+            row['read_at'], row['created_at'], row['updated_at'], row['seq'],
+            row['reply_to_id'], reply.get('sender_id'), reply.get('text'), reply.get('message_type'),
+        ))
+        attachments[row['id']] = [
+            attachment_payload(*(attachment[column] for column in ATTACHMENT_COLUMNS[1:]))
+            for attachment in row['attachments']
+        ]
+
+    items = build_messages(tuples, viewer_id, attachments=attachments)
+    for item in items:
+        item['archived'] = True
+    return items
+
+
+def message_deleted_event(message_id, seq):
+    """group_send event - xabar o'chirildi (ChatConsumer.message_deleted_handler)"""
+    return {
+        'type': 'message_deleted_handler',
+        'frame': dumps({'type': 'message_deleted', 'message_id': message_id, 'seq': seq}),
+    }
+
+
+def chat_message_event(payload):
+    """
+    group_send event - frame lar oldindan encode qilingan
+
+    is_mine qabul qiluvchiga bog'liq, shuning uchun ikki variant:
+    ChatConsumer.chat_message_handler mosini tanlab yuboradi.
+    """
+    mine = dict(payload, is_mine=True)
+    other = dict(payload, is_mine=False)
+    return {
+        'type': 'chat_message_handler',
+        'sender_id': payload['sender']['id'] if payload['sender'] else None,
+        'frame_mine': dumps({'type': 'chat_message', 'message': mine}),
+        'frame_other': dumps({'type': 'chat_message', 'message': other}),
+    }
@@ -2,76 +2,27 @@
 
 from rest_framework import serializers
 from .models import ChatRoom, Message, MessageAttachment
+from account.cards import UserCardSerializer
 from account.models import UserModel
+from django.db import transaction
 from django.utils import timezone
 
+from .media import PROCESSED_TYPES
+from .payloads import message_payload
+from .tasks import process_chat_attachment
 
-class UserMiniSerializer(serializers.ModelSerializer):
+
+class UserMiniSerializer(UserCardSerializer):
     """
-    User minimal ma'lumoti
+    User minimal ma'lumoti (account.cards - WS payload bilan bir xil)
 
     ✅ Keys saqlanadi: first_name, last_name
     ✅ Value full_name dan olinadi
     """
-    avatar = serializers.SerializerMethodField()
-    first_name = serializers.SerializerMethodField()
-    last_name = serializers.SerializerMethodField()
 
-    class Meta:
-        model = UserModel
+    class Meta(UserCardSerializer.Meta):
         fields = ['id', 'phone', 'first_name', 'last_name', 'avatar', 'role']
 
-    def _get_user_full_name(self, user):
-        """
-        User ning to'liq ismini olish
-
-        Priority:
-        - Client: client_profile.full_name
-        - Doctor: doctor.full_name
-        - Fallback: phone
-        """
-        # Client
-        if hasattr(user, 'client_profile'):
-            try:
-                full_name = (user.client_profile.full_name or '').strip()
-                if full_name:
-                    return full_name
-            except:
-                pass
-
-        # Doctor
-        if hasattr(user, 'doctor'):
-            try:
-                full_name = (user.doctor.full_name or '').strip()
-                if full_name:
-                    return full_name
-            except:
-                pass
-
-        # Fallback
-        return user.phone or ''
-
-    def get_first_name(self, obj):
-        """
-        ✅ Key: first_name (o'zgarmaydi)
-        ✅ Value: full_name (profile dan)
-        """
-        return self._get_user_full_name(obj)
-
-    def get_last_name(self, obj):
-        """
-        ✅ Key: last_name (o'zgarmaydi)
-        ✅ Value: bo'sh string
-        """
-        return ''
-
-    def get_avatar(self, obj):
-        if hasattr(obj, 'avatar') and obj.avatar:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.avatar.url)
-        return None
-
 
 class MessageAttachmentSerializer(serializers.ModelSerializer):
     file_url = serializers.SerializerMethodField()
@@ -174,16 +125,22 @@ class MessageCreateSerializer(serializers.ModelSerializer):
 
         message = Message.objects.create(**validated_data)
 
-        # Attachmentlarni saqlash
+        # Attachmentlarni saqlash (thumbnail/duration - chat.tasks.process_chat_attachment)
+        pending = []
         for file in attachments_data:
             file_type = self._get_file_type(file.name)
-            MessageAttachment.objects.create(
+            attachment = MessageAttachment.objects.create(
                 message=message,
                 file=file,
                 file_type=file_type,
                 file_name=file.name,
                 size=file.size
             )
+            if file_type in PROCESSED_TYPES:
+                pending.append(attachment.id)
+
+        if pending:
+            transaction.on_commit(lambda: [process_chat_attachment.delay(i) for i in pending])
 
         return message
 
@@ -226,16 +183,16 @@ class ChatRoomSerializer(serializers.ModelSerializer):
     def get_last_message(self, obj):
         """
         FIXED: Prefetch ichida slice ishlatmaslik
-        To'g'ridan-to'g'ri query
+        Room list da view oldindan batch qilib beradi (context['last_messages'])
         """
-        last_msg = obj.messages.select_related(
-            'sender',
-            'sender__client_profile',  # ✅ Client uchun
-            'sender__doctor',  # ✅ Doctor uchun
-        ).prefetch_related('attachments').order_by('-created_at').first()
-
-        if last_msg:
-            return MessageSerializer(last_msg, context=self.context).data
+        last_messages = self.context.get('last_messages')
+        if last_messages is not None:
+            return last_messages.get(obj.id)
+
+        request = self.context.get('request')
+        last_id = obj.messages.order_by('-created_at').values_list('id', flat=True).first()
+        if last_id:
+            return message_payload(last_id, request.user.id if request else None)
         return None
 
     def get_unread_count(self, obj):
@@ -248,7 +205,8 @@ class ChatRoomSerializer(serializers.ModelSerializer):
         """1:1 chat uchun qarshi taraf"""
         request = self.context.get('request')
         if request and request.user and obj.room_type == '1:1':
-            other = obj.get_other_participant(request.user)
+            # Prefetch qilingan participants dan - qo'shimcha query yo'q
+            other = next((p for p in obj.participants.all() if p.id != request.user.id), None)
             if other:
                 return UserMiniSerializer(other, context=self.context).data
         return None
@@ -0,0 +1,283 @@
+import atexit
+import logging
+import threading
+import time
+
+from celery.signals import worker_process_shutdown, worker_shutdown
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import ChatRoom, Message, MessageTombstone, RoomMembership, RoomSequence
+
+logger = logging.getLogger(__name__)
+
+def message_preview(message):
+    return message.text[:100] if message.text else f"[{message.message_type}]"
+
+
+def write_room_touch(room_id, text, message_time):
+    """
+    ChatRoom last message cache ni yangilash - bitta UPDATE, SELECT yo'q
+
+    Eskiroq xabar yangisini bosib ketmasligi uchun last_message_time sharti bilan.
+    """
+    ChatRoom.objects.filter(
+        Q(last_message_time__isnull=True) | Q(last_message_time__lte=message_time),
+        id=room_id,
+    ).update(
+        last_message_text=text,
+        last_message_time=message_time,
+        updated_at=timezone.now(),
+    )
+
+
+class RoomTouchBuffer:
+    """
+    Write-behind room touch
+
+    Har bir yangi xabar ChatRoom qatorini UPDATE qilmaydi: bitta room
+    uchun CHAT_ROOM_TOUCH_INTERVAL sekundda ko'pi bilan bitta UPDATE.
+    Oraliqda kelgan xabarlardan faqat eng oxirgisi yoziladi.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = {}  # room_id -> (text, message_time)
+        self.last_flush = {}  # room_id -> time.monotonic()
+        self.timers = {}  # room_id -> threading.Timer
+
+    @property
+    def interval(self):
+        return getattr(settings, 'CHAT_ROOM_TOUCH_INTERVAL', 1.0)
+
+    def touch(self, room_id, text, message_time):
+        with self.lock:
+            current = self.pending.get(room_id)
+            if current is None or current[1] <= message_time:
+                self.pending[room_id] = (text, message_time)
+
+            if room_id in self.timers:
+                return  # flush allaqachon rejalashtirilgan
+
+            wait = self.interval - (time.monotonic() - self.last_flush.get(room_id, float('-inf')))
+            if wait > 0:
+                timer = threading.Timer(wait, self._flush_from_timer, [room_id])
+                timer.daemon = True
+                self.timers[room_id] = timer
+                timer.start()
+                return
+
+        self.flush_room(room_id)
+
+    def flush_room(self, room_id):
+        with self.lock:
+            self.timers.pop(room_id, None)
+            item = self.pending.pop(room_id, None)
+            now = time.monotonic()
+            self.last_flush[room_id] = now
+
+            # Eski yozuvlarni tozalash (dict cheksiz o'smasin)
+            if len(self.last_flush) > 10000:
+                self.last_flush = {
+                    key: value for key, value in self.last_flush.items()
+                    if now - value < self.interval
+                }
+
+        if item:
+            write_room_touch(room_id, *item)
+
+    def _flush_from_timer(self, room_id):
+        try:
+            self.flush_room(room_id)
+        finally:
+            # Timer thread o'z DB connectionini ochgan - yopib ketamiz
+            connections.close_all()
+
+    def flush(self):
+        """Barcha kutilayotgan touchlarni hozir yozish (shutdown, test)"""
+        with self.lock:
+            for timer in self.timers.values():
+                timer.cancel()
+            self.timers.clear()
+            room_ids = list(self.pending)
+
+        for room_id in room_ids:
+            self.flush_room(room_id)
+
+
+room_touch_buffer = RoomTouchBuffer()
+
+
+def flush_room_touches(**kwargs):
+    """
+    Process to'xtayapti - timer kutayotgan touch lar yo'qolmasin
+
+    atexit: daphne (serve worker lari) SIGTERM da reactor ni to'xtatib
+    odatdagidek chiqadi. Celery: worker_shutdown (asosiy process) va
+    worker_process_shutdown (prefork child lar os._exit bilan chiqadi,
+    atexit ishlamaydi).
+    """
+    try:
+        room_touch_buffer.flush()
+    except Exception as e:
+        logger.warning(f"Room touch flush on shutdown failed: {e}")
+
+
+atexit.register(flush_room_touches)
+worker_shutdown.connect(flush_room_touches, weak=False)
+worker_process_shutdown.connect(flush_room_touches, weak=False)
+
+
+def get_last_messages(rooms, viewer_id=None):
+    """
+    Room list uchun oxirgi xabarlarni bitta query bilan olish
+
+    rooms: ChatRoomViewSet.get_queryset() dan (last_message_id annotate qilingan)
+    Returns: {room_id: message payload} (chat.payloads)
+    """
+    from .payloads import build_messages, message_rows
+
+    message_ids = [room.last_message_id for room in rooms if room.last_message_id]
+    if not message_ids:
+        return {}
+
+    payloads = build_messages(message_rows(Message.objects.filter(id__in=message_ids)), viewer_id)
+    return {payload['room']: payload for payload in payloads}
+
+
+def mark_messages_read(room_id, user, message_ids=None, up_to_id=None):
+    """
+    Room dagi boshqalar yuborgan xabarlarni o'qilgan deb belgilash
+
+    Bitta ranged UPDATE (id <= up_to_id AND sender != user AND is_read = false)
+    + RoomMembership counterlarini moslash.
+    message_ids / up_to_id berilmasa - roomdagi barcha o'qilmagan xabarlar.
+    Returns: belgilangan xabarlar soni
+    """
+    messages = Message.objects.filter(
+        room_id=room_id,
+        is_read=False
+    ).exclude(
+        sender_id=user.id
+    )
+
+    if message_ids is not None:
+        messages = messages.filter(id__in=message_ids)
+
+    if up_to_id is not None:
+        messages = messages.filter(id__lte=up_to_id)
+
+    # O'qiladigan xabar yo'q - room lock ham, seq ham kerak emas
+    if not messages.exists():
+        return 0
+
+    with transaction.atomic():
+        # Avval room lock (RoomSequence qatori): parallel read receipt lar
+        # bir xil xabarlarni ikki marta sanab counter larni ikki marta ayirmasin.
+        # Sanash va UPDATE lock ostida - ikkalasi bir xil qatorlarni ko'radi
+        seq = RoomSequence.next(room_id)
+        read_by_sender = dict(
+            messages.order_by().values_list('sender_id').annotate(count=Count('id'))
+        )
+
+        # Read holati o'zgargan xabarlar delta sync da qaytadi
+        updated = messages.update(is_read=True, read_at=timezone.now(), seq=seq) if read_by_sender else 0
+        if updated:
+            RoomMembership.messages_read(room_id, read_by_sender)
+
+        if message_ids is None and up_to_id is None:
+            # Butun room o'qildi - reader counteri aniq 0
+            RoomMembership.objects.filter(room_id=room_id, user_id=user.id).update(unread_count=0)
+
+    return updated
+
+
+def read_receipt_event(user_id, up_to_id, marked_count):
+    """
+    Coalesced read receipt uchun group_send event
+
+    'message_id' eski clientlar uchun saqlangan (= up_to_message_id).
+    up_to_id None - room dagi hamma xabar o'qildi.
+    """
+    return {
+        'type': 'read_receipt_handler',
+        'message_id': up_to_id,
+        'up_to_message_id': up_to_id,
+        'marked_count': marked_count,
+        'user_id': user_id,
+    }
+
+
+def bulk_import_messages(messages, batch_size=1000):
+    """
+    Ko'p xabarni import qilish (migration, backup restore)
+
+    bulk_create - per-row save() side effectlarisiz. Room touch va
+    unread counterlar har bir room uchun bir martadan yangilanadi.
+    """
+    with transaction.atomic():
+        # Har bir room uchun bitta seq - import qilingan xabarlar delta sync da ko'rinadi
+        seqs = {}
+        for message in messages:
+            if message.room_id not in seqs:
+                seqs[message.room_id] = RoomSequence.next(message.room_id)
+            message.seq = seqs[message.room_id]
+
+        created = Message.objects.bulk_create(messages, batch_size=batch_size)
+
+    latest = {}  # room_id -> Message
+    counts = {}  # (room_id, sender_id) -> soni
+    for message in created:
+        current = latest.get(message.room_id)
+        if current is None or current.created_at <= message.created_at:
+            latest[message.room_id] = message
+        key = (message.room_id, message.sender_id)
+        counts[key] = counts.get(key, 0) + (0 if message.is_read else 1)
+
+    with transaction.atomic():
+        for room_id, message in latest.items():
+            write_room_touch(room_id, message_preview(message), message.created_at)
+        for (room_id, sender_id), count in counts.items():
+            if count:
+                RoomMembership.message_created(room_id, sender_id, count=count)
+
+    return created
+
+
+def record_removed(rows, reason):
+    """
+    Xabarlar o'chiriladi/arxivlanadi - delta sync uchun tombstone lar va
+    o'qilmaganlari RoomMembership counter laridan ayriladi
+
+    rows: [{'id', 'room_id', 'sender_id', 'is_read'}] (values() qatorlari),
+    o'chirishdan oldin, o'sha transaction ichida. Har room uchun bitta seq.
+    """
+    by_room = {}
+    unread = {}
+    for row in rows:
+        by_room.setdefault(row['room_id'], []).append(row['id'])
+        if not row['is_read']:
+            senders = unread.setdefault(row['room_id'], {})
+            senders[row['sender_id']] = senders.get(row['sender_id'], 0) + 1
+
+    tombstones = []
+    for room_id, message_ids in by_room.items():
+        seq = RoomSequence.next(room_id)
+        if room_id in unread:
+            RoomMembership.messages_removed(room_id, unread[room_id])
+        tombstones += [
+            MessageTombstone(room_id=room_id, message_id=message_id, reason=reason, seq=seq)
+            for message_id in message_ids
+        ]
+    MessageTombstone.objects.bulk_create(tombstones, batch_size=1000)
+    return tombstones
+
+
+def delete_messages(queryset):
+    """queryset.delete() o'rniga (admin bulk delete) - tombstone lar bilan"""
+    with transaction.atomic():
+        rows = queryset.select_for_update().values('id', 'room_id', 'sender_id', 'is_read')
+        record_removed(list(rows), MessageTombstone.Reason.DELETED)
+        return queryset.delete()
@@ -0,0 +1,35 @@
+from django.db.models.signals import m2m_changed
+from django.dispatch import receiver
+
+from .models import ChatRoom, RoomMembership
+
+
+@receiver(m2m_changed, sender=ChatRoom.participants.through)
+def sync_room_memberships(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    ChatRoom.participants o'zgarganda RoomMembership ni sinxronlash
+    """
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if action == 'post_clear':
+        if reverse:
+            RoomMembership.objects.filter(user_id=instance.pk).delete()
+        else:
+            RoomMembership.objects.filter(room_id=instance.pk).delete()
+        return
+
+    if reverse:
+        # user.chat_rooms.add(...) - instance user, pk_set roomlar
+        pairs = [(room_id, instance.pk) for room_id in pk_set]
+    else:
+        pairs = [(instance.pk, user_id) for user_id in pk_set]
+
+    if action == 'post_add':
+        RoomMembership.objects.bulk_create(
+            [RoomMembership(room_id=room_id, user_id=user_id) for room_id, user_id in pairs],
+            ignore_conflicts=True
+        )
+    else:
+        for room_id, user_id in pairs:
+            RoomMembership.objects.filter(room_id=room_id, user_id=user_id).delete()
@@ -0,0 +1,37 @@
+import logging
+
+from asgiref.sync import async_to_sync
+from celery import shared_task
+from channels.layers import get_channel_layer
+
+from .media import attachment_ready_event, process_attachment
+from .models import MessageAttachment
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(ignore_result=True)
+def process_chat_attachment(attachment_id):
+    """
+    Thumbnail/duration hisoblash va `attachment_ready` broadcast
+    Har bir attachment alohida task - Celery worker pool parallel ishlaydi.
+    """
+    attachment = MessageAttachment.objects.select_related('message').filter(id=attachment_id).first()
+    if attachment is None:
+        return
+
+    try:
+        if process_attachment(attachment):
+            # Payload o'zgardi - message seq oshadi (delta sync da qaytadi)
+            attachment.message.save(update_fields=['updated_at'])
+    except Exception as e:
+        # Buzilgan fayl - attachment thumbnail siz qoladi, ready baribir yuboriladi
+        logger.error(f"Attachment {attachment_id} processing failed: {e}")
+
+    try:
+        async_to_sync(get_channel_layer().group_send)(
+            f'chat_{attachment.message.room_id}',
+            attachment_ready_event(attachment)
+        )
+    except Exception as e:
+        logger.error(f"attachment_ready broadcast error: {e}")
@@ -1,3 +1,379 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from rest_framework.test import APIClient
+
+from .models import ChatRoom, Message, MessageAttachment, MessageTombstone, RoomMembership, RoomSequence
+from .services import bulk_import_messages, mark_messages_read
+from .tasks import process_chat_attachment
+
+User = get_user_model()
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class RoomMembershipTest(TestCase):
+
+    def setUp(self):
+        self.client_user = User.objects.create_user(phone='998901234567')
+        self.doctor = User.objects.create_user(phone='998901234568', role='doctor')
+        self.room, _ = ChatRoom.get_or_create_private_room(self.client_user, self.doctor)
+
+    def test_unread_counter_follows_messages(self):
+        for text in ('a', 'b', 'c'):
+            Message.objects.create(room=self.room, sender=self.client_user, text=text)
+
+        self.assertEqual(self.room.get_unread_count(self.doctor), 3)
+        self.assertEqual(self.room.get_unread_count(self.client_user), 0)
+
+        first = self.room.messages.order_by('id').first()
+        mark_messages_read(self.room.id, self.doctor, message_ids=[first.id])
+        self.assertEqual(self.room.get_unread_count(self.doctor), 2)
+
+        mark_messages_read(self.room.id, self.doctor)
+        self.assertEqual(self.room.get_unread_count(self.doctor), 0)
+
+    def test_mark_read_up_to(self):
+        messages = [
+            Message.objects.create(room=self.room, sender=self.client_user, text=text)
+            for text in ('a', 'b', 'c')
+        ]
+        Message.objects.create(room=self.room, sender=self.doctor, text='mine')
+
+        marked = mark_messages_read(self.room.id, self.doctor, up_to_id=messages[1].id)
+
+        self.assertEqual(marked, 2)
+        self.assertEqual(self.room.get_unread_count(self.doctor), 1)
+        self.assertEqual(self.room.get_unread_count(self.client_user), 1)
+
+    def test_concurrent_read_receipts_counted_once(self):
+        messages = [
+            Message.objects.create(room=self.room, sender=self.client_user, text=text)
+            for text in ('a', 'b')
+        ]
+        next_seq = RoomSequence.next
+        raced = []
+
+        def next_after_other_receipt(room_id):
+            # Ikkinchi read receipt room lock ni bizdan oldin olib, shu xabarni o'qib bo'lgan
+            if not raced:
+                raced.append(room_id)
+                mark_messages_read(room_id, self.doctor, message_ids=[messages[0].id])
+            return next_seq(room_id)
+
+        with mock.patch.object(RoomSequence, 'next', side_effect=next_after_other_receipt):
+            marked = mark_messages_read(self.room.id, self.doctor, message_ids=[messages[0].id])
+
+        self.assertEqual(marked, 0)
+        self.assertEqual(self.room.get_unread_count(self.doctor), 1)
+
+    def test_unread_increment_commits_with_message(self):
+        with mock.patch.object(RoomMembership, 'message_created', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                Message.objects.create(room=self.room, sender=self.client_user, text='salom')
+        # Counter yozilmadi - xabar ham yo'q (bitta transaction)
+        self.assertFalse(Message.objects.filter(room=self.room).exists())
+
+    @override_settings(CHAT_ROOM_TOUCH_INTERVAL=0)
+    def test_room_touch_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Message.objects.create(room=self.room, sender=self.client_user, text='salom')
+
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.last_message_text, 'salom')
+
+    @override_settings(CHAT_ROOM_TOUCH_INTERVAL=60)
+    def test_pending_touch_flushed_on_shutdown(self):
+        from celery.signals import worker_process_shutdown
+
+        from .services import room_touch_buffer
+
+        # Birinchi touch darhol yoziladi, keyingisi interval tugashini kutadi
+        room_touch_buffer.last_flush.pop(self.room.id, None)
+        with self.captureOnCommitCallbacks(execute=True):
+            Message.objects.create(room=self.room, sender=self.client_user, text='birinchi')
+        with self.captureOnCommitCallbacks(execute=True):
+            Message.objects.create(room=self.room, sender=self.client_user, text='oxirgi')
+        self.addCleanup(room_touch_buffer.flush)
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.last_message_text, 'birinchi')
+
+        worker_process_shutdown.send(sender=None, pid=0, exitcode=0)
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.last_message_text, 'oxirgi')
+
+    def test_bulk_import_messages(self):
+        bulk_import_messages([
+            Message(room=self.room, sender=self.client_user, text=str(i))
+            for i in range(5)
+        ])
+
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.last_message_text, '4')
+        self.assertEqual(self.room.get_unread_count(self.doctor), 5)
+
+    def test_room_list(self):
+        Message.objects.create(room=self.room, sender=self.client_user, text='salom')
+
+        api = APIClient()
+        api.force_authenticate(self.doctor)
+        response = api.get('/api/chat/rooms/')
+
+        data = response.json()
+        self.assertEqual(data['count'], 1)
+        room = data['results'][0]
+        self.assertEqual(room['unread_count'], 1)
+        self.assertEqual(room['last_message']['text'], 'salom')
+        self.assertEqual(room['other_user']['id'], self.client_user.id)
+
+        response = api.get('/api/chat/rooms/unread_total/')
+        self.assertEqual(response.data['unread_count'], 1)
+
+    def test_unread_counter_follows_deletes(self):
+        from chat import services
+
+        messages = [
+            Message.objects.create(room=self.room, sender=self.client_user, text=text)
+            for text in ('a', 'b', 'c', 'd')
+        ]
+        mark_messages_read(self.room.id, self.doctor, message_ids=[messages[0].id])
+        self.assertEqual(self.room.get_unread_count(self.doctor), 3)
+
+        # O'qilgan xabar o'chsa counter o'zgarmaydi
+        messages[0].delete()
+        self.assertEqual(self.room.get_unread_count(self.doctor), 3)
+        messages[1].delete()
+        self.assertEqual(self.room.get_unread_count(self.doctor), 2)
+
+        services.delete_messages(Message.objects.filter(id=messages[2].id))
+        self.assertEqual(self.room.get_unread_count(self.doctor), 1)
+        self.assertEqual(self.room.get_unread_count(self.client_user), 0)
+
+    def test_membership_removed_with_participant(self):
+        self.room.participants.remove(self.doctor)
+        self.assertFalse(RoomMembership.objects.filter(room=self.room, user=self.doctor).exists())
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class AttachmentPipelineTest(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        self.user = User.objects.create_user(phone='998901234567')
+        self.doctor = User.objects.create_user(phone='998901234568', role='doctor')
+        self.room, _ = ChatRoom.get_or_create_private_room(self.user, self.doctor)
+
+    def _jpeg(self, size=(1600, 1200)):
+        buffer = io.BytesIO()
+        Image.new('RGB', size, (200, 30, 30)).save(buffer, 'JPEG')
+        return SimpleUploadedFile('photo.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+    def test_upload_defers_processing_then_builds_thumbnail(self):
+        with self.settings(MEDIA_ROOT=self.media_root, CHAT_THUMBNAIL_SIZE=(320, 320)), \
+                mock.patch('chat.tasks.get_channel_layer') as get_layer, \
+                mock.patch('chat.serializers.process_chat_attachment.delay') as delay:
+            get_layer.return_value.group_send = mock.AsyncMock()
+            api = APIClient()
+            api.force_authenticate(self.user)
+
+            with self.captureOnCommitCallbacks(execute=True):
+                response = api.post('/api/chat/messages/', {
+                    'room': self.room.id, 'attachments': [self._jpeg()],
+                }, format='multipart')
+
+            self.assertEqual(response.status_code, 201, response.content)
+            attachment = MessageAttachment.objects.get()
+            self.assertFalse(attachment.thumbnail)
+            delay.assert_called_once_with(attachment.id)
+
+            process_chat_attachment(attachment.id)
+
+            attachment.refresh_from_db()
+            with Image.open(attachment.thumbnail.path) as thumb:
+                self.assertEqual(thumb.size, (320, 240))
+        event = get_layer.return_value.group_send.call_args.args[1]
+        self.assertEqual(event['type'], 'attachment_ready_handler')
+        self.assertTrue(event['attachment']['thumbnail_url'].endswith('_thumb.jpg'))
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class MessagePayloadTest(TestCase):
+
+    def setUp(self):
+        from client.models import ClientProfile
+
+        self.user = User.objects.create_user(phone='998901234567')
+        ClientProfile.objects.create(user=self.user, full_name='Ali Valiyev')
+        self.doctor = User.objects.create_user(phone='998901234568', role='doctor')
+        self.room, _ = ChatRoom.get_or_create_private_room(self.user, self.doctor)
+
+    def test_payload_shape_and_frames(self):
+        from config.fastjson import loads
+        from .payloads import chat_message_event, message_payload
+
+        first = Message.objects.create(room=self.room, sender=self.doctor, text='Salom')
+        reply = Message.objects.create(room=self.room, sender=self.user, text='Va alaykum', reply_to=first)
+
+        payload = message_payload(reply.id, viewer_id=self.user.id)
+        self.assertEqual(payload['sender']['full_name'], 'Ali Valiyev')
+        self.assertEqual(payload['sender']['first_name'], 'Ali Valiyev')
+        self.assertEqual(payload['reply_to']['sender']['full_name'], self.doctor.phone)
+        self.assertTrue(payload['is_mine'])
+
+        event = chat_message_event(payload)
+        self.assertEqual(event['sender_id'], self.user.id)
+        self.assertFalse(loads(event['frame_other'])['message']['is_mine'])
+        self.assertEqual(loads(event['frame_mine'])['message']['text'], 'Va alaykum')
+
+    def test_rest_user_matches_card(self):
+        from account.cards import user_card
+        from call.serializers import CallUserMiniSerializer
+        from stream.serializers import StreamUserMiniSerializer
+        from .serializers import UserMiniSerializer
+
+        # REST serializer lar va WS/call payload - bitta user card
+        for user in (self.user, self.doctor):
+            card = user_card(user.id)
+            for serializer_class in (UserMiniSerializer, CallUserMiniSerializer, StreamUserMiniSerializer):
+                data = serializer_class(User.objects.get(pk=user.pk)).data
+                self.assertEqual(dict(data), {field: card[field] for field in data})
+        self.assertEqual(UserMiniSerializer(self.user).data['first_name'], 'Ali Valiyev')
+
+    def test_messages_endpoint_queries_do_not_grow(self):
+        api = APIClient()
+        api.force_authenticate(self.user)
+        url = f'/api/chat/rooms/{self.room.id}/messages/'
+
+        Message.objects.create(room=self.room, sender=self.doctor, text='1')
+        Message.objects.create(room=self.room, sender=self.user, text='2')
+        api.get(url)  # user card lar cache ga tushadi
+        with CaptureQueriesContext(connection) as single:
+            api.get(url)
+
+        for i in range(10):
+            Message.objects.create(room=self.room, sender=self.user if i % 2 else self.doctor, text=str(i))
+        with CaptureQueriesContext(connection) as page:
+            response = api.get(url)
+
+        self.assertEqual(len(page), len(single))
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response.json()['count'], 12)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class DeltaSyncTest(TestCase):
+
+    def setUp(self):
+        self.client_user = User.objects.create_user(phone='998901234567')
+        self.doctor = User.objects.create_user(phone='998901234568', role='doctor')
+        self.room, _ = ChatRoom.get_or_create_private_room(self.client_user, self.doctor)
+
+    def delta(self, since, limit=200):
+        from call.models import Call
+        from .payloads import delta_items
+
+        return delta_items(Message.objects.filter(room=self.room), Call.objects.filter(room=self.room),
+                           since, limit, viewer_id=self.client_user.id,
+                           tombstone_qs=MessageTombstone.objects.filter(room=self.room))
+
+    def test_delta_contains_new_and_read_messages(self):
+        first = Message.objects.create(room=self.room, sender=self.doctor, text='a')
+        second = Message.objects.create(room=self.room, sender=self.doctor, text='b')
+        watermark = RoomSequence.current(self.room.id)
+        self.assertEqual(watermark, second.seq)
+        self.assertEqual(self.delta(watermark), [])
+
+        mark_messages_read(self.room.id, self.client_user, up_to_id=first.id)
+        third = Message.objects.create(room=self.room, sender=self.client_user, text='c')
+
+        items = self.delta(watermark)
+        self.assertEqual([item['id'] for item in items], [first.id, third.id])
+        self.assertTrue(items[0]['is_read'])
+        self.assertEqual(items[-1]['seq'], RoomSequence.current(self.room.id))
+
+    def test_deleted_message_leaves_tombstone(self):
+        message = Message.objects.create(room=self.room, sender=self.client_user, text='a')
+        watermark = RoomSequence.current(self.room.id)
+
+        api = APIClient()
+        api.force_authenticate(self.client_user)
+        with mock.patch('chat.views.get_channel_layer') as get_layer:
+            get_layer.return_value.group_send = mock.AsyncMock()
+            self.assertEqual(api.delete(f'/api/chat/messages/{message.id}/').status_code, 204)
+        event = get_layer.return_value.group_send.call_args.args[1]
+        self.assertEqual(event['type'], 'message_deleted_handler')
+
+        items = self.delta(watermark)
+        self.assertEqual([(item['item_type'], item['id'], item['reason']) for item in items],
+                         [('deleted', message.id, 'deleted')])
+        self.assertEqual(items[0]['seq'], RoomSequence.current(self.room.id))
+
+    def test_large_delta_falls_back_to_history(self):
+        for i in range(5):
+            Message.objects.create(room=self.room, sender=self.doctor, text=str(i))
+
+        self.assertIsNone(self.delta(1, limit=3))
+        self.assertEqual(len(self.delta(2, limit=3)), 3)
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    ARCHIVE_RETENTION_DAYS={'chat.Message': 30},
+)
+class ArchiveTest(TestCase):
+
+    def setUp(self):
+        self.client_user = User.objects.create_user(phone='998901234567')
+        self.doctor = User.objects.create_user(phone='998901234568', role='doctor')
+        self.room, _ = ChatRoom.get_or_create_private_room(self.client_user, self.doctor)
+
+    def test_old_messages_move_to_archive_and_read_through(self):
+        from datetime import timedelta
+
+        from django.utils import timezone
+
+        from config import archive
+        from config.models import ArchiveChunk
+        from .payloads import archived_items
+
+        old = [Message.objects.create(room=self.room, sender=self.doctor, text=f'eski {i}') for i in range(3)]
+        MessageAttachment.objects.create(message=old[0], file='chat_files/a.pdf', file_type='file',
+                                         file_name='a.pdf', size=10)
+        reply = Message.objects.create(room=self.room, sender=self.client_user, text='eski reply', reply_to=old[0])
+        kept = Message.objects.create(room=self.room, sender=self.client_user, text='yangi', reply_to=old[2])
+
+        month_ago = timezone.now() - timedelta(days=40)
+        for i, message in enumerate(Message.objects.exclude(id=kept.id).order_by('id')):
+            Message.objects.filter(id=message.id).update(created_at=month_ago + timedelta(minutes=i))
+
+        archived = archive.archive_model(archive.POLICIES['chat.Message'])
+
+        # old[2] ga yangi xabar reply qilgan - DB da qoladi
+        self.assertEqual(archived, 3)
+        self.assertEqual(set(Message.objects.values_list('id', flat=True)), {old[2].id, kept.id})
+        self.assertEqual(ArchiveChunk.objects.filter(partition=self.room.id).count(), 1)
+
+        items = archived_items(self.room.id, timezone.now(), 10, self.client_user.id)
+        self.assertEqual([item['text'] for item in items], ['eski 0', 'eski 1', 'eski reply'])
+        self.assertTrue(all(item['archived'] for item in items))
+        self.assertEqual(items[0]['attachments'][0]['file_name'], 'a.pdf')
+        self.assertEqual(items[2]['reply_to']['text'], 'eski 0')
+        self.assertEqual(len(archived_items(self.room.id, month_ago + timedelta(minutes=1), 10, None)), 1)
+
+        # O'qilmagan arxivlangan xabarlar counter dan chiqdi (DB da o'qilmagani - old[2] va kept)
+        self.assertEqual(self.room.get_unread_count(self.client_user), 1)
+        self.assertEqual(self.room.get_unread_count(self.doctor), 1)
+
+        # Delta sync dagi client lar uchun - har arxivlangan xabarga tombstone, room ga bitta seq
+        tombstones = MessageTombstone.objects.filter(room=self.room)
+        self.assertEqual(set(tombstones.values_list('message_id', 'reason')),
+                         {(old[0].id, 'archived'), (old[1].id, 'archived'), (reply.id, 'archived')})
+        self.assertEqual(set(tombstones.values_list('seq', flat=True)), {RoomSequence.current(self.room.id)})
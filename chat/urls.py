@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ChatRoomViewSet, MessageViewSet, DoctorChatRoomViewSet
+from .views import AsyncChatRoomListView, ChatRoomViewSet, MessageViewSet, DoctorChatRoomViewSet
 
 router = DefaultRouter()
 router.register(r'rooms', ChatRoomViewSet, basename='chatroom')
@@ -9,5 +9,7 @@ router.register(r'doctor/chat-rooms', DoctorChatRoomViewSet, basename='doctor-ch
 
 
 urlpatterns = [
+    # Room list - async (POST create ham shu yerdan viewset ga)
+    path('rooms/', AsyncChatRoomListView.as_view()),
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -1,17 +1,27 @@
 from asgiref.sync import async_to_sync
+from django.http import HttpResponse
 from channels.layers import get_channel_layer
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.pagination import PageNumberPagination
-from django.db.models import Max
-from django.utils import timezone
-from .models import ChatRoom, Message
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery, Sum
+from config.aio import AsyncReadView, apaginate, paginated, run_sync
+from config.fastjson import dumps
+from .models import ChatRoom, Message, RoomMembership, RoomSequence
+from .payloads import MESSAGE_COLUMNS, build_messages, chat_message_event, message_deleted_event, message_payload
 from .serializers import (
     ChatRoomSerializer, ChatRoomCreateSerializer,
     MessageSerializer, MessageCreateSerializer
 )
+from .services import get_last_messages, mark_messages_read, read_receipt_event
+
+
+def json_response(data, status=200):
+    """Oldindan orjson bilan encode qilingan body (DRF renderer siz)"""
+    return HttpResponse(dumps(data), status=status, content_type='application/json')
 
 
 class MessagePagination(PageNumberPagination):
@@ -27,16 +37,40 @@ class ChatRoomViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """
         ✅ OPTIMIZED: client_profile va doctor ham select_related
+
+        Room list bitta indexed query: membership (unread counter) join,
+        denormalized last_message_time bo'yicha sort, oxirgi xabar id
+        subquery orqali - per-room COUNT/Max yo'q.
         """
+        user = self.request.user
+        last_message_id = Message.objects.filter(
+            room=OuterRef('pk')
+        ).order_by('-created_at').values('id')[:1]
+
         return ChatRoom.objects.filter(
-            participants=self.request.user
+            memberships__user=user
         ).prefetch_related(
             'participants',
             'participants__client_profile',
             'participants__doctor',
         ).annotate(
-            last_message_time_annotated=Max('messages__created_at')
-        ).order_by('-last_message_time_annotated').distinct()
+            unread_count=F('memberships__unread_count'),
+            last_message_id=Subquery(last_message_id),
+        ).order_by(F('last_message_time').desc(nulls_last=True), '-updated_at')
+
+    def list(self, request, *args, **kwargs):
+        """Room list - oxirgi xabarlar bitta query bilan"""
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        rooms = page if page is not None else list(queryset)
+
+        context = self.get_serializer_context()
+        context['last_messages'] = get_last_messages(rooms, request.user.id)
+        serializer = ChatRoomSerializer(rooms, many=True, context=context)
+
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
 
     def get_serializer_class(self):
         if self.action == 'create':
@@ -63,26 +97,21 @@ class ChatRoomViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
 
-        messages = room.messages.select_related(
-            'sender',
-            'sender__client_profile',
-            'sender__doctor',
-        ).prefetch_related(
-            'attachments',
-            'reply_to__sender',
-            'reply_to__sender__client_profile',
-            'reply_to__sender__doctor'
-        )
-
+        # chat.payloads - tuple lar ustida, user card lar cache dan
         paginator = MessagePagination()
-        page = paginator.paginate_queryset(messages, request)
+        page = paginator.paginate_queryset(room.messages.values_list(*MESSAGE_COLUMNS), request)
 
-        serializer = MessageSerializer(page, many=True, context={'request': request})
-        return paginator.get_paginated_response(serializer.data)
+        payloads = build_messages(page, viewer_id=request.user.id)
+        return json_response(paginator.get_paginated_response(payloads).data)
 
     @action(detail=True, methods=['post'])
     def mark_as_read(self, request, pk=None):
-        """Chatdagi barcha xabarlarni o'qilgan deb belgilash"""
+        """
+        Chatdagi xabarlarni o'qilgan deb belgilash
+
+        Body (optional): {"up_to_message_id": 123} - faqat shu id gacha.
+        ChatConsumer read_receipt bilan bir xil yo'l: bitta UPDATE + bitta broadcast.
+        """
         room = self.get_object()
 
         if not room.participants.filter(id=request.user.id).exists():
@@ -91,14 +120,25 @@ class ChatRoomViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
 
-        updated = room.messages.filter(
-            is_read=False
-        ).exclude(
-            sender=request.user
-        ).update(
-            is_read=True,
-            read_at=timezone.now()
-        )
+        up_to_id = request.data.get('up_to_message_id')
+        try:
+            up_to_id = int(up_to_id) if up_to_id is not None else None
+        except (TypeError, ValueError):
+            return Response(
+                {'detail': 'up_to_message_id noto\'g\'ri'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        updated = mark_messages_read(room.id, request.user, up_to_id=up_to_id)
+
+        if updated:
+            try:
+                async_to_sync(get_channel_layer().group_send)(
+                    f'chat_{room.id}',
+                    read_receipt_event(request.user.id, up_to_id, updated)
+                )
+            except Exception as e:
+                print(f"WebSocket broadcast error: {e}")
 
         return Response({
             'success': True,
@@ -108,14 +148,33 @@ class ChatRoomViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def unread_total(self, request):
         """Umumiy o'qilmagan xabarlar soni"""
-        total = Message.objects.filter(
-            room__participants=request.user,
-            is_read=False
-        ).exclude(
-            sender=request.user
-        ).count()
+        total = RoomMembership.objects.filter(
+            user=request.user
+        ).aggregate(total=Sum('unread_count'))['total']
 
-        return Response({'unread_count': total})
+        return Response({'unread_count': total or 0})
+
+
+class AsyncChatRoomListView(AsyncReadView):
+    """
+    ChatRoomViewSet.list ning async varianti (GET /api/chat/rooms/), POST create - viewset ga
+
+    Serializer user card lar uchun sync cache ishlatadi - oxirgi xabarlar
+    query si bilan bitta hop da.
+    """
+    permission_classes = [IsAuthenticated]
+    fallback = staticmethod(ChatRoomViewSet.as_view({'get': 'list', 'post': 'create'}))
+
+    async def data(self, request):
+        view = ChatRoomViewSet(request=request, action='list', format_kwarg=None, args=(), kwargs={})
+        queryset = view.filter_queryset(view.get_queryset())
+        paginator, rooms = await apaginate(request, queryset, view.pagination_class)
+        return paginated(paginator, await run_sync(self.serialize, view, rooms))
+
+    def serialize(self, view, rooms):
+        context = view.get_serializer_context()
+        context['last_messages'] = get_last_messages(rooms, view.request.user.id)
+        return ChatRoomSerializer(rooms, many=True, context=context).data
 
 
 class MessageViewSet(viewsets.ModelViewSet):
@@ -144,129 +203,39 @@ class MessageViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         message = serializer.save()
 
-        #  Message data tayyorlash (ABSOLUTE URLs bilan)
-        message_data = self._prepare_message_data(message, request)
-
-        #  WebSocket broadcast
-        channel_layer = get_channel_layer()
-        room_group_name = f'chat_{message.room.id}'
+        # Bitta payload - response va WebSocket broadcast uchun (chat.payloads)
+        payload = message_payload(message.id, viewer_id=request.user.id)
 
         try:
-            async_to_sync(channel_layer.group_send)(
-                room_group_name,
-                {
-                    'type': 'chat_message_handler',
-                    'message': message_data
-                }
+            async_to_sync(get_channel_layer().group_send)(
+                f'chat_{message.room_id}',
+                chat_message_event(payload)
             )
         except Exception as e:
             print(f"WebSocket broadcast error: {e}")
 
-        return Response(message_data, status=status.HTTP_201_CREATED)
-
-    def _get_user_full_name(self, user):
-        """
-        User ning to'liq ismini olish
-
-        Priority:
-        - Client: client_profile.full_name
-        - Doctor: doctor.full_name
-        - Fallback: phone
-        """
-        # Client
-        if hasattr(user, 'client_profile'):
-            try:
-                full_name = (user.client_profile.full_name or '').strip()
-                if full_name:
-                    return full_name
-            except:
-                pass
-
-        # Doctor
-        if hasattr(user, 'doctor'):
-            try:
-                full_name = (user.doctor.full_name or '').strip()
-                if full_name:
-                    return full_name
-            except:
-                pass
-
-        # Fallback
-        return user.phone or ''
+        return json_response(payload, status=status.HTTP_201_CREATED)
 
-    def _prepare_message_data(self, message, request):
-        """
-        Message obyektini dict ga aylantirish
-        ABSOLUTE URLs bilan
+    def perform_destroy(self, instance):
+        # Message.delete() tombstone yozadi - onlayn client larga ham darhol
+        message_id, room_id = instance.id, instance.room_id
+        with transaction.atomic():
+            instance.delete()
+            seq = RoomSequence.current(room_id)
 
-         IMPORTANT: Keys saqlanadi (first_name, last_name)
-         Value full_name dan olinadi
-         Flutter kodlari buzilmaydi
-        """
-        # Sender full_name olish
-        sender_full_name = self._get_user_full_name(message.sender)
-
-        data = {
-            'id': message.id,
-            'room': message.room.id,
-            'sender': {
-                'id': message.sender.id,
-                'phone': message.sender.phone,
-                'first_name': sender_full_name,  # Key o'zgarmadi, value full_name
-                'last_name': '',  # Key o'zgarmadi, bo'sh string
-                'role': message.sender.role,
-            },
-            'message_type': message.message_type,
-            'text': message.text,
-            'is_read': message.is_read,
-            'read_at': message.read_at.isoformat() if message.read_at else None,
-            'created_at': message.created_at.isoformat(),
-            'updated_at': message.updated_at.isoformat(),
-            'is_mine': message.sender.id == request.user.id,
-            'attachments': [],
-            'reply_to': None
-        }
-
-        # Attachments with ABSOLUTE URLs
-        for att in message.attachments.all():
-            attachment_data = {
-                'id': att.id,
-                'file_type': att.file_type,
-                'file_name': att.file_name,
-                'size': att.size,
-                'duration': att.duration,
-                'file_url': request.build_absolute_uri(att.file.url) if att.file else None,
-                'thumbnail_url': request.build_absolute_uri(att.thumbnail.url) if att.thumbnail else None,
-            }
-            data['attachments'].append(attachment_data)
-
-        # Reply to
-        if message.reply_to:
-            # Reply sender full_name
-            reply_sender_full_name = self._get_user_full_name(message.reply_to.sender)
-
-            data['reply_to'] = {
-                'id': message.reply_to.id,
-                'sender': {
-                    'id': message.reply_to.sender.id,
-                    'phone': message.reply_to.sender.phone,
-                    'first_name': reply_sender_full_name,  # Key o'zgarmadi
-                },
-                'text': message.reply_to.text[:100] if message.reply_to.text else '',
-                'message_type': message.reply_to.message_type,
-            }
-
-        return data
+        try:
+            async_to_sync(get_channel_layer().group_send)(f'chat_{room_id}', message_deleted_event(message_id, seq))
+        except Exception as e:
+            print(f"WebSocket broadcast error: {e}")
 
     @action(detail=True, methods=['post'])
     def mark_read(self, request, pk=None):
         """Bitta xabarni o'qilgan deb belgilash"""
         message = self.get_object()
 
-        if message.sender != request.user and not message.is_read:
-            message.is_read = True
-            message.read_at = timezone.now()
-            message.save(update_fields=['is_read', 'read_at'])
+        if message.sender_id != request.user.id and not message.is_read:
+            mark_messages_read(message.room_id, request.user, message_ids=[message.id])
+            message.refresh_from_db(fields=['is_read', 'read_at'])
 
         serializer = self.get_serializer(message)
         return Response(serializer.data)
@@ -245,10 +245,9 @@ class ClientConsultationViewSet(viewsets.ReadOnlyModelViewSet):
         return ConsultationRequest.objects.filter(
             client=user
         ).select_related(
-            'doctor',
             'availability_slot',
             'chat_room'
-        ).order_by('-created_at')
+        ).order_by('-created_at')  # doctor profillari - IdentityLoader (serializer)
 
     @action(detail=False, methods=['get'])
     def active(self, request):
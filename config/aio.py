@@ -0,0 +1,253 @@
+"""
+Async view lar uchun helper lar
+
+Django 4.0 da async ORM yo'q (aget/acount 4.1 da, aiterator 4.2 da keladi).
+aget/acount/alist - shu queryset metodlari o'rnida: har biri bitta executor
+hop (4.1+ dagi kabi), upgrade dan keyin queryset.aget(...) ga almashtiriladi.
+
+AsyncReadView da thread faqat SQL va serializer (lazy relation, sync cache)
+vaqtida band - serializer doim run_sync ichida; cache, javobni orjson bilan
+render qilish event loop da.
+Thread bandligi (hop soni, busy vaqt) executor_stats() da - benchmark_async_views.
+"""
+import asyncio
+import functools
+import threading
+import time
+import weakref
+
+import redis.asyncio
+from asgiref.sync import AsyncToSync, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.decorators import classonlymethod
+from django.views import View
+from rest_framework.permissions import AllowAny
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
+
+from .cache import RedisCache
+from .fastjson import ORJSONRenderer, dumps
+from .metrics import record_cache
+from .serving import database_sync_to_async
+
+_stats_lock = threading.Lock()
+_stats = {'hops': 0, 'busy': 0.0}
+
+
+def executor_stats(reset=False):
+    """{'hops': executor ga o'tishlar soni, 'busy': thread larda o'tgan vaqt (s)}"""
+    with _stats_lock:
+        stats = dict(_stats)
+        if reset:
+            _stats.update(hops=0, busy=0.0)
+    return stats
+
+
+def timed(func):
+    """func ni executor_stats() ga hisoblab bajarish (thread ichida chaqiriladi)"""
+    def inner(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            busy = time.perf_counter() - started
+            with _stats_lock:
+                _stats['hops'] += 1
+                _stats['busy'] += busy
+    return inner
+
+
+async def run_sync(func, *args, **kwargs):
+    """
+    Sync kod (ORM) ni executor da bajarish
+
+    Sync koddan async_to_sync orqali kelgan bo'lsa (test client, management
+    command) - o'sha thread va uning connection/tranzaksiyasi ishlatiladi.
+    Aks holda ASGI_THREADS o'lchamli executor, connection lar har hop dan
+    keyin pool ga qaytadi (config.serving.database_sync_to_async).
+    """
+    if getattr(AsyncToSync.executors, 'current', None) is not None:
+        return await sync_to_async(timed(func), thread_sensitive=True)(*args, **kwargs)
+    return await database_sync_to_async(timed(func))(*args, **kwargs)
+
+
+async def aget(queryset, **kwargs):
+    return await run_sync(queryset.get, **kwargs)
+
+
+async def acount(queryset):
+    return await run_sync(queryset.count)
+
+
+async def alist(queryset):
+    """list(queryset) - select_related/prefetch_related ham shu hop da"""
+    return await run_sync(list, queryset)
+
+
+class AsyncCache:
+    """
+    Redis ga event loop dan to'g'ridan-to'g'ri (redis.asyncio), raw bytes
+
+    Key lar Django cache bilan bir xil (make_key) - sync koddan
+    cache.delete(key) bilan invalidate qilsa bo'ladi. Redis bo'lmagan
+    backend da (test, locmem) Django cache async API ishlatiladi.
+    """
+
+    def __init__(self, alias='default'):
+        self.alias = alias
+        self.clients = weakref.WeakKeyDictionary()
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def client(self):
+        if not isinstance(self.cache, RedisCache):
+            return None
+
+        # redis.asyncio connection lari loop ga bog'langan
+        loop = asyncio.get_running_loop()
+        client = self.clients.get(loop)
+        if client is None:
+            location = settings.CACHES[self.alias]['LOCATION']
+            client = self.clients[loop] = redis.asyncio.Redis.from_url(
+                location[0] if isinstance(location, (list, tuple)) else location
+            )
+        return client
+
+    async def get(self, key):
+        client = self.client()
+        if client is None:
+            return await self.cache.aget(key)
+        value = await client.get(self.cache.make_key(key))
+        record_cache(value is not None, value is None)
+        return value
+
+    async def set(self, key, value, timeout):
+        client = self.client()
+        if client is None:
+            return await self.cache.aset(key, value, timeout)
+        await client.set(self.cache.make_key(key), value, ex=timeout)
+
+
+acache = AsyncCache()
+
+
+async def apaginate(request, queryset, pagination_class=None):
+    """
+    LimitOffsetPagination ning async varianti: (paginator, rows)
+
+    paginator None bo'lsa - limit berilmagan, rows butun queryset.
+    """
+    paginator = (pagination_class or api_settings.DEFAULT_PAGINATION_CLASS)()
+    limit = paginator.get_limit(request)
+    if limit is None:
+        return None, await alist(queryset)
+
+    paginator.request = request
+    paginator.limit = limit
+    paginator.offset = paginator.get_offset(request)
+    paginator.count = await acount(queryset)
+    if paginator.count == 0 or paginator.offset > paginator.count:
+        return paginator, []
+    return paginator, await alist(queryset[paginator.offset:paginator.offset + paginator.limit])
+
+
+def paginated(paginator, data):
+    return paginator.get_paginated_response(data).data if paginator else data
+
+
+class AsyncReadView(View):
+    """
+    Hot read endpoint lar uchun async GET
+
+    - DRF authentication/permission/throttle - bitta hop da (JWT user query)
+    - data() - async, SQL aget/acount/alist/run_sync orqali
+    - javob orjson bilan event loop da render qilinadi
+    - cache_timeout - user ga bog'liq bo'lmagan javob shuncha soniya
+      AsyncCache da, hit bo'lsa thread ga umuman o'tilmaydi
+    - GET dan boshqa method lar fallback (sync DRF view) ga:
+      fallback = staticmethod(ViewSet.as_view({...}))
+    """
+    authentication_classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    permission_classes = [AllowAny]
+    throttle_classes = api_settings.DEFAULT_THROTTLE_CLASSES
+    cache_timeout = None
+    fallback = None
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+
+        # Django 4.0 class-based view ni async deb tanimaydi (4.1 dan view_is_async)
+        async def async_view(request, *args, **kwargs):
+            response = view(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+            return response
+
+        functools.update_wrapper(async_view, view)
+        # DRF APIView kabi - JWT, session emas
+        async_view.csrf_exempt = True
+        return async_view
+
+    def http_method_not_allowed(self, request, *args, **kwargs):
+        if self.fallback is None:
+            return super().http_method_not_allowed(request, *args, **kwargs)
+
+        async def fallback():
+            return await run_sync(self.render_fallback, request, *args, **kwargs)
+        return fallback()
+
+    def render_fallback(self, request, *args, **kwargs):
+        response = self.fallback(request, *args, **kwargs)
+        return response.render() if hasattr(response, 'render') else response
+
+    def check_request(self, request, *args, **kwargs):
+        """DRF APIView.initial() - (drf request, None) yoki (None, xato javobi)"""
+        view = APIView(
+            authentication_classes=self.authentication_classes,
+            permission_classes=self.permission_classes,
+            throttle_classes=self.throttle_classes,
+        )
+        view.args, view.kwargs, view.headers = args, kwargs, {}
+        drf_request = view.request = view.initialize_request(request, *args, **kwargs)
+        try:
+            view.initial(drf_request, *args, **kwargs)
+        except Exception as exc:
+            response = view.finalize_response(drf_request, view.handle_exception(exc), *args, **kwargs)
+            return None, response.render()
+        return drf_request, None
+
+    def cache_key(self, request):
+        return f'aio:view:{request.get_full_path()}'
+
+    async def get(self, request, *args, **kwargs):
+        # Ochiq endpoint da cache auth dan oldin tekshiriladi, aks holda auth dan keyin
+        public = self.permission_classes == [AllowAny]
+        if self.cache_timeout and public:
+            body = await acache.get(self.cache_key(request))
+            if body is not None:
+                return self.response(body)
+
+        drf_request, error = await run_sync(self.check_request, request, *args, **kwargs)
+        if error is not None:
+            return error
+
+        if self.cache_timeout and not public:
+            body = await acache.get(self.cache_key(request))
+            if body is not None:
+                return self.response(body)
+
+        body = dumps(await self.data(drf_request, *args, **kwargs))
+        if self.cache_timeout:
+            await acache.set(self.cache_key(request), body, self.cache_timeout)
+        return self.response(body)
+
+    def response(self, body):
+        return HttpResponse(body, content_type=ORJSONRenderer.media_type)
+
+    async def data(self, request, *args, **kwargs):
+        raise NotImplementedError
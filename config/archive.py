@@ -0,0 +1,231 @@
+"""
+Tiered storage - eski qatorlarni cold storage ga (ArchiveChunk) ko'chirish
+
+ARCHIVE_RETENTION_DAYS dagi har bir model uchun N kundan eski qatorlar
+batch-batch o'qiladi, partition (room_id, call_id, ...) bo'yicha
+guruhlanib zlib + JSONL chunk sifatida yoziladi va asosiy jadvaldan
+o'chiriladi. Settings da yo'q model arxivlanmaydi.
+
+read() - scroll-back uchun read-through: partition dagi chunk lar
+yangidan eskiga qarab o'qiladi (chat.payloads.archived_items).
+"""
+import logging
+import zlib
+from collections import defaultdict
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.db import models, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .fastjson import dumps, loads
+from .models import ArchiveChunk
+
+logger = logging.getLogger(__name__)
+
+
+class ArchivePolicy:
+    """Model uchun arxiv qoidasi. Kun soni settings.ARCHIVE_RETENTION_DAYS dan"""
+
+    def __init__(self, label, date_field, partition_field=None):
+        self.label = label
+        self.date_field = date_field
+        self.partition_field = partition_field
+
+    @property
+    def model(self):
+        return apps.get_model(self.label)
+
+    @property
+    def days(self):
+        return getattr(settings, 'ARCHIVE_RETENTION_DAYS', {}).get(self.label)
+
+    def queryset(self, cutoff):
+        return self.model.objects.filter(**{f'{self.date_field}__lt': cutoff})
+
+    def protected(self, ids):
+        """Batch dan chiqarib qoldiriladigan id lar (hali kerak bo'lgan qatorlar)"""
+        return set()
+
+    def dump(self, rows):
+        """values() dict lariga qo'shimcha ma'lumot qo'shish (o'chiriladigan bog'liq qatorlar)"""
+        return rows
+
+    def removed(self, rows):
+        """Qatorlar o'chirilishidan oldin, o'sha transaction da (tombstone, counter lar)"""
+
+    def restore(self, row):
+        """JSON dan qaytgan qatorda datetime larni tiklash"""
+        for field in self.model._meta.concrete_fields:
+            if isinstance(field, models.DateTimeField) and row.get(field.attname):
+                row[field.attname] = parse_datetime(row[field.attname])
+        return row
+
+
+class MessageArchivePolicy(ArchivePolicy):
+
+    def protected(self, ids):
+        # Arxivlanmaydigan xabar reply qilgan xabar qoladi (reply_to SET_NULL bo'lmasin)
+        from chat.models import Message
+
+        return set(
+            Message.objects.filter(reply_to_id__in=ids).exclude(id__in=ids).values_list('reply_to_id', flat=True)
+        )
+
+    def dump(self, rows):
+        # Attachment lar CASCADE bilan o'chadi - xabar bilan birga saqlanadi
+        from chat.models import Message, MessageAttachment
+
+        attachments = defaultdict(list)
+        for attachment in MessageAttachment.objects.filter(message_id__in=[row['id'] for row in rows]).values():
+            attachments[attachment['message_id']].append(attachment)
+
+        by_id = {row['id']: row for row in rows}
+        missing = {row['reply_to_id'] for row in rows if row['reply_to_id'] and row['reply_to_id'] not in by_id}
+        replies = {
+            reply['id']: reply
+            for reply in Message.objects.filter(id__in=missing).values('id', 'sender_id', 'text', 'message_type')
+        }
+        replies.update(by_id)
+
+        for row in rows:
+            row['attachments'] = attachments.get(row['id'], [])
+            reply = replies.get(row['reply_to_id'])
+            row['reply'] = {
+                'sender_id': reply['sender_id'], 'text': reply['text'], 'message_type': reply['message_type'],
+            } if reply else None
+        return rows
+
+    def removed(self, rows):
+        # Delta sync dagi client lar xabar arxivga ketganini bilsin
+        from chat.models import MessageTombstone
+        from chat.services import record_removed
+
+        record_removed(rows, MessageTombstone.Reason.ARCHIVED)
+
+
+POLICIES = {
+    policy.label: policy for policy in (
+        MessageArchivePolicy('chat.Message', 'created_at', 'room_id'),
+        ArchivePolicy('chat.MessageTombstone', 'created_at', 'room_id'),
+        ArchivePolicy('call.CallEvent', 'timestamp', 'call_id'),
+        ArchivePolicy('stream.StreamChat', 'created_at', 'stream_id'),
+        ArchivePolicy('partner_auth.PartnerRequest', 'created_at', 'partner_id'),
+    )
+}
+
+
+def encode(rows):
+    return zlib.compress(b'\n'.join(dumps(row) for row in rows), 6)
+
+
+def decode(data):
+    return [loads(line) for line in zlib.decompress(bytes(data)).split(b'\n') if line]
+
+
+def archive_model(policy, now=None, batch_size=2000, dry_run=False):
+    """
+    policy.days dan eski qatorlarni ko'chirish. Returns arxivlangan qatorlar soni
+
+    Har bir batch alohida transaction: chunk yoziladi va qatorlar o'chiriladi.
+    """
+    if not policy.days:
+        return 0
+
+    model = policy.model
+    cutoff = (now or timezone.now()) - timedelta(days=policy.days)
+    queryset = policy.queryset(cutoff).order_by('pk')
+
+    archived = 0
+    last_pk = None
+    while True:
+        batch = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        ids = list(batch.values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            break
+        last_pk = ids[-1]
+
+        protected = policy.protected(ids)
+        ids = [pk for pk in ids if pk not in protected]
+        if dry_run:
+            archived += len(ids)
+            continue
+        if not ids:
+            continue
+
+        with transaction.atomic():
+            rows = policy.dump(list(model.objects.filter(pk__in=ids).order_by('pk').values()))
+
+            partitions = defaultdict(list)
+            for row in rows:
+                partitions[row.get(policy.partition_field) if policy.partition_field else None].append(row)
+
+            ArchiveChunk.objects.bulk_create([
+                ArchiveChunk(
+                    model_label=policy.label,
+                    partition=partition,
+                    first_id=part[0]['id'],
+                    last_id=part[-1]['id'],
+                    started_at=min(row[policy.date_field] for row in part),
+                    ended_at=max(row[policy.date_field] for row in part),
+                    row_count=len(part),
+                    data=encode(part),
+                )
+                for partition, part in partitions.items()
+            ])
+            policy.removed(rows)
+            model.objects.filter(pk__in=ids).delete()
+
+        archived += len(rows)
+
+    logger.info(f"Archived {archived} {policy.label} rows older than {cutoff:%Y-%m-%d}")
+    return archived
+
+
+def archive_all(labels=None, **kwargs):
+    """{label: soni} - ARCHIVE_RETENTION_DAYS dagi barcha modellar"""
+    return {
+        label: archive_model(policy, **kwargs)
+        for label, policy in POLICIES.items()
+        if labels is None or label in labels
+    }
+
+
+def read(label, partition, before=None, limit=50):
+    """
+    Read-through: partition dagi arxiv qatorlari, yangidan eskiga, before dan oldingi
+
+    Chunk lar ended_at bo'yicha kamayish tartibida - limit yetgach to'xtaydi.
+    """
+    policy = POLICIES[label]
+    chunks = ArchiveChunk.objects.filter(model_label=label, partition=partition)
+    if before is not None:
+        chunks = chunks.filter(started_at__lt=before)
+
+    # Avval faqat metadata - data faqat kerak bo'lgan chunk lar uchun o'qiladi
+    chunks = list(chunks.order_by('-ended_at').values_list('id', 'ended_at'))
+
+    rows = []
+    for index, (chunk_id, _) in enumerate(chunks):
+        data = ArchiveChunk.objects.values_list('data', flat=True).get(id=chunk_id)
+        for row in decode(data):
+            row = policy.restore(row)
+            if before is None or row[policy.date_field] < before:
+                rows.append(row)
+        rows.sort(key=lambda row: (row[policy.date_field], row['id']), reverse=True)
+
+        # Qolgan chunk larda bundan yangi qator yo'q - yetarli bo'lsa to'xtaymiz
+        next_end = chunks[index + 1][1] if index + 1 < len(chunks) else None
+        if len(rows) >= limit and (next_end is None or rows[limit - 1][policy.date_field] >= next_end):
+            break
+
+    return rows[:limit]
+
+
+def has_archived(label, partition, before=None):
+    chunks = ArchiveChunk.objects.filter(model_label=label, partition=partition)
+    if before is not None:
+        chunks = chunks.filter(started_at__lt=before)
+    return chunks.exists()
@@ -18,15 +18,23 @@ from channels.routing import ProtocolTypeRouter, URLRouter
 from chat.chatmiddleware import TokenAuthMiddlewareStack
 from chat.routing import websocket_urlpatterns as chat_ws_patterns
 from stream.routing import websocket_urlpatterns as stream_ws_patterns
-
-application = ProtocolTypeRouter({
-    "http": get_asgi_application(),
-    "websocket": TokenAuthMiddlewareStack(
-        URLRouter(
-            chat_ws_patterns + stream_ws_patterns
-        )
-    ),
-})
+from config.serving import ThreadPoolMiddleware
+
+http_routes = get_asgi_application()
+websocket_routes = TokenAuthMiddlewareStack(
+    URLRouter(
+        chat_ws_patterns + stream_ws_patterns
+    )
+)
+
+application = ThreadPoolMiddleware(ProtocolTypeRouter({
+    "http": http_routes,
+    "websocket": websocket_routes,
+}))
+
+# manage.py serve --ws-port: HTTP va WebSocket alohida worker pool larda
+http_application = ThreadPoolMiddleware(ProtocolTypeRouter({"http": http_routes}))
+websocket_application = ThreadPoolMiddleware(ProtocolTypeRouter({"websocket": websocket_routes}))
 
 
 
@@ -0,0 +1,421 @@
+"""
+Cache backend lar: hit/miss config.metrics ga yoziladi
+
+settings.CACHES da django_redis / locmem o'rniga shu class lar.
+
+TieredRedisCache - Redis (L2) oldida process ichidagi L1 (cachetools.TTLCache).
+L1 faqat OPTIONS['TIERS'] dagi prefix lar uchun, har biriga o'z policy si:
+
+    'TIERS': {
+        'partner:': {'timeout': 60, 'maxsize': 1000},
+    }
+
+timeout - L1 da necha soniya turadi (L2 timeout dan qisqa bo'lishi kerak).
+Policy si yo'q key lar (counter, throttle, viewer set) to'g'ridan-to'g'ri L2 ga.
+
+Tier key yozilsa/o'chirilsa shu process L1 dan darhol, boshqa process lar
+Redis pub/sub orqali o'chiradi. Subscriber uzilgan paytda L1 ishlatilmaydi
+(yo'qolgan invalidation lar sababli eskirgan qiymat qaytmasin).
+
+L1 va listener process da bitta (LOCATION/KEY_PREFIX bo'yicha) - har thread
+dagi cache instance lari ularni bo'lishadi.
+"""
+import logging
+import os
+import pickle
+import threading
+import time
+import uuid
+import weakref
+from collections import defaultdict
+
+from cachetools import TTLCache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.locmem import LocMemCache as DjangoLocMemCache
+from django_redis.cache import RedisCache as DjangoRedisCache
+
+from .metrics import inc, record_cache
+
+logger = logging.getLogger(__name__)
+
+_missing = object()
+
+
+class CacheMetricsMixin:
+
+    def get(self, key, default=None, version=None, **kwargs):
+        value = super().get(key, _missing, version=version, **kwargs)
+        if value is _missing:
+            record_cache(0, 1)
+            return default
+        record_cache(1)
+        return value
+
+    def get_many(self, keys, version=None, **kwargs):
+        keys = list(keys)
+        values = super().get_many(keys, version=version, **kwargs)
+        record_cache(len(values), len(keys) - len(values))
+        return values
+
+
+class RedisCache(CacheMetricsMixin, DjangoRedisCache):
+    pass
+
+
+class LocMemCache(CacheMetricsMixin, DjangoLocMemCache):
+    pass
+
+
+class Tier:
+    """
+    Bitta prefix ning L1 i
+
+    Qiymat pickle qilingan holda (locmem kabi) - chaqiruvchilar bitta
+    mutable obyektni bo'lishmaydi. generation - har evict da oshadi: L2 dan
+    o'qish paytida invalidation kelsa, o'qilgan (eski) qiymat L1 ga yozilmaydi.
+    """
+
+    def __init__(self, prefix, timeout=60, maxsize=1000):
+        self.prefix = prefix
+        self.timeout = timeout
+        self.label = prefix.rstrip(':_') or prefix
+        self.entries = TTLCache(maxsize, timeout)
+        self.lock = threading.Lock()
+        self.generation = 0
+
+    def get(self, key, version):
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry is None or entry[0] != version:
+            inc('cache_l1_requests_total', tier=self.label, result='miss')
+            return _missing
+        inc('cache_l1_requests_total', tier=self.label, result='hit')
+        record_cache(1)
+        return pickle.loads(entry[1])
+
+    def put(self, key, version, value, generation):
+        entry = (version, pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        with self.lock:
+            if generation == self.generation:
+                self.entries[key] = entry
+
+    def evict(self, key):
+        with self.lock:
+            self.generation += 1
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.generation += 1
+            self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class L1:
+    """
+    Process dagi L1: tier lar + origin + invalidation listener
+
+    Django cache handle lari thread ga bog'liq (har thread o'z instance ini
+    quradi), L1 esa process da bitta - LOCATION/KEY_PREFIX bo'yicha _l1s da.
+    """
+
+    def __init__(self, tiers):
+        # Uzun prefix birinchi: 'ref:doctor:' 'ref:' dan oldin tekshiriladi
+        self.tiers = sorted((Tier(prefix, **policy) for prefix, policy in tiers.items()),
+                            key=lambda tier: -len(tier.prefix))
+        self.origin = uuid.uuid4().hex
+        self.pid = os.getpid()
+        self.listener = None
+        self.lock = threading.Lock()
+
+    def check_fork(self):
+        """Fork: ota process L1 i bola process uchun eskirgan, listener thread i esa yo'q"""
+        if self.pid == os.getpid():
+            return
+        with self.lock:
+            if self.pid != os.getpid():
+                self.pid = os.getpid()
+                self.origin = uuid.uuid4().hex
+                self.listener = None
+                self.evict_all()
+
+    def matching_tier(self, key):
+        for tier in self.tiers:
+            if key.startswith(tier.prefix):
+                return tier
+        return None
+
+    def evict_all(self):
+        for tier in self.tiers:
+            tier.clear()
+
+    def receive(self, origin, keys):
+        if origin == self.origin:
+            return
+        if keys == '*':
+            self.evict_all()
+            return
+        for key in keys.split('\n'):
+            tier = self.matching_tier(key)
+            if tier is not None:
+                tier.evict(key)
+
+    def stats(self):
+        return {tier.label: len(tier) for tier in self.tiers}
+
+
+# (backend class, LOCATION, KEY_PREFIX) -> L1
+_l1s = {}
+_l1s_lock = threading.Lock()
+
+
+def shared_l1(key, tiers):
+    with _l1s_lock:
+        l1 = _l1s.get(key)
+        if l1 is None:
+            l1 = _l1s[key] = L1(tiers)
+        return l1
+
+
+class TieredCacheMixin:
+    """L1 (process da umumiy, L1) + L2 (super()). Cross-process xabar: publish() / L1.receive()"""
+
+    def __init__(self, server, params):
+        params = dict(params)
+        options = dict(params.get('OPTIONS') or {})
+        tiers = options.pop('TIERS', {})
+        params['OPTIONS'] = options
+        super().__init__(server, params)
+        self.l1 = shared_l1((type(self).__qualname__, str(server), self.key_prefix), tiers)
+
+    @property
+    def tiers(self):
+        return self.l1.tiers
+
+    @property
+    def origin(self):
+        return self.l1.origin
+
+    def tier(self, key):
+        if not self.tiers or not self.l1_ready():
+            return None
+        return self.l1.matching_tier(key)
+
+    def l1_ready(self):
+        self.l1.check_fork()
+        return True
+
+    def get(self, key, default=None, version=None, **kwargs):
+        tier = self.tier(key)
+        if tier is None:
+            return super().get(key, default, version=version, **kwargs)
+
+        value = tier.get(key, version)
+        if value is not _missing:
+            return value
+        generation = tier.generation
+        value = super().get(key, _missing, version=version, **kwargs)
+        if value is _missing:
+            return default
+        tier.put(key, version, value, generation)
+        return value
+
+    def get_many(self, keys, version=None, **kwargs):
+        values, rest, generations = {}, [], {}
+        for key in keys:
+            tier = self.tier(key)
+            value = tier.get(key, version) if tier is not None else _missing
+            if value is not _missing:
+                values[key] = value
+                continue
+            rest.append(key)
+            if tier is not None:
+                generations[key] = (tier, tier.generation)
+
+        if rest:
+            fetched = super().get_many(rest, version=version, **kwargs)
+            for key, value in fetched.items():
+                if key in generations:
+                    tier, generation = generations[key]
+                    tier.put(key, version, value, generation)
+            values.update(fetched)
+        return values
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None, **kwargs):
+        result = super().set(key, value, timeout, version=version, **kwargs)
+        self.invalidate([key])
+        return result
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None, **kwargs):
+        result = super().add(key, value, timeout, version=version, **kwargs)
+        if result:
+            self.invalidate([key])
+        return result
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None, **kwargs):
+        result = super().set_many(data, timeout, version=version, **kwargs)
+        self.invalidate(data)
+        return result
+
+    def delete(self, key, version=None, **kwargs):
+        result = super().delete(key, version=version, **kwargs)
+        self.invalidate([key])
+        return result
+
+    def delete_many(self, keys, version=None, **kwargs):
+        keys = list(keys)
+        result = super().delete_many(keys, version=version, **kwargs)
+        self.invalidate(keys)
+        return result
+
+    def incr(self, key, delta=1, version=None, **kwargs):
+        result = super().incr(key, delta, version=version, **kwargs)
+        self.invalidate([key])
+        return result
+
+    def decr(self, key, delta=1, version=None, **kwargs):
+        result = super().decr(key, delta, version=version, **kwargs)
+        self.invalidate([key])
+        return result
+
+    def clear(self):
+        result = super().clear()
+        self.evict_all()
+        self.publish('*')
+        return result
+
+    def invalidate(self, keys):
+        """Tier key lar: shu process L1 dan o'chirish + boshqa process larga xabar"""
+        keys = [key for key in keys if self.matching_tier(key) is not None]
+        if not keys:
+            return
+        for key in keys:
+            self.matching_tier(key).evict(key)
+        self.publish('\n'.join(keys))
+
+    def matching_tier(self, key):
+        return self.l1.matching_tier(key)
+
+    def evict_all(self):
+        self.l1.evict_all()
+
+    def receive(self, origin, keys):
+        self.l1.receive(origin, keys)
+
+    def publish(self, keys):
+        raise NotImplementedError
+
+    def l1_stats(self):
+        """{tier: entries soni} - metrics gauge lari uchun"""
+        return self.l1.stats()
+
+
+class InvalidationListener(threading.Thread):
+    """
+    Redis pub/sub dan invalidation xabarlarini o'qiydi (L1 ga bitta, daemon)
+
+    cache - pub/sub connection uchun bitta instance (process da L1 soni qadar).
+    """
+
+    RETRY_DELAY = 1
+    MAX_RETRY_DELAY = 30
+
+    def __init__(self, cache, l1):
+        super().__init__(name='cache-invalidation', daemon=True)
+        self.cache = cache
+        self.l1 = l1
+        self.pid = os.getpid()
+        self.ready = threading.Event()
+        self.stopped = threading.Event()
+        self.pubsub = None
+
+    def run(self):
+        delay = self.RETRY_DELAY
+        while not self.stopped.is_set():
+            try:
+                self.listen()
+            except Exception as e:
+                # Redis yo'q paytda log har soniyada to'lib ketmasin
+                if not self.stopped.is_set() and delay in (self.RETRY_DELAY, self.MAX_RETRY_DELAY):
+                    logger.warning(f"Cache invalidation listener disconnected, L1 disabled: {e}")
+            finally:
+                # Uzilish paytidagi invalidation lar yo'qolgan - L1 tozalanadi
+                if self.ready.is_set():
+                    delay = self.RETRY_DELAY
+                self.ready.clear()
+                self.l1.evict_all()
+            self.stopped.wait(delay)
+            delay = min(delay * 2, self.MAX_RETRY_DELAY)
+
+    def stop(self):
+        self.stopped.set()
+        pubsub = self.pubsub
+        if pubsub is not None:
+            try:
+                pubsub.close()
+            except Exception:
+                pass
+
+    def listen(self):
+        self.pubsub = pubsub = self.cache.client.get_client(write=True).pubsub()
+        try:
+            pubsub.subscribe(self.cache.channel)
+            # subscribe tasdiqlangandan keyingi publish lar albatta keladi
+            message = pubsub.get_message(timeout=5)
+            if not message or message['type'] != 'subscribe':
+                raise ConnectionError('subscribe not confirmed')
+            self.l1.evict_all()
+            self.ready.set()
+
+            for message in pubsub.listen():
+                if message['type'] != 'message':
+                    continue
+                origin, _, keys = message['data'].decode().partition(' ')
+                self.l1.receive(origin, keys)
+        finally:
+            pubsub.close()
+
+
+class TieredRedisCache(TieredCacheMixin, RedisCache):
+
+    def __init__(self, server, params):
+        super().__init__(server, params)
+        self.channel = self.make_key('cache:invalidate')
+
+    def l1_ready(self):
+        l1 = self.l1
+        l1.check_fork()
+        listener = l1.listener
+        if listener is None:
+            with l1.lock:
+                if l1.listener is None:
+                    l1.listener = InvalidationListener(self, l1)
+                    l1.listener.start()
+                listener = l1.listener
+        return listener.ready.is_set()
+
+    def publish(self, keys):
+        try:
+            self.client.get_client(write=True).publish(self.channel, f'{self.origin} {keys}')
+        except Exception as e:
+            # Boshqa process lar L1 timeout gacha eski qiymatni ko'rishi mumkin
+            logger.warning(f"Cache invalidation publish failed: {e}")
+
+
+class TieredLocMemCache(TieredCacheMixin, LocMemCache):
+    """
+    Test/dev uchun: bir xil LOCATION dagi L1 lar L2 ni bo'lishadi (locmem),
+    invalidation ham ular orasida - process lar modeli
+    """
+    _buses = defaultdict(weakref.WeakSet)
+
+    def __init__(self, name, params):
+        super().__init__(name, params)
+        self.bus = self._buses[name]
+        self.bus.add(self.l1)
+
+    def publish(self, keys):
+        for l1 in list(self.bus):
+            l1.receive(self.origin, keys)
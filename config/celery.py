@@ -3,6 +3,7 @@
 # ============================================
 
 from celery import Celery
+from celery.schedules import crontab
 import os
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
@@ -18,6 +19,22 @@ app.conf.beat_schedule = {
         'task': 'call.tasks.check_missed_calls',
         'schedule': 30.0,
     },
+    'dispatch-due-notifications-every-minute': {
+        'task': 'news.tasks.dispatch_due_notifications',
+        'schedule': 60.0,
+    },
+    'release-expired-stock-reservations-every-minute': {
+        'task': 'shop.tasks.release_expired_reservations',
+        'schedule': 60.0,
+    },
+    'reconcile-payme-statement-nightly': {
+        'task': 'paymeuz.tasks.reconcile_payme_statement',
+        'schedule': crontab(hour=22, minute=0),  # 03:00 Asia/Tashkent
+    },
+    'archive-cold-rows-nightly': {
+        'task': 'config.tasks.archive_cold_rows',
+        'schedule': crontab(hour=21, minute=30),  # 02:30 Asia/Tashkent
+    },
 }
 
 app.conf.timezone = 'UTC'
@@ -0,0 +1,65 @@
+"""
+PostgreSQL backend + process ichidagi connection pool (config/db/pool.py)
+
+    DATABASES['default']['ENGINE'] = 'config.db'
+    DATABASES['default']['OPTIONS']['pool'] = {'max_size': 10, 'timeout': 10}
+
+CONN_MAX_AGE=0 bo'lishi kerak - Django har bir request / consumer DB chaqiruvi
+oxirida close() qiladi va connection pool ga qaytadi.
+"""
+import psycopg2.extensions
+from django.db.backends.postgresql import base
+
+from .pool import get_pool
+
+IDLE = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+IN_TRANSACTION = (psycopg2.extensions.TRANSACTION_STATUS_INTRANS, psycopg2.extensions.TRANSACTION_STATUS_INERROR)
+
+
+def check(conn):
+    if conn.closed:
+        return False
+    with conn.cursor() as cursor:
+        cursor.execute('SELECT 1')
+    return True
+
+
+def reset(conn):
+    """Pool ga qaytishdan oldin: ochiq tranzaksiya rollback, ishlayotgan/uzilgan connection tashlanadi"""
+    if conn.closed:
+        return False
+    status = conn.info.transaction_status
+    if status in IN_TRANSACTION:
+        conn.rollback()
+        return True
+    return status == IDLE
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    pool = None
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('pool', None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        # Pool alias + parametrlar bo'yicha: test DB yaratilganda NAME o'zgaradi,
+        # eski DB ga ochilgan connection lar yangi pool ga tushmasligi kerak
+        key = (self.alias, hash(tuple(sorted(conn_params.items()))))
+        options = self.settings_dict['OPTIONS'].get('pool') or {}
+        self.pool = get_pool(key, name=self.alias, check=check, reset=reset, **options)
+
+        connection = self.pool.getconn(lambda: super(DatabaseWrapper, self).get_new_connection(conn_params))
+        # Pool dagi connection uchun ham (base.get_new_connection dagi kabi)
+        self.isolation_level = self.settings_dict['OPTIONS'].get('isolation_level', connection.isolation_level)
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                # atomic ichida yopilsa wrapper connection ni ushlab qoladi - pool ga qaytarib bo'lmaydi
+                if self.in_atomic_block:
+                    self.connection.close()
+                    return self.pool.putconn(self.connection, discard=True)
+                return self.pool.putconn(self.connection)
@@ -0,0 +1,206 @@
+"""
+Process ichidagi DB connection pool (config.db backend uchun)
+
+Django connection ni thread-local saqlaydi va CONN_MAX_AGE=0 da har bir
+request / database_sync_to_async chaqiruv oxirida yopadi. Backend yopish
+o'rniga connection ni shu pool ga qaytaradi, keyingi connect() esa
+pool dan oladi - TCP + auth + SET TIME ZONE har safar qaytarilmaydi.
+
+- max_size: process dagi connection lar chegarasi; band bo'lsa timeout
+  gacha kutiladi (wait vaqti stats() da)
+- check_after soniyadan ko'p bo'sh turgan connection berishdan oldin
+  tekshiriladi (SELECT 1), max_lifetime dan eskilari yangilanadi
+- fork dan keyin (Celery prefork) bola process yangi pool ochadi, ota
+  process connection lariga tegmaydi
+"""
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# Wait shundan uzoq bo'lsa log ga yoziladi (sekund)
+SLOW_WAIT = 0.1
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+
+    def __init__(self, name='default', max_size=10, timeout=10, max_idle=300, max_lifetime=1800, check_after=30,
+                 check=None, reset=None):
+        self.name = name
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.check_after = check_after
+        self.check = check or (lambda conn: True)
+        self.reset = reset or (lambda conn: True)
+
+        self.pid = os.getpid()
+        self.condition = threading.Condition()
+        self.idle = deque()  # (conn, created_at, returned_at), o'ngda eng yangi
+        self.in_use = {}  # id(conn) -> created_at
+        self.size = 0
+        self.counters = {
+            'checkouts': 0, 'created': 0, 'discarded': 0,
+            'waits': 0, 'wait_time': 0.0, 'max_wait': 0.0, 'timeouts': 0,
+        }
+
+    def getconn(self, connect):
+        """Bo'sh connection yoki connect() bilan yangisi. Pool to'la bo'lsa timeout gacha kutadi"""
+        started = time.monotonic()
+        entry = self._acquire(started)
+
+        waited = time.monotonic() - started
+        with self.condition:
+            self.counters['checkouts'] += 1
+            if waited > 0.001:
+                self.counters['waits'] += 1
+                self.counters['wait_time'] += waited
+                self.counters['max_wait'] = max(self.counters['max_wait'], waited)
+        if waited > SLOW_WAIT:
+            logger.warning(f"DB pool {self.name}: waited {waited * 1000:.0f} ms for a connection "
+                           f"({self.size}/{self.max_size} open)")
+
+        if entry is not None:
+            conn, created_at, returned_at = entry
+            now = time.monotonic()
+            expired = now - created_at > self.max_lifetime
+            if not expired and (now - returned_at <= self.check_after or self._healthy(conn)):
+                self.in_use[id(conn)] = created_at
+                return conn
+
+            # Eskirgan/o'lik connection o'rniga yangisi ochiladi - pool dagi joy saqlanadi
+            if not expired:
+                logger.info(f"DB pool {self.name}: dropping dead idle connection")
+            self._disconnect(conn)
+            with self.condition:
+                self.counters['discarded'] += 1
+
+        try:
+            conn = connect()
+        except Exception:
+            with self.condition:
+                self.size -= 1
+                self.condition.notify()
+            raise
+
+        with self.condition:
+            self.counters['created'] += 1
+        self.in_use[id(conn)] = time.monotonic()
+        return conn
+
+    def _acquire(self, started):
+        """Bo'sh connection (entry) yoki None - yangi ochish uchun joy band qilindi"""
+        with self.condition:
+            self._prune()
+            while True:
+                if self.idle:
+                    return self.idle.pop()
+                if self.size < self.max_size:
+                    self.size += 1
+                    return None
+
+                remaining = started + self.timeout - time.monotonic()
+                if remaining <= 0:
+                    self.counters['timeouts'] += 1
+                    raise PoolTimeout(f"DB pool {self.name}: no connection available in {self.timeout}s "
+                                      f"({self.max_size} in use)")
+                self.condition.wait(remaining)
+
+    def putconn(self, conn, discard=False):
+        """Connection ni pool ga qaytarish. Tranzaksiya ochiq qolgan bo'lsa reset() rollback qiladi"""
+        if self.pid != os.getpid():
+            # Fork dan oldin ochilgan - socket ota process niki, tegmaymiz
+            return
+        created_at = self.in_use.pop(id(conn), None)
+        if created_at is None:
+            return
+
+        if discard or not self._reset(conn):
+            self._close(conn)
+            return
+
+        with self.condition:
+            self.idle.append((conn, created_at, time.monotonic()))
+            self.condition.notify()
+
+    def _prune(self):
+        # Chapda eng uzoq turganlari
+        now = time.monotonic()
+        while self.idle and now - self.idle[0][2] > self.max_idle:
+            conn, _, _ = self.idle.popleft()
+            self.size -= 1
+            self.counters['discarded'] += 1
+            self._disconnect(conn)
+
+    def _healthy(self, conn):
+        try:
+            return self.check(conn)
+        except Exception:
+            return False
+
+    def _reset(self, conn):
+        try:
+            return self.reset(conn)
+        except Exception:
+            return False
+
+    def _close(self, conn):
+        self._disconnect(conn)
+        with self.condition:
+            self.size -= 1
+            self.counters['discarded'] += 1
+            self.condition.notify()
+
+    @staticmethod
+    def _disconnect(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def close_all(self):
+        with self.condition:
+            while self.idle:
+                conn, _, _ = self.idle.pop()
+                self.size -= 1
+                self._disconnect(conn)
+
+    def stats(self):
+        with self.condition:
+            stats = dict(self.counters, size=self.size, idle=len(self.idle), in_use=len(self.in_use),
+                         max_size=self.max_size)
+        stats['avg_wait'] = stats['wait_time'] / stats['waits'] if stats['waits'] else 0.0
+        return stats
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+# Fork dan oldingi pool lar - ulardagi socket lar ota process niki, GC yopib yubormasin
+_inherited = []
+
+
+def get_pool(key, **options):
+    """Process dagi key (alias + connection parametrlari) uchun bitta pool"""
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is not None and pool.pid != os.getpid():
+            _inherited.append(pool)
+            pool = None
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(**options)
+        return pool
+
+
+def pool_stats():
+    """{alias: stats} - shu process dagi pool lar"""
+    with _pools_lock:
+        pools = [pool for pool in _pools.values() if pool.pid == os.getpid()]
+    return {pool.name: pool.stats() for pool in pools}
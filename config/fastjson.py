@@ -0,0 +1,96 @@
+"""
+orjson asosidagi JSON helper
+
+dumps() tayyor bytes qaytaradi - HTTP response body, channel layer event va
+WebSocket frame uchun bir marta encode qilinadi.
+
+UUID, datetime/date/time, dataclass va dict/list subclass (ReturnDict) larni
+orjson o'zi biladi. Qolganlari (Decimal, lazy translation, QuerySet, ...)
+_default() da DRF JSONEncoder bilan bir xil qilinadi - javob formati o'zgarmaydi.
+"""
+import datetime
+import decimal
+
+import orjson
+from django.db.models.query import QuerySet
+from django.utils.encoding import force_str
+from django.utils.functional import Promise
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+JSONDecodeError = orjson.JSONDecodeError
+
+OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+
+def _default(obj):
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, Promise):
+        return force_str(obj)
+    if isinstance(obj, datetime.timedelta):
+        return str(obj.total_seconds())
+    if isinstance(obj, QuerySet):
+        return list(obj)
+    if isinstance(obj, bytes):
+        return obj.decode()
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    if hasattr(obj, '__iter__'):
+        return list(obj)
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+def dumps(obj, option=0):
+    return orjson.dumps(obj, default=_default, option=OPTIONS | option)
+
+
+def loads(data):
+    return orjson.loads(data)
+
+
+class ORJSONRenderer(JSONRenderer):
+    """DRF JSONRenderer o'rniga - indent faqat browsable API / ?indent uchun"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        return dumps(data, orjson.OPT_INDENT_2 if indent else 0)
+
+
+class ORJSONParser(JSONParser):
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding') or 'utf-8'
+        data = stream.read() if stream is not None else b''
+        if encoding.lower().replace('-', '') != 'utf8':
+            data = data.decode(encoding)
+
+        try:
+            return orjson.loads(data)
+        except (JSONDecodeError, UnicodeDecodeError) as exc:
+            raise ParseError(f'JSON parse error - {exc}')
+
+
+def frame_event(payload):
+    """
+    group_send event - payload bir marta encode qilinadi, har bir consumer
+    uni o'zgartirmasdan yuboradi (FrameConsumerMixin.encoded_frame)
+    """
+    return {'type': 'encoded.frame', 'frame': dumps(payload)}
+
+
+class FrameConsumerMixin:
+    """AsyncWebsocketConsumer lar uchun: orjson frame lar"""
+
+    async def send_frame(self, payload):
+        """dict -> text frame; bytes (oldindan encode qilingan) o'zgarishsiz"""
+        if not isinstance(payload, bytes):
+            payload = dumps(payload)
+        await self.send(text_data=payload.decode())
+
+    async def encoded_frame(self, event):
+        await self.send(text_data=event['frame'].decode())
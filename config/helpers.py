@@ -1,3 +1,4 @@
+import logging
 import requests
 import time
 from django.conf import settings
@@ -9,6 +10,10 @@ from account.models import SmsCode
 from datetime import timedelta
 from django.core.exceptions import SuspiciousOperation
 
+from .metrics import outbound
+
+logger = logging.getLogger(__name__)
+
 
 def generate_sms_code():
     return str(random.randint(100000, 999999))
@@ -129,22 +134,23 @@ ESKIZ_PAYLOAD = 'https://notify.eskiz.uz/api'
 
 def sms_get_auth_token():
     try:
-        r = requests.post(f"{ESKIZ_PAYLOAD}/auth/login", json={
-            'email': settings.ESKIZ_SMS_USERNAME,
-            'password': settings.ESKIZ_SMS_PASSWORD
-        })
+        with outbound('eskiz'):
+            r = requests.post(f"{ESKIZ_PAYLOAD}/auth/login", json={
+                'email': settings.ESKIZ_SMS_USERNAME,
+                'password': settings.ESKIZ_SMS_PASSWORD
+            })
 
         data = r.json()
         return data['data']['token']
     except Exception as e:
-        print(e)
+        logger.error(f"Eskiz auth failed: {e}")
         return None
 
 
 def send_sms_eskiz(phone, text):
     auth_token = sms_get_auth_token()
     if auth_token is None:
-        print("Error while getting auth token")
+        logger.error("Error while getting auth token")
         return False
 
     headers = {
@@ -152,38 +158,40 @@ def send_sms_eskiz(phone, text):
     }
 
     try:
-        r = requests.post(f"{ESKIZ_PAYLOAD}/message/sms/send", json={
-            "mobile_phone": phone,
-            "message": text,
-            "from": "4546"
-        }, headers=headers)
+        with outbound('eskiz'):
+            r = requests.post(f"{ESKIZ_PAYLOAD}/message/sms/send", json={
+                "mobile_phone": phone,
+                "message": text,
+                "from": "4546"
+            }, headers=headers)
 
         data = r.json()
-        print(f"{data['id']} / {data['message']}")
+        logger.info(f"Eskiz SMS {data['id']} / {data['message']}")
 
         return True
     except Exception as e:
-        print(e)
+        logger.error(f"Eskiz SMS failed: {e}")
         return False
 
 
 def send_sms(phone, text):
     try:
-        r = requests.post("http://91.204.239.44/broker-api/send", json={
-            'messages': [
-                {
-                    'recipient': phone,
-                    'message-id': 'Mehrigiyo' + str(round(time.time() * 1000)),
-                    'sms': {
-                        'originator': '3700',
-                        'content': {'text': text}
+        with outbound('sms_broker'):
+            r = requests.post("http://91.204.239.44/broker-api/send", json={
+                'messages': [
+                    {
+                        'recipient': phone,
+                        'message-id': 'Mehrigiyo' + str(round(time.time() * 1000)),
+                        'sms': {
+                            'originator': '3700',
+                            'content': {'text': text}
+                        }
                     }
-                }
-            ]
-        }, auth=(settings.SMS_USERNAME, settings.SMS_PASSWORD))
-        print(r.text)
+                ]
+            }, auth=(settings.SMS_USERNAME, settings.SMS_PASSWORD))
+        logger.info(f"SMS broker: {r.text}")
     except Exception as e:
-        print(e)
+        logger.error(f"SMS broker failed: {e}")
         return False
 
     return True
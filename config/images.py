@@ -0,0 +1,179 @@
+"""
+Responsive image derivatives
+
+Upload bo'lganda original rasmdan fixed width larda WebP + JPEG derivativelar
+yaratiladi. Fayl nomi original content hash idan olinadi
+(variants/ab/ab12..._320.webp) - nom o'zgarmaydi, CDN/browser uni
+`immutable` qilib cache lay oladi.
+
+Manifest model dagi `<field>_srcset` JSONField da saqlanadi:
+    {"source": "medicine/a.jpg", "webp": {"160": "variants/..."}, "jpeg": {...}}
+Serializer (SrcsetField) path larni URL ga aylantiradi - qo'shimcha query yo'q.
+
+Encode request/save ichida emas: post_save commit dan keyin
+config.tasks.build_image_variants ni navbatga qo'yadi (Celery worker).
+"""
+import hashlib
+import io
+import logging
+import math
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models.signals import post_save
+from PIL import Image, ImageOps, UnidentifiedImageError
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+VARIANT_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+HASH_CHUNK = 64 * 1024
+# EXIF Orientation 5-8 - rasm 90 gradusga buriladi (width/height almashadi)
+EXIF_ORIENTATION = 0x0112
+
+# (model, image_field, srcset_field)
+REGISTRY = []
+
+
+def variant_widths():
+    return tuple(getattr(settings, 'IMAGE_VARIANT_WIDTHS', (160, 320, 640, 1080)))
+
+
+def variant_path(digest, width, ext):
+    return f'variants/{digest[:2]}/{digest}_{width}.{ext}'
+
+
+def build_variants(name, storage=None):
+    """
+    Original (storage dagi nom) dan derivativelar yaratish. Returns manifest
+
+    DB ga tegmaydi - backfill process pool da ham chaqiriladi.
+    Content-addressed: bir xil rasm ikki marta encode qilinmaydi.
+    """
+    storage = storage or default_storage
+    manifest = {'source': name}
+
+    # Fayl xotiraga to'liq o'qilmaydi - hash bo'laklab
+    sha1 = hashlib.sha1()
+    with storage.open(name, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+            sha1.update(chunk)
+    digest = sha1.hexdigest()[:20]
+
+    try:
+        with storage.open(name, 'rb') as f, Image.open(f) as original:
+            # O'lcham header dan - piksel lar hali decode qilinmagan
+            raw_width, raw_height = original.size
+            rotated = original.getexif().get(EXIF_ORIENTATION) in (5, 6, 7, 8)
+            width = raw_height if rotated else raw_width
+            # Originaldan katta width yaratilmaydi, lekin kamida bitta derivative bo'ladi
+            widths = [w for w in variant_widths() if w < width] or [width]
+
+            # JPEG eng katta kerakli width gacha kichraytirib decode qilinadi (DCT scale)
+            scale = width / max(widths)
+            original.draft(None, (math.ceil(raw_width / scale), math.ceil(raw_height / scale)))
+            original = ImageOps.exif_transpose(original)
+            if original.mode not in ('RGB', 'RGBA'):
+                original = original.convert('RGBA' if 'transparency' in original.info else 'RGB')
+
+            for ext, (image_format, options) in VARIANT_FORMATS.items():
+                manifest[ext] = {}
+                for width in widths:
+                    path = variant_path(digest, width, ext)
+                    if not storage.exists(path):
+                        image = original
+                        if image_format == 'JPEG' and image.mode == 'RGBA':
+                            image = image.convert('RGB')
+                        if width < original.width:
+                            height = round(original.height * width / original.width)
+                            image = image.resize((width, height), Image.LANCZOS)
+                        buffer = io.BytesIO()
+                        image.save(buffer, image_format, **options)
+                        storage.save(path, ContentFile(buffer.getvalue()))
+                    manifest[ext][str(width)] = path
+    except (UnidentifiedImageError, OSError) as e:
+        # Video story, svg va h.k. - derivative yo'q
+        logger.warning(f"Image variants skipped for {name}: {e}")
+
+    return manifest
+
+
+def is_stale(field_file, srcset):
+    return bool(field_file) and (srcset or {}).get('source') != field_file.name
+
+
+def update_srcset(instance, image_field, srcset_field):
+    """
+    Rasm o'zgargan bo'lsa manifestni qayta yaratish (config.tasks.build_image_variants)
+
+    save(update_fields) - post_save ga bog'liq cache lar (snapshot, savat
+    versiyasi) ham yangilanadi; handler manifestni yangi deb ko'radi, task
+    qayta navbatga qo'yilmaydi.
+    """
+    field_file = getattr(instance, image_field)
+    if not is_stale(field_file, getattr(instance, srcset_field)):
+        return
+
+    try:
+        srcset = build_variants(field_file.name, field_file.storage)
+    except Exception as e:
+        logger.error(f"Image variants failed for {field_file.name}: {e}")
+        return
+
+    setattr(instance, srcset_field, srcset)
+    instance.save(update_fields=[srcset_field])
+
+
+def register(model, image_field, srcset_field):
+    """AppConfig.ready() dan chaqiriladi"""
+    REGISTRY.append((model, image_field, srcset_field))
+
+    def handler(sender, instance, raw=False, **kwargs):
+        if raw:
+            return
+        field_file = getattr(instance, image_field)
+        if not field_file:
+            # Rasm o'chirildi - encode yo'q, manifest shu yerda tozalanadi (save() siz - signal loop bo'lmasin)
+            if getattr(instance, srcset_field):
+                setattr(instance, srcset_field, {})
+                sender.objects.filter(pk=instance.pk).update(**{srcset_field: {}})
+        elif is_stale(field_file, getattr(instance, srcset_field)):
+            from .tasks import build_image_variants
+
+            label, pk = sender._meta.label, instance.pk
+            transaction.on_commit(lambda: build_image_variants.delay(label, pk, image_field, srcset_field))
+
+    post_save.connect(handler, sender=model, weak=False,
+                      dispatch_uid=f'image_variants_{model._meta.label}_{image_field}')
+
+
+class SrcsetField(serializers.Field):
+    """
+    Manifest -> {"webp": {"160": url, ...}, "jpeg": {...}}
+
+    Usage: image_srcset = SrcsetField()
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        return super().get_attribute(instance) or {}
+
+    def to_representation(self, value):
+        request = self.context.get('request')
+        result = {}
+        for ext in VARIANT_FORMATS:
+            urls = {}
+            for width, path in (value.get(ext) or {}).items():
+                url = default_storage.url(path)
+                urls[width] = request.build_absolute_uri(url) if request else url
+            result[ext] = urls
+        return result
@@ -0,0 +1,538 @@
+"""
+In-process load harness (manage.py benchmark_suite)
+
+Scenario lar production stack orqali o'tadi: config.asgi.application ga
+to'g'ridan-to'g'ri ASGI chaqiruv - middleware lar, sync/async view lar,
+TokenAuthMiddleware, consumer lar, thread pool va DB haqiqiy; faqat
+socket/daphne yo'q. Channel layer - in-memory, LiveKit - local fake HTTP
+server, FCM - FakeFCMTransport (broadcast) yoki credential siz (o'tkazib
+yuboriladi).
+
+SQL soni config.metrics dan olinadi (db_queries_total yig'indisi) - ASGI
+dan tashqaridagi scenario lar (Payme RPC, Celery task) metrics.measure() da.
+
+Natija scenario bo'yicha: ops, req/s, p50/p99, SQL/op, xatolar.
+compare() - saqlangan baseline bilan solishtirish (CI).
+"""
+import asyncio
+import base64
+import random
+import statistics
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from asgiref.sync import sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test import RequestFactory
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from account.models import UserDevice
+from chat.models import ChatRoom, Message, RoomMembership
+from chat.services import bulk_import_messages
+from paymeuz.models import Payment
+from paymeuz.payme.service import PaymeService
+from paymeuz.payme.views import PaymeCallbackView
+from shop.models import Medicine, TypeMedicine
+from specialist.models import Doctor, TypeDoctor
+from stream.models import LiveStream
+
+from . import metrics
+from .fastjson import dumps, loads
+
+User = get_user_model()
+
+# scale=1 dagi hajm
+SEED_SIZES = {
+    'medicines': 10_000,
+    'doctors': 1_000,
+    'clients': 1_000,
+    'messages': 100_000,
+}
+ROOMS_PER_CLIENT = 2
+
+
+class Fixture:
+    """Seed qilingan ma'lumot: scenario lar ishlatadigan id lar va token lar"""
+
+    def __init__(self, medicines, clients, doctors, rooms, stream):
+        self.medicines = medicines
+        self.clients = clients
+        self.doctors = doctors
+        self.rooms = rooms  # [(room_id, client_id, doctor_id)]
+        self.stream = stream
+        self.tokens = {}
+
+    def token(self, user_id):
+        token = self.tokens.get(user_id)
+        if token is None:
+            token = self.tokens[user_id] = str(AccessToken.for_user(User(id=user_id)))
+        return token
+
+    def disjoint_rooms(self):
+        """Ishtirokchilari takrorlanmaydigan room lar - parallel call lar bir-birini busy qilmasin"""
+        used, rooms = set(), []
+        for room in self.rooms:
+            if room[1] not in used and room[2] not in used:
+                used.update(room[1:])
+                rooms.append(room)
+        return rooms
+
+
+def seed(scale=1.0, rng=None):
+    rng = rng or random.Random(42)
+
+    def size(name):
+        return max(int(SEED_SIZES[name] * scale), 10)
+
+    TypeMedicine.objects.bulk_create([TypeMedicine(name=f'Turkum {i}') for i in range(20)])
+    types = list(TypeMedicine.objects.values_list('id', flat=True))
+    Medicine.objects.bulk_create([
+        Medicine(title=f'Dori {i}', description='Tavsif ' * 20, cost=rng.randint(5, 500) * 1000,
+                 quantity=rng.randint(0, 100), type_medicine_id=rng.choice(types))
+        for i in range(size('medicines'))
+    ], batch_size=1000)
+
+    TypeDoctor.objects.bulk_create([TypeDoctor(name=f'Mutaxassislik {i}') for i in range(15)])
+    doctor_types = list(TypeDoctor.objects.values_list('id', flat=True))
+    User.objects.bulk_create([
+        User(phone=f'99890{i:07d}', role='doctor', password='!') for i in range(size('doctors'))
+    ], batch_size=1000)
+    doctors = list(User.objects.filter(role='doctor').order_by('id').values_list('id', flat=True))
+    Doctor.objects.bulk_create([
+        Doctor(user_id=user_id, image='', full_name=f'Doktor {i}', experience=str(rng.randint(1, 30)),
+               type_doctor_id=rng.choice(doctor_types), gender=rng.choice(['male', 'female']), is_verified=True)
+        for i, user_id in enumerate(doctors)
+    ], batch_size=1000)
+
+    User.objects.bulk_create([
+        User(phone=f'99891{i:07d}', role='client', password='!') for i in range(size('clients'))
+    ], batch_size=1000)
+    clients = list(User.objects.filter(role='client').order_by('id').values_list('id', flat=True))
+    UserDevice.objects.bulk_create([
+        UserDevice(user_id=user_id, fcm_token=f'token-{user_id}', device_id=f'device-{user_id}')
+        for user_id in clients
+    ], batch_size=1000)
+
+    # Room lar: har bir client ROOMS_PER_CLIENT ta doktor bilan (participants + membership bulk da)
+    pairs = [(client, doctor) for client in clients for doctor in rng.sample(doctors, ROOMS_PER_CLIENT)]
+    ChatRoom.objects.bulk_create([ChatRoom(room_type='1:1', created_by_id=client) for client, _ in pairs],
+                                 batch_size=1000)
+    room_ids = list(ChatRoom.objects.order_by('id').values_list('id', flat=True))
+    rooms = [(room_id, client, doctor) for room_id, (client, doctor) in zip(room_ids, pairs)]
+    Through = ChatRoom.participants.through
+    Through.objects.bulk_create([
+        Through(chatroom_id=room_id, usermodel_id=user_id)
+        for room_id, client, doctor in rooms for user_id in (client, doctor)
+    ], batch_size=1000)
+    RoomMembership.objects.bulk_create([
+        RoomMembership(room_id=room_id, user_id=user_id)
+        for room_id, client, doctor in rooms for user_id in (client, doctor)
+    ], batch_size=1000)
+
+    per_room = max(size('messages') // len(rooms), 1)
+    for start in range(0, len(rooms), 200):
+        bulk_import_messages([
+            Message(room_id=room_id, sender_id=client if i % 2 else doctor, text=f'Xabar {i}', is_read=i < per_room - 3)
+            for room_id, client, doctor in rooms[start:start + 200] for i in range(per_room)
+        ])
+
+    stream = LiveStream.objects.create(title='Jonli efir', host_id=doctors[0], livekit_room_name='benchmark-stream',
+                                       status='live', started_at=timezone.now())
+    medicines = list(Medicine.objects.values_list('id', flat=True))
+    return Fixture(medicines, clients, doctors, rooms, stream.id)
+
+
+# ASGI client
+
+async def http(app, method, path, body=None, token=None):
+    """(status, body) - har bir request boshqa IP dan (anon throttle real trafikdagidek)"""
+    path, _, query = path.partition('?')
+    headers = [(b'host', b'testserver'), (b'accept', b'application/json')]
+    if body is not None:
+        body = dumps(body)
+        headers += [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]
+    if token:
+        headers.append((b'authorization', f'Bearer {token}'.encode()))
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': method,
+        'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': query.encode(),
+        'root_path': '', 'headers': headers, 'server': ('testserver', 80),
+        'client': (f'10.{random.randint(0, 255)}.{random.randint(0, 255)}.{random.randint(1, 254)}', 0),
+    }
+    requests = [{'type': 'http.request', 'body': body or b'', 'more_body': False}]
+    disconnected = asyncio.Event()
+    response = {'status': None, 'body': []}
+
+    async def receive():
+        if requests:
+            return requests.pop()
+        await disconnected.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            response['status'] = message['status']
+        elif message['type'] == 'http.response.body':
+            response['body'].append(message.get('body', b''))
+
+    await app(scope, receive, send)
+    disconnected.set()
+    return response['status'], b''.join(response['body'])
+
+
+async def expect(app, method, path, status=200, **kwargs):
+    code, body = await http(app, method, path, **kwargs)
+    if code != status:
+        raise AssertionError(f'{method} {path}: {code} {body[:200]!r}')
+    return loads(body) if body else None
+
+
+class Socket:
+
+    def __init__(self, app, path):
+        self.communicator = WebsocketCommunicator(app, path)
+
+    async def connect(self):
+        connected, code = await self.communicator.connect(timeout=10)
+        if not connected:
+            raise AssertionError(f'WebSocket rejected ({code})')
+
+    async def send(self, payload):
+        await self.communicator.send_to(text_data=dumps(payload).decode())
+
+    async def until(self, frame_type, timeout=10):
+        """frame_type kelguncha qolgan frame larni o'tkazib yuborish"""
+        while True:
+            frame = loads(await self.communicator.receive_from(timeout))
+            if frame.get('type') == frame_type:
+                return frame
+
+    async def close(self):
+        await self.communicator.disconnect()
+
+
+@contextmanager
+def fake_livekit():
+    """LiveKit RoomService o'rniga local HTTP server - create/delete room tarmoqqa chiqmaydi"""
+    from call.service import livekit_service
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            request = loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)) or b'{}')
+            body = dumps({'sid': f'RM_{uuid.uuid4().hex[:12]}', 'name': request.get('name', '')})
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    http_url = livekit_service.http_url
+    livekit_service.http_url = f'http://127.0.0.1:{server.server_port}'
+    try:
+        yield
+    finally:
+        livekit_service.http_url = http_url
+        server.shutdown()
+        server.server_close()
+
+
+# Scenario lar
+
+class Scenario:
+    name = None
+    # ops shu koeffitsientga ko'paytiriladi (og'ir scenario lar kamroq)
+    ops_factor = 1.0
+    # SQLite da yozuvchi tranzaksiyalar parallel ishlamaydi ("database is
+    # locked" yoki busy timeout kutish) - bunday scenario lar SQLite da ketma-ket
+    serial_on_sqlite = False
+
+    def __init__(self, app, fixture, rng):
+        self.app = app
+        self.fixture = fixture
+        self.rng = rng
+
+    def max_concurrency(self):
+        if self.serial_on_sqlite and connection.vendor == 'sqlite':
+            return 1
+        return None
+
+    async def setup(self, concurrency, ops):
+        pass
+
+    async def op(self, worker):
+        raise NotImplementedError
+
+    async def teardown(self):
+        pass
+
+
+class Catalog(Scenario):
+    """Katalog: sahifa + bitta dori"""
+    name = 'catalog'
+
+    async def op(self, worker):
+        offset = self.rng.randrange(0, max(len(self.fixture.medicines) - 20, 1))
+        await expect(self.app, 'GET', f'/api/shop/medicines/?limit=20&offset={offset}')
+        await expect(self.app, 'GET', f'/api/shop/medicines/{self.rng.choice(self.fixture.medicines)}/')
+
+
+class CartAdd(Scenario):
+    name = 'cart_add'
+    serial_on_sqlite = True
+
+    async def op(self, worker):
+        await expect(self.app, 'POST', '/api/shop/cart/', token=self.fixture.token(self.rng.choice(self.fixture.clients)),
+                     body={'product_id': self.rng.choice(self.fixture.medicines), 'amount': 1})
+
+
+class ChatRooms(Scenario):
+    """Doktor room list i (eng ko'p room li user lar)"""
+    name = 'chat_rooms'
+
+    async def op(self, worker):
+        await expect(self.app, 'GET', '/api/chat/rooms/', token=self.fixture.token(self.rng.choice(self.fixture.doctors)))
+
+
+class ChatFanout(Scenario):
+    """
+    ChatConsumer: bitta xabar -> room dagi barcha socket lar (har worker o'z room ida)
+
+    op - yuborishdan hamma socket chat_message olguncha.
+    """
+    name = 'chat_fanout'
+    serial_on_sqlite = True
+    sockets_per_room = 10
+
+    async def setup(self, concurrency, ops):
+        self.rooms = []
+        for room_id, client, doctor in self.fixture.rooms[:concurrency]:
+            sockets = []
+            for i in range(self.sockets_per_room):
+                token = self.fixture.token(client if i % 2 == 0 else doctor)
+                socket = Socket(self.app, f'/ws/chat/{room_id}/?token={token}')
+                await socket.connect()
+                await socket.until('chat_history')
+                sockets.append(socket)
+            self.rooms.append(sockets)
+
+    async def op(self, worker):
+        sockets = self.rooms[worker]
+        await sockets[0].send({'type': 'chat_message', 'text': 'Salom'})
+        await asyncio.gather(*(socket.until('chat_message') for socket in sockets))
+
+    async def teardown(self):
+        for sockets in self.rooms:
+            for socket in sockets:
+                await socket.close()
+
+
+class StreamJoin(Scenario):
+    """Jonli efirga kirish to'lqinlari: concurrency ta viewer bir vaqtda ulanadi"""
+    name = 'stream_join'
+
+    async def setup(self, concurrency, ops):
+        self.sockets = []
+
+    async def op(self, worker):
+        token = self.fixture.token(self.rng.choice(self.fixture.clients))
+        socket = Socket(self.app, f'/ws/stream/{self.fixture.stream}/?token={token}')
+        self.sockets.append(socket)
+        await socket.connect()
+        await socket.until('viewer_count')
+
+    async def teardown(self):
+        await asyncio.gather(*(socket.close() for socket in self.sockets))
+
+
+class CallFlow(Scenario):
+    """initiate -> answer -> end (LiveKit - fake_livekit)"""
+    name = 'call'
+
+    def max_concurrency(self):
+        return len(self.fixture.disjoint_rooms())
+
+    async def setup(self, concurrency, ops):
+        self.rooms = asyncio.Queue()
+        for room in self.fixture.disjoint_rooms():
+            self.rooms.put_nowait(room)
+
+    async def op(self, worker):
+        room_id, client, doctor = await self.rooms.get()
+        try:
+            call = await expect(self.app, 'POST', '/api/call/calls/initiate/', status=201,
+                                token=self.fixture.token(client), body={'room_id': room_id, 'call_type': 'audio'})
+            await expect(self.app, 'POST', f"/api/call/calls/{call['call_id']}/answer/", token=self.fixture.token(doctor))
+            await expect(self.app, 'POST', f"/api/call/calls/{call['call_id']}/end/", token=self.fixture.token(client))
+        finally:
+            self.rooms.put_nowait((room_id, client, doctor))
+
+
+class PaymeRPC(Scenario):
+    """
+    CheckPerformTransaction -> CreateTransaction -> PerformTransaction
+
+    Payme URL lari hozir ulanmagan (paymeuz/urls.py), shuning uchun
+    PaymeCallbackView to'g'ridan-to'g'ri, ASGI thread idagi kabi chaqiriladi.
+    """
+    name = 'payme'
+    credentials = ('benchmark', 'benchmark-key')
+
+    async def setup(self, concurrency, ops):
+        self.view = PaymeCallbackView.as_view()
+        self.factory = RequestFactory()
+        self.auth = 'Basic ' + base64.b64encode(':'.join(self.credentials).encode()).decode()
+        self.config = PaymeService.PAYME_CONFIG
+        PaymeService.load_config({'MERCHANT_ID': self.credentials[0], 'SECRET_KEY': self.credentials[1]})
+
+        def create():
+            content_type = ContentType.objects.get_for_model(Payment)
+            return Payment.objects.bulk_create([
+                Payment(user_id=self.rng.choice(self.fixture.clients), payment_type='market', content_type=content_type,
+                        object_id=1, amount=self.rng.randint(10, 500) * 1000, payment_method='payme')
+                for _ in range(ops)
+            ])
+        self.payments = await sync_to_async(create)()
+
+    def rpc(self, method, params):
+        request = self.factory.post('/', data=dumps({'id': 1, 'method': method, 'params': params}),
+                                    content_type='application/json', HTTP_AUTHORIZATION=self.auth)
+        result = loads(self.view(request).content)
+        if 'result' not in result:
+            raise AssertionError(f'{method}: {result}')
+
+    def sequence(self, payment):
+        account = {'order_id': str(payment.id)}
+        amount = int(payment.amount * 100)
+        transaction_id = uuid.uuid4().hex
+        with metrics.measure('payme'):
+            self.rpc('CheckPerformTransaction', {'account': account, 'amount': amount})
+            self.rpc('CreateTransaction', {'id': transaction_id, 'time': int(time.time() * 1000),
+                                           'account': account, 'amount': amount})
+            self.rpc('PerformTransaction', {'id': transaction_id})
+
+    async def op(self, worker):
+        await sync_to_async(self.sequence, thread_sensitive=False)(self.payments.pop())
+
+    async def teardown(self):
+        PaymeService.load_config(self.config)
+
+
+class PushBroadcast(Scenario):
+    """Celery: broadcast_notification barcha aktiv qurilmalarga (FakeFCMTransport)"""
+    name = 'push_broadcast'
+    ops_factor = 0.2
+
+    def broadcast(self):
+        from news.broadcast import FakeFCMTransport
+        from news.models import Notification
+        from news.tasks import broadcast_notification
+
+        notification = Notification.objects.create(title='Benchmark', description='Fanout', push_time=timezone.now(),
+                                                   status='sending')
+        with metrics.measure('celery:broadcast_notification'):
+            broadcast_notification.apply(args=(notification.id,), kwargs={'transport': FakeFCMTransport()}).get()
+
+    async def op(self, worker):
+        await sync_to_async(self.broadcast, thread_sensitive=False)()
+
+
+SCENARIOS = [Catalog, CartAdd, ChatRooms, ChatFanout, StreamJoin, CallFlow, PaymeRPC, PushBroadcast]
+
+
+# Runner
+
+def _queries():
+    return sum(value for series, value in metrics.snapshot().items() if series.startswith('db_queries_total'))
+
+
+class Result:
+
+    def __init__(self, name):
+        self.name = name
+        self.latencies = []
+        self.errors = []
+        self.elapsed = 0.0
+        self.queries = 0
+
+    def as_dict(self):
+        ops = len(self.latencies)
+        if not ops:
+            return {'ops': 0, 'errors': len(self.errors)}
+        latencies = sorted(self.latencies)
+        return {
+            'ops': ops,
+            'rps': round(ops / self.elapsed, 1),
+            'p50_ms': round(statistics.median(latencies) * 1000, 2),
+            'p99_ms': round(latencies[min(int(ops * 0.99), ops - 1)] * 1000, 2),
+            'queries_per_op': round(self.queries / (ops + len(self.errors)), 2),
+            'errors': len(self.errors),
+        }
+
+
+async def run_scenario(scenario, ops, concurrency):
+    concurrency = min(concurrency, scenario.max_concurrency() or concurrency, ops)
+    result = Result(scenario.name)
+    await scenario.setup(concurrency, ops + 1)
+    try:
+        # Warm-up: import lar, cache, connection lar
+        await scenario.op(0)
+
+        remaining = ops
+        queries = await sync_to_async(_queries, thread_sensitive=False)()
+
+        async def worker(index):
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                started = time.perf_counter()
+                try:
+                    await scenario.op(index)
+                except Exception as e:
+                    result.errors.append(f'{type(e).__name__}: {e}')
+                else:
+                    result.latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(index) for index in range(concurrency)))
+        result.elapsed = time.perf_counter() - started
+        result.queries = await sync_to_async(_queries, thread_sensitive=False)() - queries
+    finally:
+        await scenario.teardown()
+    return result
+
+
+def compare(results, baseline, tolerance):
+    """
+    Baseline ga nisbatan regressiya lar (matn ro'yxati)
+
+    SQL/op deyarli deterministik - 10% + 0.5 dan ko'p oshsa; p50 va req/s
+    tolerance (0.5 = 50%) dan, p99 (shovqinli) 2 * tolerance dan ko'p
+    yomonlashsa; yangi xato paydo bo'lsa.
+    """
+    failures = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if not base or not current.get('ops'):
+            continue
+        if current['errors'] > base['errors']:
+            failures.append(f"{name}: {current['errors']} errors (baseline {base['errors']})")
+        if current['queries_per_op'] > base['queries_per_op'] * 1.1 + 0.5:
+            failures.append(f"{name}: {current['queries_per_op']} queries/op (baseline {base['queries_per_op']})")
+        for field, allowed in (('p50_ms', tolerance), ('p99_ms', tolerance * 2)):
+            if current[field] > base[field] * (1 + allowed):
+                failures.append(f"{name}: {field} {current[field]} (baseline {base[field]})")
+        if current['rps'] < base['rps'] / (1 + tolerance):
+            failures.append(f"{name}: {current['rps']} req/s (baseline {base['rps']})")
+    return failures
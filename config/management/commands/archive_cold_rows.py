@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from config import archive
+
+
+class Command(BaseCommand):
+    help = 'Move rows older than ARCHIVE_RETENTION_DAYS into compressed archive chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', action='append', help='Only this model label, e.g. chat.Message (repeatable)')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Rows per chunk batch (default: 2000)')
+        parser.add_argument('--dry-run', action='store_true', help='Only count archivable rows')
+
+    def handle(self, *args, **options):
+        labels = options['model']
+        unknown = set(labels or ()) - set(archive.POLICIES)
+        if unknown:
+            raise CommandError(f"Unknown model(s): {', '.join(sorted(unknown))}")
+
+        result = archive.archive_all(labels, batch_size=options['batch_size'], dry_run=options['dry_run'])
+        for label, count in result.items():
+            policy = archive.POLICIES[label]
+            days = f"{policy.days} days" if policy.days else 'disabled'
+            self.stdout.write(f"{label:<30} {count:>8} ({days})")
@@ -0,0 +1,157 @@
+"""
+Hot read endpoint lar: sync DRF view vs AsyncReadView (config/aio.py)
+
+Ikkalasi ham bitta event loop da, concurrency ta coroutine bilan chaqiriladi:
+- sync: Django ASGIHandler kabi - har bir request ThreadSensitiveContext da,
+  butun view thread da (so'ng close_old_connections)
+- async: AsyncReadView - thread faqat run_sync hop larida
+
+thread ms/req - request uchun thread larda o'tgan vaqt (executor bandligi),
+peak threads - benchmark davomida bir vaqtdagi eng ko'p thread.
+
+Executor thread lari alohida connection ishlatadi, shuning uchun test ma'lumoti
+commit qilinadi va oxirida o'chiriladi (998000000... raqamli user lar).
+"""
+import asyncio
+import statistics
+import threading
+import time
+
+from asgiref.sync import ThreadSensitiveContext, sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.test.utils import override_settings
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from call.models import Call
+from call.views import AsyncActiveCallsView, CallViewSet
+from chat.models import ChatRoom, Message
+from chat.views import AsyncChatRoomListView, ChatRoomViewSet
+from config.aio import executor_stats, timed
+from shop.models import Medicine, TypeMedicine
+from shop.views import AsyncMedicinesView, MedicinesView
+from specialist.models import Doctor, TypeDoctor
+from specialist.views import AsyncDoctorListAPI, DoctorListAPI
+from stream.models import LiveStream
+from stream.views import AsyncLiveStreamsView, LiveStreamViewSet
+
+User = get_user_model()
+
+PHONE_PREFIX = '998000000'
+
+
+class Command(BaseCommand):
+    help = 'Benchmark sync DRF vs async read views: latency and thread-pool occupancy (test data is cleaned up)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Requests per endpoint (default: 500)')
+        parser.add_argument('--concurrency', type=int, default=32, help='Concurrent requests (default: 32)')
+        parser.add_argument('--items', type=int, default=20, help='Doctors/medicines/rooms to create (default: 20)')
+        parser.add_argument('--locmem', action='store_true', help='Use process-local cache instead of Redis')
+
+    def handle(self, *args, **options):
+        caches = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        with override_settings(**({'CACHES': caches} if options['locmem'] else {})):
+            client = self._create(options['items'])
+            try:
+                self._run(client, options['requests'], options['concurrency'])
+            finally:
+                self._cleanup()
+
+    def _create(self, count):
+        client = User.objects.create_user(phone=f'{PHONE_PREFIX}001')
+        type_doctor = TypeDoctor.objects.create(name='Benchmark')
+        type_medicine = TypeMedicine.objects.create(name='Benchmark')
+        for i in range(count):
+            doctor_user = User.objects.create_user(phone=f'{PHONE_PREFIX}{100 + i}', role='doctor')
+            Doctor.objects.create(user=doctor_user, image='', full_name=f'Doctor {i}', experience='5',
+                                  type_doctor=type_doctor, gender='male', is_verified=True)
+            Medicine.objects.create(title=f'Benchmark {i}', cost=1000 + i, type_medicine=type_medicine)
+
+            room, _ = ChatRoom.get_or_create_private_room(client, doctor_user)
+            Message.objects.create(room=room, sender=doctor_user, text=f'Xabar {i}')
+            if i < 2:
+                Call.objects.create(room=room, call_type='audio', caller=client, receiver=doctor_user,
+                                    livekit_room_name=f'benchmark-call-{i}', status='answered')
+                LiveStream.objects.create(title=f'Benchmark {i}', host=doctor_user,
+                                          livekit_room_name=f'benchmark-stream-{i}')
+        return client
+
+    def _cleanup(self):
+        users = User.objects.filter(phone__startswith=PHONE_PREFIX)
+        ChatRoom.objects.filter(participants__in=users).delete()
+        Medicine.objects.filter(type_medicine__name='Benchmark').delete()
+        users.delete()
+        TypeDoctor.objects.filter(name='Benchmark').delete()
+        TypeMedicine.objects.filter(name='Benchmark').delete()
+
+    def _run(self, client, total, concurrency):
+        # Throttle lar benchmark ni 429 bilan to'xtatmasin
+        no_throttle = {'throttle_classes': ()}
+        endpoints = [
+            ('/api/shop/medicines/', MedicinesView.as_view(**no_throttle),
+             AsyncMedicinesView.as_view(**no_throttle)),
+            ('/api/specialist/doctors/', DoctorListAPI.as_view(**no_throttle),
+             AsyncDoctorListAPI.as_view(**no_throttle)),
+            ('/api/chat/rooms/', ChatRoomViewSet.as_view({'get': 'list'}, **no_throttle),
+             AsyncChatRoomListView.as_view(**no_throttle)),
+            ('/api/call/calls/active/', CallViewSet.as_view({'get': 'active'}, **no_throttle),
+             AsyncActiveCallsView.as_view(**no_throttle)),
+            ('/api/stream/streams/live/', LiveStreamViewSet.as_view({'get': 'live'}, **no_throttle),
+             AsyncLiveStreamsView.as_view(**no_throttle)),
+        ]
+        factory = APIRequestFactory()
+        token = f'Bearer {AccessToken.for_user(client)}'
+
+        self.stdout.write(f"{total} requests/endpoint, concurrency {concurrency}")
+        self.stdout.write(f"{'endpoint':<26} {'view':>5} {'req/s':>7} {'p50 ms':>8} {'p99 ms':>8} "
+                          f"{'thread ms/req':>13} {'peak threads':>12}")
+        for url, sync_view, async_view in endpoints:
+            for name, call in (('sync', self._sync_call(sync_view)), ('async', async_view)):
+                requests = [factory.get(url, HTTP_AUTHORIZATION=token) for _ in range(total)]
+                result = asyncio.run(self._load(call, requests, concurrency))
+                self.stdout.write(f"{url:<26} {name:>5} {result}")
+
+    @staticmethod
+    def _sync_call(view):
+        @timed
+        def run(request):
+            try:
+                return view(request).render()
+            finally:
+                close_old_connections()
+
+        async def call(request):
+            async with ThreadSensitiveContext():
+                return await sync_to_async(run)(request)
+        return call
+
+    async def _load(self, call, requests, concurrency):
+        await call(requests.pop())  # warm-up (cache, import lar)
+        executor_stats(reset=True)
+
+        latencies = []
+        peak = threading.active_count()
+        queue = list(requests)
+
+        async def worker():
+            nonlocal peak
+            while queue:
+                request = queue.pop()
+                started = time.perf_counter()
+                response = await call(request)
+                latencies.append(time.perf_counter() - started)
+                peak = max(peak, threading.active_count())
+                assert response.status_code == 200, response.content[:200]
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        stats = executor_stats()
+        return (f"{len(latencies) / elapsed:>7.0f} {statistics.median(latencies) * 1000:>8.1f} "
+                f"{latencies[int(len(latencies) * 0.99) - 1] * 1000:>8.1f} "
+                f"{stats['busy'] / len(latencies) * 1000:>13.2f} {peak:>12}")
@@ -0,0 +1,101 @@
+import io
+import json
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from chat.models import ChatRoom, Message
+from chat.payloads import MESSAGE_COLUMNS, build_messages
+from config.fastjson import ORJSONParser, ORJSONRenderer, dumps
+from paymeuz.models import Payment
+from shop.models import Medicine, TypeMedicine
+from shop.serializers import MedicineSerializer
+
+User = get_user_model()
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Benchmark DRF JSONRenderer/JSONParser/json.dumps vs orjson on real response shapes (rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=50, help='Items per page (default: 50)')
+        parser.add_argument('--rounds', type=int, default=500, help='Rounds per shape (default: 500)')
+
+    def handle(self, *args, **options):
+        caches = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        try:
+            with override_settings(CACHES=caches), transaction.atomic():
+                shapes = self._shapes(options['items'])
+                self._run(shapes, options['rounds'])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _shapes(self, count):
+        client = User.objects.create_user(phone='998000000001')
+        doctor = User.objects.create_user(phone='998000000002', role='doctor')
+
+        # Katalog sahifasi (MedicineSerializer, ko'p tilli matnlar)
+        type_medicine = TypeMedicine.objects.create(name='Analgetik')
+        for i in range(count):
+            Medicine.objects.create(
+                title=f'Paratsetamol {i}', title_uz=f'Paratsetamol {i}', title_ru=f'Парацетамол {i}',
+                description='Og\'riq qoldiruvchi vosita. ' * 10, description_ru='Обезболивающее средство. ' * 10,
+                cost=12000 + i, quantity=100, type_medicine=type_medicine,
+            )
+        medicines = Medicine.objects.prefetch_related('pictures')
+        for medicine in medicines:
+            medicine.is_favorite, medicine.total_rate = False, 4.5
+        catalog = {'count': count, 'next': None, 'previous': None,
+                   'results': MedicineSerializer(medicines, many=True).data}
+
+        # Chat history (chat.payloads)
+        room, _ = ChatRoom.get_or_create_private_room(client, doctor)
+        for i in range(count):
+            Message.objects.create(room=room, sender=client if i % 2 else doctor, text=f'Xabar {i} ' * 8)
+        history = {'type': 'chat_history', 'has_more': False,
+                   'items': build_messages(list(room.messages.values_list(*MESSAGE_COLUMNS)), client.id)}
+
+        # Payment lar: UUID, Decimal, datetime - encoder default() yo'li
+        content_type = ContentType.objects.get_for_model(Medicine)
+        for i in range(count):
+            Payment.objects.create(user=client, payment_type='market', content_type=content_type,
+                                   object_id=i + 1, amount='125000.50', payment_method='payme')
+        payments = list(Payment.objects.values('id', 'amount', 'currency', 'status', 'created_at', 'paid_at'))
+
+        return {'catalog': catalog, 'history': history, 'payments': payments}
+
+    def _run(self, shapes, rounds):
+        def timed(func, data):
+            started = time.perf_counter()
+            for _ in range(rounds):
+                result = func(data)
+            return (time.perf_counter() - started) / rounds * 1000, result
+
+        for name, data in shapes.items():
+            drf_ms, body = timed(JSONRenderer().render, data)
+            fast_ms, _ = timed(ORJSONRenderer().render, data)
+            self.stdout.write(self.style.SUCCESS(
+                f"render {name:>8}: drf {drf_ms:.3f} ms, orjson {fast_ms:.3f} ms "
+                f"(x{drf_ms / fast_ms:.1f}, {len(body)} bytes)"
+            ))
+
+            drf_ms, _ = timed(lambda raw: JSONParser().parse(io.BytesIO(raw)), body)
+            fast_ms, _ = timed(lambda raw: ORJSONParser().parse(io.BytesIO(raw)), body)
+            self.stdout.write(f"parse  {name:>8}: drf {drf_ms:.3f} ms, orjson {fast_ms:.3f} ms (x{drf_ms / fast_ms:.1f})")
+
+        # WebSocket frame: json.dumps(str) vs dumps(bytes).decode()
+        history = shapes['history']
+        drf_ms, _ = timed(lambda data: json.dumps(data, default=str), history)
+        fast_ms, _ = timed(lambda data: dumps(data).decode(), history)
+        self.stdout.write(f"ws frame  history: json {drf_ms:.3f} ms, orjson {fast_ms:.3f} ms (x{drf_ms / fast_ms:.1f})")
@@ -0,0 +1,197 @@
+"""
+manage.py serve ni 1..N worker bilan ishga tushirib REST va WebSocket throughput ni o'lchash
+
+    python manage.py benchmark_serving --workers 1,2,4 --duration 10 --phone 998901234567 --room 12
+
+REST: keep-alive connection lar --path ga GET yuboradi (javob kutib, keyingisini).
+WS: har bir connection chat room ga ulanib {"type": "sync"} yuboradi va chat_sync
+frame ini kutadi (consumer -> DB executor -> frame, to'liq yo'l). --phone/--room
+berilmasa WS qismi o'tkazib yuboriladi. WS uchun channel layer (Redis) kerak.
+"""
+import asyncio
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from config.fastjson import dumps, loads
+
+User = get_user_model()
+
+
+class Result:
+
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+
+    def summary(self, duration):
+        if not self.latencies:
+            return f"{'-':>9} {'-':>8} {'-':>8} {self.errors:>6}"
+        latencies = sorted(self.latencies)
+        p50 = statistics.median(latencies) * 1000
+        p99 = latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)] * 1000
+        return f"{len(latencies) / duration:>9.0f} {p50:>8.1f} {p99:>8.1f} {self.errors:>6}"
+
+
+async def read_response(reader):
+    """HTTP/1.1 javob: (status, keep_alive)"""
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split()[1])
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip().lower()
+
+    if 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    elif headers.get('transfer-encoding') == 'chunked':
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if not size:
+                break
+    else:
+        await reader.read()
+        return status, False
+    return status, headers.get('connection') != 'close'
+
+
+async def http_client(port, path, deadline, result):
+    request = f'GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nAccept: application/json\r\n\r\n'.encode()
+    writer = None
+    while time.perf_counter() < deadline:
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            started = time.perf_counter()
+            writer.write(request)
+            status, keep_alive = await read_response(reader)
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            result.errors += 1
+            writer = None
+            await asyncio.sleep(0.05)
+            continue
+
+        if status == 200:
+            result.latencies.append(time.perf_counter() - started)
+        else:
+            result.errors += 1
+        if not keep_alive:
+            writer.close()
+            writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def ws_client(url, deadline, result):
+    import websockets
+
+    try:
+        async with websockets.connect(url, open_timeout=10) as ws:
+            seq = 0
+            while True:
+                frame = loads(await ws.recv())
+                if frame.get('type') == 'chat_history':
+                    seq = frame.get('seq') or 0
+                    break
+
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                await ws.send(dumps({'type': 'sync', 'since': seq}).decode())
+                while loads(await ws.recv()).get('type') not in ('chat_sync', 'chat_history'):
+                    pass
+                result.latencies.append(time.perf_counter() - started)
+    except (OSError, websockets.WebSocketException, asyncio.TimeoutError):
+        result.errors += 1
+
+
+async def run_load(clients, duration):
+    deadline = time.perf_counter() + duration
+    result = Result()
+    await asyncio.gather(*(client(deadline, result) for client in clients))
+    return result
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise CommandError(f'Server did not start on port {port}')
+
+
+class Command(BaseCommand):
+    help = 'Load benchmark: start `manage.py serve` with 1..N workers, measure REST and WebSocket throughput'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', default='1,2,4', help='Worker counts per pool (default: 1,2,4)')
+        parser.add_argument('--threads', type=int, default=settings.ASGI_THREADS, help='Threads per worker')
+        parser.add_argument('--duration', type=float, default=10, help='Seconds per phase (default: 10)')
+        parser.add_argument('--warmup', type=float, default=3, help='Unmeasured seconds before REST phase')
+        parser.add_argument('--concurrency', type=int, default=64, help='HTTP connections (default: 64)')
+        parser.add_argument('--path', default='/api/shop/medicines/', help='REST path (default: catalog)')
+        parser.add_argument('--ws-connections', type=int, default=64, help='WebSocket connections (default: 64)')
+        parser.add_argument('--phone', help='WebSocket user phone (room participant)')
+        parser.add_argument('--room', type=int, help='Chat room id for WebSocket load')
+        parser.add_argument('--port', type=int, default=18000, help='HTTP port; WebSocket uses port+1')
+
+    def handle(self, *args, **options):
+        counts = [int(count) for count in options['workers'].split(',')]
+        port, ws_port = options['port'], options['port'] + 1
+        ws_url = self.ws_url(options, ws_port)
+
+        self.stdout.write(f"CPU: {os.cpu_count()}, threads/worker: {options['threads']}, "
+                          f"{options['duration']:.0f}s per phase")
+        self.stdout.write(f"{'workers':>7} {'phase':>5} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'errors':>6}")
+
+        for count in counts:
+            server = subprocess.Popen(
+                [sys.executable, 'manage.py', 'serve', '--bind', '127.0.0.1', '--port', str(port),
+                 '--ws-port', str(ws_port), '--http-workers', str(count), '--ws-workers', str(count),
+                 '--threads', str(options['threads'])],
+                cwd=settings.BASE_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            )
+            try:
+                wait_for_port(port)
+                wait_for_port(ws_port)
+                clients = [
+                    lambda deadline, result: http_client(port, options['path'], deadline, result)
+                ] * options['concurrency']
+                # Warm-up: har bir worker Django ni, URL resolver va connection larni yuklab olsin
+                asyncio.run(run_load(clients, options['warmup']))
+                result = asyncio.run(run_load(clients, options['duration']))
+                self.stdout.write(f"{count:>7} {'rest':>5} {result.summary(options['duration'])}")
+
+                if ws_url:
+                    clients = [lambda deadline, result: ws_client(ws_url, deadline, result)] * options['ws_connections']
+                    result = asyncio.run(run_load(clients, options['duration']))
+                    self.stdout.write(f"{count:>7} {'ws':>5} {result.summary(options['duration'])}")
+            finally:
+                server.send_signal(signal.SIGTERM)
+                server.wait()
+
+    def ws_url(self, options, ws_port):
+        if not (options['phone'] and options['room']):
+            self.stdout.write(self.style.WARNING('--phone/--room not given, skipping WebSocket phase'))
+            return None
+
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        try:
+            user = User.objects.get(phone=options['phone'])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['phone']} not found")
+        return f"ws://127.0.0.1:{ws_port}/ws/chat/{options['room']}/?token={AccessToken.for_user(user)}"
@@ -0,0 +1,149 @@
+"""
+REST, WebSocket va Celery yo'llari bo'yicha yuklama benchmark (config/loadtest.py)
+
+    python manage.py benchmark_suite --scale 1 --ops 500 --concurrency 32
+    python manage.py benchmark_suite --locmem --scale 0.01 --ops 100 --check   # CI
+
+Alohida test bazada ishlaydi (seed -> scenario lar -> baza o'chiriladi).
+--check: natija baseline (--baseline JSON) dan --tolerance dan ko'p yomon
+bo'lsa yoki SQL/op oshsa exit code 1. --save-baseline - joriy natijani
+baseline ga yozish. Vaqt lar mashinaga bog'liq - baseline ni CI runner da
+yangilang; SQL/op esa hamma joyda bir xil bo'lishi kerak.
+"""
+import asyncio
+import contextlib
+import logging
+import os
+import random
+import tempfile
+import time
+
+import orjson
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test.utils import override_settings, setup_databases, setup_test_environment, \
+    teardown_databases, teardown_test_environment
+
+from config import loadtest
+from config.fastjson import dumps, loads
+
+DEFAULT_BASELINE = os.path.join(settings.BASE_DIR, 'config', 'loadtest_baseline.json')
+
+
+class Command(BaseCommand):
+    help = 'Seed a throwaway database and load-test REST, WebSocket and Celery paths; compare with a stored baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=1.0,
+                            help='Seed size: 1 = 10k medicines, 1k doctors, 100k messages (default: 1)')
+        parser.add_argument('--ops', type=int, default=200, help='Operations per scenario (default: 200)')
+        parser.add_argument('--concurrency', type=int, default=16, help='Concurrent virtual users (default: 16)')
+        parser.add_argument('--only', help='Comma-separated scenarios: ' + ', '.join(s.name for s in loadtest.SCENARIOS))
+        parser.add_argument('--locmem', action='store_true', help='Use process-local cache instead of Redis')
+        parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON file')
+        parser.add_argument('--save-baseline', action='store_true', help='Write results to the baseline file')
+        parser.add_argument('--check', action='store_true', help='Fail if results regress against the baseline')
+        parser.add_argument('--tolerance', type=float, default=0.5,
+                            help='Allowed latency/throughput regression, 0.5 = 50%% (default: 0.5)')
+
+    def handle(self, *args, **options):
+        scenarios = loadtest.SCENARIOS
+        if options['only']:
+            names = options['only'].split(',')
+            scenarios = [scenario for scenario in scenarios if scenario.name in names]
+            if not scenarios:
+                raise CommandError(f"Unknown scenarios: {options['only']}")
+
+        overrides = {'CHANNEL_LAYERS': {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}}
+        if options['locmem']:
+            # L1 policy lari production dagidek
+            tiers = settings.CACHES['default'].get('OPTIONS', {}).get('TIERS', {})
+            overrides['CACHES'] = {'default': {'BACKEND': 'config.cache.TieredLocMemCache', 'OPTIONS': {'TIERS': tiers}}}
+        quiet = contextlib.nullcontext()
+        if options['verbosity'] < 2:
+            # Kutilgan xatolar (FCM credential yo'q va h.k.) va debug print lar natijani ko'mib yubormasin
+            logging.disable(logging.ERROR)
+            quiet = contextlib.redirect_stdout(open(os.devnull, 'w'))
+
+        setup_test_environment(debug=False)
+        try:
+            with override_settings(**overrides), tempfile.TemporaryDirectory() as tmp, quiet:
+                old_config = self._setup_database(tmp)
+                try:
+                    results = self._run(scenarios, options)
+                finally:
+                    teardown_databases(old_config, verbosity=0)
+        finally:
+            teardown_test_environment()
+            logging.disable(logging.NOTSET)
+
+        self._report(results, options)
+
+    def _setup_database(self, tmp):
+        connection = connections['default']
+        if connection.vendor == 'sqlite':
+            # In-memory baza thread lar orasida parallel yozishni ko'tarmaydi
+            connection.settings_dict['TEST']['NAME'] = os.path.join(tmp, 'loadtest.sqlite3')
+        return setup_databases(verbosity=0, interactive=False, aliases={'default'})
+
+    def _run(self, scenarios, options):
+        from config.asgi import application
+
+        started = time.perf_counter()
+        fixture = loadtest.seed(options['scale'])
+        connections.close_all()
+        self.stdout.write(f"Seeded {len(fixture.medicines)} medicines, {len(fixture.doctors)} doctors, "
+                          f"{len(fixture.rooms)} rooms in {time.perf_counter() - started:.1f}s")
+
+        async def run():
+            results = {}
+            rng = random.Random(7)
+            for scenario_class in scenarios:
+                scenario = scenario_class(application, fixture, rng)
+                ops = max(int(options['ops'] * scenario.ops_factor), 5)
+                result = await loadtest.run_scenario(scenario, ops, options['concurrency'])
+                results[scenario.name] = result.as_dict()
+                for error in sorted(set(result.errors))[:3]:
+                    self.stderr.write(f"  {scenario.name}: {error}")
+            return results
+
+        with loadtest.fake_livekit():
+            results = asyncio.run(run())
+        connections.close_all()
+        return results
+
+    def _report(self, results, options):
+        baseline = {}
+        if os.path.exists(options['baseline']):
+            with open(options['baseline'], 'rb') as f:
+                baseline = loads(f.read())
+
+        # Baseline faqat bir xil hajm/yuklama bilan solishtiriladi
+        params = {name: options[name] for name in ('scale', 'ops', 'concurrency')}
+        self.stdout.write(f"{'scenario':<16} {'ops':>5} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} "
+                          f"{'SQL/op':>7} {'errors':>6} {'base p50':>9} {'base SQL':>8}")
+        for name, result in results.items():
+            base = baseline.get(name, {}) if baseline.get('_params') == params else {}
+            if not result.get('ops'):
+                self.stdout.write(f"{name:<16} {0:>5} {'-':>8} {'-':>8} {'-':>8} {'-':>7} {result['errors']:>6}")
+                continue
+            self.stdout.write(f"{name:<16} {result['ops']:>5} {result['rps']:>8} {result['p50_ms']:>8} "
+                              f"{result['p99_ms']:>8} {result['queries_per_op']:>7} {result['errors']:>6} "
+                              f"{base.get('p50_ms', '-'):>9} {base.get('queries_per_op', '-'):>8}")
+
+        if options['save_baseline']:
+            baseline = dict(baseline if baseline.get('_params') == params else {}, **results, _params=params)
+            with open(options['baseline'], 'wb') as f:
+                f.write(dumps(baseline, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS) + b'\n')
+            self.stdout.write(f"Baseline saved to {options['baseline']}")
+
+        if options['check']:
+            if not baseline:
+                raise CommandError(f"No baseline at {options['baseline']}")
+            if baseline.get('_params') != params:
+                raise CommandError(f"Baseline was recorded with {baseline.get('_params')}, this run used {params}")
+            failures = loadtest.compare(results, baseline, options['tolerance'])
+            if failures:
+                raise CommandError('Regressions:\n  ' + '\n  '.join(failures))
+            self.stdout.write(self.style.SUCCESS('No regressions against baseline'))
@@ -0,0 +1,68 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from config import images
+from config.snapshots import snapshots
+
+
+def _build(name):
+    # Process pool worker: faqat storage (mediafiles/) bilan ishlaydi, DB ga tegmaydi
+    try:
+        return name, images.build_variants(name), None
+    except Exception as e:
+        return name, None, str(e)
+
+
+class Command(BaseCommand):
+    help = 'Backfill responsive image derivatives (WebP/JPEG) for existing uploads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=4, help='Process pool size (default: 4)')
+        parser.add_argument('--force', action='store_true', help='Rebuild manifests that look up to date')
+        parser.add_argument('--model', type=str, help='Only this model label, e.g. shop.Medicine')
+
+    def handle(self, *args, **options):
+        # (model, srcset_field, pk) lar - bir xil fayl bir marta encode qilinadi
+        targets = {}
+        for model, image_field, srcset_field in images.REGISTRY:
+            if options['model'] and model._meta.label.lower() != options['model'].lower():
+                continue
+
+            rows = model.objects.exclude(**{image_field: ''}).exclude(**{f'{image_field}__isnull': True})
+            for pk, name, srcset in rows.values_list('pk', image_field, srcset_field).iterator(chunk_size=2000):
+                if options['force'] or (srcset or {}).get('source') != name:
+                    targets.setdefault(name, []).append((model, srcset_field, pk))
+
+        if not targets:
+            self.stdout.write('Nothing to do')
+            return
+
+        # Fork dan oldin - child process lar parent connectionni meros qilib olmasin
+        connections.close_all()
+
+        started = time.perf_counter()
+        done = failed = 0
+        with ProcessPoolExecutor(max_workers=options['processes']) as pool:
+            futures = [pool.submit(_build, name) for name in targets]
+            for future in as_completed(futures):
+                name, srcset, error = future.result()
+                if error:
+                    failed += 1
+                    self.stderr.write(f"{name}: {error}")
+                    continue
+
+                for model, srcset_field, pk in targets[name]:
+                    model.objects.filter(pk=pk).update(**{srcset_field: srcset})
+                done += 1
+
+        # .update() signal bermaydi - srcset li snapshot lar qo'lda yangilanadi
+        for snapshot in snapshots.values():
+            snapshot.rebuild()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"{done} files in {elapsed:.2f}s ({done / elapsed:,.1f} files/s), failed={failed}"
+        ))
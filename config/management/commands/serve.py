@@ -0,0 +1,187 @@
+"""
+Master/worker supervisor: N ta daphne process, HTTP va WebSocket alohida pool larda
+
+Master har bir worker uchun SO_REUSEPORT socket ochadi va uni daphne ga --fd
+bilan beradi - connection larni kernel worker lar orasida taqsimlaydi, worker
+o'lsa socket master da qoladi va yangi worker o'sha socket ni oladi.
+
+    python manage.py serve --port 8000 --http-workers 4
+    python manage.py serve --port 8000 --ws-port 8001 --http-workers 4 --ws-workers 2
+
+--ws-port berilsa nginx /ws/ location ni shu port ga yo'naltiradi.
+SIGTERM/SIGINT - graceful stop, SIGHUP - worker larni birma-bir qayta ishga tushirish (deploy).
+"""
+import logging
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+logger = logging.getLogger(__name__)
+
+APPLICATIONS = {
+    'all': 'config.asgi:application',
+    'http': 'config.asgi:http_application',
+    'ws': 'config.asgi:websocket_application',
+}
+
+
+def listen(host, port, backlog, reuse_port):
+    sock = socket.socket(socket.AF_INET6 if ':' in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class Worker:
+
+    def __init__(self, pool, index, sock):
+        self.pool = pool
+        self.index = index
+        self.sock = sock
+        self.process = None
+        self.started_at = 0
+
+    def __str__(self):
+        return f"{self.pool}-{self.index}"
+
+
+class Command(BaseCommand):
+    help = 'Run daphne worker processes behind one supervisor, with separate HTTP and WebSocket pools'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bind', default='0.0.0.0', help='Address to bind (default: 0.0.0.0)')
+        parser.add_argument('--port', type=int, default=8000, help='HTTP port; WebSocket too without --ws-port')
+        parser.add_argument('--ws-port', type=int, help='Separate WebSocket pool port')
+        parser.add_argument('--http-workers', type=int, default=os.cpu_count() or 1,
+                            help='HTTP worker processes (default: CPU count)')
+        parser.add_argument('--ws-workers', type=int, default=1, help='WebSocket worker processes (default: 1)')
+        parser.add_argument('--threads', type=int, default=settings.ASGI_THREADS,
+                            help='Sync executor threads per worker (default: ASGI_THREADS)')
+        parser.add_argument('--backlog', type=int, default=2048, help='Listen backlog (default: 2048)')
+        parser.add_argument('--graceful-timeout', type=int, default=30, help='Seconds to wait on stop (default: 30)')
+        parser.add_argument('--boot-time', type=float, default=3,
+                            help='Seconds a new worker gets before the old one is stopped on SIGHUP (default: 3)')
+        parser.add_argument('--proxy-headers', action='store_true', help='Trust X-Forwarded-For from nginx')
+        parser.add_argument('--access-log', action='store_true', help='Write daphne access log to stdout')
+
+    def handle(self, *args, **options):
+        if options['ws_port']:
+            pools = [('http', options['port'], options['http_workers']), ('ws', options['ws_port'], options['ws_workers'])]
+        else:
+            pools = [('all', options['port'], options['http_workers'])]
+
+        if any(count < 1 for _, _, count in pools):
+            raise CommandError('Worker count must be at least 1')
+
+        self.options = options
+        self.workers = self.bind(pools)
+        self.stopping = False
+        self.reloading = False
+
+        signal.signal(signal.SIGTERM, self.on_stop)
+        signal.signal(signal.SIGINT, self.on_stop)
+        signal.signal(signal.SIGHUP, self.on_reload)
+
+        for worker in self.workers:
+            self.spawn(worker)
+        self.stdout.write(self.style.SUCCESS(', '.join(
+            f"{name}: {count} worker(s) on {options['bind']}:{port}" for name, port, count in pools
+        ) + f", {options['threads']} threads each"))
+
+        try:
+            self.supervise()
+        finally:
+            self.stop()
+
+    def bind(self, pools):
+        # SO_REUSEPORT yo'q platformada pool dagi worker lar bitta socket ni bo'lishadi
+        reuse_port = hasattr(socket, 'SO_REUSEPORT')
+        workers = []
+        for name, port, count in pools:
+            shared = None if reuse_port else listen(self.options['bind'], port, self.options['backlog'], False)
+            for index in range(count):
+                sock = shared or listen(self.options['bind'], port, self.options['backlog'], True)
+                workers.append(Worker(name, index, sock))
+        return workers
+
+    def spawn(self, worker):
+        fd = worker.sock.fileno()
+        command = [sys.executable, '-m', 'daphne', '--fd', str(fd)]
+        if self.options['proxy_headers']:
+            command.append('--proxy-headers')
+        if self.options['access_log']:
+            command += ['--access-log', '-']
+        command.append(APPLICATIONS[worker.pool])
+
+        env = dict(os.environ, ASGI_THREADS=str(self.options['threads']))
+        worker.process = subprocess.Popen(command, pass_fds=(fd,), env=env, cwd=settings.BASE_DIR)
+        worker.started_at = time.monotonic()
+        logger.info(f"Worker {worker} started (pid {worker.process.pid})")
+
+    def supervise(self):
+        while not self.stopping:
+            if self.reloading:
+                self.reloading = False
+                self.reload()
+
+            for worker in self.workers:
+                code = worker.process.poll()
+                if code is None or self.stopping:
+                    continue
+                logger.warning(f"Worker {worker} (pid {worker.process.pid}) exited with {code}, restarting")
+                # Darhol yiqilayotgan worker ni (import xatosi va h.k.) tez-tez qayta ishga tushirmaslik
+                if time.monotonic() - worker.started_at < 1:
+                    time.sleep(1)
+                self.spawn(worker)
+
+            time.sleep(0.5)
+
+    def reload(self):
+        """Worker lar birma-bir almashtiriladi - qolganlari shu payt so'rovlarga javob beradi"""
+        for worker in self.workers:
+            if self.stopping:
+                return
+            # Yangi process o'sha socket ni oladi, eskisi u ishga tushgach to'xtatiladi
+            old = Worker(worker.pool, worker.index, worker.sock)
+            old.process = worker.process
+            self.spawn(worker)
+            time.sleep(self.options['boot_time'])
+            self.terminate([old])
+        logger.info('All workers reloaded')
+
+    def terminate(self, workers):
+        for worker in workers:
+            if worker.process and worker.process.poll() is None:
+                worker.process.terminate()
+
+        deadline = time.monotonic() + self.options['graceful_timeout']
+        for worker in workers:
+            if not worker.process:
+                continue
+            try:
+                worker.process.wait(max(deadline - time.monotonic(), 0))
+            except subprocess.TimeoutExpired:
+                logger.warning(f"Worker {worker} did not stop in time, killing")
+                worker.process.kill()
+                worker.process.wait()
+
+    def stop(self):
+        self.terminate(self.workers)
+        for sock in {worker.sock for worker in self.workers}:
+            sock.close()
+
+    def on_stop(self, signum, frame):
+        self.stopping = True
+
+    def on_reload(self, signum, frame):
+        self.reloading = True
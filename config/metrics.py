@@ -0,0 +1,424 @@
+"""
+Request/frame instrumentatsiyasi va Prometheus metrikalari
+
+Har bir HTTP request (InstrumentationMiddleware) va WebSocket frame
+(InstrumentedConsumerMixin) uchun Sample ochiladi: wall time, SQL soni va
+vaqti, cache hit/miss, tashqi HTTP (FCM, LiveKit, Eskiz, Telegram) vaqti.
+Sample contextvar da - sync_to_async/database_sync_to_async thread lariga
+ham o'tadi, shuning uchun executor dagi SQL ham shu request ga yoziladi.
+
+- SQL: har bir connection ga bitta execute_wrapper (connection_created)
+- cache: config.cache backend lari record_cache() chaqiradi
+- tashqi HTTP: `with outbound('livekit'):` chaqiruv joyida
+
+Metrikalar process xotirasida yig'iladi (lock + dict, request ga bir necha
+mikrosekund) va METRICS_FLUSH_INTERVAL da bir marta Redis hash ga qo'shiladi -
+/metrics/ barcha worker lar yig'indisini beradi. Redis bo'lmasa (locmem)
+faqat shu process niki.
+
+Profil: PROFILE_SAMPLE_RATE > 0 bo'lsa request lar shu ulushi cProfile
+bilan PROFILE_DIR/<route>/ ga .prof qilib yoziladi (snakeviz, pstats).
+Async view da faqat event loop thread i profil qilinadi.
+"""
+import asyncio
+import cProfile
+import logging
+import os
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import Http404, HttpResponse
+from django.utils.deprecation import MiddlewareMixin
+
+logger = logging.getLogger(__name__)
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+REDIS_KEY = 'metrics'
+
+HELP = {
+    'http_requests_total': ('counter', 'HTTP requests'),
+    'http_request_duration_seconds': ('histogram', 'HTTP request wall time'),
+    'ws_frames_total': ('counter', 'WebSocket frames and channel layer events handled'),
+    'ws_frame_duration_seconds': ('histogram', 'WebSocket frame handling wall time'),
+    'db_queries_total': ('counter', 'SQL queries per route/consumer'),
+    'db_query_seconds_total': ('counter', 'Time spent in SQL per route/consumer'),
+    'cache_requests_total': ('counter', 'Cache lookups by result'),
+    'cache_l1_requests_total': ('counter', 'In-process L1 cache lookups by tier and result'),
+    'outbound_requests_total': ('counter', 'Outbound HTTP calls (FCM, LiveKit, SMS, Telegram)'),
+    'outbound_request_duration_seconds': ('histogram', 'Outbound HTTP call wall time'),
+    'payme_rpc_duration_seconds': ('histogram', 'Payme Merchant API callback handling time by method'),
+}
+
+_lock = threading.Lock()
+_values = defaultdict(float)  # 'name{label="..."}' -> qiymat (flush qilinmagan qismi)
+_last_flush = time.monotonic()
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _series(name, labels):
+    if not labels:
+        return name
+    return name + '{' + ','.join(f'{key}="{_label(value)}"' for key, value in sorted(labels.items())) + '}'
+
+
+# Series nomlari (label kombinatsiyalari chegaralangan) bir marta quriladi
+_keys = {}
+
+
+def inc(name, value=1, **labels):
+    cache_key = (name, *labels.items())
+    key = _keys.get(cache_key)
+    if key is None:
+        key = _keys[cache_key] = _series(name, labels)
+    with _lock:
+        _values[key] += value
+
+
+def observe(name, seconds, **labels):
+    """Histogram: _bucket{le=...}, _sum, _count"""
+    cache_key = (name, *labels.items())
+    keys = _keys.get(cache_key)
+    if keys is None:
+        keys = _keys[cache_key] = (
+            _series(f'{name}_sum', labels),
+            _series(f'{name}_count', labels),
+            [(bound, _series(f'{name}_bucket', dict(labels, le=bound))) for bound in BUCKETS],
+            _series(f'{name}_bucket', dict(labels, le='+Inf')),
+        )
+    sum_key, count_key, buckets, inf_key = keys
+    with _lock:
+        _values[sum_key] += seconds
+        _values[count_key] += 1
+        _values[inf_key] += 1
+        for bound, key in buckets:
+            if seconds <= bound:
+                _values[key] += 1
+
+
+class Sample:
+    """Bitta request/frame bo'yicha yig'ilgan ko'rsatkichlar"""
+    __slots__ = ('route', 'started', 'queries', 'sql_time', 'cache_hits', 'cache_misses', 'outbound', 'outbound_time')
+
+    def __init__(self, route):
+        self.route = route
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.outbound = 0
+        self.outbound_time = 0.0
+
+    def finish(self):
+        elapsed = time.perf_counter() - self.started
+        if self.queries:
+            inc('db_queries_total', self.queries, route=self.route)
+            inc('db_query_seconds_total', self.sql_time, route=self.route)
+        if self.cache_hits:
+            inc('cache_requests_total', self.cache_hits, route=self.route, result='hit')
+        if self.cache_misses:
+            inc('cache_requests_total', self.cache_misses, route=self.route, result='miss')
+
+        if elapsed > settings.SLOW_REQUEST_THRESHOLD:
+            logger.warning(f"Slow {self.route}: {elapsed * 1000:.0f} ms, {self.queries} queries "
+                           f"({self.sql_time * 1000:.0f} ms), cache {self.cache_hits} hit/{self.cache_misses} miss, "
+                           f"{self.outbound} outbound ({self.outbound_time * 1000:.0f} ms)")
+        return elapsed
+
+
+_current = ContextVar('metrics_sample', default=None)
+_GROUP = re.compile(r'\(\?P<(\w+)>[^)]*\)')
+
+
+def current_sample():
+    return _current.get()
+
+
+def record_query(execute, sql, params, many, context):
+    sample = _current.get()
+    if sample is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        sample.queries += 1
+        sample.sql_time += time.perf_counter() - started
+
+
+def install_query_wrapper(sender, connection, **kwargs):
+    # connection_created har reconnect da keladi, execute_wrappers esa wrapper obyektida qoladi
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+connection_created.connect(install_query_wrapper)
+# Import dan oldin ochilgan (shu thread dagi) connection lar
+for _connection in connections.all():
+    install_query_wrapper(None, _connection)
+
+
+@contextmanager
+def measure(route):
+    """Middleware/consumer dan tashqaridagi kod uchun Sample (Celery task, benchmark)"""
+    sample = Sample(route)
+    token = _current.set(sample)
+    try:
+        yield sample
+    finally:
+        _current.reset(token)
+        sample.finish()
+
+
+def record_cache(hits, misses=0):
+    sample = _current.get()
+    if sample is not None:
+        sample.cache_hits += hits
+        sample.cache_misses += misses
+
+
+@contextmanager
+def outbound(service):
+    """Tashqi HTTP chaqiruv: `with outbound('eskiz'): requests.post(...)`"""
+    started = time.perf_counter()
+    outcome = 'ok'
+    try:
+        yield
+    except Exception:
+        outcome = 'error'
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        inc('outbound_requests_total', service=service, outcome=outcome)
+        observe('outbound_request_duration_seconds', elapsed, service=service)
+        sample = _current.get()
+        if sample is not None:
+            sample.outbound += 1
+            sample.outbound_time += elapsed
+
+
+# Redis ga yig'ish
+
+def _redis():
+    from config.cache import RedisCache
+
+    cache = caches['default']
+    if isinstance(cache, RedisCache):
+        return cache.client.get_client(write=True)
+    return None
+
+
+def flush(force=False):
+    """Process dagi qiymatlarni Redis hash ga qo'shish (interval da bir marta)"""
+    global _last_flush
+    now = time.monotonic()
+    if not force and now - _last_flush < settings.METRICS_FLUSH_INTERVAL:
+        return
+    _last_flush = now
+    client = _redis()
+    if client is None:
+        return
+
+    with _lock:
+        values = dict(_values)
+        _values.clear()
+    if not values:
+        return
+    try:
+        pipe = client.pipeline(transaction=False)
+        for key, value in values.items():
+            pipe.hincrbyfloat(caches['default'].make_key(REDIS_KEY), key, value)
+        pipe.execute()
+    except Exception as e:
+        # Keyingi flush da qayta urinamiz
+        logger.warning(f"Metrics flush failed: {e}")
+        with _lock:
+            for key, value in values.items():
+                _values[key] += value
+
+
+def flush_due():
+    return time.monotonic() - _last_flush >= settings.METRICS_FLUSH_INTERVAL
+
+
+def snapshot():
+    """{series: qiymat} - Redis dagi yig'indi + shu process ning flush qilinmagan qismi"""
+    flush(force=True)
+    client = _redis()
+    if client is None:
+        with _lock:
+            return dict(_values)
+    return {key.decode(): float(value) for key, value in client.hgetall(caches['default'].make_key(REDIS_KEY)).items()}
+
+
+def _metric_name(series):
+    name = series.split('{', 1)[0]
+    for suffix in ('_bucket', '_sum', '_count'):
+        if name.endswith(suffix) and name[:-len(suffix)] in HELP:
+            return name[:-len(suffix)]
+    return name
+
+
+def _process_gauges():
+    """Shu worker process ning pool holati - pid label bilan"""
+    from config.aio import executor_stats
+    from config.db.pool import pool_stats
+
+    pid = os.getpid()
+    lines = []
+    for alias, stats in pool_stats().items():
+        for field in ('size', 'idle', 'in_use', 'waits', 'timeouts'):
+            lines.append(f'db_pool_{field}{{alias="{alias}",pid="{pid}"}} {stats[field]}')
+    stats = executor_stats()
+    lines.append(f'executor_hops_total{{pid="{pid}"}} {stats["hops"]}')
+    lines.append(f'executor_busy_seconds_total{{pid="{pid}"}} {stats["busy"]}')
+    for cache in caches.all():
+        for tier, entries in getattr(cache, 'l1_stats', dict)().items():
+            lines.append(f'cache_l1_entries{{tier="{_label(tier)}",pid="{pid}"}} {entries}')
+    return lines
+
+
+def render():
+    """Prometheus text exposition format"""
+    grouped = defaultdict(list)
+    for series, value in snapshot().items():
+        grouped[_metric_name(series)].append((series, value))
+
+    lines = []
+    for name in sorted(grouped):
+        kind, help_text = HELP.get(name, ('untyped', name))
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+        lines += [f'{series} {value:.15g}' for series, value in sorted(grouped[name])]
+    lines += _process_gauges()
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    """/metrics/ - Prometheus scrape, `Authorization: Bearer <METRICS_TOKEN>`"""
+    token = settings.METRICS_TOKEN
+    if not token or request.headers.get('Authorization') != f'Bearer {token}':
+        raise Http404
+    return HttpResponse(render(), content_type='text/plain; version=0.0.4')
+
+
+# Profil
+
+_profiling = threading.Lock()
+
+
+def _route_slug(route):
+    return re.sub(r'\W+', '_', route).strip('_') or 'root'
+
+
+def start_profile():
+    """Namuna tushsa va boshqa profil ketmayotgan bo'lsa cProfile.Profile, aks holda None"""
+    if not settings.PROFILE_SAMPLE_RATE or random.random() >= settings.PROFILE_SAMPLE_RATE:
+        return None
+    # Bir vaqtda bitta profiler (sys.setprofile thread ga bitta)
+    if not _profiling.acquire(blocking=False):
+        return None
+    profile = cProfile.Profile()
+    profile.enable()
+    return profile
+
+
+def stop_profile(profile, route):
+    profile.disable()
+    _profiling.release()
+    directory = os.path.join(settings.PROFILE_DIR, _route_slug(route))
+    try:
+        os.makedirs(directory, exist_ok=True)
+        profile.dump_stats(os.path.join(directory, f'{time.strftime("%Y%m%d-%H%M%S")}-{os.getpid()}.prof'))
+    except OSError as e:
+        logger.warning(f"Profile dump failed for {route}: {e}")
+
+
+class InstrumentationMiddleware(MiddlewareMixin):
+    """
+    MIDDLEWARE boshida turadi - request to'liq (boshqa middleware lar bilan) o'lchanadi
+
+    Sync va async rejimda ham ishlaydi, async da thread ga o'tmaydi (Redis
+    flush interval da bir marta executor da).
+    """
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+
+        sample, token, profile = self.begin(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.end(request, response, sample, profile)
+        flush()
+        return response
+
+    async def __acall__(self, request):
+        sample, token, profile = self.begin(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.end(request, response, sample, profile)
+        if flush_due():
+            await sync_to_async(flush, thread_sensitive=False)()
+        return response
+
+    @staticmethod
+    def route(request):
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return 'unmatched'
+        # DRF router regex lari: '^rooms/(?P<pk>[^/.]+)/$' -> 'rooms/<pk>/'
+        return '/' + _GROUP.sub(r'<\1>', match.route).replace('^', '').replace('$', '')
+
+    def begin(self, request):
+        sample = Sample('')
+        token = _current.set(sample)
+        return sample, token, start_profile()
+
+    def end(self, request, response, sample, profile):
+        sample.route = route = self.route(request)
+        if profile is not None:
+            stop_profile(profile, route)
+        elapsed = sample.finish()
+        inc('http_requests_total', route=route, method=request.method, status=response.status_code)
+        observe('http_request_duration_seconds', elapsed, route=route)
+
+
+class InstrumentedConsumerMixin:
+    """
+    Consumer lar uchun: har bir kelgan frame va channel layer event
+
+    ws_frames_total{consumer,event}, ws_frame_duration_seconds{consumer},
+    SQL/cache route="ws:<Consumer>" bilan.
+    """
+
+    async def dispatch(self, message):
+        name = type(self).__name__
+        sample = Sample(f'ws:{name}')
+        token = _current.set(sample)
+        try:
+            await super().dispatch(message)
+        finally:
+            _current.reset(token)
+            elapsed = sample.finish()
+            inc('ws_frames_total', consumer=name, event=message['type'])
+            observe('ws_frame_duration_seconds', elapsed, consumer=name)
+            if flush_due():
+                await sync_to_async(flush, thread_sensitive=False)()
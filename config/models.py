@@ -7,3 +7,29 @@ class ConfigModel(models.Model):
 
     def __str__(self):
         return f"{self.version}"
+
+
+class ArchiveChunk(models.Model):
+    """
+    Cold storage (config.archive) - eski qatorlar zlib + JSONL ko'rinishida
+
+    Bitta chunk = bitta model + partition (masalan room_id) dagi bir batch.
+    Asosiy jadvallar va ularning indekslari kichik bo'lib qoladi.
+    """
+    model_label = models.CharField(max_length=100)
+    partition = models.BigIntegerField(null=True, blank=True)
+    first_id = models.BigIntegerField()
+    last_id = models.BigIntegerField()
+    started_at = models.DateTimeField()
+    ended_at = models.DateTimeField()
+    row_count = models.PositiveIntegerField()
+    data = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['model_label', 'partition', '-ended_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.model_label}[{self.partition}] {self.first_id}-{self.last_id} ({self.row_count})"
@@ -0,0 +1,62 @@
+"""
+Query plan tekshiruvi (config/tests.py dagi regression suite uchun)
+
+Endpoint bajargan SQL lar CaptureQueriesContext bilan yig'iladi va har biri
+uchun EXPLAIN olinadi. Katta (o'sib boradigan) jadvallarda sequential scan
+bo'lsa - index yo'q yoki query index ga mos emas.
+
+SQLite: EXPLAIN QUERY PLAN - "SCAN <table>" (USING INDEX siz) = full scan
+PostgreSQL: enable_seqscan=off bilan EXPLAIN (FORMAT JSON) - shunda ham
+"Seq Scan" qolsa, ishlatsa bo'ladigan index yo'q.
+"""
+import json
+import re
+
+from django.db import connection
+
+SQLITE_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$')
+
+
+def explain(sql, params=None, using=connection):
+    """SQL -> [(table, scan_type)] (scan_type: 'seq' yoki 'index')"""
+    with using.cursor() as cursor:
+        if using.vendor == 'sqlite':
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            result = []
+            for *_, detail in cursor.fetchall():
+                match = SQLITE_SCAN.match(detail)
+                if match:
+                    result.append((match.group(1), 'seq'))
+                elif detail.startswith(('SEARCH', 'SCAN')):
+                    result.append((detail.split()[1], 'index'))
+            return result
+
+        if using.vendor == 'postgresql':
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return list(_pg_nodes(plan[0]['Plan']))
+
+    return []
+
+
+def _pg_nodes(node):
+    if 'Relation Name' in node:
+        yield node['Relation Name'], 'seq' if node['Node Type'] == 'Seq Scan' else 'index'
+    for child in node.get('Plans', ()):
+        yield from _pg_nodes(child)
+
+
+def sequential_scans(queries, tables, using=connection):
+    """Captured query lar ichidan tables dagi seq scan lar: [(table, sql)]"""
+    found = []
+    for query in queries:
+        sql = query['sql']
+        if not sql.lstrip().upper().startswith('SELECT'):
+            continue
+        for table, scan in explain(sql, using=using):
+            if scan == 'seq' and table in tables:
+                found.append((table, sql))
+    return found
@@ -0,0 +1,97 @@
+"""
+Multi-process ASGI serving (manage.py serve)
+
+Har bir daphne worker process o'z event loop i bilan ishlaydi. ASGI_THREADS -
+bitta process dagi sync kod (DRF view, ORM) uchun thread lar soni:
+
+- HTTP sync view: Django ularni har request ning o'z ThreadSensitiveContext
+  executor ida bajaradi (loop default executor ida emas) - thread soni
+  request lar soniga teng o'sadi. SyncViewLimitMiddleware bir vaqtda
+  ishlayotgan sync view larni ASGI_THREADS ta bilan cheklaydi. Async view lar
+  (config.aio) va streaming javob body si cheklovsiz.
+- WebSocket va async view lardagi database_sync_to_async chaqiruvlar loop
+  ning default executor ida - ThreadPoolMiddleware uni ASGI_THREADS
+  o'lchamli qiladi
+"""
+import asyncio
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from channels.db import DatabaseSyncToAsync
+from django.conf import settings
+
+# channels default i (thread_sensitive=True) - process dagi barcha consumer lar
+# DB ga bitta thread orqali navbat bilan boradi. Connection lar thread-local,
+# shuning uchun consumer lar loop executor idagi istalgan thread da ishlay oladi.
+database_sync_to_async = partial(DatabaseSyncToAsync, thread_sensitive=False)
+
+
+def default_executor(loop, threads):
+    """Loop ning default executor i ASGI_THREADS o'lchamli (bir marta)"""
+    if loop not in _sized_loops:
+        loop.set_default_executor(ThreadPoolExecutor(threads, thread_name_prefix='asgi'))
+        _sized_loops.add(loop)
+
+
+_sized_loops = weakref.WeakSet()
+_view_slots = weakref.WeakKeyDictionary()  # loop -> asyncio.Semaphore
+
+
+class ThreadPoolMiddleware:
+    """ASGI app uchun: loop default executor ini (database_sync_to_async) ASGI_THREADS ga moslash"""
+
+    def __init__(self, app, threads=None):
+        self.app = app
+        self.threads = threads or settings.ASGI_THREADS
+
+    async def __call__(self, scope, receive, send):
+        default_executor(asyncio.get_running_loop(), self.threads)
+        return await self.app(scope, receive, send)
+
+
+class SyncViewLimitMiddleware:
+    """
+    MIDDLEWARE oxirida turadi: ASGI da bir vaqtda ishlaydigan sync view lar <= ASGI_THREADS
+
+    Slot process_view da (view aniq bo'lganda) olinadi va view + ichki
+    middleware lar tugagach qaytadi - streaming body ni yuborish paytida emas.
+    WSGI (runserver, test client) da hech narsa qilmaydi.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response, threads=None):
+        self.get_response = get_response
+        self.threads = threads or settings.ASGI_THREADS
+        if asyncio.iscoroutinefunction(get_response):
+            # Django handler bu instance ni coroutine function deb tanisin
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+            self.process_view = self.aprocess_view
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        try:
+            return await self.get_response(request)
+        finally:
+            semaphore = request.__dict__.pop('_sync_view_slot', None)
+            if semaphore is not None:
+                semaphore.release()
+
+    def semaphore(self, loop):
+        semaphore = _view_slots.get(loop)
+        if semaphore is None:
+            semaphore = _view_slots[loop] = asyncio.Semaphore(self.threads)
+        return semaphore
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        if asyncio.iscoroutinefunction(view_func):
+            return None
+        semaphore = self.semaphore(asyncio.get_running_loop())
+        await semaphore.acquire()
+        request._sync_view_slot = semaphore
+        return None
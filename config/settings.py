@@ -106,6 +106,7 @@ CORS_ALLOWED_ORIGIN_REGEXES = [
 
 
 MIDDLEWARE = [
+    'config.metrics.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -116,6 +117,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'config.serving.SyncViewLimitMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -139,6 +141,10 @@ TEMPLATES = [
 WSGI_APPLICATION = 'config.wsgi.application'
 ASGI_APPLICATION = 'config.asgi.application'
 
+# Bitta ASGI worker process da bir vaqtda ishlaydigan sync view lar va
+# database_sync_to_async thread lari soni (config/serving.py, manage.py serve --threads)
+ASGI_THREADS = env.int('ASGI_THREADS', default=8)
+
 
 # Database
 # https://docs.djangoproject.com/en/4.0/ref/settings/#databases
@@ -152,6 +158,19 @@ except:
         }
     }
 
+# PostgreSQL: process ichidagi connection pool (config/db). Connection har bir
+# request / consumer chaqiruv oxirida pool ga qaytadi, shuning uchun CONN_MAX_AGE=0.
+# Har bir process (daphne worker, Celery prefork child) o'z pool iga ega:
+# jami connection <= process lar soni * DB_POOL_MAX_SIZE
+if env.bool('DB_POOL', default=True) and DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql':
+    DATABASES['default'].update(ENGINE='config.db', CONN_MAX_AGE=0)
+    DATABASES['default'].setdefault('OPTIONS', {})['pool'] = {
+        'max_size': env.int('DB_POOL_MAX_SIZE', default=ASGI_THREADS + 2),
+        'timeout': env.float('DB_POOL_TIMEOUT', default=10),
+        'max_idle': env.int('DB_POOL_MAX_IDLE', default=300),
+        'max_lifetime': env.int('DB_POOL_MAX_LIFETIME', default=1800),
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
@@ -176,6 +195,15 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'config.fastjson.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'config.fastjson.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     # 'DEFAULT_PERMISSION_CLASSES': [
     #     'rest_framework.permissions.IsAuthenticated',
     # ],
@@ -279,6 +307,10 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'mediafiles'
 
+# Responsive derivatives (config.images) - MEDIA_ROOT/variants/ ostidagi nomlar
+# content hash li, CDN/nginx da `Cache-Control: immutable` berish mumkin
+IMAGE_VARIANT_WIDTHS = (160, 320, 640, 1080)
+
 # MEDIA_ROOT = BASE_DIR / 'media'
 
 AUTH_USER_MODEL = "account.UserModel"
@@ -300,7 +332,8 @@ FIREBASE_REGISTRATION_KEYS = [env('ANDROID_REG_KEY'),  env('IOS_REG_KEY')]
 
 
 # File upload settings
-FILE_UPLOAD_MAX_MEMORY_SIZE = 50 * 1024 * 1024  # 50 MB
+# Katta fayllar RAM da emas, temp faylga chunk lab yoziladi (TemporaryFileUploadHandler)
+FILE_UPLOAD_MAX_MEMORY_SIZE = int(2.5 * 1024 * 1024)  # 2.5 MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 50 * 1024 * 1024  # 50 MB
 
 # Allowed file extensions (optional)
@@ -350,10 +383,18 @@ CHANNEL_LAYERS = {
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'BACKEND': 'django_redis.cache.RedisCache',
+        'BACKEND': 'config.cache.TieredRedisCache',
         'LOCATION': f'redis://{REDIS_HOST}:{REDIS_PORT}/1',
         'OPTIONS': {
             'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+            # Process ichidagi L1 (config/cache.py): prefix -> L1 da turish vaqti va hajmi.
+            # Faqat kam o'zgaradigan, o'zgarganda set/delete qilinadigan key lar
+            'TIERS': {
+                'partner:': {'timeout': 60, 'maxsize': 1000},
+                'user_card:': {'timeout': 30, 'maxsize': 10000},
+                'livekit_room:': {'timeout': 60, 'maxsize': 1000},
+                'snapshot:': {'timeout': 60, 'maxsize': 100},  # config/snapshots.py
+            },
         },
         'KEY_PREFIX': 'doctor_call',
         'TIMEOUT': 3600,
@@ -361,6 +402,19 @@ CACHES = {
 }
 
 
+# METRICS (config.metrics) - /metrics/ Prometheus scrape
+
+# Bo'sh bo'lsa /metrics/ 404
+METRICS_TOKEN = env('METRICS_TOKEN', default='')
+# Process dagi metrikalar Redis ga shuncha soniyada bir marta qo'shiladi
+METRICS_FLUSH_INTERVAL = env.float('METRICS_FLUSH_INTERVAL', default=10)
+# Bundan sekin request/frame log ga (SQL, cache, tashqi HTTP bo'yicha) yoziladi
+SLOW_REQUEST_THRESHOLD = env.float('SLOW_REQUEST_THRESHOLD', default=1.0)
+# cProfile: request lar ulushi (0 - o'chiq), .prof fayllar PROFILE_DIR/<route>/ da
+PROFILE_SAMPLE_RATE = env.float('PROFILE_SAMPLE_RATE', default=0)
+PROFILE_DIR = env('PROFILE_DIR', default=str(BASE_DIR / 'profiles'))
+
+
 # LIVEKIT CONFIGURATION
 LIVEKIT_API_KEY = env('LIVEKIT_API_KEY')
 LIVEKIT_API_SECRET = env('LIVEKIT_API_SECRET')
@@ -373,6 +427,42 @@ else:
     SITE_URL = 'http://imorganic.uz'  # keyinroq https
 
 
+# PUSH BROADCAST (news.tasks.broadcast_notification)
+FCM_BROADCAST_BATCH_SIZE = 500  # FCM multicast limit
+FCM_BROADCAST_WORKERS = 8
+FCM_BROADCAST_MAX_RETRIES = 3
+FCM_BROADCAST_BACKOFF = 1.0  # seconds, doubled per retry
+FCM_BROADCAST_STALE_AFTER = 300  # 'sending' without progress -> resume
+
+
+# CHAT CONFIGURATION
+
+# ChatRoom last message cache - room uchun ko'pi bilan 1 UPDATE / interval (seconds)
+CHAT_ROOM_TOUCH_INTERVAL = 1.0
+
+# Attachment thumbnail (chat.media) - max width, height
+CHAT_THUMBNAIL_SIZE = (320, 320)
+
+# Reconnect delta sync - bundan ko'p o'zgarish bo'lsa to'liq history yuboriladi
+CHAT_SYNC_LIMIT = 200
+
+
+# STOCK (shop.inventory) - checkout dagi zaxira shuncha soniyada to'lov boshlanmasa qaytadi
+STOCK_RESERVATION_TTL = 15 * 60
+
+
+# ARCHIVE (config.archive) - N kundan eski qatorlar cold storage ga ko'chadi
+# Ro'yxatda yo'q model arxivlanmaydi
+
+ARCHIVE_RETENTION_DAYS = {
+    'chat.Message': 365,
+    'chat.MessageTombstone': 90,
+    'call.CallEvent': 90,
+    'stream.StreamChat': 30,
+    'partner_auth.PartnerRequest': 30,
+}
+
+
 # CALL CONFIGURATION
 
 # Maximum call duration (seconds) - for billing/limits
@@ -419,6 +509,13 @@ LOGGING = {
         #     'formatter': 'verbose',
         # },
     },
+    'loggers': {
+        'config.metrics': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
     # 'root': {
     #     'handlers': ['console', 'file'],
     #     'level': 'INFO' if not DEBUG else 'DEBUG',
@@ -444,6 +541,9 @@ LOGGING = {
 
 
 
+# Recorded Payme GetStatement responses (<YYYY-MM-DD>.json) for nightly reconciliation
+PAYME_STATEMENT_DIR = BASE_DIR / 'payme_statements'
+
 # Payme Merchant Configuration
 # PAYME_SETTINGS = {
 #     'MERCHANT_ID': env('PAYME_MERCHANT_ID', default=''),  # From Payme dashboard
@@ -0,0 +1,175 @@
+"""
+Reference data snapshot lari (region, country, doctor/medicine turlari, stories, reklama)
+
+Har bir mobil client ilova ochilganda shularni so'raydi - push kampaniyadan
+keyin minglab bir xil query. Snapshot - tayyor serialize qilingan ro'yxat
+cache da (snapshot:<name>, L1 + Redis) va uning versiyasi (content hash).
+
+- View lar snapshot dan javob beradi, ETag = versiya; If-None-Match mos
+  kelsa 304 (body yo'q)
+- Cache da yo'q bo'lsa bitta process/thread quradi (single-flight),
+  qolganlar tayyor bo'lishini kutadi
+- depends_on model lari saqlansa/o'chirilsa commit dan keyin qayta quriladi
+
+URL lar request host idan emas, SITE_URL dan (snapshot hamma uchun bitta).
+"""
+import hashlib
+import logging
+import threading
+import time
+from urllib.parse import urljoin
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models.signals import post_delete, post_save
+from rest_framework.response import Response
+
+from .fastjson import dumps
+
+logger = logging.getLogger(__name__)
+
+snapshots = {}
+
+
+class SiteRequest:
+    """Serializer context dagi request o'rniga: absolute URL lar SITE_URL bilan"""
+
+    def build_absolute_uri(self, location=None):
+        return urljoin(settings.SITE_URL, location or '/')
+
+
+class Snapshot:
+    # Boshqa process qurayotgan bo'lsa shuncha soniya kutiladi
+    LOCK_TIMEOUT = 10
+    POLL_INTERVAL = 0.05
+
+    def __init__(self, name, build, depends_on=(), timeout=24 * 3600):
+        """
+        build() - JSON ga aylanadigan ma'lumot (serializer(...).data)
+        depends_on - o'zgarganda snapshot qayta quriladigan model lar
+        """
+        self.name = name
+        self.build = build
+        self.timeout = timeout
+        self.key = f'snapshot:{name}'
+        self.lock_key = f'snapshot-lock:{name}'
+        self.lock = threading.Lock()
+        # Tranzaksiya (connection) thread ga bog'liq - dirty ham
+        self.local = threading.local()
+
+        for model in depends_on:
+            for signal in (post_save, post_delete):
+                signal.connect(self.schedule_rebuild, sender=model, weak=False,
+                               dispatch_uid=f'snapshot:{name}:{model._meta.label}:{signal is post_save}')
+        snapshots[name] = self
+
+    def get(self):
+        """{'version': ..., 'data': ...}"""
+        try:
+            snapshot = cache.get(self.key)
+        except Exception as e:
+            logger.warning(f"Snapshot {self.name}: cache unavailable: {e}")
+            return self.make()
+        return snapshot if snapshot is not None else self.build_once()
+
+    def make(self):
+        data = self.build()
+        return {'version': hashlib.sha1(dumps(data)).hexdigest()[:16], 'data': data}
+
+    def rebuild(self):
+        snapshot = self.make()
+        try:
+            cache.set(self.key, snapshot, self.timeout)
+        except Exception as e:
+            logger.warning(f"Snapshot {self.name}: cache unavailable: {e}")
+        return snapshot
+
+    def build_once(self):
+        # Process ichida - bitta thread, process lar orasida - cache.add lock
+        with self.lock:
+            snapshot = cache.get(self.key)
+            if snapshot is not None:
+                return snapshot
+
+            if cache.add(self.lock_key, 1, self.LOCK_TIMEOUT):
+                try:
+                    return self.rebuild()
+                finally:
+                    cache.delete(self.lock_key)
+
+            deadline = time.monotonic() + self.LOCK_TIMEOUT
+            while time.monotonic() < deadline:
+                time.sleep(self.POLL_INTERVAL)
+                snapshot = cache.get(self.key)
+                if snapshot is not None:
+                    return snapshot
+
+        # Lock egasi javob bermadi - o'zimiz quramiz (cache ga yozmasdan)
+        logger.warning(f"Snapshot {self.name}: rebuild lock timed out")
+        return self.make()
+
+    def schedule_rebuild(self, sender, using=DEFAULT_DB_ALIAS, **kwargs):
+        """
+        Signal: commit dan keyin qayta qurish
+
+        Bitta tranzaksiyada ko'p save bo'lsa birinchi callback quradi (hammasi
+        commit bo'lgan), qolganlari dirty=False ni ko'rib o'tkazib yuboradi.
+        """
+        self.local.dirty = True
+        transaction.on_commit(self.rebuild_if_dirty, using=using)
+
+    def rebuild_if_dirty(self):
+        if not getattr(self.local, 'dirty', False):
+            return
+        self.local.dirty = False
+        # Admin dagi save xato bermasin - snapshot timeout da baribir yangilanadi
+        try:
+            self.rebuild()
+        except Exception as e:
+            logger.error(f"Snapshot {self.name}: rebuild failed: {e}")
+
+
+def etag(snapshot):
+    return f'"{snapshot["version"]}"'
+
+
+def not_modified(request, snapshot):
+    """If-None-Match snapshot versiyasiga mos kelsa 304 javob, aks holda None"""
+    if request.method not in ('GET', 'HEAD'):
+        return None
+    header = request.headers.get('If-None-Match', '')
+    tag = etag(snapshot)
+    if header.strip() == '*' or tag in (value.strip().removeprefix('W/') for value in header.split(',')):
+        return with_etag(Response(status=304), snapshot)
+    return None
+
+
+def with_etag(response, snapshot):
+    response['ETag'] = etag(snapshot)
+    # Client har safar If-None-Match bilan tekshiradi, o'zgarmagan bo'lsa 304
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+class SnapshotListMixin:
+    """
+    ListAPIView / ListModelMixin uchun: list() snapshot dan
+
+    Pagination (limit/offset) snapshot ro'yxatini kesadi - DB ga query yo'q.
+    """
+    snapshot = None
+
+    def filter_rows(self, rows):
+        return rows
+
+    def list(self, request, *args, **kwargs):
+        snapshot = self.snapshot.get()
+        response = not_modified(request, snapshot)
+        if response is not None:
+            return response
+
+        rows = self.filter_rows(snapshot['data'])
+        page = self.paginate_queryset(rows)
+        response = self.get_paginated_response(page) if page is not None else Response(rows)
+        return with_etag(response, snapshot)
@@ -0,0 +1,32 @@
+import logging
+
+from celery import shared_task
+from django.apps import apps
+
+from . import archive, images
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(ignore_result=True)
+def archive_cold_rows():
+    """
+    ARCHIVE_RETENTION_DAYS dan eski qatorlarni cold storage ga ko'chirish
+
+    Runs: Every night
+    """
+    result = archive.archive_all()
+    logger.info(f"Archive: {result}")
+
+
+@shared_task(ignore_result=True)
+def build_image_variants(label, pk, image_field, srcset_field):
+    """
+    Yangi/o'zgargan rasm uchun responsive derivative lar (config.images.register)
+
+    Runs: post_save commit dan keyin
+    """
+    instance = apps.get_model(label).objects.filter(pk=pk).first()
+    if instance is None:
+        return
+    images.update_srcset(instance, image_field, srcset_field)
@@ -0,0 +1,650 @@
+import datetime
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from account.models import CountyModel, RegionModel, SmsCode, UserDevice, UserModel
+from call.models import Call
+from chat.models import ChatRoom, Message
+from client.models import ClientProfile
+from consultation.models import ConsultationRequest
+from news.models import NewsModel, TagsModel
+from shop.models import CartModel, Medicine, TypeMedicine
+from specialist.models import Doctor, TypeDoctor
+
+from .queryplan import explain, sequential_scans
+
+# O'sib boradigan jadvallar - bularda full scan bo'lmasligi kerak.
+# Katalog/reference jadvallar (medicine, news, type lar) sahifalab o'qiladi, ular ro'yxatda yo'q.
+WATCHED_TABLES = {
+    'chat_message', 'chat_roommembership', 'chat_chatroom_participants', 'call_call',
+    'shop_cartmodel', 'user_devices', 'account_smscode', 'consultation_requests',
+    'doctor_availability', 'payments',
+}
+
+# (url, user, query budget) - budget hozirgi holatdan olingan, oshsa test yiqiladi
+ENDPOINTS = [
+    ('/api/shop/medicines/', None, 4),
+    ('/api/shop/medicines/{medicine}/', None, 5),
+    ('/api/shop/types/', None, 2),
+    ('/api/shop/medicines/type/{type_medicine}/', None, 2),
+    ('/api/shop/cart/', 'client', 2),
+    ('/api/news/', None, 3),
+    ('/api/news/tags/', None, 1),
+    ('/api/specialist/types/', None, 2),
+    ('/api/specialist/doctors/', None, 3),
+    ('/api/specialist/doctor/{doctor}/', 'client', 6),
+    ('/api/chat/rooms/', 'client', 8),
+    ('/api/chat/rooms/{room}/', 'client', 7),
+    ('/api/chat/rooms/{room}/messages/', 'client', 8),
+    ('/api/chat/rooms/unread_total/', 'client', 1),
+    ('/api/chat/messages/', 'client', 3),
+    ('/api/call/calls/', 'client', 3),
+    ('/api/call/calls/active/', 'client', 1),
+    ('/api/consultation/client/consultations/', 'client', 3),
+    ('/api/consultation/doctor/consultations/', 'doctor', 3),
+    ('/api/user/devices/', 'client', 2),
+]
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class QueryPlanRegressionTest(TestCase):
+    """
+    Top endpointlar uchun query soni va EXPLAIN regression suite
+
+    Yangi query qo'shilsa yoki index ishlatilmay qolsa - shu yerda ko'rinadi.
+    Budget ni oshirishdan oldin N+1 yo'qligini tekshiring.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.client_user = UserModel.objects.create_user(phone='998900000001')
+        ClientProfile.objects.create(user=cls.client_user, full_name='Ali Valiyev')
+        cls.doctor_user = UserModel.objects.create_user(phone='998900000002', role='doctor')
+        type_doctor = TypeDoctor.objects.create(name='Terapevt')
+        cls.doctor = Doctor.objects.create(user=cls.doctor_user, image='', full_name='Doctor', experience='5',
+                                           type_doctor=type_doctor, gender='male', is_verified=True)
+
+        cls.type_medicine = TypeMedicine.objects.create(name='Analgetik')
+        cls.medicine = Medicine.objects.create(title='Paratsetamol', cost=12000, type_medicine=cls.type_medicine)
+        CartModel.objects.create(user=cls.client_user, product=cls.medicine)
+        NewsModel.objects.create(name='Yangilik', description='...', hashtag=TagsModel.objects.create(tag_name='x'))
+
+        cls.room, _ = ChatRoom.get_or_create_private_room(cls.client_user, cls.doctor_user)
+        for text in ('salom', 'qalaysiz'):
+            Message.objects.create(room=cls.room, sender=cls.doctor_user, text=text)
+        Call.objects.create(room=cls.room, call_type='audio', caller=cls.client_user, receiver=cls.doctor_user,
+                            livekit_room_name='room-1', status='ended')
+        ConsultationRequest.objects.create(
+            client=cls.client_user, doctor=cls.doctor_user, status='paid',
+            requested_date=datetime.date(2026, 1, 10), requested_time=datetime.time(10, 0),
+        )
+        UserDevice.objects.create(user=cls.client_user, fcm_token='token-1', device_id='device-1')
+
+    def url(self, template):
+        return template.format(medicine=self.medicine.id, type_medicine=self.type_medicine.id,
+                               doctor=self.doctor.id, room=self.room.id)
+
+    def test_endpoints(self):
+        for template, user, budget in ENDPOINTS:
+            with self.subTest(endpoint=template):
+                api = APIClient()
+                if user:
+                    api.force_authenticate(self.client_user if user == 'client' else self.doctor_user)
+
+                with CaptureQueriesContext(connection) as queries:
+                    response = api.get(self.url(template))
+
+                self.assertEqual(response.status_code, 200)
+                self.assertLessEqual(len(queries), budget, '\n'.join(q['sql'] for q in queries))
+                self.assertEqual(sequential_scans(queries, WATCHED_TABLES), [])
+
+    def test_async_views_match_sync(self):
+        from asgiref.sync import async_to_sync
+        from rest_framework.test import APIRequestFactory, force_authenticate
+
+        from call.views import AsyncActiveCallsView, CallViewSet
+        from chat.views import AsyncChatRoomListView, ChatRoomViewSet
+        from shop.views import AsyncMedicinesView, MedicinesView
+        from specialist.views import AsyncDoctorListAPI, DoctorListAPI
+        from stream.views import AsyncLiveStreamsView, LiveStreamViewSet
+
+        from .aio import executor_stats
+        from .fastjson import loads
+
+        Call.objects.create(room=self.room, call_type='video', caller=self.client_user, receiver=self.doctor_user,
+                            livekit_room_name='room-2', status='ringing')
+        views = [
+            ('/api/shop/medicines/', MedicinesView.as_view(), AsyncMedicinesView.as_view()),
+            ('/api/specialist/doctors/', DoctorListAPI.as_view(), AsyncDoctorListAPI.as_view()),
+            ('/api/chat/rooms/', ChatRoomViewSet.as_view({'get': 'list'}), AsyncChatRoomListView.as_view()),
+            ('/api/call/calls/active/', CallViewSet.as_view({'get': 'active'}), AsyncActiveCallsView.as_view()),
+            ('/api/stream/streams/live/', LiveStreamViewSet.as_view({'get': 'live'}), AsyncLiveStreamsView.as_view()),
+        ]
+        factory = APIRequestFactory()
+        for url, sync_view, async_view in views:
+            with self.subTest(endpoint=url):
+                request = factory.get(url)
+                force_authenticate(request, self.client_user)
+                expected = sync_view(request).render()
+
+                request = factory.get(url)
+                force_authenticate(request, self.client_user)
+                executor_stats(reset=True)
+                response = async_to_sync(async_view)(request)
+
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(loads(response.content), loads(expected.content))
+                self.assertGreater(executor_stats()['hops'], 0)
+
+        # Auth talab qilinadigan endpoint - token siz 401, fallback orqali POST ham ishlaydi
+        response = async_to_sync(AsyncActiveCallsView.as_view())(factory.get('/api/call/calls/active/'))
+        self.assertEqual(response.status_code, 401)
+        request = factory.post('/api/chat/rooms/', {'user_id': self.doctor_user.id}, format='json')
+        force_authenticate(request, self.client_user)
+        response = async_to_sync(AsyncChatRoomListView.as_view())(request)
+        self.assertEqual((response.status_code, loads(response.content)['id']), (200, self.room.id))
+
+    def test_async_views_serialize_off_loop(self):
+        import asyncio
+        from unittest import mock
+
+        from asgiref.sync import async_to_sync
+        from rest_framework.test import APIRequestFactory
+
+        from shop.serializers import MedicineSerializer
+        from shop.views import AsyncMedicinesView
+        from specialist.serializers import DoctorListSerializer
+        from specialist.views import AsyncDoctorListAPI
+
+        on_loop = []
+
+        def watch(serializer_class):
+            original = serializer_class.to_representation
+
+            def to_representation(serializer, instance):
+                # Serializer ichidagi lazy query event loop da SynchronousOnlyOperation beradi
+                try:
+                    asyncio.get_running_loop()
+                    on_loop.append(serializer_class.__name__)
+                except RuntimeError:
+                    pass
+                return original(serializer, instance)
+            return mock.patch.object(serializer_class, 'to_representation', to_representation)
+
+        factory = APIRequestFactory()
+        with watch(MedicineSerializer), watch(DoctorListSerializer):
+            for url, view in (('/api/shop/medicines/', AsyncMedicinesView.as_view()),
+                              ('/api/specialist/doctors/', AsyncDoctorListAPI.as_view())):
+                self.assertEqual(async_to_sync(view)(factory.get(url)).status_code, 200)
+        self.assertEqual(on_loop, [])
+
+    def test_hot_filters_use_indexes(self):
+        """Endpoint orqali chaqirilmaydigan hot path lar (busy check, SMS, push audience)"""
+        from django.db.models import Q
+        from django.utils import timezone
+
+        from call.models import ACTIVE_STATUSES
+
+        now = timezone.now()
+        querysets = {
+            'call busy check': Call.objects.filter(
+                Q(caller=self.client_user) | Q(receiver=self.client_user), status__in=ACTIVE_STATUSES),
+            'sms verify': SmsCode.objects.filter(
+                phone='998900000001', code='1234', purpose='register', confirmed=False, expire_at__gte=now),
+            'sms confirmed': SmsCode.objects.filter(phone='998900000001', confirmed=True, expire_at__gte=now),
+            'push devices': UserDevice.objects.filter(user=self.client_user, is_active=True),
+            'unread messages': Message.objects.filter(room=self.room, is_read=False).exclude(
+                sender=self.client_user),
+            'active cart': CartModel.objects.filter(
+                user=self.client_user, status=CartModel.Status.ACTIVE).select_related('product'),
+        }
+        for name, queryset in querysets.items():
+            with self.subTest(path=name):
+                plan = explain(*queryset.query.sql_with_params())
+                self.assertTrue(plan)
+                self.assertNotIn('seq', {scan for table, scan in plan if table in WATCHED_TABLES}, plan)
+
+
+class ThreadPoolMiddlewareTest(TestCase):
+
+    def test_default_executor_sized(self):
+        import asyncio
+
+        from .serving import ThreadPoolMiddleware
+
+        async def app(scope, receive, send):
+            pass
+
+        async def main():
+            await ThreadPoolMiddleware(app, threads=2)({'type': 'http'}, None, None)
+            return asyncio.get_running_loop()._default_executor._max_workers
+
+        self.assertEqual(asyncio.run(main()), 2)
+
+    def test_only_sync_views_limited(self):
+        import asyncio
+
+        from django.test import RequestFactory
+
+        from .serving import SyncViewLimitMiddleware
+
+        state = {'running': 0, 'peak': 0}
+
+        def sync_view(request):
+            pass
+
+        async def async_view(request):
+            pass
+
+        async def get_response(request):
+            # Django handler: process_view, keyin view
+            await middleware.process_view(request, request.view, (), {})
+            state['running'] += 1
+            state['peak'] = max(state['peak'], state['running'])
+            await asyncio.sleep(0.01)
+            state['running'] -= 1
+
+        middleware = SyncViewLimitMiddleware(get_response, threads=2)
+
+        async def run(view):
+            state['peak'] = 0
+            requests = [RequestFactory().get('/') for _ in range(6)]
+            for request in requests:
+                request.view = view
+            await asyncio.gather(*(middleware(request) for request in requests))
+            return state['peak']
+
+        async def main():
+            return await run(sync_view), await run(async_view)
+
+        self.assertTrue(asyncio.iscoroutinefunction(middleware))
+        self.assertEqual(asyncio.run(main()), (2, 6))
+
+
+class ConnectionPoolTest(TestCase):
+
+    class Conn:
+        def __init__(self):
+            self.closed = False
+
+        def close(self):
+            self.closed = True
+
+    def test_reuses_connections(self):
+        from .db.pool import ConnectionPool
+
+        pool = ConnectionPool(max_size=2)
+        first = pool.getconn(self.Conn)
+        pool.putconn(first)
+        self.assertIs(pool.getconn(self.Conn), first)
+        self.assertEqual(pool.stats()['created'], 1)
+
+    def test_waits_for_free_connection_and_times_out(self):
+        import threading
+
+        from .db.pool import ConnectionPool, PoolTimeout
+
+        pool = ConnectionPool(max_size=1, timeout=0.05)
+        conn = pool.getconn(self.Conn)
+        with self.assertRaises(PoolTimeout):
+            pool.getconn(self.Conn)
+
+        pool.timeout = 5
+        threading.Timer(0.05, pool.putconn, [conn]).start()
+        self.assertIs(pool.getconn(self.Conn), conn)
+        stats = pool.stats()
+        self.assertEqual((stats['timeouts'], stats['waits'], stats['size']), (1, 1, 1))
+        self.assertGreater(stats['max_wait'], 0.04)
+
+    def test_broken_connections_are_replaced(self):
+        from .db.pool import ConnectionPool
+
+        pool = ConnectionPool(max_size=1, check_after=0, reset=lambda conn: not conn.closed,
+                              check=lambda conn: conn.healthy)
+        conn = pool.getconn(self.Conn)
+        conn.close()
+        pool.putconn(conn)  # reset() False - tashlanadi
+        self.assertEqual(pool.stats()['size'], 0)
+
+        conn = pool.getconn(self.Conn)
+        conn.healthy = False
+        pool.putconn(conn)
+        fresh = pool.getconn(self.Conn)  # health check yiqildi - yangisi
+        self.assertIsNot(fresh, conn)
+        self.assertTrue(conn.closed)
+        self.assertEqual(pool.stats()['size'], 1)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'config.cache.LocMemCache'}}, METRICS_TOKEN='secret')
+class InstrumentationTest(TestCase):
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    @staticmethod
+    def delta(before, after, series):
+        return after.get(series, 0) - before.get(series, 0)
+
+    def test_request_metrics(self):
+        from .metrics import snapshot
+
+        type_doctor = TypeDoctor.objects.create(name='Terapevt')
+        user = UserModel.objects.create_user(phone='998900000001', role='doctor')
+        Doctor.objects.create(user=user, image='', full_name='Doktor', experience='5', type_doctor=type_doctor,
+                              gender='male', is_verified=True)
+
+        before = snapshot()
+        api = APIClient()
+        api.get('/api/specialist/doctors/')
+        api.get('/api/specialist/doctors/')  # cache dan
+        after = snapshot()
+
+        route = 'route="/api/specialist/doctors/"'
+        self.assertEqual(self.delta(before, after, f'http_requests_total{{method="GET",{route},status="200"}}'), 2)
+        self.assertEqual(self.delta(before, after, f'http_request_duration_seconds_count{{{route}}}'), 2)
+        self.assertGreater(self.delta(before, after, f'db_queries_total{{{route}}}'), 0)
+        # 1-request: view cache + 2 ta throttle tarixi miss; 2-request: view cache hit (throttle gacha)
+        self.assertEqual(self.delta(before, after, f'cache_requests_total{{result="hit",{route}}}'), 1)
+        self.assertEqual(self.delta(before, after, f'cache_requests_total{{result="miss",{route}}}'), 3)
+
+    def test_outbound_errors_counted(self):
+        from .metrics import outbound, snapshot
+
+        before = snapshot()
+        with self.assertRaises(ConnectionError):
+            with outbound('eskiz'):
+                raise ConnectionError
+        after = snapshot()
+        self.assertEqual(self.delta(before, after, 'outbound_requests_total{outcome="error",service="eskiz"}'), 1)
+
+    def test_metrics_endpoint_requires_token(self):
+        self.assertEqual(self.client.get('/metrics/').status_code, 404)
+
+        self.client.get('/api/shop/types/')
+        response = self.client.get('/metrics/', HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '# TYPE http_request_duration_seconds histogram')
+        self.assertContains(response, 'http_requests_total{method="GET",route="/api/shop/types/",status="200"} 1')
+
+    def test_route_label_is_pattern(self):
+        from .metrics import snapshot
+
+        before = snapshot()
+        APIClient().get('/api/chat/rooms/12345/')
+        APIClient().get('/api/chat/rooms/67890/')
+        after = snapshot()
+        # DRF router regex i: '^rooms/(?P<pk>[^/.]+)/$'
+        series = 'http_requests_total{method="GET",route="/api/chat/rooms/<pk>/",status="401"}'
+        self.assertEqual(self.delta(before, after, series), 2)
+
+    @override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+    def test_consumer_frames(self):
+        from asgiref.sync import async_to_sync, sync_to_async
+        from channels.generic.websocket import AsyncWebsocketConsumer
+        from channels.testing import WebsocketCommunicator
+
+        from .metrics import InstrumentedConsumerMixin, snapshot
+
+        def query():
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+
+        class EchoConsumer(InstrumentedConsumerMixin, AsyncWebsocketConsumer):
+            async def receive(self, text_data=None, bytes_data=None):
+                await sync_to_async(query)()
+                await self.send(text_data=text_data)
+
+        async def talk():
+            communicator = WebsocketCommunicator(EchoConsumer.as_asgi(), '/ws/echo/')
+            await communicator.connect()
+            for text in ('a', 'b'):
+                await communicator.send_to(text_data=text)
+                await communicator.receive_from()
+            await communicator.disconnect()
+
+        before = snapshot()
+        async_to_sync(talk)()
+        after = snapshot()
+        self.assertEqual(self.delta(before, after, 'ws_frames_total{consumer="EchoConsumer",event="websocket.receive"}'), 2)
+        self.assertEqual(self.delta(before, after, 'ws_frame_duration_seconds_count{consumer="EchoConsumer"}'), 4)
+        self.assertEqual(self.delta(before, after, 'db_queries_total{route="ws:EchoConsumer"}'), 2)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'config.cache.LocMemCache'}})
+class TieredCacheTest(TestCase):
+
+    def setUp(self):
+        from django.core.cache.backends.locmem import LocMemCache
+
+        from . import cache
+        from .cache import TieredLocMemCache
+
+        params = {'OPTIONS': {'TIERS': {'ref:': {'timeout': 60}, 'ref:big:': {'timeout': 60, 'maxsize': 1}}}}
+        # Bir xil LOCATION - ikkita "process" (har biri o'z L1 registry si bilan), L2 umumiy
+        self.addCleanup(cache._l1s.clear)
+        cache._l1s.clear()
+        self.first = TieredLocMemCache('tiered-test', params)
+        cache._l1s.clear()
+        self.second = TieredLocMemCache('tiered-test', params)
+        self.l2 = LocMemCache('tiered-test', {})
+        self.addCleanup(self.l2.clear)
+
+    def test_l1_shared_by_instances(self):
+        from .cache import TieredLocMemCache
+
+        # Bir process dagi instance lar (thread lar) bitta L1 ni ishlatadi
+        third = TieredLocMemCache('tiered-test', {'OPTIONS': {'TIERS': {'ref:': {'timeout': 60}}}})
+        self.assertIs(third.l1, self.second.l1)
+        third.set('ref:countries', ['uz'])
+        self.assertEqual(self.second.get('ref:countries'), ['uz'])
+        # L2 ni chetlab yozilgan qiymat - third ham second L1 ga qo'ygan javobni ko'radi
+        self.l2.set('ref:countries', ['kz'])
+        self.assertEqual(third.get('ref:countries'), ['uz'])
+
+    def test_l1_serves_tier_keys(self):
+        from .metrics import snapshot
+
+        self.first.set('ref:countries', ['uz'])
+        before = snapshot()
+        self.assertEqual(self.first.get('ref:countries'), ['uz'])
+        # L2 ni chetlab yozilgan qiymat ko'rinmaydi - javob L1 dan
+        self.l2.set('ref:countries', ['kz'])
+        value = self.first.get('ref:countries')
+        self.assertEqual(value, ['uz'])
+        after = snapshot()
+        hits = 'cache_l1_requests_total{result="hit",tier="ref"}'
+        self.assertEqual(after.get(hits, 0) - before.get(hits, 0), 1)
+
+        # Har safar yangi obyekt - chaqiruvchi o'zgartirsa L1 buzilmaydi
+        value.append('ru')
+        self.assertEqual(self.first.get('ref:countries'), ['uz'])
+
+    def test_untiered_keys_bypass_l1(self):
+        self.first.set('counter', 1)
+        self.assertEqual(self.first.get('counter'), 1)
+        self.l2.set('counter', 2)
+        self.assertEqual(self.first.get('counter'), 2)
+
+    def test_writes_invalidate_other_processes(self):
+        self.first.set('ref:countries', ['uz'])
+        self.assertEqual(self.second.get('ref:countries'), ['uz'])
+        self.assertEqual(self.second.get_many(['ref:countries', 'ref:regions']), {'ref:countries': ['uz']})
+
+        self.first.set('ref:countries', ['uz', 'kz'])
+        self.assertEqual(self.second.get('ref:countries'), ['uz', 'kz'])
+        self.first.delete('ref:countries')
+        self.assertIsNone(self.second.get('ref:countries'))
+
+        self.first.set('ref:big:a', 1)
+        self.first.set('ref:big:b', 2)
+        self.assertEqual(self.second.get_many(['ref:big:a', 'ref:big:b']), {'ref:big:a': 1, 'ref:big:b': 2})
+        self.assertEqual(self.second.l1_stats(), {'ref:big': 1, 'ref': 0})
+
+    def test_stale_read_not_cached(self):
+        self.first.set('ref:countries', ['uz'])
+        tier = self.second.matching_tier('ref:countries')
+        generation = tier.generation
+        # L2 dan o'qish va L1 ga yozish orasida invalidation keldi
+        self.first.set('ref:countries', ['kz'])
+        tier.put('ref:countries', None, ['uz'], generation)
+        self.assertEqual(self.second.get('ref:countries'), ['kz'])
+
+
+class TieredRedisListenerTest(TestCase):
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'config.cache.TieredRedisCache',
+        'LOCATION': 'redis://127.0.0.1:1/0',
+        'KEY_PREFIX': 'listener-test',
+        'OPTIONS': {'TIERS': {'ref:': {'timeout': 60}}},
+    }})
+    def test_one_listener_per_process(self):
+        import logging
+        import threading
+
+        from django.core.cache import caches
+
+        from . import cache
+
+        # Redis yo'q - listener ulanolmaydi, warning lar test chiqishini to'ldirmasin
+        logging.disable(logging.WARNING)
+        self.addCleanup(logging.disable, logging.NOTSET)
+
+        instances = []
+
+        def read():
+            instance = caches['default']
+            instance.l1_ready()
+            instances.append(instance)
+
+        threads = [threading.Thread(target=read) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Django cache handle lari thread ga bog'liq, L1 va listener esa bitta
+        self.assertEqual(len({id(instance) for instance in instances}), 8)
+        l1 = instances[0].l1
+        self.addCleanup(cache._l1s.pop, ('TieredRedisCache', 'redis://127.0.0.1:1/0', 'listener-test'), None)
+        self.addCleanup(l1.listener.join, 5)
+        self.addCleanup(l1.listener.stop)
+        self.assertTrue(all(instance.l1 is l1 for instance in instances))
+        listeners = [thread for thread in threading.enumerate() if thread is l1.listener]
+        self.assertEqual(len(listeners), 1)
+        self.assertEqual(sum(1 for thread in threading.enumerate()
+                             if isinstance(thread, cache.InvalidationListener) and thread.l1 is l1), 1)
+
+
+class LoadTestTest(TestCase):
+
+    def test_compare(self):
+        from .loadtest import compare
+
+        baseline = {'catalog': {'ops': 100, 'rps': 50.0, 'p50_ms': 10.0, 'p99_ms': 40.0, 'queries_per_op': 4.0,
+                                'errors': 0}}
+        same = dict(baseline['catalog'], rps=40.0, p50_ms=14.0, p99_ms=70.0, queries_per_op=4.4)
+        self.assertEqual(compare({'catalog': same}, baseline, 0.5), [])
+
+        worse = dict(same, p50_ms=16.0, queries_per_op=5.0, errors=1)
+        failures = compare({'catalog': worse, 'new': same}, baseline, 0.5)
+        self.assertEqual(len(failures), 3)
+        self.assertTrue(all(failure.startswith('catalog:') for failure in failures))
+
+    @override_settings(CACHES={'default': {'BACKEND': 'config.cache.LocMemCache'}})
+    def test_scenario_runs_through_asgi(self):
+        import random
+
+        from asgiref.sync import async_to_sync
+
+        from .asgi import application
+        from .loadtest import ChatRooms, run_scenario, seed
+
+        fixture = seed(scale=0.001)
+        self.assertEqual(len(fixture.rooms), 20)
+        result = async_to_sync(run_scenario)(ChatRooms(application, fixture, random.Random(1)), ops=5, concurrency=2)
+        stats = result.as_dict()
+        self.assertEqual((stats['ops'], stats['errors']), (5, 0))
+        self.assertGreater(stats['queries_per_op'], 0)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'config.cache.LocMemCache'}}, SITE_URL='https://example.uz')
+class SnapshotTest(TestCase):
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_served_from_snapshot_with_etag(self):
+        TypeDoctor.objects.create(name='Terapevt')
+        api = APIClient()
+        response = api.get('/api/specialist/types/')
+        self.assertEqual(response.json()['count'], 1)
+        tag = response['ETag']
+
+        with self.assertNumQueries(0):
+            response = api.get('/api/specialist/types/?limit=1&offset=0')
+        self.assertEqual(response['ETag'], tag)
+        self.assertEqual(response.json()['results'][0]['name'], 'Terapevt')
+
+        response = api.get('/api/specialist/types/', HTTP_IF_NONE_MATCH=tag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_rebuilt_on_save(self):
+        country = CountyModel.objects.create(name="O'zbekiston", order_number=1)
+        RegionModel.objects.create(country=country, name='Toshkent')
+        api = APIClient()
+        tag = api.get('/api/user/region/', {'pk': country.id})['ETag']
+
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            RegionModel.objects.create(country=country, name='Samarqand')
+            RegionModel.objects.create(country=country, name='Buxoro')
+        # Bitta tranzaksiya - bitta rebuild
+        selects = [query for query in queries if query['sql'].startswith('SELECT')]
+        self.assertEqual(len(selects), 1)
+
+        with self.assertNumQueries(0):
+            response = api.get('/api/user/region/', {'pk': country.id}, HTTP_IF_NONE_MATCH=tag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], tag)
+        self.assertEqual([region['name'] for region in response.json()['data']], ['Toshkent', 'Samarqand', 'Buxoro'])
+        self.assertEqual(api.get('/api/user/region/', {'pk': 'x'}).json()['data'], [])
+
+    def test_urls_use_site_url(self):
+        TypeMedicine.objects.create(name='Analgetik', image='types/a.jpg')
+        results = APIClient().get('/api/shop/types/').json()['results']
+        self.assertEqual(results[0]['image'], 'https://example.uz/media/types/a.jpg')
+
+    def test_single_flight(self):
+        import threading
+        import time
+
+        from .snapshots import Snapshot, snapshots
+
+        builds = []
+
+        def build():
+            builds.append(1)
+            time.sleep(0.1)
+            return ['uz']
+
+        snapshot = Snapshot('test', build)
+        self.addCleanup(snapshots.pop, 'test')
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(snapshot.get())) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(builds), 1)
+        self.assertEqual([result['data'] for result in results], [['uz']] * 5)
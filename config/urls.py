@@ -23,6 +23,7 @@ from drf_yasg.views import get_schema_view
 from rest_framework import permissions
 
 from account.views import LoginView
+from config.metrics import metrics_view
 
 schema_view = get_schema_view(
     openapi.Info(
@@ -45,6 +46,7 @@ schema_view = get_schema_view(
 urlpatterns = [
     # path('', home),  # root URL
     path('admin/', admin.site.urls),
+    path('metrics/', metrics_view, name='metrics'),
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
     path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
 
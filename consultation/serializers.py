@@ -1,16 +1,20 @@
 from rest_framework import serializers
 
+from account.identity import IdentityListSerializer, IdentityMixin, get_profile
 from specialist.models import Doctor
 from .models import ConsultationRequest, DoctorAvailability
 
 
-class ConsultationRequestSerializer(serializers.ModelSerializer):
+class ConsultationRequestSerializer(IdentityMixin, serializers.ModelSerializer):
     """
     Client uchun konsultatsiya serializer
+
+    Doctor profillari sahifa bo'yicha bitta query (account.identity)
     """
+    identity_fields = ('doctor_id',)
 
     # Doctor ma'lumotlari
-    doctor_id = serializers.IntegerField(source='doctor.id', read_only=True)
+    doctor_id = serializers.IntegerField(read_only=True)
     doctor_name = serializers.SerializerMethodField()
     doctor_avatar = serializers.SerializerMethodField()
     doctor_type = serializers.SerializerMethodField()
@@ -29,6 +33,7 @@ class ConsultationRequestSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = ConsultationRequest
+        list_serializer_class = IdentityListSerializer
         fields = [
             'id',
             'doctor_id',
@@ -53,33 +58,23 @@ class ConsultationRequestSerializer(serializers.ModelSerializer):
 
     def get_doctor_name(self, obj):
         """Doctor nomi"""
-        try:
-            doctor = Doctor.objects.get(user=obj.doctor)
+        user = self.identity(obj.doctor_id)
+        doctor = get_profile(user, 'doctor')
+        if doctor:
             return doctor.full_name
-        except:
-            return obj.doctor.first_name or obj.doctor.phone
+        return user.first_name or user.phone
 
     def get_doctor_avatar(self, obj):
         """Doctor avatar"""
-        try:
-            doctor = Doctor.objects.get(user=obj.doctor)
-            if doctor.avatar:
-                return doctor.avatar.url
-        except:
-            pass
+        doctor = get_profile(self.identity(obj.doctor_id), 'doctor')
+        if doctor and doctor.image:
+            return doctor.image.url
         return None
 
     def get_doctor_type(self, obj):
-        try:
-            doctor = Doctor.objects.get(user=obj.doctor)
-            if doctor.type_doctor:
-                # Enum bo'lsa
-                if hasattr(doctor.type_doctor, 'value'):
-                    return doctor.type_doctor.value  # ← "Terapevt"
-                # String ga aylantirish
-                return str(doctor.type_doctor)  # ← "Terapevt"
-        except:
-            pass
+        doctor = get_profile(self.identity(obj.doctor_id), 'doctor')
+        if doctor and doctor.type_doctor:
+            return str(doctor.type_doctor)  # ← "Terapevt"
         return None
 
     def get_date(self, obj):
@@ -105,10 +100,11 @@ class ConsultationRequestSerializer(serializers.ModelSerializer):
         return obj.status not in ['completed', 'cancelled']
 
 
-class ConsultationListSerializer(serializers.ModelSerializer):
+class ConsultationListSerializer(IdentityMixin, serializers.ModelSerializer):
     """
     Qisqa ma'lumot (list uchun)
     """
+    identity_fields = ('doctor_id',)
 
     doctor_name = serializers.SerializerMethodField()
     doctor_type = serializers.SerializerMethodField()
@@ -117,6 +113,7 @@ class ConsultationListSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = ConsultationRequest
+        list_serializer_class = IdentityListSerializer
         fields = [
             'id',
             'doctor_name',
@@ -129,18 +126,17 @@ class ConsultationListSerializer(serializers.ModelSerializer):
         ]
 
     def get_doctor_name(self, obj):
-        try:
-            doctor = Doctor.objects.get(user=obj.doctor)
+        user = self.identity(obj.doctor_id)
+        doctor = get_profile(user, 'doctor')
+        if doctor:
             return doctor.full_name
-        except:
-            return obj.doctor.first_name or obj.doctor.phone
+        return user.first_name or user.phone
 
     def get_doctor_type(self, obj):
-        try:
-            doctor = Doctor.objects.get(user=obj.doctor)
-            return doctor.type_doctor
-        except:
-            return None
+        doctor = get_profile(self.identity(obj.doctor_id), 'doctor')
+        if doctor and doctor.type_doctor:
+            return str(doctor.type_doctor)
+        return None
 
     def get_date(self, obj):
         if obj.availability_slot:
@@ -1,3 +1,73 @@
-from django.test import TestCase
+import datetime
 
-# Create your tests here.
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from account.models import UserModel
+from client.models import ClientProfile
+from specialist.models import Doctor, TypeDoctor
+from .models import ConsultationRequest
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ConsultationListQueryCountTest(TestCase):
+    """Sahifadagi qatorlar soni query soniga ta'sir qilmasligi kerak"""
+
+    def setUp(self):
+        self.type_doctor = TypeDoctor.objects.create(name='Terapevt')
+        self.client_user = UserModel.objects.create_user(phone='998900000001')
+        ClientProfile.objects.create(user=self.client_user, full_name='Ali Valiyev')
+        self.doctors = []
+
+    def _add_consultations(self, count):
+        for _ in range(count):
+            index = len(self.doctors) + 2
+            user = UserModel.objects.create_user(phone=f'9989000000{index:02d}', role='doctor')
+            Doctor.objects.create(user=user, image='', full_name=f'Doctor {index}', experience='5',
+                                  type_doctor=self.type_doctor, gender='male')
+            self.doctors.append(user)
+            ConsultationRequest.objects.create(
+                client=self.client_user, doctor=user, status='paid',
+                requested_date=datetime.date(2026, 1, 10), requested_time=datetime.time(10, 0),
+            )
+
+    def _count_queries(self, user, url):
+        api = APIClient()
+        api.force_authenticate(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = api.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response.json()
+
+    def test_client_list(self):
+        self._add_consultations(2)
+        small, _ = self._count_queries(self.client_user, '/api/consultation/client/consultations/')
+        self._add_consultations(6)
+        large, data = self._count_queries(self.client_user, '/api/consultation/client/consultations/')
+
+        self.assertEqual(small, large)
+        rows = data['results'] if isinstance(data, dict) else data
+        self.assertEqual({row['doctor_type'] for row in rows}, {'Terapevt'})
+        self.assertTrue(all(row['doctor_name'].startswith('Doctor') for row in rows))
+
+    def test_doctor_list(self):
+        self._add_consultations(1)
+        doctor = self.doctors[0]
+        for i in range(5):
+            client = UserModel.objects.create_user(phone=f'9989100000{i:02d}')
+            ClientProfile.objects.create(user=client, full_name=f'Client {i}')
+            ConsultationRequest.objects.create(
+                client=client, doctor=doctor, status='paid',
+                requested_date=datetime.date(2026, 1, 10), requested_time=datetime.time(11, 0),
+            )
+
+        queries, data = self._count_queries(doctor, '/api/consultation/doctor/consultations/')
+        rows = data['results'] if isinstance(data, dict) else data
+        self.assertEqual(len(rows), 6)
+        self.assertIn('Client 0', {row['client_name'] for row in rows})
+
+        ConsultationRequest.objects.filter(doctor=doctor).exclude(client=self.client_user).delete()
+        fewer, _ = self._count_queries(doctor, '/api/consultation/doctor/consultations/')
+        self.assertEqual(queries, fewer)
@@ -30,10 +30,13 @@ class ConsultationViewSet(viewsets.ModelViewSet):
         """Get consultations for current user"""
         user = self.request.user
 
+        # Doctor/client profillari serializer da IdentityLoader orqali (bitta query)
+        queryset = ConsultationRequest.objects.select_related('availability_slot', 'chat_room')
+
         if user.role == 'doctor':
-            return ConsultationRequest.objects.filter(doctor=user)
+            return queryset.filter(doctor=user)
         else:
-            return ConsultationRequest.objects.filter(client=user)
+            return queryset.filter(client=user)
 
     @action(detail=False, methods=['get'])
     def availability(self, request):
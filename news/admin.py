@@ -3,7 +3,8 @@ from admin_auto_filters.filters import AutocompleteFilter
 from django.contrib import admin
 from modeltranslation.admin import TabbedTranslationAdmin
 from shop.models import Feedbacks
-from .models import NewsModel, Stories, TagsModel, Advertising, StoriesImage
+from .forms import NotificationAdminForm
+from .models import NewsModel, Stories, TagsModel, Advertising, StoriesImage, Notification
 
 
 class HashTagFilter(AutocompleteFilter):
@@ -53,6 +54,17 @@ class AdvertisingAdmin(admin.ModelAdmin):
     autocomplete_fields = ['medicine', 'doctor', ]
 
 
+class NotificationAdmin(admin.ModelAdmin):
+    form = NotificationAdminForm
+    list_display = ['id', 'title', 'type', 'target_role', 'target_language', 'push_time', 'status',
+                    'success_count', 'failure_count', ]
+    list_filter = ['status', 'type', 'target_role', 'target_language', ]
+    search_fields = ['id', 'title', ]
+    autocomplete_fields = ['target_user', ]  # ajax - userlar formaga yuklanmaydi
+    list_select_related = ['target_user', ]
+    readonly_fields = ['status', 'last_device_id', 'success_count', 'failure_count', 'progress_at', 'sent_at', ]
+
+
 class FeedbackAdmin(admin.ModelAdmin):
     list_display = ['id', 'link', 'medicine', 'type', 'category', ]
     search_fields = ['id', 'link', 'medicine', ]
@@ -63,3 +75,4 @@ admin.site.register(NewsModel, NewsModelAdmin)
 admin.site.register(TagsModel, TagsModelAdmin)
 admin.site.register(Advertising, AdvertisingAdmin)
 admin.site.register(Feedbacks, FeedbackAdmin)
+admin.site.register(Notification, NotificationAdmin)
@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class NewsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'news'
+
+    def ready(self):
+        from config import images
+        from .models import NewsModel, Stories, StoriesImage
+
+        images.register(NewsModel, 'image', 'image_srcset')
+        images.register(Stories, 'icon', 'icon_srcset')
+        images.register(StoriesImage, 'image', 'image_srcset')
+
+        from . import snapshots
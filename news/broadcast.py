@@ -0,0 +1,174 @@
+"""
+Mass push notification fanout
+
+BroadcastEngine tokenlarni 500 talik multicast batchlarga bo'lib,
+worker pool orqali yuboradi. Har bir "wave" (workers ta batch)
+tugagach progress callback chaqiriladi - crash bo'lsa broadcast
+oxirgi saqlangan cursor dan davom etadi.
+
+Transport almashtiriladigan: production da FirebaseTransport,
+benchmark/test da FakeFCMTransport.
+"""
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+from config.metrics import outbound
+
+logger = logging.getLogger(__name__)
+
+# Per-token natijalar
+RESULT_OK = 'ok'
+RESULT_INVALID = 'invalid'  # token o'chirilgan/yaroqsiz - prune qilinadi
+RESULT_ERROR = 'error'
+
+
+class TransientError(Exception):
+    """Butun batch vaqtincha yuborilmadi (network, FCM 5xx) - retry qilinadi"""
+
+
+class FirebaseTransport:
+    """firebase_admin multicast orqali yuborish (send_each_for_multicast - firebase-admin >= 6.2)"""
+
+    def __init__(self):
+        from news.send_notification import get_firebase_app
+        get_firebase_app()
+
+    def send_multicast(self, tokens, title, body, image=None, data=None):
+        from firebase_admin import exceptions, messaging
+
+        message = messaging.MulticastMessage(
+            notification=messaging.Notification(title=title, body=body, image=image),
+            data=data or {},
+            tokens=tokens,
+        )
+
+        try:
+            with outbound('fcm'):
+                response = messaging.send_each_for_multicast(message)
+        except (exceptions.UnavailableError, exceptions.InternalError,
+                exceptions.DeadlineExceededError, ConnectionError) as e:
+            raise TransientError(str(e)) from e
+
+        results = []
+        for item in response.responses:
+            if item.success:
+                results.append(RESULT_OK)
+            elif isinstance(item.exception, (messaging.UnregisteredError,
+                                             messaging.SenderIdMismatchError,
+                                             exceptions.InvalidArgumentError)):
+                results.append(RESULT_INVALID)
+            else:
+                results.append(RESULT_ERROR)
+        return results
+
+
+class FakeFCMTransport:
+    """
+    Benchmark/test uchun FCM o'rniga
+
+    latency: bitta multicast call davomiyligi (sekund)
+    invalid_ratio: yaroqsiz token ulushi
+    transient_ratio: vaqtincha xato beradigan batch ulushi
+    """
+
+    def __init__(self, latency=0.0, invalid_ratio=0.0, transient_ratio=0.0, seed=None):
+        self.latency = latency
+        self.invalid_ratio = invalid_ratio
+        self.transient_ratio = transient_ratio
+        self.random = random.Random(seed)
+        self.calls = 0
+
+    def send_multicast(self, tokens, title, body, image=None, data=None):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self.transient_ratio and self.random.random() < self.transient_ratio:
+            raise TransientError('fake FCM unavailable')
+        return [
+            RESULT_INVALID if self.invalid_ratio and self.random.random() < self.invalid_ratio else RESULT_OK
+            for _ in tokens
+        ]
+
+
+class BroadcastEngine:
+    """
+    rows: (device_id, fcm_token) juftliklari, device_id bo'yicha o'suvchi
+    on_progress(last_device_id, success, failed, invalid_tokens):
+        har bir wave tugagach - cursor va hisoblagichlarni saqlash uchun
+    """
+
+    def __init__(self, transport, batch_size=None, workers=None, max_retries=None, backoff=None):
+        self.transport = transport
+        self.batch_size = batch_size or getattr(settings, 'FCM_BROADCAST_BATCH_SIZE', 500)
+        self.workers = workers or getattr(settings, 'FCM_BROADCAST_WORKERS', 8)
+        self.max_retries = max_retries if max_retries is not None else getattr(settings, 'FCM_BROADCAST_MAX_RETRIES', 3)
+        self.backoff = backoff if backoff is not None else getattr(settings, 'FCM_BROADCAST_BACKOFF', 1.0)
+
+    def _batches(self, rows):
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _send_batch(self, batch, title, body, image, data):
+        """Returns (success, failed, invalid_tokens)"""
+        tokens = [token for _, token in batch]
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                results = self.transport.send_multicast(tokens, title, body, image=image, data=data)
+                break
+            except TransientError as e:
+                if attempt == self.max_retries:
+                    logger.error(f"Push batch failed after {attempt + 1} attempts: {e}")
+                    return 0, len(tokens), []
+                time.sleep(self.backoff * (2 ** attempt))
+
+        invalid = [token for token, result in zip(tokens, results) if result == RESULT_INVALID]
+        success = sum(1 for result in results if result == RESULT_OK)
+        return success, len(tokens) - success, invalid
+
+    def run(self, rows, title, body, image=None, data=None, on_progress=None):
+        """Returns (success, failed)"""
+        total_success = total_failed = 0
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            wave = []
+            for batch in self._batches(rows):
+                wave.append(batch)
+                if len(wave) == self.workers:
+                    success, failed = self._run_wave(pool, wave, title, body, image, data, on_progress)
+                    total_success += success
+                    total_failed += failed
+                    wave = []
+
+            if wave:
+                success, failed = self._run_wave(pool, wave, title, body, image, data, on_progress)
+                total_success += success
+                total_failed += failed
+
+        return total_success, total_failed
+
+    def _run_wave(self, pool, wave, title, body, image, data, on_progress):
+        futures = [pool.submit(self._send_batch, batch, title, body, image, data) for batch in wave]
+
+        success = failed = 0
+        invalid = []
+        for future in futures:
+            batch_success, batch_failed, batch_invalid = future.result()
+            success += batch_success
+            failed += batch_failed
+            invalid.extend(batch_invalid)
+
+        if on_progress:
+            on_progress(wave[-1][-1][0], success, failed, invalid)
+
+        return success, failed
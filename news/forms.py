@@ -1,16 +1,16 @@
 from django import forms
 
-from account.models import UserModel
 from news.models import Notification
 
 
 class NotificationAdminForm(forms.ModelForm):
-    user = forms.ChoiceField(choices=(("0", 'All users'),))
-
-    def __init__(self, *args, **kwargs):
-        super(NotificationAdminForm, self).__init__(*args, **kwargs)
-        self.fields['user'].choices += [(str(x.pk), f"{x.get_full_name()} | {x.username}") for x in UserModel.objects.all()]
+    """
+    Audience userlar ro'yxati formaga yuklanmaydi: target_user admin
+    autocomplete (AJAX, UserModel search) orqali tanlanadi, segmentlar
+    esa dispatch vaqtida Notification.audience_devices() da resolve bo'ladi.
+    """
 
     class Meta:
         model = Notification
-        fields = ["title", "description", "image", "type", "user"]
\ No newline at end of file
+        fields = ["title", "description", "image", "type", "foreign_id", "push_time",
+                  "target_user", "target_role", "target_language"]
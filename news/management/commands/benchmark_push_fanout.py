@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from news.broadcast import BroadcastEngine, FakeFCMTransport
+
+
+class Command(BaseCommand):
+    help = 'Benchmark push broadcast fanout against a fake FCM transport (no DB, no network)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tokens', type=int, default=1_000_000, help='Token count (default: 1M)')
+        parser.add_argument('--workers', type=int, default=8, help='Worker pool size (default: 8)')
+        parser.add_argument('--batch-size', type=int, default=500, help='Multicast batch size (default: 500)')
+        parser.add_argument('--latency', type=float, default=0.05, help='Fake FCM call latency, seconds (default: 0.05)')
+        parser.add_argument('--invalid-ratio', type=float, default=0.01, help='Invalid token ratio (default: 0.01)')
+        parser.add_argument('--transient-ratio', type=float, default=0.0, help='Transient batch failure ratio')
+
+    def handle(self, *args, **options):
+        transport = FakeFCMTransport(
+            latency=options['latency'],
+            invalid_ratio=options['invalid_ratio'],
+            transient_ratio=options['transient_ratio'],
+            seed=42,
+        )
+        engine = BroadcastEngine(
+            transport,
+            batch_size=options['batch_size'],
+            workers=options['workers'],
+            backoff=0.01,
+        )
+
+        rows = ((device_id, f'token-{device_id}') for device_id in range(1, options['tokens'] + 1))
+        pruned = []
+
+        def on_progress(last_device_id, success, failed, invalid_tokens):
+            pruned.extend(invalid_tokens)
+
+        started = time.perf_counter()
+        success, failed = engine.run(rows, 'Benchmark', 'Fanout benchmark', on_progress=on_progress)
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{options['tokens']} tokens in {elapsed:.2f}s "
+            f"({options['tokens'] / elapsed:,.0f} tokens/s, {transport.calls} multicast calls)"
+        ))
+        self.stdout.write(f"success={success} failed={failed} pruned={len(pruned)}")
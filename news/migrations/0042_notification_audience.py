@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('news', '0041_notification_broadcast_progress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='target_user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='targeted_notifications', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='target_role',
+            field=models.CharField(blank=True, choices=[('client', 'Client'), ('doctor', 'Doctor'), ('operator', 'Operator')], max_length=20),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='target_language',
+            field=models.CharField(blank=True, choices=[('uz', "O'zbek"), ('ru', 'Русский'), ('en', 'English')], max_length=3),
+        ),
+    ]
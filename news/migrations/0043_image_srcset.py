@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0042_notification_audience'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='newsmodel',
+            name='image_srcset',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='stories',
+            name='icon_srcset',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='storiesimage',
+            name='image_srcset',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
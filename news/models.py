@@ -1,4 +1,5 @@
 import datetime
+from django.conf import settings
 from django.db import models
 from specialist.models import Doctor
 from shop.models import Medicine
@@ -9,6 +10,7 @@ today = datetime.date.today()
 class NewsModel(models.Model):
     image = models.ImageField(upload_to=f'news/{today.year}-{today.month}-{today.month}/',
                               null=True, blank=True)
+    image_srcset = models.JSONField(default=dict, blank=True, editable=False)  # config.images
     name = models.CharField(max_length=255)
     hashtag = models.ForeignKey('TagsModel', on_delete=models.RESTRICT)
     description = models.TextField()
@@ -34,6 +36,7 @@ class Stories(models.Model):
     title_ru = models.TextField(default="", blank=True)
     title_en = models.TextField(default="", blank=True)
     icon = models.ImageField(upload_to="news/stories/icon", null=True)
+    icon_srcset = models.JSONField(default=dict, blank=True, editable=False)  # config.images
 
     def __str__(self):
         return self.title
@@ -42,6 +45,7 @@ class Stories(models.Model):
 class StoriesImage(models.Model):
     story = models.ForeignKey(Stories, on_delete=models.CASCADE, related_name='images')
     image = models.FileField(upload_to=f'news/stories/{today.year}-{today.month}/')
+    image_srcset = models.JSONField(default=dict, blank=True, editable=False)  # config.images
 
     def __str__(self) -> str:
         return f"ID#{self.id}: {self.image}"
@@ -74,3 +78,55 @@ class Notification(models.Model):
         (2, 'doctors')
     ), default=1, db_index=True)
 
+    # Audience - bo'sh bo'lsa barcha userlar. Dispatch vaqtida server tomonda
+    # resolve qilinadi (audience_devices), list sifatida saqlanmaydi.
+    target_user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True,
+                                    related_name='targeted_notifications')
+    target_role = models.CharField(max_length=20, blank=True, choices=(
+        ('client', 'Client'),
+        ('doctor', 'Doctor'),
+        ('operator', 'Operator'),
+    ))
+    target_language = models.CharField(max_length=3, blank=True, choices=(
+        ('uz', 'O\'zbek'),
+        ('ru', 'Русский'),
+        ('en', 'English'),
+    ))
+
+    # Broadcast progress (news.tasks.broadcast_notification)
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    )
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    last_device_id = models.BigIntegerField(default=0)  # resume cursor (UserDevice.id)
+    success_count = models.PositiveIntegerField(default=0)
+    failure_count = models.PositiveIntegerField(default=0)
+    progress_at = models.DateTimeField(null=True, blank=True)  # heartbeat - crash bo'lsa resume
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'push_time']),
+        ]
+
+    def audience_devices(self):
+        """
+        Notification yuboriladigan aktiv qurilmalar (lazy queryset)
+
+        Faqat aktiv qurilmasi bor userlar qamrab olinadi.
+        """
+        from account.models import UserDevice
+
+        devices = UserDevice.objects.filter(is_active=True).exclude(fcm_token='')
+
+        if self.target_user_id:
+            devices = devices.filter(user_id=self.target_user_id)
+        if self.target_role:
+            devices = devices.filter(user__role=self.target_role)
+        if self.target_language:
+            devices = devices.filter(user__language=self.target_language)
+
+        return devices
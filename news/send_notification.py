@@ -2,6 +2,8 @@ import os
 import firebase_admin
 from firebase_admin import credentials, messaging
 
+from config.metrics import outbound
+
 
 def get_firebase_app():
     if firebase_admin._apps:
@@ -35,7 +37,8 @@ def sendPush(title, description, registration_tokens, image=None, dataObject=Non
         tokens=registration_tokens,
     )
 
-    return messaging.send_multicast(message)
+    with outbound('fcm'):
+        return messaging.send_multicast(message)
 
 
 
@@ -2,23 +2,27 @@ from rest_framework import serializers
 from rest_framework.serializers import ModelSerializer, Serializer, CharField, SerializerMethodField
 
 from account.models import UserModel
+from config.images import SrcsetField
 from shop.models import Feedbacks
 from .models import NewsModel, Stories, TagsModel, Advertising, Notification, StoriesImage
 
 
 class StoriesImageSerializer(ModelSerializer):
+    image_srcset = SrcsetField()
+
     class Meta:
         model = StoriesImage
-        fields = ['id', 'image']
+        fields = ['id', 'image', 'image_srcset']
 
 class StoriesSerializer(serializers.ModelSerializer):
     images = StoriesImageSerializer(many=True, read_only=True)
+    icon_srcset = SrcsetField()
 
     class Meta:
         model = Stories
         fields = [
             'id', 'title', 'title_uz', 'title_ru', 'title_en',
-            'icon', 'images'
+            'icon', 'icon_srcset', 'images'
         ]
 
 
@@ -48,6 +52,7 @@ class TagsSerializer(ModelSerializer):
 
 class NewsModelSerializer(ModelSerializer):
     hashtag = TagsSerializer()
+    image_srcset = SrcsetField()
 
     class Meta:
         model = NewsModel
@@ -85,7 +90,7 @@ class FeedbackLinksSerializer(ModelSerializer):
 class NotificationSerializer(ModelSerializer):
     class Meta:
         model = Notification
-        fields = '__all__'
+        fields = ('id', 'title', 'description', 'image', 'foreign_id', 'push_time', 'type')
         # extra_kwargs = {
         #     'title': {'required': True},
         #     'description': {'required': True},
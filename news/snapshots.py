@@ -0,0 +1,19 @@
+"""Ilova ochilganda so'raladigan ma'lumot (config/snapshots.py)"""
+from config.snapshots import SiteRequest, Snapshot
+
+from .models import Advertising, Stories, StoriesImage
+from .serializers import AdvertisingSerializer, StoriesSerializer
+
+
+def build_stories():
+    queryset = Stories.objects.prefetch_related('images').order_by('id')
+    return StoriesSerializer(queryset, many=True, context={'request': SiteRequest()}).data
+
+
+def build_advertising():
+    queryset = Advertising.objects.select_related('doctor').order_by('id')
+    return AdvertisingSerializer(queryset, many=True, context={'request': SiteRequest()}).data
+
+
+stories = Snapshot('stories', build_stories, depends_on=[Stories, StoriesImage])
+advertising = Snapshot('shop_advertising', build_advertising, depends_on=[Advertising])
@@ -0,0 +1,104 @@
+# news/tasks.py
+import logging
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from account.models import UserDevice
+from .broadcast import BroadcastEngine, FirebaseTransport
+from .models import Notification
+
+logger = logging.getLogger(__name__)
+
+
+def _claimable(now):
+    """Yuborilishi kerak bo'lgan yoki crash bo'lib qolib ketgan notificationlar"""
+    stale = now - timedelta(seconds=getattr(settings, 'FCM_BROADCAST_STALE_AFTER', 300))
+    return (
+        Q(status='pending', push_time__lte=now) |
+        Q(status='sending', progress_at__lt=stale)
+    )
+
+
+@shared_task
+def dispatch_due_notifications():
+    """
+    push_time kelgan notificationlarni broadcast ga yuborish
+
+    Runs: Every minute (celery beat)
+    """
+    now = timezone.now()
+    due_ids = list(Notification.objects.filter(_claimable(now)).values_list('id', flat=True))
+
+    dispatched = 0
+    for notification_id in due_ids:
+        # Atomic claim - bir nechta beat/worker bitta notificationni ikki marta olmasin
+        claimed = Notification.objects.filter(_claimable(now), id=notification_id).update(
+            status='sending',
+            progress_at=now
+        )
+        if claimed:
+            broadcast_notification.delay(notification_id)
+            dispatched += 1
+
+    return f"Dispatched {dispatched} notifications"
+
+
+@shared_task
+def broadcast_notification(notification_id, transport=None):
+    """
+    Notificationni barcha aktiv qurilmalarga yuborish
+
+    Tokenlar UserDevice.id bo'yicha stream qilinadi; har bir wave dan
+    keyin cursor (last_device_id) saqlanadi, shuning uchun crash bo'lsa
+    broadcast o'sha joydan davom etadi.
+    """
+    try:
+        notification = Notification.objects.get(id=notification_id)
+    except Notification.DoesNotExist:
+        return None
+
+    engine = BroadcastEngine(transport or FirebaseTransport())
+
+    rows = notification.audience_devices().filter(
+        id__gt=notification.last_device_id
+    ).order_by('id').values_list('id', 'fcm_token').iterator(
+        chunk_size=engine.batch_size * engine.workers
+    )
+
+    def on_progress(last_device_id, success, failed, invalid_tokens):
+        if invalid_tokens:
+            UserDevice.objects.filter(fcm_token__in=invalid_tokens).update(is_active=False)
+
+        Notification.objects.filter(id=notification_id).update(
+            last_device_id=last_device_id,
+            success_count=F('success_count') + success,
+            failure_count=F('failure_count') + failed,
+            progress_at=timezone.now()
+        )
+
+    image = f"{settings.SITE_URL}{notification.image.url}" if notification.image else None
+    data = {
+        'type': 'notification',
+        'notification_id': str(notification.id),
+        'notification_type': str(notification.type),
+        'foreign_id': notification.foreign_id or '',
+    }
+
+    try:
+        success, failed = engine.run(
+            rows, notification.title, notification.description,
+            image=image, data=data, on_progress=on_progress
+        )
+    except Exception as e:
+        logger.error(f"Broadcast {notification_id} failed: {e}", exc_info=True)
+        Notification.objects.filter(id=notification_id).update(status='failed')
+        raise
+
+    Notification.objects.filter(id=notification_id).update(status='sent', sent_at=timezone.now())
+    logger.info(f"Broadcast {notification_id}: {success} sent, {failed} failed")
+
+    return {'success': success, 'failed': failed}
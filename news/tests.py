@@ -1,8 +1,13 @@
-from django.test import TestCase
+from unittest import mock
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.utils import timezone
+
+from account.models import UserDevice, UserModel
+from .broadcast import RESULT_INVALID, RESULT_OK, FakeFCMTransport
 from .models import Notification
+from .tasks import broadcast_notification, dispatch_due_notifications
+
 
 class NotificationModelTest(TestCase):
     def test_create_notification(self):
@@ -12,4 +17,66 @@ class NotificationModelTest(TestCase):
             push_time=timezone.now()
         )
         self.assertEqual(notification.title, 'Test Title')
-        self.assertTrue(Notification.objects.filter(title='Test Title').exists())
\ No newline at end of file
+        self.assertTrue(Notification.objects.filter(title='Test Title').exists())
+
+
+class StaleTokenTransport(FakeFCMTransport):
+    def send_multicast(self, tokens, title, body, image=None, data=None):
+        self.calls += 1
+        return [RESULT_INVALID if token.startswith('stale') else RESULT_OK for token in tokens]
+
+
+class NotificationBroadcastTest(TestCase):
+
+    def setUp(self):
+        user = UserModel.objects.create_user(phone='998901234567')
+        for i in range(7):
+            UserDevice.objects.create(
+                user=user, device_id=f'd{i}',
+                fcm_token=f'stale-{i}' if i == 3 else f'token-{i}'
+            )
+        self.notification = Notification.objects.create(
+            title='Aksiya', description='Chegirma', push_time=timezone.now()
+        )
+
+    @mock.patch('news.tasks.broadcast_notification.delay')
+    def test_dispatch_claims_due_notification_once(self, delay):
+        dispatch_due_notifications()
+        dispatch_due_notifications()
+
+        delay.assert_called_once_with(self.notification.id)
+        self.notification.refresh_from_db()
+        self.assertEqual(self.notification.status, 'sending')
+
+    @override_settings(FCM_BROADCAST_BATCH_SIZE=2, FCM_BROADCAST_WORKERS=2)
+    def test_broadcast_prunes_invalid_tokens(self):
+        transport = StaleTokenTransport()
+        result = broadcast_notification(self.notification.id, transport=transport)
+
+        self.assertEqual(result, {'success': 6, 'failed': 1})
+        self.assertEqual(transport.calls, 4)
+        self.assertFalse(UserDevice.objects.get(fcm_token='stale-3').is_active)
+
+        self.notification.refresh_from_db()
+        self.assertEqual(self.notification.status, 'sent')
+        self.assertEqual(self.notification.last_device_id, UserDevice.objects.order_by('-id').first().id)
+
+    def test_broadcast_resumes_from_cursor(self):
+        self.notification.last_device_id = UserDevice.objects.order_by('id')[4].id
+        self.notification.save()
+
+        result = broadcast_notification(self.notification.id, transport=StaleTokenTransport())
+
+        self.assertEqual(result, {'success': 2, 'failed': 0})
+
+    def test_audience_filters_by_role_and_language(self):
+        doctor = UserModel.objects.create_user(phone='998901112233', role='doctor', language='ru')
+        UserDevice.objects.create(user=doctor, device_id='doc', fcm_token='doctor-token')
+        UserDevice.objects.create(user=doctor, device_id='old', fcm_token='old-token', is_active=False)
+
+        self.notification.target_role = 'doctor'
+        self.assertEqual(list(self.notification.audience_devices().values_list('fcm_token', flat=True)),
+                         ['doctor-token'])
+
+        self.notification.target_language = 'uz'
+        self.assertFalse(self.notification.audience_devices().exists())
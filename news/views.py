@@ -7,6 +7,8 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from shop.models import Feedbacks
+from config.snapshots import SnapshotListMixin
+from . import snapshots
 from .filters import NewsFilter
 from .models import NewsModel, Stories, TagsModel, Advertising, Notification
 from .serializers import (
@@ -103,19 +105,21 @@ class TagView(APIView):
     #     return self.list(request, *args, **kwargs)
 
 
-class StoriesListView(generics.ListAPIView):
+class StoriesListView(SnapshotListMixin, generics.ListAPIView):
     queryset = Stories.objects.prefetch_related('images').all()
     serializer_class = StoriesSerializer
+    snapshot = snapshots.stories
 
 class StoriesDetailView(generics.RetrieveAPIView):
     queryset = Stories.objects.prefetch_related('images').all()
     serializer_class = StoriesSerializer
 
 
-class AdvertisingShopView(generics.ListAPIView):
+class AdvertisingShopView(SnapshotListMixin, generics.ListAPIView):
     queryset = Advertising.objects.all()
     # permission_classes = (IsAuthenticated,)
     serializer_class = AdvertisingSerializer
+    snapshot = snapshots.advertising
 
     # pagination_class = api_settings.DEFAULT_PAGINATION_CLASS
 
@@ -4,4 +4,8 @@ from django.apps import AppConfig
 class PartnerAuthConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'partner_auth'
-    verbose_name = 'Partner Authentication'
\ No newline at end of file
+    verbose_name = 'Partner Authentication'
+
+    def ready(self):
+        """Import signals when app is ready"""
+        import partner_auth.signals
@@ -1,18 +1,22 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
 from django.core.cache import cache
 from django.utils import timezone
+from django.utils.deprecation import MiddlewareMixin
 from rest_framework.response import Response
 from rest_framework import status
 from .models import PartnerRequest
 import json
 
 
-class PartnerRateLimitMiddleware:
+class PartnerRateLimitMiddleware(MiddlewareMixin):
     """Partner uchun rate limiting"""
 
-    def __init__(self, get_response):
-        self.get_response = get_response
-
     def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+
         # Faqat partner API endpointlari uchun
         if hasattr(request, 'partner') and request.partner:
             if not self.check_rate_limit(request.partner):
@@ -29,6 +33,23 @@ class PartnerRateLimitMiddleware:
 
         return response
 
+    async def __acall__(self, request):
+        # Sync-only middleware butun chain ni (async view larni ham) thread ga o'tkazadi.
+        # Partner bo'lmagan request lar bu yerda thread ga umuman o'tmaydi
+        if hasattr(request, 'partner') and request.partner:
+            if not await sync_to_async(self.check_rate_limit)(request.partner):
+                return Response(
+                    {"detail": "Rate limit exceeded. Too many requests."},
+                    status=status.HTTP_429_TOO_MANY_REQUESTS
+                )
+
+        response = await self.get_response(request)
+
+        if hasattr(request, 'partner') and request.partner:
+            await sync_to_async(self.log_partner_request)(request, response)
+
+        return response
+
     def check_rate_limit(self, partner):
         """Rate limit tekshirish"""
         cache_key = f"partner_rate_limit_{partner.id}"
@@ -86,8 +107,7 @@ class PartnerRateLimitMiddleware:
             )
 
             # Partner statistikasini yangilash
-            request.partner.total_requests += 1
-            request.partner.save(update_fields=['total_requests'])
+            request.partner.increment(total_requests=1)
 
         except Exception as e:
             # Log xatosi asosiy jarayonga ta'sir qilmasligi kerak
@@ -1,4 +1,6 @@
+from django.core.cache import cache
 from django.db import models
+from django.db.models import F
 from django.utils.crypto import get_random_string
 import hashlib
 
@@ -21,6 +23,8 @@ class Partner(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    CACHE_TIMEOUT = 600
+
     class Meta:
         db_table = 'partners'
         verbose_name = 'Hamkor'
@@ -38,6 +42,29 @@ class Partner(models.Model):
         """Secret ni tekshirish"""
         return self.api_secret == self.hash_secret(secret)
 
+    @staticmethod
+    def cache_key(api_key):
+        return f'partner:key:{api_key}'
+
+    @classmethod
+    def get_active(cls, api_key):
+        """
+        Aktiv partner yoki None - har bir partner request da, shuning uchun cache da
+        (L1 + Redis). Partner o'zgarsa signal cache ni tozalaydi.
+        """
+        key = cls.cache_key(api_key)
+        partner = cache.get(key)
+        if partner is None:
+            # Topilmagani cache lanmaydi - tasodifiy key lar cache ni to'ldirmasin
+            partner = cls.objects.filter(api_key=api_key, is_active=True).first()
+            if partner is not None:
+                cache.set(key, partner, cls.CACHE_TIMEOUT)
+        return partner
+
+    def increment(self, **fields):
+        """Statistika counter lari - bitta UPDATE, cache dagi eski qiymat ustiga yozilmaydi"""
+        Partner.objects.filter(pk=self.pk).update(**{name: F(name) + value for name, value in fields.items()})
+
     @classmethod
     def generate_credentials(cls):
         """Yangi credentials yaratish"""
@@ -22,9 +22,8 @@ def authenticate_partner(view_func):
                 status=status.HTTP_401_UNAUTHORIZED
             )
 
-        try:
-            partner = Partner.objects.get(api_key=api_key, is_active=True)
-        except Partner.DoesNotExist:
+        partner = Partner.get_active(api_key)
+        if partner is None:
             return Response(
                 {"detail": "Noto'g'ri API Key"},
                 status=status.HTTP_401_UNAUTHORIZED
@@ -57,9 +56,8 @@ class IsPartnerAuthenticated(BasePermission):
         if not api_key or not api_secret:
             return False
 
-        try:
-            partner = Partner.objects.get(api_key=api_key, is_active=True)
-        except Partner.DoesNotExist:
+        partner = Partner.get_active(api_key)
+        if partner is None:
             return False
 
         if not partner.verify_secret(api_secret):
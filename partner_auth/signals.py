@@ -0,0 +1,19 @@
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import Partner
+
+
+@receiver(pre_save, sender=Partner)
+def remember_api_key(sender, instance, **kwargs):
+    """api_key almashtirilsa eski key ham cache dan o'chirilishi kerak"""
+    if instance.pk and not kwargs.get('raw'):
+        instance._cached_api_key = Partner.objects.filter(pk=instance.pk).values_list('api_key', flat=True).first()
+
+
+@receiver(post_save, sender=Partner)
+@receiver(post_delete, sender=Partner)
+def invalidate_partner(sender, instance, **kwargs):
+    keys = {instance.api_key, getattr(instance, '_cached_api_key', None)} - {None}
+    cache.delete_many([Partner.cache_key(api_key) for api_key in keys])
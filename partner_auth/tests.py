@@ -1,3 +1,50 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from .models import Partner
+
+TIERED_CACHE = {'default': {'BACKEND': 'config.cache.TieredLocMemCache',
+                            'OPTIONS': {'TIERS': {'partner:': {'timeout': 60}}}}}
+
+
+@override_settings(CACHES=TIERED_CACHE)
+class PartnerAuthTest(TestCase):
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.secret = 'sk_test_secret'
+        self.partner = Partner.objects.create(name='Hamkor', api_key='pk_test_key',
+                                              api_secret=Partner.hash_secret(self.secret))
+        self.api = APIClient(HTTP_X_API_KEY='pk_test_key', HTTP_X_API_SECRET=self.secret)
+
+    def test_partner_lookup_cached(self):
+        self.assertEqual(Partner.get_active('pk_test_key'), self.partner)
+        with self.assertNumQueries(0):
+            self.assertEqual(Partner.get_active('pk_test_key'), self.partner)
+        self.assertIsNone(Partner.get_active('pk_unknown'))
+
+    def test_deactivation_invalidates_cache(self):
+        Partner.get_active('pk_test_key')
+        self.partner.is_active = False
+        self.partner.save()
+        self.assertIsNone(Partner.get_active('pk_test_key'))
+
+        response = self.api.post('/api/partner/token/', {'user_phone': '998901234567'}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+    def test_rotated_key_invalidates_cache(self):
+        Partner.get_active('pk_test_key')
+        self.partner.api_key = 'pk_rotated_key'
+        self.partner.save()
+        self.assertIsNone(Partner.get_active('pk_test_key'))
+        self.assertEqual(Partner.get_active('pk_rotated_key'), self.partner)
+
+    def test_counters_update_in_database(self):
+        partner = Partner.get_active('pk_test_key')
+        partner.increment(total_requests=1)
+        partner.increment(total_requests=1, total_users_created=1)
+        self.partner.refresh_from_db()
+        self.assertEqual((self.partner.total_requests, self.partner.total_users_created), (2, 1))
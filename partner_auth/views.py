@@ -109,8 +109,7 @@ class PartnerTokenView(APIView):
                 is_new_user = True
 
                 # Partner statistikasini yangilash
-                request.partner.total_users_created += 1
-                request.partner.save(update_fields=['total_users_created'])
+                request.partner.increment(total_users_created=1)
             else:
                 return Response(
                     {
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class PaymeuzConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'paymeuz'
+
+    def ready(self):
+        """Compile Payme merchant config once at startup"""
+        from paymeuz.payme.service import PaymeService
+        PaymeService.load_config()
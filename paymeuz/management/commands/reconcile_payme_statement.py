@@ -0,0 +1,44 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from paymeuz.payme.service import PaymeService
+from paymeuz.tasks import statement_day_range
+
+
+class Command(BaseCommand):
+    help = 'Diff a recorded Payme GetStatement response against the PaymentTransaction ledger'
+
+    def add_arguments(self, parser):
+        parser.add_argument('statement', type=str, help='Path to recorded statement JSON')
+        parser.add_argument(
+            '--day',
+            type=str,
+            help='Local day covered by the statement (YYYY-MM-DD). Default: range of the statement itself'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            statement = PaymeService.load_statement(options['statement'])
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Can't read statement: {e}")
+
+        from_time = to_time = None
+        if options['day']:
+            from datetime import datetime
+            day = datetime.strptime(options['day'], '%Y-%m-%d').date()
+            from_time, to_time = statement_day_range(day)
+
+        report = PaymeService.reconcile_statement(statement, from_time, to_time)
+
+        self.stdout.write(f"Checked {report['checked']} ledger transactions")
+
+        if not (report['missing'] or report['unexpected'] or report['mismatched']):
+            self.stdout.write(self.style.SUCCESS('✅ Ledger matches Payme statement'))
+            return
+
+        self.stdout.write(self.style.ERROR(json.dumps({
+            'missing': report['missing'],
+            'unexpected': report['unexpected'],
+            'mismatched': report['mismatched'],
+        }, indent=2)))
@@ -0,0 +1,17 @@
+# Generated by Django 4.0.2 on 2026-10-19 15:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('paymeuz', '0002_payment_paymenttransaction_remove_card_owner_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['payme_time'], name='payments_payme_t_82409b_idx'),
+        ),
+    ]
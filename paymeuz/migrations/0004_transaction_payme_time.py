@@ -0,0 +1,36 @@
+# Generated by Django 4.0.2 on 2026-10-19 18:03
+
+from django.db import migrations, models
+
+
+def backfill_payme_time(apps, schema_editor):
+    """Mavjud CreateTransaction lar: payme_time = request_data['time']"""
+    PaymentTransaction = apps.get_model('paymeuz', 'PaymentTransaction')
+
+    batch = []
+    rows = PaymentTransaction.objects.filter(method='CreateTransaction').values_list('id', 'request_data')
+    for pk, request_data in rows.iterator(chunk_size=2000):
+        time = (request_data or {}).get('time')
+        if isinstance(time, int):
+            batch.append(PaymentTransaction(id=pk, payme_time=time))
+    PaymentTransaction.objects.bulk_update(batch, ['payme_time'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('paymeuz', '0003_payment_payme_time_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='paymenttransaction',
+            name='payme_time',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_payme_time, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='paymenttransaction',
+            index=models.Index(fields=['method', 'payme_time'], name='payment_tra_method_d49aaa_idx'),
+        ),
+    ]
@@ -89,6 +89,7 @@ class Payment(models.Model):
             models.Index(fields=['payment_type', 'status']),
             models.Index(fields=['payme_transaction_id']),
             models.Index(fields=['created_at']),
+            models.Index(fields=['payme_time']),
         ]
 
     def __str__(self):
@@ -161,8 +162,14 @@ class PaymentTransaction(models.Model):
     state = models.IntegerField(null=True, blank=True)
     reason = models.IntegerField(null=True, blank=True)
 
+    # CreateTransaction: Payme's own create time (params.time, ms) - GetStatement range
+    payme_time = models.BigIntegerField(null=True, blank=True)
+
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         db_table = 'payment_transactions'
-        ordering = ['-created_at']
\ No newline at end of file
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['method', 'payme_time']),  # GetStatement range scans
+        ]
\ No newline at end of file
@@ -1,4 +1,5 @@
 import base64
+import hmac
 import json
 from datetime import timezone
 
@@ -8,7 +9,13 @@ from django.conf import settings
 class PaymeService:
     """Payme Merchant API Service"""
 
-    PAYME_CONFIG = settings.PAYME_SETTINGS
+    # Raw settings dict; compiled into the attributes below by load_config()
+    PAYME_CONFIG = {}
+
+    MERCHANT_ID = ''
+    SECRET_KEY = ''
+    CHECKOUT_BASE_URL = ''
+    CALLBACK_URL = ''
 
     # Payme states
     STATE_CREATED = 1
@@ -23,35 +30,68 @@ class PaymeService:
     ERROR_TRANSACTION_NOT_FOUND = -31003
     ERROR_CANT_CANCEL = -31007
 
+    # GetStatement rows fetched per database round trip
+    STATEMENT_CHUNK_SIZE = 500
+
+    # Checkout endpoints when the config has no ENDPOINT/ENVIRONMENT
+    TEST_CHECKOUT_URL = 'https://test.paycom.uz'
+    PROD_CHECKOUT_URL = 'https://checkout.paycom.uz'
+
+    # Last Authorization header that passed verification (bytes) - only
+    # successes are remembered, see check_auth()
+    _verified_header = None
+
+    @classmethod
+    def load_config(cls, config=None):
+        """
+        Compile merchant config once (called from PaymeuzConfig.ready)
+
+        Hot paths read plain class attributes instead of
+        digging through the settings dict on every RPC call.
+        settings.PAYMEUZ_SETTINGS uses ID/KEY/TEST_ENV; MERCHANT_ID/
+        SECRET_KEY/ENVIRONMENT/ENDPOINT are accepted as well.
+        """
+        if config is None:
+            config = getattr(settings, 'PAYMEUZ_SETTINGS', {})
+
+        cls.PAYME_CONFIG = config
+        cls.MERCHANT_ID = config.get('MERCHANT_ID', config.get('ID')) or ''
+        cls.SECRET_KEY = config.get('SECRET_KEY', config.get('KEY')) or ''
+
+        endpoints = config.get('ENDPOINT', {})
+        if config.get('ENVIRONMENT') in endpoints:
+            cls.CHECKOUT_BASE_URL = endpoints[config['ENVIRONMENT']]
+        else:
+            cls.CHECKOUT_BASE_URL = cls.TEST_CHECKOUT_URL if config.get('TEST_ENV') else cls.PROD_CHECKOUT_URL
+        cls.CALLBACK_URL = getattr(settings, 'PAYME_CALLBACK_URL', '')
+
+        # Credentials changed - previously verified header is stale
+        cls._verified_header = None
+
     @classmethod
     def check_auth(cls, request):
         """
         Verify Payme authentication
 
         Payme sends: Authorization: Basic base64(merchant_id:password)
+        Settlement comes in bursts with the same header, so the last
+        verified header is remembered and compared in constant time.
+        Failed headers are never cached - each one is verified again.
         """
         auth_header = request.META.get('HTTP_AUTHORIZATION', '')
 
-        if not auth_header.startswith('Basic '):
+        if not auth_header.startswith('Basic ') or not cls.SECRET_KEY:
             return False
 
-        try:
-            # Decode base64
-            encoded = auth_header.split('Basic ')[1]
-            decoded = base64.b64decode(encoded).decode('utf-8')
-
-            # Expected format: merchant_id:password
-            merchant_id, password = decoded.split(':')
+        header = auth_header.encode('utf-8')
+        verified = cls._verified_header
+        if verified is not None and hmac.compare_digest(header, verified):
+            return True
 
-            # Verify
-            expected_merchant = cls.PAYME_CONFIG['MERCHANT_ID']
-            expected_password = cls.PAYME_CONFIG['SECRET_KEY']
-
-            return (merchant_id == expected_merchant and
-                    password == expected_password)
-
-        except Exception:
+        if not _verify_auth_header(auth_header):
             return False
+        cls._verified_header = header
+        return True
 
     @classmethod
     def create_checkout_url(cls, payment):
@@ -60,8 +100,6 @@ class PaymeService:
 
         Returns: URL client should be redirected to
         """
-        merchant_id = cls.PAYME_CONFIG['MERCHANT_ID']
-
         # Amount in tiyin (1 UZS = 100 tiyin)
         amount_tiyin = int(payment.amount * 100)
 
@@ -74,18 +112,11 @@ class PaymeService:
         account_json = json.dumps(account)
         account_base64 = base64.b64encode(account_json.encode()).decode()
 
-        # Callback URL
-        callback = settings.PAYME_CALLBACK_URL
-
-        # Build URL
-        env = cls.PAYME_CONFIG['ENVIRONMENT']
-        base_url = cls.PAYME_CONFIG['ENDPOINT'][env]
-
         checkout_url = (
-            f"{base_url}/{merchant_id}"
+            f"{cls.CHECKOUT_BASE_URL}/{cls.MERCHANT_ID}"
             f"?amount={amount_tiyin}"
             f"&account={account_base64}"
-            f"&callback={callback}"
+            f"&callback={cls.CALLBACK_URL}"
         )
 
         return checkout_url
@@ -134,6 +165,16 @@ class PaymeService:
                 }
             }
 
+        # Cancelled payments (e.g. market checkout whose stock reservation
+        # expired - shop.inventory.release_expired) can't be performed
+        if payment.status in ('cancelled', 'failed'):
+            return {
+                'error': {
+                    'code': cls.ERROR_COULD_NOT_PERFORM,
+                    'message': f'Payment {payment.status}'
+                }
+            }
+
         # Success
         return {
             'result': {
@@ -150,7 +191,6 @@ class PaymeService:
         """
         transaction_id = params.get('id')
         account = params.get('account', {})
-        amount = params.get('amount')
         time = params.get('time')
 
         order_id = account.get('order_id')
@@ -182,22 +222,49 @@ class PaymeService:
                 }
             }
 
+        # Market checkout: its stock must still be held. Every path that
+        # releases it (release_expired, failed/cancelled payment) also moves
+        # the payment off 'pending', so the claim below fails if it raced us
+        if payment.payment_type == 'market':
+            from shop import inventory
+
+            if not inventory.is_held(payment):
+                return {
+                    'error': {
+                        'code': cls.ERROR_COULD_NOT_PERFORM,
+                        'message': 'Stock reservation released'
+                    }
+                }
+
+        # Claim the payment: the conditional UPDATE row-locks it (status is
+        # re-checked after the lock, like select_for_update) - release_expired
+        # skips it from then on. Not pending: cancelled/expired since
+        # CheckPerformTransaction, or taken by another Payme transaction
+        claimed = Payment.objects.filter(pk=payment.pk, status='pending').update(
+            payme_transaction_id=transaction_id,
+            payme_time=time,
+            payme_state=cls.STATE_CREATED,
+            status='processing',
+        )
+        if not claimed:
+            payment.refresh_from_db(fields=['status'])
+            return {
+                'error': {
+                    'code': cls.ERROR_COULD_NOT_PERFORM,
+                    'message': f'Payment {payment.status}'
+                }
+            }
+
         # Create new transaction
         transaction = PaymentTransaction.objects.create(
             payment=payment,
             transaction_id=transaction_id,
             method='CreateTransaction',
             request_data=params,
+            payme_time=time,
             state=cls.STATE_CREATED
         )
 
-        # Update payment
-        payment.payme_transaction_id = transaction_id
-        payment.payme_time = time
-        payment.payme_state = cls.STATE_CREATED
-        payment.status = 'processing'
-        payment.save()
-
         return {
             'result': {
                 'create_time': int(transaction.created_at.timestamp() * 1000),
@@ -360,4 +427,178 @@ class PaymeService:
                 'cancel_time': cancel_time,
                 'state': new_state
             }
-        }
\ No newline at end of file
+        }
+
+    @classmethod
+    def get_statement(cls, params):
+        """
+        GetStatement method
+
+        Payme asks: which transactions were created in [from, to]?
+        Transactions are returned as a lazy iterator over .values_list()
+        chunks - the caller encodes them without building model instances.
+        """
+        from_time = params.get('from')
+        to_time = params.get('to')
+
+        if not isinstance(from_time, int) or not isinstance(to_time, int) or from_time > to_time:
+            return {
+                'error': {
+                    'code': -32602,
+                    'message': 'Invalid params: from/to'
+                }
+            }
+
+        return {
+            'result': {
+                'transactions': cls.iter_statement(from_time, to_time)
+            }
+        }
+
+    @classmethod
+    def iter_statement(cls, from_time, to_time):
+        """
+        Yield Payme statement rows for transaction time in [from_time, to_time]
+
+        Range, order and the reported 'time' all use the transaction's own
+        CreateTransaction time (PaymentTransaction.payme_time), served from
+        the (method, payme_time) index - a payment's payme_time belongs to
+        its latest transaction only. Rows are read with .values_list() in
+        chunks instead of instantiating models.
+        """
+        from paymeuz.models import PaymentTransaction
+
+        rows = PaymentTransaction.objects.filter(
+            method='CreateTransaction',
+            payme_time__gte=from_time,
+            payme_time__lte=to_time,
+        ).order_by(
+            'payme_time', 'id'
+        ).values_list(
+            'id', 'transaction_id', 'state', 'reason', 'created_at', 'payme_time',
+            'payment_id', 'payment__amount', 'payment__paid_at', 'payment__cancelled_at',
+        )
+
+        for (pk, transaction_id, state, reason, created_at, time,
+             payment_id, amount, paid_at, cancelled_at) in rows.iterator(
+                chunk_size=cls.STATEMENT_CHUNK_SIZE):
+            state = state or cls.STATE_CREATED
+            cancelled = state in (cls.STATE_CANCELLED, cls.STATE_CANCELLED_AFTER_COMPLETE)
+
+            yield {
+                'id': transaction_id,
+                'time': time,
+                'amount': int(amount * 100),
+                'account': {'order_id': str(payment_id)},
+                'create_time': int(created_at.timestamp() * 1000),
+                'perform_time': int(paid_at.timestamp() * 1000) if paid_at else 0,
+                'cancel_time': int(cancelled_at.timestamp() * 1000) if cancelled and cancelled_at else 0,
+                'transaction': str(pk),
+                'state': state,
+                'reason': reason,
+                'receivers': None,
+            }
+
+    @classmethod
+    def encode_statement(cls, request_id, transactions):
+        """
+        Encode a GetStatement JSON-RPC response chunk by chunk
+
+        Every transaction is serialized as soon as it is read from the
+        database. Must be consumed in sync code (the callback view joins it).
+        """
+        yield '{"jsonrpc": "2.0", "id": %s, "result": {"transactions": [' % json.dumps(request_id)
+
+        first = True
+        for transaction in transactions:
+            if not first:
+                yield ','
+            first = False
+            yield json.dumps(transaction)
+
+        yield ']}}'
+
+    @classmethod
+    def reconcile_statement(cls, statement, from_time=None, to_time=None):
+        """
+        Diff a recorded Payme statement against our PaymentTransaction ledger
+
+        statement: list of transactions as returned by Payme GetStatement
+        Returns dict with 'missing' (in Payme, not in ledger),
+        'unexpected' (in ledger, not in Payme) and 'mismatched' rows.
+        """
+        theirs = {row['id']: row for row in statement}
+
+        if from_time is None:
+            from_time = min((row['time'] for row in statement), default=0)
+        if to_time is None:
+            to_time = max((row['time'] for row in statement), default=0)
+
+        report = {
+            'from': from_time,
+            'to': to_time,
+            'checked': 0,
+            'missing': [],
+            'unexpected': [],
+            'mismatched': [],
+        }
+
+        for ours in cls.iter_statement(from_time, to_time):
+            report['checked'] += 1
+            row = theirs.pop(ours['id'], None)
+
+            if row is None:
+                report['unexpected'].append(ours['id'])
+                continue
+
+            diff = {
+                field: {'payme': row.get(field), 'ledger': ours[field]}
+                for field in ('amount', 'state', 'reason')
+                if row.get(field) != ours[field]
+            }
+            if row.get('account', {}).get('order_id') != ours['account']['order_id']:
+                diff['order_id'] = {
+                    'payme': row.get('account', {}).get('order_id'),
+                    'ledger': ours['account']['order_id'],
+                }
+
+            if diff:
+                report['mismatched'].append({'id': ours['id'], 'diff': diff})
+
+        report['missing'] = list(theirs)
+
+        return report
+
+    @classmethod
+    def load_statement(cls, path):
+        """
+        Load a recorded GetStatement response from a JSON file
+
+        Accepts the raw JSON-RPC response, its 'result' object
+        or a bare list of transactions.
+        """
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+
+        if isinstance(data, dict):
+            data = data.get('result', data).get('transactions', [])
+
+        return data
+
+
+def _verify_auth_header(auth_header):
+    """
+    Decode and check a Basic auth header against the compiled merchant config
+
+    Both parts are compared in constant time.
+    """
+    try:
+        decoded = base64.b64decode(auth_header[len('Basic '):], validate=True)
+        merchant_id, _, password = decoded.partition(b':')
+    except ValueError:
+        return False
+
+    merchant_ok = hmac.compare_digest(merchant_id, PaymeService.MERCHANT_ID.encode('utf-8'))
+    password_ok = hmac.compare_digest(password, PaymeService.SECRET_KEY.encode('utf-8'))
+
+    return merchant_ok and password_ok
@@ -0,0 +1,57 @@
+# paymeuz/tasks.py
+import logging
+from datetime import datetime, time, timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
+
+from .payme.service import PaymeService
+
+logger = logging.getLogger('paymeuz')
+
+
+def statement_day_range(day):
+    """Payme millisecond [from, to] range covering one local day"""
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.combine(day, time.min), tz)
+    end = start + timedelta(days=1)
+    return int(start.timestamp() * 1000), int(end.timestamp() * 1000) - 1
+
+
+@shared_task
+def reconcile_payme_statement(day=None, statement_path=None):
+    """
+    Diff yesterday's recorded Payme statement against our ledger
+
+    Runs: Every night
+    Reads: PAYME_STATEMENT_DIR/<YYYY-MM-DD>.json
+    """
+    if day:
+        day = datetime.strptime(day, '%Y-%m-%d').date()
+    else:
+        day = timezone.localdate() - timedelta(days=1)
+
+    if not statement_path:
+        statement_path = settings.PAYME_STATEMENT_DIR / f'{day.isoformat()}.json'
+
+    try:
+        statement = PaymeService.load_statement(statement_path)
+    except FileNotFoundError:
+        logger.warning(f"Payme statement for {day} not found: {statement_path}")
+        return None
+
+    from_time, to_time = statement_day_range(day)
+    report = PaymeService.reconcile_statement(statement, from_time, to_time)
+
+    if report['missing'] or report['unexpected'] or report['mismatched']:
+        logger.error(
+            f"Payme reconciliation {day}: "
+            f"missing={len(report['missing'])} "
+            f"unexpected={len(report['unexpected'])} "
+            f"mismatched={len(report['mismatched'])}"
+        )
+    else:
+        logger.info(f"Payme reconciliation {day}: {report['checked']} transactions OK")
+
+    return report
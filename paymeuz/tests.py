@@ -45,4 +45,228 @@
 #         result = PaymeService.check_perform_transaction(params)
 #
 #         self.assertIn('result', result)
-#         self.assertTrue(result['result']['allow'])
\ No newline at end of file
+#         self.assertTrue(result['result']['allow'])
+
+import base64
+import json
+import time
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.asgi import get_asgi_application
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from .models import Payment, PaymentTransaction
+from .payme.service import PaymeService
+
+
+def statement_payment():
+    """Bitta CreateTransaction li market payment"""
+    user = get_user_model().objects.create_user(phone='998901234567')
+    payment = Payment.objects.create(
+        user=user,
+        payment_type='market',
+        content_type=ContentType.objects.get_for_model(Payment),
+        object_id=1,
+        amount=1500,
+        payment_method='payme',
+        payme_time=1_700_000_000_000,
+    )
+    PaymentTransaction.objects.create(
+        payment=payment,
+        transaction_id='payme-1',
+        method='CreateTransaction',
+        request_data={'id': 'payme-1', 'time': 1_700_000_000_000},
+        payme_time=1_700_000_000_000,
+        state=PaymeService.STATE_CREATED,
+    )
+    return payment
+
+
+class PaymeStatementTest(TestCase):
+
+    def setUp(self):
+        self.payment = statement_payment()
+
+    def test_get_statement_range(self):
+        result = PaymeService.get_statement({'from': 1_699_999_999_000, 'to': 1_700_000_001_000})
+        transactions = list(result['result']['transactions'])
+
+        self.assertEqual(len(transactions), 1)
+        self.assertEqual(transactions[0]['id'], 'payme-1')
+        self.assertEqual(transactions[0]['amount'], 150000)
+
+        result = PaymeService.get_statement({'from': 0, 'to': 1_000})
+        self.assertEqual(list(result['result']['transactions']), [])
+
+    def test_statement_time_is_transaction_time(self):
+        # Ikkinchi (keyinroq) transaction payment.payme_time ni yangilagan
+        PaymentTransaction.objects.create(
+            payment=self.payment,
+            transaction_id='payme-2',
+            method='CreateTransaction',
+            request_data={'id': 'payme-2', 'time': 1_700_000_000_900},
+            payme_time=1_700_000_000_900,
+            state=PaymeService.STATE_CREATED,
+        )
+        Payment.objects.filter(pk=self.payment.pk).update(payme_time=1_700_000_000_900)
+
+        transactions = PaymeService.iter_statement(0, 2_000_000_000_000)
+        self.assertEqual({row['id']: row['time'] for row in transactions},
+                         {'payme-1': 1_700_000_000_000, 'payme-2': 1_700_000_000_900})
+
+        # Oraliq ham transaction ning o'z vaqti bo'yicha, payment niki emas
+        self.assertEqual([row['id'] for row in PaymeService.iter_statement(0, 1_700_000_000_500)], ['payme-1'])
+        self.assertEqual([row['id'] for row in PaymeService.iter_statement(1_700_000_000_500, 2_000_000_000_000)],
+                         ['payme-2'])
+
+    def test_create_transaction_records_time(self):
+        Payment.objects.filter(pk=self.payment.pk).update(status='pending', payment_type='consultation')
+        result = PaymeService.create_transaction({
+            'id': 'payme-3', 'time': 1_700_000_000_700, 'amount': 150000,
+            'account': {'order_id': str(self.payment.id)},
+        })
+        self.assertIn('result', result)
+        self.assertEqual(PaymentTransaction.objects.get(transaction_id='payme-3').payme_time, 1_700_000_000_700)
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_callback_route(self):
+        from django.urls import reverse
+
+        self.assertEqual(reverse('payme-callback'), '/api/payme/callback/')
+        # Auth siz - JSON-RPC xato, 404 emas
+        response = self.client.post('/api/payme/callback/', '{}', content_type='application/json')
+        self.assertEqual(response.json()['error']['code'], -32504)
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_callback_latency_includes_encoding(self):
+        from config import metrics
+
+        PaymeService.load_config({'MERCHANT_ID': 'merchant', 'SECRET_KEY': 'secret'})
+        self.addCleanup(PaymeService.load_config)
+        encode = PaymeService.encode_statement
+
+        def slow_encode(request_id, transactions):
+            time.sleep(0.05)
+            yield from encode(request_id, transactions)
+
+        count = 'payme_rpc_duration_seconds_count{method="GetStatement"}'
+        total = 'payme_rpc_duration_seconds_sum{method="GetStatement"}'
+        before = metrics.snapshot()
+        with mock.patch.object(PaymeService, 'encode_statement', side_effect=slow_encode):
+            response = self.client.post(
+                '/api/payme/callback/',
+                json.dumps({'id': 1, 'method': 'GetStatement', 'params': {'from': 0, 'to': 2_000_000_000_000}}),
+                content_type='application/json',
+                HTTP_AUTHORIZATION='Basic ' + base64.b64encode(b'merchant:secret').decode(),
+            )
+        self.assertEqual(json.loads(response.content)['result']['transactions'][0]['id'], 'payme-1')
+
+        after = metrics.snapshot()
+        self.assertEqual(after[count] - before.get(count, 0), 1)
+        # Generator yaratish emas - encode ham o'lchangan
+        self.assertGreaterEqual(after[total] - before.get(total, 0), 0.05)
+        self.assertIn('# TYPE payme_rpc_duration_seconds histogram', metrics.render())
+
+    def test_encode_statement_is_valid_json(self):
+        transactions = PaymeService.iter_statement(0, 2_000_000_000_000)
+        body = ''.join(PaymeService.encode_statement(7, transactions))
+
+        data = json.loads(body)
+        self.assertEqual(data['id'], 7)
+        self.assertEqual(data['result']['transactions'][0]['account']['order_id'], str(self.payment.id))
+
+    def test_reconcile_statement(self):
+        statement = [
+            {'id': 'payme-1', 'time': 1_700_000_000_000, 'amount': 150000,
+             'account': {'order_id': str(self.payment.id)}, 'state': 2, 'reason': None},
+            {'id': 'payme-2', 'time': 1_700_000_000_500, 'amount': 1000,
+             'account': {'order_id': 'x'}, 'state': 1, 'reason': None},
+        ]
+
+        report = PaymeService.reconcile_statement(statement)
+
+        self.assertEqual(report['checked'], 1)
+        self.assertEqual(report['missing'], ['payme-2'])
+        self.assertEqual(report['unexpected'], [])
+        self.assertEqual(report['mismatched'][0]['diff']['state'], {'payme': 2, 'ledger': 1})
+
+
+class PaymeCallbackAsgiTest(TransactionTestCase):
+    """Sync view boshqa thread da ishlaydi - ma'lumot commit bo'lgan bo'lishi kerak"""
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_statement_through_asgi(self):
+        # daphne/serve - response body event loop da o'qiladi
+        PaymeService.load_config({'MERCHANT_ID': 'merchant', 'SECRET_KEY': 'secret'})
+        self.addCleanup(PaymeService.load_config)
+        statement_payment()
+
+        body = json.dumps({'jsonrpc': '2.0', 'id': 1, 'method': 'GetStatement',
+                           'params': {'from': 0, 'to': 2_000_000_000_000}}).encode()
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'scheme': 'http',
+            'method': 'POST', 'path': '/api/payme/callback/', 'raw_path': b'/api/payme/callback/',
+            'query_string': b'', 'root_path': '', 'client': ('127.0.0.1', 5000), 'server': ('testserver', 80),
+            'headers': [
+                (b'content-type', b'application/json'),
+                (b'authorization', b'Basic ' + base64.b64encode(b'merchant:secret')),
+            ],
+        }
+
+        async def call():
+            communicator = ApplicationCommunicator(get_asgi_application(), scope)
+            await communicator.send_input({'type': 'http.request', 'body': body})
+            start = await communicator.receive_output(5)
+            chunks = []
+            while True:
+                message = await communicator.receive_output(5)
+                chunks.append(message.get('body', b''))
+                if not message.get('more_body'):
+                    return start, b''.join(chunks)
+
+        start, content = async_to_sync(call)()
+        self.assertEqual(start['status'], 200)
+        data = json.loads(content)
+        self.assertEqual([row['id'] for row in data['result']['transactions']], ['payme-1'])
+
+
+class PaymeAuthTest(TestCase):
+
+    def setUp(self):
+        PaymeService.load_config({'MERCHANT_ID': 'merchant', 'SECRET_KEY': 'secret:key'})
+        self.addCleanup(PaymeService.load_config)
+
+    def _request(self, credentials):
+        from django.test import RequestFactory
+        header = 'Basic ' + base64.b64encode(credentials.encode()).decode()
+        return RequestFactory().post('/', HTTP_AUTHORIZATION=header)
+
+    def test_check_auth(self):
+        self.assertTrue(PaymeService.check_auth(self._request('merchant:secret:key')))
+        self.assertFalse(PaymeService.check_auth(self._request('merchant:wrong')))
+
+    def test_failures_not_cached(self):
+        request = self._request('merchant:secret:key')
+        self.assertFalse(PaymeService.check_auth(self._request('merchant:wrong')))
+        self.assertTrue(PaymeService.check_auth(request))
+        self.assertFalse(PaymeService.check_auth(self._request('merchant:wrong')))
+        self.assertTrue(PaymeService.check_auth(request))
+
+    def test_reads_paymeuz_settings(self):
+        with self.settings(PAYMEUZ_SETTINGS={'TEST_ENV': True, 'ID': 'merchant-id', 'KEY': 'payme-key'}):
+            PaymeService.load_config()
+        self.assertEqual(PaymeService.MERCHANT_ID, 'merchant-id')
+        self.assertEqual(PaymeService.SECRET_KEY, 'payme-key')
+        self.assertEqual(PaymeService.CHECKOUT_BASE_URL, PaymeService.TEST_CHECKOUT_URL)
+        self.assertTrue(PaymeService.check_auth(self._request('merchant-id:payme-key')))
+
+    def test_reload_invalidates_cache(self):
+        request = self._request('merchant:secret:key')
+        self.assertTrue(PaymeService.check_auth(request))
+
+        PaymeService.load_config({'MERCHANT_ID': 'merchant', 'SECRET_KEY': 'rotated'})
+        self.assertFalse(PaymeService.check_auth(request))
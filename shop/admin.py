@@ -2,7 +2,8 @@ from admin_auto_filters.filters import AutocompleteFilter
 
 from django.contrib import admin
 from modeltranslation.admin import TabbedTranslationAdmin
-from .models import Medicine, TypeMedicine, CartModel, PicturesMedicine, DeliveryMan
+from .models import Medicine, TypeMedicine, CartModel, PicturesMedicine, DeliveryMan, StockReservation, OrderModel, \
+    OrderItem
 
 
 class TypeMedicineFilter(AutocompleteFilter):
@@ -50,7 +51,7 @@ class MedicineAdmin(TabbedTranslationAdmin):
     date_hierarchy = 'created_at'
     exclude = ('name', 'review', 'weight', 'order_count')
     list_display = (
-        'id', 'title', 'image', 'description', 'quantity', 'type_medicine',
+        'id', 'title', 'image', 'description', 'quantity', 'reserved', 'type_medicine',
         'cost', 'discount', 'created_at',)
     list_filter = [TypeMedicineFilter, ]
     search_fields = ['id', 'title', 'description', 'cost',
@@ -72,21 +73,34 @@ class DeliveryManAdmin(admin.ModelAdmin):
     search_fields = ['id', 'full_name', 'phone', ]
 
 
+class StockReservationAdmin(admin.ModelAdmin):
+    list_display = ['id', 'payment', 'medicine', 'quantity', 'status', 'expires_at', 'created_at', ]
+    list_filter = ['status', ]
+    search_fields = ['payment__id', ]
+    raw_id_fields = ['payment', 'medicine', ]
+
+
 admin.site.register(DeliveryMan, DeliveryManAdmin)
+admin.site.register(StockReservation, StockReservationAdmin)
+
 
+class OrderItemInline(admin.TabularInline):
+    model = OrderItem
+    extra = 0
+    readonly_fields = ['medicine', 'title', 'cost', 'discount', 'amount', 'total_price', ]
+    can_delete = False
 
-# class OrderModelAdmin(admin.ModelAdmin):
-#     date_hierarchy = 'created_at'
-#     list_display = ['id', 'user', 'credit_card', 'price', 'payment_type', 'payment_status',
-#                     'delivery_status', 'delivery', 'created_at', ]
-#     list_filter = [UserFilter, CreditCardFilter, ShippingAddressFilter, 'payment_type', 'payment_status',
-#                    'delivery_status', DeliveryFilter, ]
-#     search_fields = ['id', 'price', ]
-#     # autocomplete_fields = ['user',  'delivery', ]
-#     filter_horizontal = ['cart_products', ]
+
+class OrderModelAdmin(admin.ModelAdmin):
+    date_hierarchy = 'created_at'
+    list_display = ['id', 'user', 'price', 'delivery_status', 'delivery', 'created_at', ]
+    list_filter = [UserFilter, 'delivery_status', DeliveryFilter, ]
+    search_fields = ['id', 'price', ]
+    autocomplete_fields = ['user', ]
+    inlines = [OrderItemInline]
 
 
 admin.site.register(Medicine, MedicineAdmin)
 admin.site.register(TypeMedicine, TypeMedicineAdmin)
-# admin.site.register(OrderModel, OrderModelAdmin)
+admin.site.register(OrderModel, OrderModelAdmin)
 admin.site.register(CartModel, CartModelAdmin)
@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class ShopConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'shop'
+
+    def ready(self):
+        from config import images
+        from .models import Medicine, PicturesMedicine, TypeMedicine
+
+        images.register(Medicine, 'image', 'image_srcset')
+        images.register(PicturesMedicine, 'image', 'image_srcset')
+        images.register(TypeMedicine, 'icon', 'icon_srcset')
+
+        from . import signals, snapshots
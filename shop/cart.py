@@ -0,0 +1,152 @@
+"""
+Savat: narxlar SQL da (CartModel.total_price property o'rniga)
+
+Hisob tiyin da, butun son (1 so'm = 100 tiyin) - SQLite/PostgreSQL da bir
+xil, yaxlitlash yo'q va checkout dagi narx bilan bir xil:
+
+    unit = cost * (100 - discount)        # tiyin
+    line = unit * amount
+
+- summary(): count, items, subtotal, discount, total - bitta aggregate query
+- items(): savat qatorlari - lean (MedicineSerializer siz) + narxlar va
+  summary, bitta query da (jami lar SUM() OVER () window bilan)
+- version(): user savatining versiyasi (cache) - ETag, o'zgarmagan savat 304
+- touch(): savat o'zgardi (commit dan keyin versiya o'chiriladi)
+- product_changed(): Medicine (yoki rasmi) saqlandi - shu mahsulot turgan
+  aktiv savatlar touch() qilinadi (narx/chegirma savat javobida)
+"""
+import logging
+import uuid
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Sum, Window
+from django.db.models.functions import Coalesce
+
+from .models import CartModel
+
+logger = logging.getLogger(__name__)
+
+VERSION_TIMEOUT = 7 * 24 * 3600
+
+
+def money(tiyin):
+    return Decimal(tiyin or 0) / 100
+
+
+def priced(queryset):
+    """Har qatorga cost_tiyin, unit_tiyin, line_tiyin (subtotal, chegirmali narx)"""
+    cost = Coalesce(F('product__cost'), 0) * 100
+    return queryset.annotate(
+        cost_tiyin=cost * F('amount'),
+        unit_tiyin=Coalesce(F('product__cost'), 0) * (100 - F('product__discount')),
+        line_tiyin=F('unit_tiyin') * F('amount'),
+    )
+
+
+def active(user):
+    return CartModel.objects.filter(user=user, status=CartModel.Status.ACTIVE)
+
+
+def totals():
+    return {
+        'count': Count('id'),
+        'items': Sum('amount'),
+        'subtotal': Sum('cost_tiyin'),
+        'total': Sum('line_tiyin'),
+    }
+
+
+def as_summary(count=0, items=0, subtotal=0, total=0):
+    return {
+        'count': count,
+        'items': items or 0,
+        'subtotal': money(subtotal),
+        'discount': money((subtotal or 0) - (total or 0)),
+        'total': money(total),
+    }
+
+
+def summary(user):
+    return as_summary(**priced(active(user)).aggregate(**totals()))
+
+
+def items(user, request=None):
+    """-> (qatorlar, summary)"""
+    windows = {f'sum_{name}': Window(expression) for name, expression in totals().items()}
+    rows = list(
+        priced(active(user)).annotate(**windows).order_by('id').values_list(
+            'id', 'product_id', 'product__title', 'product__image', 'product__cost', 'product__discount',
+            'amount', 'unit_tiyin', 'line_tiyin', *windows,
+        )
+    )
+    if not rows:
+        return [], as_summary()
+
+    result = [
+        {
+            'id': pk,
+            'product_id': product_id,
+            'title': title,
+            'image': image_url(image, request),
+            'cost': cost,
+            'discount': discount,
+            'amount': amount,
+            'unit_price': money(unit),
+            'total_price': money(line),
+        }
+        for pk, product_id, title, image, cost, discount, amount, unit, line, *_ in rows
+    ]
+    return result, as_summary(*rows[0][-len(windows):])
+
+
+def image_url(name, request=None):
+    if not name:
+        return None
+    url = settings.MEDIA_URL + name
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+def version_key(user_id):
+    return f'cart_version:{user_id}'
+
+
+def version(user_id):
+    """Savat versiyasi; cache da yo'q bo'lsa yangisi (client qayta yuklaydi)"""
+    key = version_key(user_id)
+    try:
+        value = cache.get(key)
+        if value is None:
+            value = uuid.uuid4().hex[:16]
+            # Parallel so'rovlar bitta versiyada kelishsin
+            if not cache.add(key, value, VERSION_TIMEOUT):
+                value = cache.get(key) or value
+        return value
+    except Exception as e:
+        logger.warning(f"Cart version cache unavailable: {e}")
+        return None
+
+
+def touch(*user_ids):
+    """Savat(lar) o'zgardi - versiya commit dan keyin o'chadi (o'qilgan eski savat yangi versiya olmasin)"""
+    keys = [version_key(user_id) for user_id in user_ids]
+
+    def forget():
+        try:
+            cache.delete_many(keys)
+        except Exception as e:
+            logger.warning(f"Cart version cache unavailable: {e}")
+
+    transaction.on_commit(forget)
+
+
+def product_changed(product_id):
+    """Mahsulot o'zgardi - uni ushlagan aktiv savatlar versiyasi (queryset.update() signal bermaydi)"""
+    user_ids = list(
+        CartModel.objects.filter(product_id=product_id, status=CartModel.Status.ACTIVE)
+        .values_list('user_id', flat=True)
+    )
+    if user_ids:
+        touch(*user_ids)
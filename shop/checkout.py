@@ -0,0 +1,93 @@
+"""
+Checkout: aktiv savat -> OrderModel + OrderItem lar + Payment (Payme)
+
+Bitta tranzaksiyada, savatdagi mahsulot soniga bog'liq bo'lmagan query lar
+bilan (100+ qator ham):
+
+- savat qatorlari narxi bilan bitta SELECT (select_for_update)
+- OrderItem lar bulk_create
+- zaxira - shop.inventory.reserve (bitta shartli UPDATE)
+- savat DONE ga bitta UPDATE, Medicine.order_count bitta UPDATE
+
+Zaxira yetmasa InsufficientStock - hech narsa yaratilmaydi.
+"""
+import logging
+from decimal import Decimal
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import F
+from rest_framework.exceptions import ValidationError
+
+from paymeuz.models import Payment
+from paymeuz.payme.service import PaymeService
+from . import cart, inventory
+from .models import CartModel, Medicine, OrderItem, OrderModel
+
+logger = logging.getLogger(__name__)
+
+
+def line_price(cost, discount, amount):
+    """shop.cart dagi SQL hisob bilan bir xil (tiyin da, butun son)"""
+    return cart.money((cost or 0) * (100 - (discount or 0)) * amount)
+
+
+@transaction.atomic
+def checkout(user, payment_method='payme', ip_address=None, user_agent=''):
+    """-> (order, payment)"""
+    rows = list(
+        CartModel.objects
+        .filter(user=user, status=CartModel.Status.ACTIVE)
+        .select_for_update()
+        .values_list('id', 'product_id', 'amount', 'product__title', 'product__cost',
+                     'product__discount', 'product__is_active')
+        .order_by('id')
+    )
+    if not rows:
+        raise ValidationError({'detail': "Savat bo'sh"})
+
+    inactive = [product_id for _, product_id, _, _, _, _, is_active in rows if not is_active]
+    if inactive:
+        raise ValidationError({'detail': "Mahsulot sotuvda yo'q", 'products': inactive})
+
+    items = [
+        OrderItem(medicine_id=product_id, title=title, cost=cost or 0, discount=discount or 0,
+                  amount=amount, total_price=line_price(cost, discount, amount))
+        for _, product_id, amount, title, cost, discount, _ in rows
+    ]
+    price = sum((item.total_price for item in items), Decimal(0))
+
+    order = OrderModel.objects.create(user=user, price=price)
+    for item in items:
+        item.order = order
+    OrderItem.objects.bulk_create(items, batch_size=500)
+
+    payment = Payment.objects.create(
+        user=user,
+        payment_type='market',
+        content_type=ContentType.objects.get_for_model(OrderModel),
+        object_id=order.id,
+        amount=price,
+        payment_method=payment_method,
+        ip_address=ip_address,
+        user_agent=user_agent or '',
+        description=f"Order #{order.id}",
+        metadata={'object_type': 'market', 'object_id': order.id},
+    )
+    inventory.reserve(payment, {item.medicine_id: item.amount for item in items})
+
+    CartModel.objects.filter(pk__in=[row[0] for row in rows]).update(status=CartModel.Status.DONE)
+    cart.touch(user.id)
+    Medicine.objects.filter(pk__in=[item.medicine_id for item in items]).update(order_count=F('order_count') + 1)
+
+    logger.info(f"Order {order.id}: {len(items)} items, {price} UZS, payment {payment.id}")
+    return order, payment
+
+
+def checkout_response(order, payment):
+    return {
+        'order_id': order.id,
+        'payment_id': str(payment.id),
+        'amount': payment.amount,
+        'checkout_url': PaymeService.create_checkout_url(payment),
+    }
@@ -0,0 +1,167 @@
+"""
+Zaxira (Medicine.quantity) - oversell bo'lmasligi uchun
+
+quantity - omborda bor, reserved - to'lovi kutilayotgan checkout lar ushlab
+turgani. Sotish mumkin bo'lgani: quantity - reserved.
+
+- reserve(): checkout boshlanganda - bitta shartli UPDATE
+  (WHERE quantity >= reserved + n), hamma mahsulot yoki hech biri
+- commit(): to'lov o'tdi - quantity va reserved bitta UPDATE da kamayadi
+- release(): to'lov xato/bekor - reserved qaytadi
+- release_expired(): TTL o'tgan, to'lov boshlanmagan checkout lar (Celery beat)
+- is_held(): zaxira hali turibdimi (Payme CreateTransaction tekshiradi)
+
+release_expired() Payment qatorlarini select_for_update bilan, Payme
+CreateTransaction esa shartli UPDATE (status='pending') bilan lock qiladi:
+biri payment ni o'zgartirsa, ikkinchisi buni ko'radi.
+
+Payment status o'zgarishi shop.signals orqali commit/release ni chaqiradi.
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .models import Medicine, StockReservation
+
+logger = logging.getLogger(__name__)
+
+
+class InsufficientStock(ValidationError):
+
+    def __init__(self, shortages):
+        # {medicine_id: sotish mumkin bo'lgan miqdor}
+        self.shortages = shortages
+        super().__init__({
+            'detail': "Mahsulot omborda yetarli emas",
+            'available': {str(medicine_id): available for medicine_id, available in shortages.items()},
+        })
+
+
+def per_item(items):
+    """{medicine_id: n} -> CASE id WHEN .. THEN n END - bitta UPDATE da har qatorga o'z miqdori"""
+    return Case(*[When(pk=pk, then=Value(quantity)) for pk, quantity in items.items()],
+                default=Value(0), output_field=IntegerField())
+
+
+@transaction.atomic
+def reserve(payment, items, ttl=None):
+    """
+    items - {medicine_id: miqdor}. Yetmasa InsufficientStock (hech narsa ushlanmaydi)
+    """
+    items = {int(pk): int(quantity) for pk, quantity in items.items() if quantity > 0}
+    if not items:
+        return []
+
+    with transaction.atomic():
+        updated = Medicine.objects.filter(
+            pk__in=items, is_active=True, quantity__gte=F('reserved') + per_item(items)
+        ).update(reserved=F('reserved') + per_item(items))
+        if updated != len(items):
+            transaction.set_rollback(True)
+
+    if updated != len(items):
+        # Faqat xato yo'lida - client ga nechta qolganini aytish uchun
+        available = dict(
+            Medicine.objects.filter(pk__in=items, is_active=True)
+            .annotate(available=F('quantity') - F('reserved'))
+            .values_list('pk', 'available')
+        )
+        raise InsufficientStock({
+            pk: max(available.get(pk, 0), 0) for pk, quantity in items.items() if available.get(pk, 0) < quantity
+        })
+
+    ttl = settings.STOCK_RESERVATION_TTL if ttl is None else ttl
+    expires_at = timezone.now() + timedelta(seconds=ttl)
+    return StockReservation.objects.bulk_create([
+        StockReservation(payment=payment, medicine_id=pk, quantity=quantity, expires_at=expires_at)
+        for pk, quantity in items.items()
+    ])
+
+
+def _claim(reservations, status):
+    """
+    ACTIVE zaxiralarni status ga o'tkazadi -> ({medicine_id: jami miqdor}, boshqa status lar)
+
+    Qatorlar bitta SELECT da o'qiladi (status filtrsiz) - commit() uchun
+    qaytarilgan zaxira borligini ham shu query ko'rsatadi.
+    """
+    rows = list(reservations.select_for_update().values_list('pk', 'medicine_id', 'quantity', 'status'))
+    active = [row for row in rows if row[3] == StockReservation.Status.ACTIVE]
+    others = {row[3] for row in rows} - {StockReservation.Status.ACTIVE}
+    if not active:
+        return {}, others
+
+    StockReservation.objects.filter(pk__in=[row[0] for row in active]).update(status=status)
+    totals = defaultdict(int)
+    for _, medicine_id, quantity, _ in active:
+        totals[medicine_id] += quantity
+    return dict(totals), others
+
+
+@transaction.atomic
+def commit(payment):
+    """To'lov o'tdi: ushlangan miqdor ombordan chiqadi"""
+    totals, others = _claim(payment.stock_reservations.all(), StockReservation.Status.COMMITTED)
+    if totals:
+        Medicine.objects.filter(pk__in=totals).update(
+            quantity=F('quantity') - per_item(totals),
+            reserved=F('reserved') - per_item(totals),
+        )
+    if StockReservation.Status.RELEASED in others:
+        # Zaxira muddati o'tib qaytarilgan, lekin to'lov baribir o'tgan - qo'lda tekshirish kerak
+        logger.error(f"Payment {payment.id}: paid after its stock reservation was released")
+    return totals
+
+
+@transaction.atomic
+def release(payment):
+    """To'lov xato/bekor: ushlangan miqdor qaytadi"""
+    return _release(payment.stock_reservations.all())
+
+
+def _release(reservations):
+    totals, _ = _claim(reservations, StockReservation.Status.RELEASED)
+    if totals:
+        Medicine.objects.filter(pk__in=totals).update(reserved=F('reserved') - per_item(totals))
+    return totals
+
+
+def is_held(payment):
+    """Payment zaxiralari hammasi ACTIVE (qaytarilmagan, sotilmagan)"""
+    return not payment.stock_reservations.exclude(status=StockReservation.Status.ACTIVE).exists()
+
+
+@transaction.atomic
+def release_expired(now=None):
+    """
+    TTL o'tgan zaxiralar - faqat to'lov boshlanmagan (pending) checkout lar
+
+    Payme transaction yaratilgan (processing) bo'lsa zaxira Perform/Cancel
+    gacha turadi. Payment lar bitta UPDATE da bekor qilinadi.
+    """
+    from paymeuz.models import Payment
+
+    now = now or timezone.now()
+    expired = StockReservation.objects.filter(
+        status=StockReservation.Status.ACTIVE, expires_at__lt=now, payment__status='pending'
+    )
+    payment_ids = set(expired.values_list('payment_id', flat=True))
+    if not payment_ids:
+        return 0
+    # Lock - shu orada CreateTransaction payment ni processing qilgan bo'lishi mumkin
+    payment_ids = set(
+        Payment.objects.select_for_update().filter(pk__in=payment_ids, status='pending').values_list('pk', flat=True)
+    )
+    if not payment_ids:
+        return 0
+
+    totals = _release(StockReservation.objects.filter(payment_id__in=payment_ids))
+    Payment.objects.filter(pk__in=payment_ids).update(status='cancelled', cancelled_at=now)
+    logger.info(f"Released stock of {len(payment_ids)} expired checkouts ({sum(totals.values())} items)")
+    return len(payment_ids)
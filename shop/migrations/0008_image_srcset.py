@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0007_delete_ordermodel'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='medicine',
+            name='image_srcset',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='picturesmedicine',
+            name='image_srcset',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='typemedicine',
+            name='icon_srcset',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,33 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('paymeuz', '0003_payment_payme_time_index'),
+        ('shop', '0008_image_srcset'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='medicine',
+            name='reserved',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='StockReservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField()),
+                ('status', models.SmallIntegerField(choices=[(1, 'active'), (2, 'committed'), (3, 'released')], default=1)),
+                ('expires_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('medicine', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='reservations', to='shop.medicine')),
+                ('payment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_reservations', to='paymeuz.payment')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'expires_at'], name='shop_stockr_status_84d08f_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 4.0.2 on 2026-10-19 17:08
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('shop', '0009_stock_reservation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=100)),
+                ('cost', models.IntegerField()),
+                ('discount', models.IntegerField(default=0)),
+                ('amount', models.PositiveIntegerField()),
+                ('total_price', models.DecimalField(decimal_places=2, max_digits=12)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='OrderModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('price', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('delivery_status', models.PositiveSmallIntegerField(choices=[(1, 'В ожидании'), (2, 'На доставке'), (3, 'Доставлен'), (4, 'Возвращен')], default=1)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='cartmodel',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='cartmodel',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 1)), fields=('user', 'product'), name='unique_active_cart_product'),
+        ),
+        migrations.AddField(
+            model_name='ordermodel',
+            name='delivery',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.RESTRICT, to='shop.deliveryman'),
+        ),
+        migrations.AddField(
+            model_name='ordermodel',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.RESTRICT, related_name='orders', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='medicine',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='order_items', to='shop.medicine'),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='order',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='shop.ordermodel'),
+        ),
+    ]
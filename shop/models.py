@@ -7,6 +7,7 @@ class TypeMedicine(models.Model):
     name = models.CharField(max_length=100, db_index=True)
     image = models.ImageField(upload_to=f'types/', null=True, blank=True)
     icon = models.ImageField(upload_to=f'types/icons/', null=True, blank=True)
+    icon_srcset = models.JSONField(default=dict, blank=True, editable=False)  # config.images
 
     def __str__(self):
         return self.name
@@ -14,11 +15,14 @@ class TypeMedicine(models.Model):
 
 class Medicine(models.Model):
     image = models.ImageField(upload_to=f'medicine/', null=True, blank=True)
+    image_srcset = models.JSONField(default=dict, blank=True, editable=False)  # config.images
     name = models.CharField(max_length=100, db_index=True, blank=True, null=True)
     title = models.CharField(max_length=100, db_index=True)
     order_count = models.IntegerField(default=0)
     description = models.TextField(null=True)
     quantity = models.IntegerField(default=0)
+    # To'lovi kutilayotgan checkout lar ushlab turgan miqdor (shop.inventory)
+    reserved = models.PositiveIntegerField(default=0, editable=False)
     review = models.IntegerField(default=0)
     weight = models.FloatField(default=0)
     type_medicine = models.ForeignKey(TypeMedicine, on_delete=models.RESTRICT, null=True)
@@ -66,6 +70,7 @@ class PicturesMedicine(models.Model):
         null=True,
         blank=True
     )
+    image_srcset = models.JSONField(default=dict, blank=True, editable=False)  # config.images
 
     def __str__(self):
         return f"{self.medicine.name} - {self.id}"
@@ -103,7 +108,14 @@ class CartModel(models.Model):
         return (price - discount_amount) * self.amount
 
     class Meta:
-        unique_together = ('user', 'product', 'status')
+        # DONE/DELETED qatorlar takrorlanadi (har checkout da) - faqat aktiv savat unique
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'product'],
+                condition=models.Q(status=1),
+                name='unique_active_cart_product'
+            ),
+        ]
         indexes = [
             models.Index(fields=['user', 'status']),
         ]
@@ -112,6 +124,40 @@ class CartModel(models.Model):
         return f"{self.user} | {self.product} | {self.amount}"
 
 
+class StockReservation(models.Model):
+    """Checkout da ushlab turilgan zaxira - Payment ga bog'liq (shop.inventory)"""
+    class Status(models.IntegerChoices):
+        ACTIVE = 1, 'active'
+        COMMITTED = 2, 'committed'
+        RELEASED = 3, 'released'
+
+    payment = models.ForeignKey(
+        'paymeuz.Payment',
+        on_delete=models.CASCADE,
+        related_name='stock_reservations'
+    )
+    medicine = models.ForeignKey(
+        Medicine,
+        on_delete=models.PROTECT,
+        related_name='reservations'
+    )
+    quantity = models.PositiveIntegerField()
+    status = models.SmallIntegerField(
+        choices=Status.choices,
+        default=Status.ACTIVE
+    )
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'expires_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.payment_id} | {self.medicine_id} | {self.quantity}"
+
+
 PAYMENT_TYPES = (
     (1, 'Оплата при доставке'),
     (2, 'Кредитная карта'),
@@ -143,22 +189,29 @@ class DeliveryMan(models.Model):
         return f"{self.full_name} ({self.phone})"
 
 
-# class OrderModel(models.Model):
-#     user = models.ForeignKey('account.UserModel', on_delete=models.RESTRICT, null=True)
-#     # shipping_address = models.ForeignKey('account.DeliveryAddress', on_delete=models.RESTRICT, null=True, blank=True)
-#     cart_products = models.ManyToManyField(CartModel)
-#     price = models.IntegerField(null=True)
-#     payment_type = models.PositiveSmallIntegerField(choices=PAYMENT_TYPES, default=2)
-#     payment_status = models.PositiveSmallIntegerField(choices=PAYMENT_STATUS, default=1)
-#     delivery_status = models.PositiveSmallIntegerField(choices=DELIVERY_STATUS, default=1)
-#     delivery = models.ForeignKey(DeliveryMan, on_delete=models.RESTRICT, null=True, blank=True)
-#     created_at = models.DateTimeField(auto_now_add=True)
-#
-#     def get_payme_amount(self):
-#         return self.price * 100
+class OrderModel(models.Model):
+    """Checkout (shop.checkout) - savat qatorlari va narxlari shu paytdagidek saqlanadi"""
+    user = models.ForeignKey('account.UserModel', on_delete=models.RESTRICT, related_name='orders')
+    price = models.DecimalField(max_digits=12, decimal_places=2)
+    delivery_status = models.PositiveSmallIntegerField(choices=DELIVERY_STATUS, default=1)
+    delivery = models.ForeignKey(DeliveryMan, on_delete=models.RESTRICT, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Order {self.id} | {self.user_id} | {self.price}"
+
+
+class OrderItem(models.Model):
+    order = models.ForeignKey(OrderModel, on_delete=models.CASCADE, related_name='items')
+    medicine = models.ForeignKey(Medicine, on_delete=models.PROTECT, related_name='order_items')
+    title = models.CharField(max_length=100)
+    cost = models.IntegerField()
+    discount = models.IntegerField(default=0)
+    amount = models.PositiveIntegerField()
+    total_price = models.DecimalField(max_digits=12, decimal_places=2)
 
     def __str__(self):
-        return self.user.get_full_name()
+        return f"{self.order_id} | {self.title} | {self.amount}"
 
 
 FEEDBACK_TYPES = (
@@ -1,14 +1,20 @@
 from rest_framework import serializers
+
+from config.images import SrcsetField
 from .models import PicturesMedicine, TypeMedicine, Medicine, CartModel
 
 
 class PicturesMedicineSerializer(serializers.ModelSerializer):
+    image_srcset = SrcsetField()
+
     class Meta:
         model = PicturesMedicine
-        fields = ['id', 'image']
+        fields = ['id', 'image', 'image_srcset']
 
 
 class TypeMedicineSerializer(serializers.ModelSerializer):
+    icon_srcset = SrcsetField()
+
     class Meta:
         model = TypeMedicine
         fields = '__all__'
@@ -16,6 +22,7 @@ class TypeMedicineSerializer(serializers.ModelSerializer):
 
 class MedicineSerializer(serializers.ModelSerializer):
     pictures = PicturesMedicineSerializer(many=True, read_only=True)
+    image_srcset = SrcsetField()
     is_favorite = serializers.BooleanField(read_only=True)
     # likes_count = serializers.IntegerField(read_only=True)
     total_rate = serializers.FloatField(read_only=True)
@@ -24,7 +31,7 @@ class MedicineSerializer(serializers.ModelSerializer):
         model = Medicine
 
         fields = [
-            'id', 'image', 'name_uz', 'name_ru', 'name_en', 'title', 'title_uz', 'title_ru', 'title_en',
+            'id', 'image', 'image_srcset', 'name_uz', 'name_ru', 'name_en', 'title', 'title_uz', 'title_ru', 'title_en',
             'order_count','description', 'description_uz', 'description_ru', 'description_en', 'quantity',
             'type_medicine', 'cost', 'discount', 'total_rate', 'is_favorite', 'pictures',
         ]
@@ -62,7 +69,7 @@ class MedicineDetailSerializer(MedicineSerializer):
     class Meta:
         model = Medicine
         fields = [
-            'id', 'image', 'title', 'title_uz', 'title_ru', 'title_en',
+            'id', 'image', 'image_srcset', 'title', 'title_uz', 'title_ru', 'title_en',
             'order_count', 'description', 'description_uz', 'description_ru', 'description_en',
             'quantity', 'type_medicine', 'cost', 'discount',
             'created_at', 'product_inn', 'product_ikpu', 'product_package_code',
@@ -0,0 +1,40 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from paymeuz.models import Payment
+from . import cart, inventory
+from .models import CartModel, Medicine, PicturesMedicine
+
+
+@receiver(post_save, sender=Payment)
+def settle_stock(sender, instance, created, **kwargs):
+    """Market to'lovi yakunlansa zaxira ombordan chiqadi yoki qaytadi"""
+    if created or kwargs.get('raw') or instance.payment_type != 'market':
+        return
+    if instance.status == 'paid':
+        inventory.commit(instance)
+    elif instance.status in ('failed', 'cancelled'):
+        inventory.release(instance)
+
+
+@receiver(post_save, sender=CartModel)
+@receiver(post_delete, sender=CartModel)
+def cart_changed(sender, instance, **kwargs):
+    cart.touch(instance.user_id)
+
+
+
+@receiver(post_save, sender=Medicine)
+def medicine_changed(sender, instance, created, **kwargs):
+    """Narx/chegirma/is_active savat javobida - mahsulotni ushlagan savatlar versiyasi o'chadi"""
+    if created or kwargs.get('raw'):
+        return
+    cart.product_changed(instance.pk)
+
+
+@receiver(post_save, sender=PicturesMedicine)
+@receiver(post_delete, sender=PicturesMedicine)
+def medicine_picture_changed(sender, instance, **kwargs):
+    if kwargs.get('raw'):
+        return
+    cart.product_changed(instance.medicine_id)
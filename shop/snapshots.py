@@ -0,0 +1,13 @@
+"""Ilova ochilganda so'raladigan ma'lumot (config/snapshots.py)"""
+from config.snapshots import SiteRequest, Snapshot
+
+from .models import TypeMedicine
+from .serializers import TypeMedicineSerializer
+
+
+def build_medicine_types():
+    return TypeMedicineSerializer(TypeMedicine.objects.order_by('id'), many=True,
+                                  context={'request': SiteRequest()}).data
+
+
+medicine_types = Snapshot('medicine_types', build_medicine_types, depends_on=[TypeMedicine])
@@ -0,0 +1,18 @@
+# shop/tasks.py
+import logging
+
+from celery import shared_task
+
+from . import inventory
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def release_expired_reservations():
+    """
+    TTL o'tgan checkout zaxiralarini qaytarish (shop.inventory)
+
+    Runs: Every minute
+    """
+    return inventory.release_expired()
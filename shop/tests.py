@@ -1,3 +1,424 @@
-from django.test import TestCase
+import datetime
+import decimal
+import io
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from PIL import Image
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from config import tasks
+from config.fastjson import ORJSONParser, ORJSONRenderer, loads as orjson_loads
+from paymeuz.models import Payment
+from paymeuz.payme.service import PaymeService
+
+from . import cart, checkout, inventory
+from .models import CartModel, Medicine, OrderItem, StockReservation
+from .serializers import MedicineSerializer
+
+
+class ImageVariantsTest(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root, IMAGE_VARIANT_WIDTHS=(160, 320, 1080))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        # Celery broker siz - task shu joyda bajariladi
+        delay = mock.patch.object(tasks.build_image_variants, 'delay', side_effect=tasks.build_image_variants)
+        self.delay = delay.start()
+        self.addCleanup(delay.stop)
+
+    def _png(self, name='pill.png', size=(800, 600)):
+        buffer = io.BytesIO()
+        Image.new('RGB', size, (10, 120, 200)).save(buffer, 'PNG')
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+    def _jpeg(self, name='pill.jpg', size=(2400, 1600), orientation=None):
+        buffer = io.BytesIO()
+        exif = Image.Exif()
+        if orientation:
+            exif[0x0112] = orientation
+        Image.new('RGB', size, (10, 120, 200)).save(buffer, 'JPEG', exif=exif)
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+    def test_upload_builds_hashed_variants(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            medicine = Medicine.objects.create(title='Aspirin', image=self._png())
+        medicine.refresh_from_db()
+
+        manifest = medicine.image_srcset
+        self.assertEqual(manifest['source'], medicine.image.name)
+        # 1080 > original width - yaratilmaydi
+        self.assertEqual(sorted(manifest['webp']), ['160', '320'])
+        self.assertRegex(manifest['webp']['320'], r'^variants/[0-9a-f]{2}/[0-9a-f]{20}_320\.webp$')
+
+        data = MedicineSerializer(medicine).data
+        self.assertTrue(data['image_srcset']['jpeg']['160'].endswith('_160.jpeg'))
+
+        # Bir xil content - bir xil derivative nomlari
+        with self.captureOnCommitCallbacks(execute=True):
+            other = Medicine.objects.create(title='Aspirin 2', image=self._png('copy.png'))
+        other.refresh_from_db()
+        self.assertEqual(other.image_srcset['webp'], manifest['webp'])
+
+    def test_variants_queued_after_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            medicine = Medicine.objects.create(title='Aspirin', image=self._png())
+        # save() ichida encode yo'q - commit dan keyin navbatga
+        self.assertEqual(Medicine.objects.get(pk=medicine.pk).image_srcset, {})
+        self.assertEqual(len(callbacks), 1)
+        self.delay.assert_not_called()
+
+        callbacks[0]()
+        self.delay.assert_called_once_with('shop.Medicine', medicine.pk, 'image', 'image_srcset')
+
+        # Manifest yozildi - qayta saqlash navbatga qo'ymaydi
+        medicine.refresh_from_db()
+        with self.captureOnCommitCallbacks() as callbacks:
+            medicine.save()
+        self.assertEqual(callbacks, [])
+
+    def test_jpeg_draft_keeps_widths(self):
+        # Orientation 6 - 1600x2400 bo'lib ko'rinadi
+        with self.captureOnCommitCallbacks(execute=True):
+            medicine = Medicine.objects.create(title='Aspirin', image=self._jpeg(orientation=6))
+        medicine.refresh_from_db()
+
+        path = medicine.image_srcset['jpeg']['1080']
+        with default_storage.open(path) as f, Image.open(f) as variant:
+            self.assertEqual(variant.size, (1080, 1620))
+
+    def test_backfill_command(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            medicine = Medicine.objects.create(title='Aspirin', image=self._png())
+        Medicine.objects.filter(pk=medicine.pk).update(image_srcset={})
+
+        call_command('generate_image_variants', processes=1, model='shop.Medicine', stdout=io.StringIO())
+
+        medicine.refresh_from_db()
+        self.assertEqual(medicine.image_srcset['source'], medicine.image.name)
+        self.assertEqual(len(medicine.image_srcset['jpeg']), 2)
+
+
+class FastJSONTest(TestCase):
+
+    def test_renderer_matches_drf_output(self):
+        data = {
+            'id': uuid.uuid4(),
+            'amount': decimal.Decimal('125000.50'),
+            'created_at': datetime.datetime(2024, 1, 2, 3, 4, 5, 123000, tzinfo=datetime.timezone.utc),
+            'date': datetime.date(2024, 1, 2),
+            'items': [{'id': 1, 'title': 'Paratsetamol', 'tags': ('a', 'b')}],
+            1: 'int key',
+        }
+        rendered = ORJSONRenderer().render(data)
+        self.assertEqual(orjson_loads(rendered), orjson_loads(JSONRenderer().render(data)))
+
+    def test_parser_rejects_invalid_json(self):
+        parser = ORJSONParser()
+        self.assertEqual(parser.parse(io.BytesIO(b'{"amount": 1}'), parser_context={}), {'amount': 1})
+        with self.assertRaises(ParseError):
+            parser.parse(io.BytesIO(b'{"amount": NaN}'), parser_context={})
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_api_renders_with_orjson(self):
+        Medicine.objects.create(title='Paratsetamol', cost=12000)
+
+        response = APIClient().get('/api/shop/medicines/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response.json()['results'][0]['title'], 'Paratsetamol')
+
+
+def market_payment(user, amount=1000):
+    return Payment.objects.create(
+        user=user,
+        payment_type='market',
+        content_type=ContentType.objects.get_for_model(Payment),
+        object_id=1,
+        amount=amount,
+        payment_method='payme',
+    )
+
+
+class InventoryTest(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(phone='998901234567')
+        self.aspirin = Medicine.objects.create(title='Aspirin', quantity=5)
+        self.analgin = Medicine.objects.create(title='Analgin', quantity=2)
+
+    def stock(self, medicine):
+        medicine.refresh_from_db()
+        return medicine.quantity, medicine.reserved
+
+    def test_reserve_is_all_or_nothing(self):
+        payment = market_payment(self.user)
+        with self.assertRaises(inventory.InsufficientStock) as error:
+            inventory.reserve(payment, {self.aspirin.pk: 3, self.analgin.pk: 3})
+
+        self.assertEqual(error.exception.shortages, {self.analgin.pk: 2})
+        self.assertEqual(self.stock(self.aspirin), (5, 0))
+        self.assertFalse(StockReservation.objects.exists())
+
+        # Mahsulot soniga bog'liq emas: UPDATE + INSERT (+ 2 savepoint, 2 release)
+        with self.assertNumQueries(6):
+            inventory.reserve(payment, {self.aspirin.pk: 3, self.analgin.pk: 2})
+        self.assertEqual(self.stock(self.aspirin), (5, 3))
+        # Qolgan 2 ta - 3 tasi ushlangan
+        with self.assertRaises(inventory.InsufficientStock):
+            inventory.reserve(market_payment(self.user), {self.aspirin.pk: 3})
+
+    def test_paid_payment_commits_stock(self):
+        payment = market_payment(self.user)
+        inventory.reserve(payment, {self.aspirin.pk: 3, self.analgin.pk: 1})
+
+        payment.mark_as_paid('payme-1')
+        self.assertEqual(self.stock(self.aspirin), (2, 0))
+        self.assertEqual(self.stock(self.analgin), (1, 0))
+        # Qayta save - ikki marta ayirilmaydi
+        payment.save()
+        self.assertEqual(self.stock(self.aspirin), (2, 0))
+
+    def test_failed_payment_releases_stock(self):
+        payment = market_payment(self.user)
+        inventory.reserve(payment, {self.aspirin.pk: 3})
+
+        payment.mark_as_failed('card declined')
+        self.assertEqual(self.stock(self.aspirin), (5, 0))
+        self.assertEqual(payment.stock_reservations.get().status, StockReservation.Status.RELEASED)
+
+    def test_expired_reservations_released(self):
+        pending = market_payment(self.user)
+        inventory.reserve(pending, {self.aspirin.pk: 2}, ttl=-1)
+        processing = market_payment(self.user)
+        inventory.reserve(processing, {self.aspirin.pk: 1}, ttl=-1)
+        Payment.objects.filter(pk=processing.pk).update(status='processing')
+
+        self.assertEqual(inventory.release_expired(), 1)
+        # Payme transaction yaratilgan checkout zaxirasi turadi
+        self.assertEqual(self.stock(self.aspirin), (5, 1))
+        pending.refresh_from_db()
+        self.assertEqual(pending.status, 'cancelled')
+
+        result = PaymeService.check_perform_transaction({'amount': 100000, 'account': {'order_id': str(pending.id)}})
+        self.assertEqual(result['error']['code'], PaymeService.ERROR_COULD_NOT_PERFORM)
+
+    def test_create_transaction_after_release_fails(self):
+        payment = market_payment(self.user)
+        inventory.reserve(payment, {self.aspirin.pk: 2}, ttl=-1)
+        account = {'order_id': str(payment.id)}
+
+        # CheckPerform o'tdi, keyin zaxira muddati tugab qaytarildi
+        result = PaymeService.check_perform_transaction({'amount': 100000, 'account': account})
+        self.assertTrue(result['result']['allow'])
+        self.assertEqual(inventory.release_expired(), 1)
+
+        result = PaymeService.create_transaction({'id': 'payme-1', 'time': 1, 'amount': 100000, 'account': account})
+        self.assertEqual(result['error']['code'], PaymeService.ERROR_COULD_NOT_PERFORM)
+        payment.refresh_from_db()
+        self.assertEqual(payment.status, 'cancelled')
+        self.assertEqual(self.stock(self.aspirin), (5, 0))
+
+    def test_create_transaction_requires_active_reservations(self):
+        payment = market_payment(self.user)
+        inventory.reserve(payment, {self.aspirin.pk: 2})
+        # Payment pending, lekin zaxira qaytarilgan
+        inventory.release(payment)
+
+        result = PaymeService.create_transaction(
+            {'id': 'payme-1', 'time': 1, 'amount': 100000, 'account': {'order_id': str(payment.id)}}
+        )
+        self.assertEqual(result['error']['code'], PaymeService.ERROR_COULD_NOT_PERFORM)
+        self.assertFalse(payment.transactions.exists())
+
+
+class InventoryStressTest(TransactionTestCase):
+    """Parallel checkout lar - ombordagidan ko'p sotilmaydi"""
+
+    def test_concurrent_reservations_never_oversell(self):
+        user = get_user_model().objects.create_user(phone='998901234567')
+        medicine = Medicine.objects.create(title='Aspirin', quantity=20)
+        payments = [market_payment(user) for _ in range(40)]
+        reserved, rejected = [], []
+
+        def checkout(payment):
+            try:
+                for attempt in range(50):
+                    try:
+                        inventory.reserve(payment, {medicine.pk: 1})
+                        reserved.append(payment.pk)
+                        return
+                    except inventory.InsufficientStock:
+                        rejected.append(payment.pk)
+                        return
+                    except OperationalError:
+                        # SQLite: "database table is locked" - qayta urinish
+                        time.sleep(0.01)
+                raise AssertionError('checkout never finished')
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=checkout, args=(payment,)) for payment in payments]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        medicine.refresh_from_db()
+        self.assertEqual(len(reserved), 20)
+        self.assertEqual(len(rejected), 20)
+        self.assertEqual(medicine.reserved, 20)
+        self.assertEqual(StockReservation.objects.filter(status=StockReservation.Status.ACTIVE).count(), 20)
+
+        # Yarmi to'landi, yarmi bekor - ombordagi qoldiq aniq
+        for pk in reserved[:10]:
+            Payment.objects.get(pk=pk).mark_as_paid()
+        for pk in reserved[10:]:
+            Payment.objects.get(pk=pk).cancel('timeout')
+        medicine.refresh_from_db()
+        self.assertEqual((medicine.quantity, medicine.reserved), (10, 0))
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class CheckoutTest(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(phone='998901234567')
+        self.medicines = Medicine.objects.bulk_create([
+            Medicine(title=f'Dori {i}', cost=10000 + i, discount=i % 3 * 10, quantity=5) for i in range(120)
+        ])
+        CartModel.objects.bulk_create([
+            CartModel(user=self.user, product=medicine, amount=2) for medicine in self.medicines
+        ])
+
+    def test_checkout_query_count_does_not_grow(self):
+        # 120 qator - 100+ bo'lsa ham 9 ta query (+ 5 savepoint/release)
+        with self.assertNumQueries(14):
+            order, payment = checkout.checkout(self.user)
+
+        items = {item.medicine_id: item for item in OrderItem.objects.filter(order=order)}
+        self.assertEqual(len(items), 120)
+        cart = CartModel(product=self.medicines[5], amount=2)
+        self.assertEqual(items[self.medicines[5].pk].total_price, decimal.Decimal(str(cart.total_price)))
+        self.assertEqual(order.price, sum(item.total_price for item in items.values()))
+
+        self.assertEqual(payment.amount, order.price)
+        self.assertEqual(payment.content_object, order)
+        self.assertEqual(payment.stock_reservations.count(), 120)
+        self.assertFalse(CartModel.objects.filter(user=self.user, status=CartModel.Status.ACTIVE).exists())
+        self.assertEqual(set(Medicine.objects.values_list('order_count', 'reserved')), {(1, 2)})
+
+    def test_api_returns_checkout_url(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        response = client.post('/api/shop/checkout/')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()['data']
+        self.assertIn('?amount=', data['checkout_url'])
+        self.assertEqual(Payment.objects.get(pk=data['payment_id']).object_id, data['order_id'])
+
+        # Savat bo'sh
+        self.assertEqual(client.post('/api/shop/checkout/').status_code, 400)
+
+        # Xuddi shu mahsulot yana savatga - eski DONE qator xalaqit bermaydi
+        CartModel.objects.create(user=self.user, product=self.medicines[0], amount=1)
+        self.assertEqual(client.post('/api/shop/checkout/').status_code, 200)
+
+    def test_insufficient_stock_keeps_cart(self):
+        Medicine.objects.filter(pk=self.medicines[0].pk).update(quantity=1)
+
+        with self.assertRaises(inventory.InsufficientStock):
+            checkout.checkout(self.user)
+
+        self.assertEqual(CartModel.objects.filter(status=CartModel.Status.ACTIVE).count(), 120)
+        self.assertFalse(Payment.objects.exists())
+        self.assertEqual(set(Medicine.objects.values_list('order_count', 'reserved')), {(0, 0)})
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class CartSummaryTest(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(phone='998901234567')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.medicines = Medicine.objects.bulk_create([
+            Medicine(title='Aspirin', cost=10001, discount=30, quantity=5),
+            Medicine(title='Analgin', cost=2500, quantity=5),
+            Medicine(title='Sovg\'a', cost=None, quantity=5),
+        ])
+        for amount, medicine in enumerate(self.medicines, start=1):
+            CartModel.objects.create(user=self.user, product=medicine, amount=amount)
+
+    def test_totals_match_checkout_prices(self):
+        with self.assertNumQueries(1):
+            items, summary = cart.items(self.user)
+
+        self.assertEqual(summary, cart.summary(self.user))
+        self.assertEqual(summary['count'], 3)
+        self.assertEqual(summary['items'], 6)
+        # 10001 * 1 + 2500 * 2 + 0 * 3, 30% chegirma faqat birinchisida
+        self.assertEqual(summary['subtotal'], decimal.Decimal('15001'))
+        self.assertEqual(summary['total'], decimal.Decimal('12000.70'))
+        self.assertEqual(summary['discount'], decimal.Decimal('3000.30'))
+        self.assertEqual(items[0]['unit_price'], decimal.Decimal('7000.70'))
+
+        order, _ = checkout.checkout(self.user)
+        self.assertEqual(order.price, summary['total'])
+        self.assertEqual(cart.items(self.user), ([], cart.summary(self.user)))
+
+    def test_etag_skips_unchanged_cart(self):
+        response = self.client.get('/api/shop/cart/?v=2')
+        data = response.json()['data']
+        self.assertEqual(len(data['items']), 3)
+        self.assertNotIn('pictures', data['items'][0])
+
+        etag = response['ETag']
+        self.assertEqual(self.client.get('/api/shop/cart/?v=2', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        expanded = self.client.get('/api/shop/cart/?v=2&expand=product')
+        self.assertNotEqual(expanded['ETag'], etag)
+        self.assertEqual(expanded.json()['data']['items'][0]['product']['title'], 'Aspirin')
+        self.assertEqual(expanded.json()['data']['summary'], data['summary'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.put('/api/shop/cart/', {'id': data['items'][0]['id'], 'amount': 3}, format='json')
+        response = self.client.get('/api/shop/cart/?v=2', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data']['summary']['items'], 8)
+
+    def test_default_response_is_list(self):
+        response = self.client.get('/api/shop/cart/')
+        data = response.json()['data']
+        self.assertIsInstance(data, list)
+        self.assertEqual([item['product']['title'] for item in data], ['Aspirin', 'Analgin', "Sovg'a"])
+        self.assertNotEqual(response['ETag'], self.client.get('/api/shop/cart/?v=2')['ETag'])
+
+    def test_price_change_changes_version(self):
+        etag = self.client.get('/api/shop/cart/?v=2')['ETag']
+
+        aspirin = self.medicines[0]
+        aspirin.cost = 20000
+        with self.captureOnCommitCallbacks(execute=True):
+            aspirin.save()
+
+        response = self.client.get('/api/shop/cart/?v=2', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data']['items'][0]['unit_price'], 14000)
\ No newline at end of file
@@ -1,6 +1,6 @@
 from django.urls import path, include, re_path
 from rest_framework import routers
-from .views import (MedicinesView, TypeMedicineView, MedicineRetrieveView, CartView,
+from .views import (AsyncMedicinesView, TypeMedicineView, MedicineRetrieveView, CartView, CheckoutView,
                 MedicineByTypeView, MedicineSearchAPIView, TypeMedicineSearchAPIView)
 
 router = routers.DefaultRouter()
@@ -11,11 +11,11 @@ urlpatterns = [
 
     # path('types/', TypeMedicineView.as_view()),
     # path('types/one/', GetMedicinesWithType.as_view()),
-    path('medicines/', MedicinesView.as_view()),
+    path('medicines/', AsyncMedicinesView.as_view()),
     path('medicines/type/<int:type_medicine_id>/', MedicineByTypeView.as_view()),
     path('medicines/<int:pk>/', MedicineRetrieveView.as_view()),
     path('cart/', CartView.as_view()),
-    # path('checkout/', OrderView.as_view()),
+    path('checkout/', CheckoutView.as_view()),
 
     path('medicines/search/', MedicineSearchAPIView.as_view()),
     path('types/search/', TypeMedicineSearchAPIView.as_view()),
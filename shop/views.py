@@ -8,10 +8,14 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from .filters import ProductFilter
+from config.aio import AsyncReadView, apaginate, paginated, run_sync
 from config.responses import ResponseSuccess
+from config.snapshots import SnapshotListMixin, not_modified, with_etag
 from .serializers import (TypeMedicineSerializer, MedicineSerializer, CartSerializer,
                           OrderStatusSerializer,
                           MedicineTypeSerializer, CartCreateUpdateSerializer, MedicineDetailSerializer)
+from . import checkout, snapshots
+from .cart import items as cart_items, summary as cart_summary, version as cart_version
 from .models import TypeMedicine, Medicine, CartModel
 from rest_framework import viewsets, generics, filters
 from drf_yasg.utils import swagger_auto_schema
@@ -21,8 +25,9 @@ from news.models import NewsModel
 from news.serializers import NewsModelSerializer
 
 
-class TypeMedicineView(viewsets.mixins.ListModelMixin, viewsets.GenericViewSet):
+class TypeMedicineView(SnapshotListMixin, viewsets.mixins.ListModelMixin, viewsets.GenericViewSet):
     queryset = TypeMedicine.objects.all()
+    snapshot = snapshots.medicine_types
     # permission_classes = (IsAuthenticated,)
     serializer_class = TypeMedicineSerializer
 
@@ -76,6 +81,24 @@ class MedicinesView(generics.ListAPIView):
         return context
 
 
+class AsyncMedicinesView(AsyncReadView):
+    """
+    MedicinesView ning async varianti (GET /api/shop/medicines/)
+
+    Cache yo'q - har bir list review counter ini oshiradi.
+    """
+
+    async def data(self, request):
+        view = MedicinesView(request=request, format_kwarg=None)
+        # filter + review UPDATE
+        queryset = await run_sync(view.get_queryset)
+        paginator, medicines = await apaginate(request, queryset)
+        return paginated(paginator, await run_sync(self.serialize, view, medicines))
+
+    def serialize(self, view, medicines):
+        # Thread da - serializer dagi lazy relation/query event loop ni bloklamasin
+        return MedicineSerializer(medicines, many=True, context=view.get_serializer_context()).data
+
 
 class MedicineRetrieveView(generics.RetrieveAPIView):
     serializer_class = MedicineDetailSerializer
@@ -133,15 +156,46 @@ class CartView(APIView):
 
     # GET CART
     def get(self, request):
-        carts = (
-            CartModel.objects
-            .filter(user=request.user, status=CartModel.Status.ACTIVE)
-            .select_related('product')
-        )
-        return ResponseSuccess(
-            data=CartSerializer(carts, many=True, context={"request": request}).data,
+        """
+        Savat (shop.cart - narxlar SQL da)
+
+        Default - avvalgidek CartSerializer ro'yxati (eski client lar uchun).
+        ?v=2 - {version, items, summary}, item lar lean;
+        ?v=2&expand=product - item lar to'liq MedicineSerializer bilan.
+        ETag = savat versiyasi: If-None-Match mos kelsa 304.
+        """
+        v2 = request.GET.get('v') == '2'
+        expand = not v2 or request.GET.get('expand') == 'product'
+        version = cart_version(request.user.id)
+        # Har ko'rinish - o'z ETag i
+        variant = ('v2.product' if expand else 'v2') if v2 else 'list'
+        tag = {'version': f'{version}.{variant}'} if version else None
+        if tag is not None:
+            response = not_modified(request, tag)
+            if response is not None:
+                return response
+
+        if expand:
+            carts = (
+                CartModel.objects
+                .filter(user=request.user, status=CartModel.Status.ACTIVE)
+                .select_related('product')
+                .prefetch_related('product__pictures')
+                .order_by('id')
+            )
+            items = CartSerializer(carts, many=True, context={"request": request}).data
+            if not v2:
+                response = ResponseSuccess(data=items, request=request.method)
+                return with_etag(response, tag) if tag is not None else response
+            summary = cart_summary(request.user)
+        else:
+            items, summary = cart_items(request.user, request)
+
+        response = ResponseSuccess(
+            data={'version': version, 'items': items, 'summary': summary},
             request=request.method
         )
+        return with_etag(response, tag) if tag is not None else response
 
     # ADD TO CART
     @transaction.atomic
@@ -203,7 +257,8 @@ class CartView(APIView):
         cart_id = request.data.get('id')
         user = request.user
 
-        qs = CartModel.objects.filter(user=user)
+        # DONE qatorlar - checkout tarixi, o'chirilmaydi
+        qs = CartModel.objects.filter(user=user, status=CartModel.Status.ACTIVE)
 
         if cart_id:
             deleted, _ = qs.filter(id=cart_id).delete()
@@ -238,6 +293,26 @@ class CartView(APIView):
 
 
 
+class CheckoutView(APIView):
+    """
+    Aktiv savatdan buyurtma + Payme to'lov havolasi
+
+    Mahsulot yetmasa 400 (available - nechta qolgani), savat o'zgarmaydi.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+        ip = x_forwarded_for.split(',')[0] if x_forwarded_for else request.META.get('REMOTE_ADDR')
+
+        order, payment = checkout.checkout(
+            request.user,
+            ip_address=ip,
+            user_agent=request.META.get('HTTP_USER_AGENT', ''),
+        )
+        return ResponseSuccess(data=checkout.checkout_response(order, payment), request=request.method)
+
+
 class MedicineSearchAPIView(generics.ListAPIView):
     queryset = Medicine.objects.filter(is_active=True)
     serializer_class = MedicineSerializer
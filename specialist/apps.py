@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class ConsultationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'specialist'
+
+    def ready(self):
+        from config import images
+        from .models import Doctor
+
+        images.register(Doctor, 'image', 'image_srcset')
+
+        from . import snapshots
@@ -1,6 +1,8 @@
 import datetime
 import requests
 
+from config.metrics import outbound
+
 from paymeuz.keywords import TELEGRAM_CONSULTATION_GROUP_ID, TG_SEND_MESSAGE
 from specialist.models import AdviceTime
 
@@ -18,11 +20,12 @@ def notify_doctors(advice_id: int, start_time: str, end_time: str) -> dict:
 
     message += f"<b>Uchrashuv vaqti</b>: {start_time} - {end_time}"
 
-    response = requests.post(TG_SEND_MESSAGE, dict({
-        "chat_id": TELEGRAM_CONSULTATION_GROUP_ID,
-        "parse_mode": "HTML",
-        "text": message
-    }))
+    with outbound('telegram'):
+        response = requests.post(TG_SEND_MESSAGE, dict({
+            "chat_id": TELEGRAM_CONSULTATION_GROUP_ID,
+            "parse_mode": "HTML",
+            "text": message
+        }))
     result = response.json()
 
     return result
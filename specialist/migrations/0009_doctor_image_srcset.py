@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('specialist', '0008_doctor_consultation_price'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='doctor',
+            name='image_srcset',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
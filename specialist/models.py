@@ -22,6 +22,7 @@ class Doctor(models.Model):
     )
 
     image = models.ImageField(upload_to='doctors/', default='defaults/doctor.jpg')
+    image_srcset = models.JSONField(default=dict, blank=True, editable=False)  # config.images
     full_name = models.CharField(max_length=255)
     experience = models.CharField(max_length=50)
     description = models.TextField(blank=True)
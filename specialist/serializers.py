@@ -1,7 +1,9 @@
 from django.db import IntegrityError
 from rest_framework import serializers
 
+from account.identity import IdentityListSerializer, IdentityMixin, get_profile
 from account.models import UserModel
+from config.images import SrcsetField
 from config.validators import normalize_phone
 from consultation.models import ConsultationRequest
 from .models import Doctor, TypeDoctor, RateDoctor, Advertising, AdviceTime, WorkSchedule, DoctorUnavailable, \
@@ -30,6 +32,7 @@ class RateInfoSerializer(serializers.ModelSerializer):
 
 class DoctorListSerializer(serializers.ModelSerializer):
     type_doctor = TypeDoctorSerializer(read_only=True)
+    image_srcset = SrcsetField()
     average_rating = serializers.SerializerMethodField()
     rating_count = serializers.SerializerMethodField()
     stars = serializers.SerializerMethodField()
@@ -37,7 +40,7 @@ class DoctorListSerializer(serializers.ModelSerializer):
     class Meta:
         model = Doctor
         fields = (
-            'id', 'full_name', 'image', 'experience',
+            'id', 'full_name', 'image', 'image_srcset', 'experience',
             'type_doctor', 'average_rating', 'rating_count', 'top', 'stars'
         )
 
@@ -63,6 +66,7 @@ class DoctorListSerializer(serializers.ModelSerializer):
 
 class DoctorDetailSerializer(serializers.ModelSerializer):
     type_doctor = TypeDoctorSerializer(read_only=True)
+    image_srcset = SrcsetField()
     average_rating = serializers.SerializerMethodField()
     rating_count = serializers.SerializerMethodField()
     stars = serializers.SerializerMethodField()
@@ -70,7 +74,7 @@ class DoctorDetailSerializer(serializers.ModelSerializer):
     class Meta:
         model = Doctor
         fields = (
-            'id', 'full_name', 'image', 'experience', 'consultation_price', 'description',
+            'id', 'full_name', 'image', 'image_srcset', 'experience', 'consultation_price', 'description',
             'type_doctor', 'average_rating', 'rating_count',
             'view_count', 'top', 'birthday', 'gender', 'stars'
         )
@@ -259,16 +263,30 @@ class GenderStatisticsSerializer(serializers.Serializer):
 # Doctor Consultation SERIALIZERS
 
 
-from rest_framework import serializers
-from specialist.models import Doctor
+def client_display_name(user):
+    """ClientProfile.full_name -> first_name + last_name -> 'Mijoz'"""
+    client_profile = get_profile(user, 'client_profile')
+    full_name = str(getattr(client_profile, 'full_name', '') or '').strip()
+    if full_name:
+        return full_name
+
+    first_name = str(user.first_name or '').strip()
+    last_name = str(user.last_name or '').strip()
+    if first_name and last_name:
+        return f"{first_name} {last_name}"
+    if first_name:
+        return first_name
+
+    return "Mijoz"
 
 
-class ConsultationDetailSerializer(serializers.ModelSerializer):
+class ConsultationDetailSerializer(IdentityMixin, serializers.ModelSerializer):
     """
     Doctor uchun batafsil konsultatsiya ma'lumoti
     """
+    identity_fields = ('client_id',)
 
-    client_id = serializers.IntegerField(source='client.id', read_only=True)
+    client_id = serializers.IntegerField(read_only=True)
     client_name = serializers.SerializerMethodField()
     client_phone = serializers.CharField(source='client.phone', read_only=True)
     client_avatar = serializers.SerializerMethodField()
@@ -283,6 +301,7 @@ class ConsultationDetailSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = ConsultationRequest
+        list_serializer_class = IdentityListSerializer
         fields = [
             'id',
             'client_id',
@@ -307,32 +326,12 @@ class ConsultationDetailSerializer(serializers.ModelSerializer):
 
     def get_client_name(self, obj):
         """Client nomi - ClientProfile.full_name dan"""
-        # ClientProfile.full_name
-        if hasattr(obj.client, 'client_profile'):
-            try:
-                client_profile = obj.client.client_profile
-                full_name = str(client_profile.full_name or '').strip()
-                if full_name:
-                    return full_name
-            except Exception:
-                pass
-
-        # UserModel: first_name + last_name
-        if hasattr(obj.client, 'first_name') and hasattr(obj.client, 'last_name'):
-            first_name = str(obj.client.first_name or '').strip()
-            last_name = str(obj.client.last_name or '').strip()
-
-            if first_name and last_name:
-                return f"{first_name} {last_name}"
-            if first_name:
-                return first_name
-
-        # Default
-        return "Mijoz"
+        return client_display_name(self.identity(obj.client_id))
 
     def get_client_avatar(self, obj):
-        if hasattr(obj.client, 'avatar') and obj.client.avatar:
-            avatar_url = obj.client.avatar.url
+        client = self.identity(obj.client_id)
+        if client.avatar:
+            avatar_url = client.avatar.url
 
             # Request dan avtomatik domain
             request = self.context.get('request')
@@ -355,10 +354,11 @@ class ConsultationDetailSerializer(serializers.ModelSerializer):
         return obj.status == 'paid'
 
 
-class ConsultationListSerializer(serializers.ModelSerializer):
+class ConsultationListSerializer(IdentityMixin, serializers.ModelSerializer):
     """
     Qisqa ma'lumot (list uchun)
     """
+    identity_fields = ('client_id',)
 
     client_name = serializers.SerializerMethodField()
     client_phone = serializers.CharField(source='client.phone', read_only=True)
@@ -367,6 +367,7 @@ class ConsultationListSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = ConsultationRequest
+        list_serializer_class = IdentityListSerializer
         fields = [
             'id',
             'client_name',
@@ -379,28 +380,7 @@ class ConsultationListSerializer(serializers.ModelSerializer):
 
     def get_client_name(self, obj):
         """Client nomi - ClientProfile.full_name dan"""
-        # ClientProfile.full_name
-        if hasattr(obj.client, 'client_profile'):
-            try:
-                client_profile = obj.client.client_profile
-                full_name = str(client_profile.full_name or '').strip()
-                if full_name:
-                    return full_name
-            except Exception:
-                pass
-
-        # UserModel: first_name + last_name
-        if hasattr(obj.client, 'first_name') and hasattr(obj.client, 'last_name'):
-            first_name = str(obj.client.first_name or '').strip()
-            last_name = str(obj.client.last_name or '').strip()
-
-            if first_name and last_name:
-                return f"{first_name} {last_name}"
-            if first_name:
-                return first_name
-
-        # Default
-        return "Mijoz"
+        return client_display_name(self.identity(obj.client_id))
 
     def get_date(self, obj):
         if obj.availability_slot:
@@ -0,0 +1,25 @@
+"""Ilova ochilganda so'raladigan ma'lumot (config/snapshots.py)"""
+from django.db.models import Count, Q
+
+from config.snapshots import SiteRequest, Snapshot
+
+from .models import Advertising, Doctor, TypeDoctor
+from .serializers import AdvertisingSerializer, TypeDoctorSerializer
+
+
+def build_doctor_types():
+    # Faqat tasdiqlangan doctorlar hisoblanadi
+    queryset = TypeDoctor.objects.annotate(
+        doctors_count=Count('doctor', filter=Q(doctor__is_verified=True))
+    ).order_by('id')
+    return TypeDoctorSerializer(queryset, many=True, context={'request': SiteRequest()}).data
+
+
+def build_advertising():
+    queryset = Advertising.objects.select_related('doctor').order_by('id')
+    return AdvertisingSerializer(queryset, many=True, context={'request': SiteRequest()}).data
+
+
+# doctors_count Doctor.is_verified ga bog'liq
+doctor_types = Snapshot('doctor_types', build_doctor_types, depends_on=[TypeDoctor, Doctor])
+advertising = Snapshot('doctor_advertising', build_advertising, depends_on=[Advertising])
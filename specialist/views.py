@@ -2,7 +2,7 @@ import datetime
 import pytz
 from django.db import transaction, models
 from django.db.utils import IntegrityError
-from django.db.models import Count, Avg, Prefetch
+from django.db.models import Count, Avg
 from django.utils import timezone
 from rest_framework import viewsets, status
 from rest_framework.decorators import action, api_view, permission_classes
@@ -15,8 +15,10 @@ from rest_framework.views import APIView
 from rest_framework import generics
 
 from account.models import SmsCode
-from client.models import ClientProfile
+from config.aio import AsyncReadView, apaginate, paginated, run_sync
+from config.snapshots import SnapshotListMixin
 from consultation.models import ConsultationRequest
+from . import snapshots
 from .permissions import IsDoctor
 from .serializers import TypeDoctorSerializer, AdvertisingSerializer, \
     GenderStatisticsSerializer, AdviceTimeSerializer, AvailableSlotSerializer, \
@@ -31,17 +33,19 @@ UserModel = get_user_model()
 utc = pytz.UTC
 
 
-class AdvertisingView(generics.ListAPIView):
+class AdvertisingView(SnapshotListMixin, generics.ListAPIView):
     serializer_class = AdvertisingSerializer
     pagination_class = api_settings.DEFAULT_PAGINATION_CLASS
+    snapshot = snapshots.advertising
 
     def get_queryset(self):
         return Advertising.objects.select_related('doctor')
 
 
-class TypeDoctorListAPI(generics.ListAPIView):
+class TypeDoctorListAPI(SnapshotListMixin, generics.ListAPIView):
     serializer_class = TypeDoctorSerializer
     permission_classes = [AllowAny]
+    snapshot = snapshots.doctor_types
 
     def get_queryset(self):
         # Faqat tasdiqlangan doctorlar hisoblanadi
@@ -181,6 +185,24 @@ class DoctorListAPI(generics.ListAPIView):
         return queryset
 
 
+class AsyncDoctorListAPI(AsyncReadView):
+    """
+    DoctorListAPI ning async varianti (GET /api/specialist/doctors/)
+
+    Javob user ga bog'liq emas - 30 soniya cache da, hit da thread ishlatilmaydi.
+    """
+    cache_timeout = 30
+
+    async def data(self, request):
+        queryset = DoctorListAPI(request=request).get_queryset().select_related('type_doctor')
+        paginator, doctors = await apaginate(request, queryset)
+        return paginated(paginator, await run_sync(self.serialize, request, doctors))
+
+    def serialize(self, request, doctors):
+        # Thread da - serializer dagi lazy relation/query event loop ni bloklamasin
+        return DoctorListSerializer(doctors, many=True, context={'request': request}).data
+
+
 # Doctor detalini olish
 class DoctorDetailAPI(generics.RetrieveAPIView):
     serializer_class = DoctorDetailSerializer
@@ -403,12 +425,7 @@ class DoctorConsultationViewSet(viewsets.ReadOnlyModelViewSet):
             'doctor',
             'availability_slot',
             'chat_room'
-        ).prefetch_related(
-            Prefetch(
-                'client__client_profile',
-                queryset=ClientProfile.objects.all()
-            )
-        ).order_by('-created_at')
+        ).order_by('-created_at')  # client_profile - IdentityLoader (serializer)
 
     @action(detail=False, methods=['get'])
     def new(self, request):
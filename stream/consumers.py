@@ -1,13 +1,15 @@
-import json
 from channels.generic.websocket import AsyncWebsocketConsumer
-from channels.db import database_sync_to_async
+from config.serving import database_sync_to_async
 from django.utils import timezone
 import logging
 
+from config.fastjson import FrameConsumerMixin, JSONDecodeError, frame_event, loads
+from config.metrics import InstrumentedConsumerMixin
+
 logger = logging.getLogger(__name__)
 
 
-class LiveStreamConsumer(AsyncWebsocketConsumer):
+class LiveStreamConsumer(InstrumentedConsumerMixin, FrameConsumerMixin, AsyncWebsocketConsumer):
     """
     WebSocket consumer for live streaming
 
@@ -99,7 +101,7 @@ class LiveStreamConsumer(AsyncWebsocketConsumer):
         - stream.reaction: Reaction
         """
         try:
-            data = json.loads(text_data)
+            data = loads(text_data)
             message_type = data.get('type')
 
             if message_type == 'stream.message':
@@ -111,7 +113,7 @@ class LiveStreamConsumer(AsyncWebsocketConsumer):
             else:
                 logger.warning(f"Unknown message type: {message_type}")
 
-        except json.JSONDecodeError:
+        except JSONDecodeError:
             logger.error("Invalid JSON received")
         except Exception as e:
             logger.error(f"Error handling message: {e}")
@@ -128,10 +130,10 @@ class LiveStreamConsumer(AsyncWebsocketConsumer):
         message_text = data.get('message', '').strip()
 
         if not message_text or len(message_text) > 500:
-            await self.send(text_data=json.dumps({
+            await self.send_frame({
                 'type': 'error',
                 'message': 'Invalid message length'
-            }))
+            })
             return
 
         # Check if chat enabled
@@ -139,10 +141,10 @@ class LiveStreamConsumer(AsyncWebsocketConsumer):
 
         # Faqat live stream va chat enabled bo'lsa davom etadi
         if not stream or not stream.chat_enabled or not stream.is_live:
-            await self.send(text_data=json.dumps({
+            await self.send_frame({
                 'type': 'error',
                 'message': 'Chat is disabled or stream ended'
-            }))
+            })
             return
 
         # Save message to database
@@ -152,9 +154,10 @@ class LiveStreamConsumer(AsyncWebsocketConsumer):
             return
 
         # Broadcast to all viewers in stream
+        # Frame bir marta encode qilinadi - har bir viewer uni o'zgarishsiz oladi
         await self.channel_layer.group_send(
             self.stream_group_name,
-            {
+            frame_event({
                 'type': 'stream_message',
                 'message_id': chat_message.id,
                 'message': chat_message.message,
@@ -165,7 +168,7 @@ class LiveStreamConsumer(AsyncWebsocketConsumer):
                     'avatar': self.user.avatar.url if self.user.avatar else None,
                 },
                 'created_at': chat_message.created_at.isoformat(),
-            }
+            })
         )
 
     async def handle_reaction(self, data):
@@ -188,53 +191,55 @@ class LiveStreamConsumer(AsyncWebsocketConsumer):
         # Broadcast reaction to all viewers
         await self.channel_layer.group_send(
             self.stream_group_name,
-            {
+            frame_event({
                 'type': 'stream_reaction',
                 'reaction_type': reaction_type,
                 'user_id': self.user.id,
-            }
+            })
         )
 
     # BROADCAST HANDLERS
+    # Yangi event lar frame_event (encoded_frame) orqali keladi; quyidagilar
+    # eski formatdagi event lar uchun qoldirilgan
     async def stream_message(self, event):
         """
         Broadcast chat message to client
         """
-        await self.send(text_data=json.dumps({
+        await self.send_frame({
             'type': 'stream_message',
             'message_id': event['message_id'],
             'message': event['message'],
             'user': event['user'],
             'created_at': event['created_at'],
-        }))
+        })
 
     async def stream_reaction(self, event):
         """
         Broadcast reaction to client
         """
-        await self.send(text_data=json.dumps({
+        await self.send_frame({
             'type': 'stream_reaction',
             'reaction_type': event['reaction_type'],
             'user_id': event['user_id'],
-        }))
+        })
 
     async def viewer_count_update(self, event):
         """
         Broadcast viewer count update
         """
-        await self.send(text_data=json.dumps({
+        await self.send_frame({
             'type': 'viewer_count',
             'count': event['count'],
-        }))
+        })
 
     async def stream_ended(self, event):
         """
         Notify that stream has ended
         """
-        await self.send(text_data=json.dumps({
+        await self.send_frame({
             'type': 'stream_ended',
             'duration': event.get('duration', 0),
-        }))
+        })
 
     # DATABASE OPERATIONS
     @database_sync_to_async
@@ -368,8 +373,8 @@ class LiveStreamConsumer(AsyncWebsocketConsumer):
 
         await self.channel_layer.group_send(
             self.stream_group_name,
-            {
-                'type': 'viewer_count_update',
+            frame_event({
+                'type': 'viewer_count',
                 'count': count,
-            }
+            })
         )
\ No newline at end of file
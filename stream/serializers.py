@@ -1,67 +1,19 @@
 from rest_framework import serializers
 from .models import LiveStream, StreamViewer, StreamChat, StreamReaction
-from account.models import UserModel
+from account.cards import UserCardSerializer
 
 
-class StreamUserMiniSerializer(serializers.ModelSerializer):
+class StreamUserMiniSerializer(UserCardSerializer):
     """
-    Minimal user info for streams
+    Minimal user info for streams (account.cards - chat/call bilan bir xil)
 
      Keys saqlanadi: first_name, last_name
      Value full_name dan olinadi
     """
-    avatar = serializers.SerializerMethodField()
-    first_name = serializers.SerializerMethodField()
-    last_name = serializers.SerializerMethodField()
 
-    class Meta:
-        model = UserModel
+    class Meta(UserCardSerializer.Meta):
         fields = ['id', 'phone', 'first_name', 'last_name', 'role', 'avatar']
 
-    def _get_user_full_name(self, user):
-        """
-        User ning to'liq ismini olish
-
-        Priority:
-        - Client: client_profile.full_name
-        - Doctor: doctor.full_name
-        - Fallback: phone
-        """
-        # Client
-        if hasattr(user, 'client_profile'):
-            try:
-                full_name = (user.client_profile.full_name or '').strip()
-                if full_name:
-                    return full_name
-            except:
-                pass
-
-        # Doctor
-        if hasattr(user, 'doctor'):
-            try:
-                full_name = (user.doctor.full_name or '').strip()
-                if full_name:
-                    return full_name
-            except:
-                pass
-
-        # Fallback
-        return user.phone or ''
-
-    def get_first_name(self, obj):
-        return self._get_user_full_name(obj)
-
-    def get_last_name(self, obj):
-        return ''
-
-    def get_avatar(self, obj):
-        """Avatar with absolute URL"""
-        if hasattr(obj, 'avatar') and obj.avatar:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.avatar.url)
-        return None
-
 
 class LiveStreamSerializer(serializers.ModelSerializer):
     """Complete stream serializer"""
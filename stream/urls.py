@@ -2,7 +2,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from rest_framework_nested import routers
-from .views import LiveStreamViewSet, StreamChatViewSet, StreamReactionViewSet
+from .views import AsyncLiveStreamsView, LiveStreamViewSet, StreamChatViewSet, StreamReactionViewSet
 
 # Main router
 router = DefaultRouter()
@@ -14,6 +14,7 @@ streams_router.register(r'chat', StreamChatViewSet, basename='stream-chat')
 streams_router.register(r'reactions', StreamReactionViewSet, basename='stream-reactions')
 
 urlpatterns = [
+    path('streams/live/', AsyncLiveStreamsView.as_view()),
     path('', include(router.urls)),
     path('', include(streams_router.urls)),
 ]
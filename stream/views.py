@@ -6,6 +6,8 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from account.cards import user_card
+from config.aio import AsyncReadView, run_sync
 from .models import StreamChat, StreamReaction
 from .serializers import StreamChatSerializer
 
@@ -23,31 +25,10 @@ def get_user_full_name(user):
     """
     User ning to'liq ismini olish (helper function)
 
-    Priority:
-    - Client: client_profile.full_name
-    - Doctor: doctor.full_name
-    - Fallback: phone
+    Priority: client_profile.full_name -> doctor.full_name -> phone
+    (account.cards - cache dagi user card, profil query siz)
     """
-    # Client
-    if hasattr(user, 'client_profile'):
-        try:
-            full_name = (user.client_profile.full_name or '').strip()
-            if full_name:
-                return full_name
-        except:
-            pass
-
-    # Doctor
-    if hasattr(user, 'doctor'):
-        try:
-            full_name = (user.doctor.full_name or '').strip()
-            if full_name:
-                return full_name
-        except:
-            pass
-
-    # Fallback
-    return user.phone or ''
+    return user_card(user.id)['full_name']
 
 
 class LiveStreamViewSet(viewsets.ModelViewSet):
@@ -300,16 +281,17 @@ class LiveStreamViewSet(viewsets.ModelViewSet):
         # Broadcast stream ended via WebSocket
         from channels.layers import get_channel_layer
         from asgiref.sync import async_to_sync
+        from config.fastjson import frame_event
 
         channel_layer = get_channel_layer()
         stream_group_name = f'stream_{stream.id}'
 
         async_to_sync(channel_layer.group_send)(
             stream_group_name,
-            {
+            frame_event({
                 'type': 'stream_ended',
                 'duration': stream.duration,
-            }
+            })
         )
 
         logger.info(f"Stream ended: {stream.id}, duration: {stream.duration}s")
@@ -496,6 +478,21 @@ class LiveStreamViewSet(viewsets.ModelViewSet):
         return False
 
 
+class AsyncLiveStreamsView(AsyncReadView):
+    """
+    LiveStreamViewSet.live ning async varianti (GET /api/stream/streams/live/)
+
+    Javob user ga bog'liq emas - auth dan keyin 5 soniyalik cache.
+    """
+    permission_classes = [IsAuthenticated]
+    cache_timeout = 5
+
+    async def data(self, request):
+        streams = LiveStream.objects.filter(status='live').select_related('host').order_by('-viewer_count')
+        # active_viewers - sync cache
+        return await run_sync(lambda: LiveStreamListSerializer(streams, many=True).data)
+
+
 class StreamChatViewSet(viewsets.ReadOnlyModelViewSet):
     """
     Stream Chat ViewSet - READ ONLY
@@ -3,6 +3,8 @@
 import logging
 from django.conf import settings
 
+from config.metrics import outbound
+
 logger = logging.getLogger(__name__)
 
 
@@ -106,7 +108,8 @@ class FCMNotification:
                         ),
                     )
 
-                    response = messaging.send(message)
+                    with outbound('fcm'):
+                        response = messaging.send(message)
                     logger.info(f"✅ FCM sent to device {device.id}: {response}")
                     success_count += 1
 